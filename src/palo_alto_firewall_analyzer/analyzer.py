@@ -0,0 +1,117 @@
+"""
+Library interface for running the validators from other Python code,
+without going through the pan_analyzer script and its output files.
+
+    from palo_alto_firewall_analyzer.analyzer import analyze, load_profilepackage
+
+    profilepackage = load_profilepackage('12345.xml')
+    for result in analyze(profilepackage, validators=['ShadowingRules'], device_groups=['my_dg']):
+        print(result.validator_name, result.device_group, result.text)
+
+Loading and indexing a configuration is usually the slowest step, so a
+ProfilePackage (or PanConfig) can be loaded once and passed to analyze()
+for any number of queries.
+"""
+
+import collections
+import contextlib
+import contextvars
+import dataclasses
+import logging
+import os
+import re
+
+from palo_alto_firewall_analyzer.core import ConfigurationSettings, ProfilePackage, ValidatorTimeout
+from palo_alto_firewall_analyzer.core import get_policy_validator, get_policy_validators, get_validator_timeout, validator_budget
+from palo_alto_firewall_analyzer.pan_config import PanConfig
+from palo_alto_firewall_analyzer.pan_helpers import build_profilepackage
+from palo_alto_firewall_analyzer.progress import progress_reporter
+
+logger = logging.getLogger(__name__)
+
+# A BadEntry, along with the name of the validator which reported it
+AnalyzerResult = collections.namedtuple('AnalyzerResult', ['validator_name', 'data', 'text', 'device_group', 'entry_type',
+                                                           'subject'], defaults=(None,))
+
+_API_RESPONSE_RE = re.compile(r'\s*(<\?xml[^>]*\?>\s*)?<response\b')
+
+
+def parse_config(xml_config):
+    """Parses either an 'Export Panorama configuration version' file's contents
+    or an API response with the configuration"""
+    if isinstance(xml_config, bytes):
+        xml_config = xml_config.decode('utf-8')
+    from_file = _API_RESPONSE_RE.match(xml_config) is None
+    return PanConfig(xml_config, from_file)
+
+
+def load_profilepackage(config_source, settings=None, api_key='', limit=None):
+    """
+    Loads and indexes a configuration, so that it can be reused across calls to analyze().
+
+    config_source: A ProfilePackage (returned as-is), a PanConfig, the XML configuration
+                   as a string or bytes, or the path to an XML configuration file.
+    settings: The [Analyzer] section of a config file (defaults to the default settings)
+    """
+    if isinstance(config_source, ProfilePackage):
+        return config_source
+    if settings is None:
+        settings = ConfigurationSettings().get_config()
+
+    if isinstance(config_source, PanConfig):
+        pan_config = config_source
+    elif isinstance(config_source, bytes) or (isinstance(config_source, str) and config_source.lstrip().startswith('<')):
+        pan_config = parse_config(config_source)
+    else:
+        with open(os.fspath(config_source), encoding='utf-8') as fh:
+            pan_config = parse_config(fh.read())
+    return build_profilepackage(settings, api_key, pan_config, limit=limit)
+
+
+def analyze(config_source, validators=None, device_groups=None, settings=None, api_key='',
+            validator_timeout=None, timed_out=None):
+    """
+    Runs validators against a configuration and lazily yields an AnalyzerResult for each problem.
+    Validators which are generators yield their problems as they're found, and the others
+    yield theirs once they complete.
+
+    config_source: Anything accepted by load_profilepackage(). Pass a ProfilePackage
+                   to avoid reloading the configuration.
+    validators: The names of the validators to run (defaults to all of them)
+    device_groups: The Device Groups to check (defaults to all of them)
+    validator_timeout: Time budget for each validator, in seconds
+    timed_out: If provided, a dict which is filled with the validators that ran
+               out of time, mapped to how far they got
+    """
+    profilepackage = load_profilepackage(config_source, settings, api_key)
+    if device_groups is not None:
+        # Only the list of Device Groups to check changes, so the indexes are shared
+        profilepackage = dataclasses.replace(profilepackage, device_groups=list(device_groups))
+
+    if validators is None:
+        selected_validators = list(get_policy_validators().values())
+    else:
+        selected_validators = [get_policy_validator(validator_name) for validator_name in validators]
+
+    for validator_name, _, validator_function in selected_validators:
+        timeout = get_validator_timeout(profilepackage.settings, validator_name, validator_timeout)
+        # The validator runs in its own context, so that its time budget and progress
+        # don't leak into the caller's code (or another analyze()) while this is suspended
+        context = contextvars.copy_context()
+        context_managers = contextlib.ExitStack()
+        context.run(context_managers.enter_context, validator_budget(timeout))
+        context.run(context_managers.enter_context, progress_reporter(validator_name))
+        try:
+            problem_entries = context.run(lambda: iter(validator_function(profilepackage)))
+            while True:
+                try:
+                    problem_entry = context.run(next, problem_entries)
+                except StopIteration:
+                    break
+                yield AnalyzerResult(validator_name, *problem_entry)
+        except ValidatorTimeout as err:
+            logger.warning(f"{validator_name} {err}. Its results are partial.")
+            if timed_out is not None:
+                timed_out[validator_name] = err.progress
+        finally:
+            context.run(context_managers.close)
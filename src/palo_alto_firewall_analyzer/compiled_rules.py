@@ -0,0 +1,230 @@
+"""
+Rules compiled into bitsets, so that finding every rule which covers another
+is a handful of bitwise ANDs instead of comparing it with each rule in turn.
+
+For each field of the transformed rules (zones, applications, users, and so
+on), every value is mapped to the set of rules containing it, as a bitset
+where bit i is rule i. The rules which contain all of a rule's values for a
+field are then the AND of those bitsets, and the rules covering it in every
+field are the AND across the fields. Python's integers are used as the
+bitsets, so each AND processes the whole rulebase in C, a machine word at a time.
+
+The same bitsets are an inverted index for the opposite question, which rules
+are covered by a rule: only the rules sharing a value with it in every field
+(or with no values) are candidates, so the work grows with how much the rules
+overlap, rather than with the square of the number of rules.
+
+The ranges of AddressSets and ServiceSets can't be enumerated as values.
+Instead, each rule is added to the bitsets of the buckets its ranges overlap
+(a /24, or /120 for IPv6, for addresses, and a destination port for services),
+so that only the rules which overlap the start of each of a rule's ranges need
+to have their ranges compared. Ranges spanning many buckets are kept in a
+separate bitset, which is always compared.
+"""
+
+from palo_alto_firewall_analyzer.intervals import MemberSet
+
+# Ranges overlapping more buckets than this are always compared, to bound the size of the index
+MAX_BUCKETS = 256
+# The number of bits iter_bits() finds one at a time, before finding the rest in the binary string
+DENSE_BITS = 64
+
+
+def covers(rule_values, other_values):
+    """Returns True if every field of rule_values is 'any' or a superset of other_values'.
+    The same check as shadowing_rules.is_shadowing(rule_values, other_values)."""
+    for field, values in rule_values.items():
+        if not ('any' in values or values >= other_values[field]):
+            return False
+    return True
+
+
+def iter_bits(bitset):
+    """Yields the positions of the set bits, from the lowest"""
+    # Clearing the lowest bit copies the whole bitset, so once there are
+    # many bits, the rest are found in its binary string instead
+    for _ in range(DENSE_BITS):
+        if not bitset:
+            return
+        lowest_bit = bitset & -bitset
+        yield lowest_bit.bit_length() - 1
+        bitset ^= lowest_bit
+    bits = bin(bitset)[:1:-1]
+    position = bits.find('1')
+    while position != -1:
+        yield position
+        position = bits.find('1', position + 1)
+
+
+class RuleMatrix:
+    """
+    transformed_rules: A list of (device group, rule type, rule name, rule entry, rule values),
+    as returned by shadowing_rules.transform_rules(). Each rule's values map the same fields
+    to frozensets of names, AddressSets or ServiceSets, where 'any' matches everything.
+    """
+
+    def __init__(self, transformed_rules):
+        self.rules = transformed_rules
+        self.all_rules = (1 << len(transformed_rules)) - 1
+        # field -> bitset of the rules containing 'any'
+        self._any_rules = {}
+        # field -> value -> bitset of the rules containing that value
+        self._value_rules = {}
+        # field -> bitset of the rules with no values for that field
+        self._empty_rules = {}
+        # field -> number of the lowest bits of its ranges ignored by the buckets
+        self._bucket_bits = {}
+        # field -> bucket -> bitset of the rules with a range overlapping that bucket
+        self._range_buckets = {}
+        # field -> bitset of the rules with a range overlapping too many buckets
+        self._wide_range_rules = {}
+        # field -> bitset of the rules with any ranges
+        self._range_rules = {}
+
+        for i, rule_tuple in enumerate(transformed_rules):
+            rule_bit = 1 << i
+            for field, values in rule_tuple[4].items():
+                if not values:
+                    self._empty_rules[field] = self._empty_rules.get(field, 0) | rule_bit
+                if isinstance(values, MemberSet):
+                    self._bucket_bits[field] = values.BUCKET_BITS
+                    self._add_ranges(field, values.intervals, rule_bit)
+                    values = values.names
+                value_rules = self._value_rules.setdefault(field, {})
+                for value in values:
+                    value_rules[value] = value_rules.get(value, 0) | rule_bit
+                if 'any' in values:
+                    self._any_rules[field] = self._any_rules.get(field, 0) | rule_bit
+
+    def _add_ranges(self, field, intervals, rule_bit):
+        range_buckets = self._range_buckets.setdefault(field, {})
+        self._wide_range_rules.setdefault(field, 0)
+        bucket_bits = self._bucket_bits[field]
+        if intervals:
+            self._range_rules[field] = self._range_rules.get(field, 0) | rule_bit
+        for start, end in intervals:
+            first_bucket, last_bucket = start >> bucket_bits, end >> bucket_bits
+            if last_bucket - first_bucket >= MAX_BUCKETS:
+                self._wide_range_rules[field] |= rule_bit
+                continue
+            for bucket in range(first_bucket, last_bucket + 1):
+                range_buckets[bucket] = range_buckets.get(bucket, 0) | rule_bit
+
+    def __len__(self):
+        return len(self.rules)
+
+    def find_covering_rules(self, rule_values, candidates=None):
+        """
+        Returns the bitset of the rules among the candidates (defaults to all of them) whose
+        values are a superset of rule_values in every field, i.e., which match all of its traffic.
+        The same as calling shadowing_rules.is_shadowing(rule, rule_values) for each rule.
+        Fields missing from rule_values aren't compared, so it can also find the rules matching a partial query.
+        """
+        covering = self.all_rules if candidates is None else candidates & self.all_rules
+        for field, values in rule_values.items():
+            if field not in self._value_rules:
+                # No rule has this field, so the rules can't be compared
+                return 0
+            names = values.names if isinstance(values, MemberSet) else values
+            value_rules = self._value_rules[field]
+            field_rules = covering
+            for value in names:
+                field_rules &= value_rules.get(value, 0)
+                if not field_rules:
+                    break
+            covering &= field_rules | self._any_rules.get(field, 0)
+            if not covering:
+                return 0
+
+        for field, range_buckets in self._range_buckets.items():
+            if field not in rule_values:
+                continue
+            intervals = rule_values[field].intervals
+            if not intervals:
+                continue
+            any_rules = self._any_rules.get(field, 0)
+            bucket_bits = self._bucket_bits[field]
+            # A covering rule must overlap the start of each range
+            overlapping = covering & ~any_rules
+            for start, _ in intervals:
+                overlapping &= range_buckets.get(start >> bucket_bits, 0) | self._wide_range_rules[field]
+                if not overlapping:
+                    break
+            covering &= overlapping | any_rules
+            for i in iter_bits(overlapping):
+                if not self.rules[i][4][field].intervals.issuperset(intervals):
+                    covering &= ~(1 << i)
+        return covering
+
+    def find_covered_rules(self, rule_values, candidates=None):
+        """
+        Returns the bitset of the rules among the candidates (defaults to all of them) whose values are
+        a subset of rule_values in every field, i.e., whose traffic is all matched by rule_values.
+        The same as calling covers(rule_values, rule) for each rule, but only the rules which share
+        a value with rule_values in every field (or have no values for it), and whose ranges overlap
+        its ranges, are compared.
+        """
+        covered = self.all_rules if candidates is None else candidates & self.all_rules
+        for field, values in rule_values.items():
+            if 'any' in values:
+                # Anything is covered by 'any'
+                continue
+            if isinstance(values, MemberSet):
+                # A covered rule's ranges are within rule_values', so they must overlap them
+                field_rules = self.all_rules & ~self._range_rules.get(field, 0)
+                if values.intervals:
+                    field_rules |= self._find_overlapping_ranges(field, values.intervals)
+                covered &= field_rules
+                if not covered:
+                    return 0
+                continue
+            value_rules = self._value_rules.get(field, {})
+            field_rules = self._empty_rules.get(field, 0)
+            for value in values:
+                field_rules |= value_rules.get(value, 0)
+            covered &= field_rules
+            if not covered:
+                return 0
+
+        for i in iter_bits(covered):
+            if not covers(rule_values, self.rules[i][4]):
+                covered &= ~(1 << i)
+        return covered
+
+    def find_overlapping_rules(self, rule_values, candidates=None):
+        """
+        Returns the bitset of the rules among the candidates (defaults to all of them) which may match
+        some of the same traffic as rule_values, as they share a value with it (or 'any') in every field.
+        Fields which rule_values leaves empty aren't compared. Ranges are only compared by the
+        buckets they overlap, so some of the rules may not actually overlap.
+        """
+        overlapping = self.all_rules if candidates is None else candidates & self.all_rules
+        for field, values in rule_values.items():
+            if not values:
+                continue
+            if 'any' in values:
+                overlapping &= ~self._empty_rules.get(field, 0)
+                continue
+            value_rules = self._value_rules.get(field, {})
+            field_rules = self._any_rules.get(field, 0)
+            names = values.names if isinstance(values, MemberSet) else values
+            for value in names:
+                field_rules |= value_rules.get(value, 0)
+            if isinstance(values, MemberSet) and values.intervals:
+                field_rules |= self._find_overlapping_ranges(field, values.intervals)
+            overlapping &= field_rules
+            if not overlapping:
+                return 0
+        return overlapping
+
+    def _find_overlapping_ranges(self, field, intervals):
+        range_buckets = self._range_buckets.get(field, {})
+        overlapping = self._wide_range_rules.get(field, 0)
+        bucket_bits = self._bucket_bits.get(field, 0)
+        for start, end in intervals:
+            first_bucket, last_bucket = start >> bucket_bits, end >> bucket_bits
+            if last_bucket - first_bucket >= MAX_BUCKETS:
+                return self._range_rules.get(field, 0)
+            for bucket in range(first_bucket, last_bucket + 1):
+                overlapping |= range_buckets.get(bucket, 0)
+        return overlapping
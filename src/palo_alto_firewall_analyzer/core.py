@@ -1,36 +1,185 @@
 import collections
 import configparser
+import contextlib
+import contextvars
 import dataclasses
 import functools
+import importlib
 import ipaddress
 import logging
 import os
 import socket
+import time
 import typing
 import xml.etree.ElementTree
 
-import xmltodict
-
-from palo_alto_firewall_analyzer.pan_config import PanConfig
+from palo_alto_firewall_analyzer.pan_config import PanConfig, element_cache
 
 logger = logging.getLogger(__name__)
 
+# Shorthands for declaring which parts of the configuration a validator reads
+SECURITY_POLICY_TYPES = ('SecurityPreRules', 'SecurityPostRules')
+NAT_POLICY_TYPES = ('NATPreRules', 'NATPostRules')
+ALL_POLICY_TYPES = tuple(PanConfig.SUPPORTED_POLICY_TYPES)
+
+# How a validator's runtime grows with the size of the configuration, from cheapest to most expensive
+COST_LINEAR = 'linear'
+COST_QUADRATIC = 'quadratic'
+COST_CLASSES = (COST_LINEAR, COST_QUADRATIC)
+
+# External resources which a validator may use
+RESOURCE_DNS = 'dns'
+RESOURCE_API = 'api'
+
 # A registry is used to auto-register the policy validators and fixers.
+# To keep startup fast, a module is only imported once one of its validators
+# or fixers is used. The built-in ones are listed in the validators and fixers
+# packages, and third-party plugins are found through their entry points.
+VALIDATOR_ENTRY_POINT_GROUP = 'pan_analyzer.validators'
+FIXER_ENTRY_POINT_GROUP = 'pan_analyzer.fixers'
+
 policy_validator_registry = {}
+# Additional details about each validator, keyed by the validator's name
+policy_validator_metadata = {}
 
 
-def register_policy_validator(readable_name, description):
+def register_policy_validator(readable_name, description, inputs=None, cost=None, resources=None):
+    """
+    inputs: The policy and object types (keys of PanConfig.SUPPORTED_POLICY_TYPES and
+    PanConfig.SUPPORTED_OBJECT_TYPES) that the validator reads. This is used to only re-run
+    the validators affected by a configuration change. None means it may read anything.
+    cost: One of COST_CLASSES. None means unknown, and is treated as the most expensive.
+    resources: The external resources (RESOURCE_DNS, RESOURCE_API) that the validator uses.
+    None means unknown, and is treated as using all of them.
+    """
+    if cost is not None and cost not in COST_CLASSES:
+        raise ValueError(f"Unknown cost '{cost}'! Must be one of {COST_CLASSES}")
     def inner_decorator(f):
         if readable_name in policy_validator_registry:
             raise KeyError(f"Name '{readable_name}' already in use!")
         policy_validator_registry[readable_name] = (readable_name, description, f)
+        if inputs is None:
+            validator_inputs = None
+        else:
+            validator_inputs = frozenset(inputs)
+        if resources is None:
+            validator_resources = None
+        else:
+            validator_resources = frozenset(resources)
+        policy_validator_metadata[readable_name] = {'inputs': validator_inputs,
+                                                    'cost': cost,
+                                                    'resources': validator_resources}
         return f
 
     return inner_decorator
 
 
+@functools.lru_cache(maxsize=None)
+def get_plugins(entry_point_group):
+    """Returns a mapping of name -> entry point for the installed plugins.
+    Each entry point is named after the validator or fixer it provides,
+    and refers to the module which registers it."""
+    try:
+        from importlib import metadata
+    except ImportError:
+        # Plugins are not supported before Python 3.8
+        return {}
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, 'select'):
+        group_entry_points = entry_points.select(group=entry_point_group)
+    else:
+        group_entry_points = entry_points.get(entry_point_group, [])
+    return {entry_point.name: entry_point for entry_point in group_entry_points}
+
+
+def _list_registry(registry, builtins, entry_point_group):
+    listing = {name: builtin[1] for name, builtin in builtins.items()}
+    for name, entry_point in get_plugins(entry_point_group).items():
+        listing.setdefault(name, f"Plugin from {entry_point.value}")
+    for name, (_, description, _) in registry.items():
+        listing.setdefault(name, description)
+    return listing
+
+
+def _load_registry_entry(registry, builtins, package, entry_point_group, name):
+    if name not in registry:
+        if name in builtins:
+            module_name = builtins[name][0]
+            importlib.import_module(f"{package}.{module_name}")
+        elif name in get_plugins(entry_point_group):
+            get_plugins(entry_point_group)[name].load()
+        if name not in registry:
+            raise KeyError(f"Unknown name '{name}'!")
+    return registry[name]
+
+
+def _load_registry(registry, builtins, package, entry_point_group):
+    for name in _list_registry(registry, builtins, entry_point_group):
+        _load_registry_entry(registry, builtins, package, entry_point_group, name)
+    # Keep the order stable, regardless of which modules were imported first
+    return {name: registry[name] for name in _list_registry(registry, builtins, entry_point_group)}
+
+
+def _get_builtin_validators():
+    from palo_alto_firewall_analyzer.validators import VALIDATORS
+    return VALIDATORS
+
+
+def list_policy_validators():
+    """Returns a mapping of validator name -> description, without importing the validators"""
+    return _list_registry(policy_validator_registry, _get_builtin_validators(), VALIDATOR_ENTRY_POINT_GROUP)
+
+
+def get_policy_validator(name):
+    """Returns the (name, description, function) of a single validator, only importing its module"""
+    return _load_registry_entry(policy_validator_registry, _get_builtin_validators(),
+                                'palo_alto_firewall_analyzer.validators', VALIDATOR_ENTRY_POINT_GROUP, name)
+
+
 def get_policy_validators():
-    return policy_validator_registry
+    return _load_registry(policy_validator_registry, _get_builtin_validators(),
+                          'palo_alto_firewall_analyzer.validators', VALIDATOR_ENTRY_POINT_GROUP)
+
+
+def get_policy_validator_metadata():
+    return policy_validator_metadata
+
+
+def get_validator_cost(validator_name):
+    """Returns the cost class and external resources of a validator. These are listed
+    for the built-in validators, so only plugins need to be imported to find them."""
+    builtins = _get_builtin_validators()
+    if validator_name in builtins:
+        _, _, cost, resources = builtins[validator_name]
+        return cost, frozenset(resources)
+    get_policy_validator(validator_name)
+    metadata = policy_validator_metadata[validator_name]
+    return metadata['cost'], metadata['resources']
+
+
+def is_validator_selected(validator_name, max_cost=None, allow_network=True):
+    """Determines if a validator fits within the max_cost class and, if allow_network
+    is False, doesn't use DNS or the API. Validators with an unknown cost or unknown
+    resources are only selected when there are no limits on them."""
+    cost, resources = get_validator_cost(validator_name)
+    if max_cost is not None:
+        if cost is None or COST_CLASSES.index(cost) > COST_CLASSES.index(max_cost):
+            return False
+    if not allow_network:
+        if resources is None or resources & {RESOURCE_DNS, RESOURCE_API}:
+            return False
+    return True
+
+
+def is_validator_affected(validator_name, changed_sections):
+    """Given the set of (device group, policy or object type) sections which changed,
+    determines if a validator needs to be re-run. A section type of None means
+    everything needs to be re-run, such as when the Device Group hierarchy changes."""
+    validator_inputs = policy_validator_metadata.get(validator_name, {}).get('inputs')
+    for _, section_type in changed_sections:
+        if section_type is None or validator_inputs is None or section_type in validator_inputs:
+            return True
+    return False
 
 
 policy_fixer_registry = {}
@@ -46,8 +195,91 @@ def register_policy_fixer(readable_name, description):
     return inner_decorator
 
 
+def _get_builtin_fixers():
+    from palo_alto_firewall_analyzer.fixers import FIXERS
+    return FIXERS
+
+
+def list_policy_fixers():
+    """Returns a mapping of fixer name -> description, without importing the fixers"""
+    return _list_registry(policy_fixer_registry, _get_builtin_fixers(), FIXER_ENTRY_POINT_GROUP)
+
+
+def get_policy_fixer(name):
+    """Returns the (name, description, function) of a single fixer, only importing its module"""
+    return _load_registry_entry(policy_fixer_registry, _get_builtin_fixers(),
+                                'palo_alto_firewall_analyzer.fixers', FIXER_ENTRY_POINT_GROUP, name)
+
+
 def get_policy_fixers():
-    return policy_fixer_registry
+    return _load_registry(policy_fixer_registry, _get_builtin_fixers(),
+                          'palo_alto_firewall_analyzer.fixers', FIXER_ENTRY_POINT_GROUP)
+
+
+class ValidatorTimeout(Exception):
+    """Raised at a validator's checkpoint once it has used up its time budget"""
+
+    def __init__(self, timeout, progress):
+        super().__init__(f"Timed out after {timeout} seconds while checking {progress}")
+        self.timeout = timeout
+        self.progress = progress
+
+
+class ValidatorBudget:
+    """
+    Tracks the time budget of a running validator and how far it got.
+    Cancellation is cooperative: validators call check_validator_budget()
+    at Device Group and rule granularity, which raises ValidatorTimeout
+    once the deadline has passed.
+    """
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        if timeout:
+            self.deadline = time.monotonic() + timeout
+        else:
+            self.deadline = None
+        self.progress = None
+
+    def check(self, progress):
+        self.progress = progress
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise ValidatorTimeout(self.timeout, progress)
+
+
+_current_validator_budget = contextvars.ContextVar('validator_budget', default=None)
+
+
+@contextlib.contextmanager
+def validator_budget(timeout):
+    """Context manager which applies a time budget (in seconds, None for no limit)
+    to the validator being run within it"""
+    budget = ValidatorBudget(timeout)
+    context_token = _current_validator_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_validator_budget.reset(context_token)
+
+
+def check_validator_budget(progress):
+    """Cancellation point for validators. progress describes what is currently
+    being checked, so a validator that times out can report how far it got."""
+    budget = _current_validator_budget.get()
+    if budget is not None:
+        budget.check(progress)
+
+
+def get_validator_timeout(settings, validator_name, default_timeout=None):
+    """Returns the time budget for a validator, in seconds. A per-validator budget
+    in the config file ('<Validator> timeout') takes precedence over default_timeout,
+    which in turn takes precedence over the config file's 'Validator timeout'"""
+    validator_timeout = settings.getfloat(f'{validator_name} timeout', fallback=None)
+    if validator_timeout is not None:
+        return validator_timeout
+    if default_timeout is not None:
+        return default_timeout
+    return settings.getfloat('Validator timeout', fallback=None)
 
 
 class ConfigurationSettings:
@@ -108,6 +340,14 @@ class ConfigurationSettings:
             self.local_config.set('Analyzer', '# UnconventionallyNamedServices: Specify a format for Service object names. Available fields are: {transport}, {source-port}, {port}, {override}')
             self.local_config.set('Analyzer', '# service name format = {transport}-{port}')
 
+            self.local_config.set('Analyzer', '# Stop validators which run longer than this many seconds and mark their results as partial')
+            self.local_config.set('Analyzer', '# Validator timeout = 3600')
+            self.local_config.set('Analyzer', '# A budget can also be set for a single validator, which takes precedence:')
+            self.local_config.set('Analyzer', '# ShadowingRules timeout = 7200')
+
+            self.local_config.set('Analyzer', '# UnionShadowingRules: Give up on a rule after subtracting this many parts of it, as rules overlapping many others can take exponential time')
+            self.local_config.set('Analyzer', '# Union shadowing work limit = 10000')
+
             self.local_config.set('Analyzer', '# EquivalentObjects: Whether to ignore the description field when comparing if two objects are equivalent (false by default)')
             self.local_config.set('Analyzer', 'Equivalent objects ignore description = false')
             self.local_config.set('Analyzer', 'Equivalent objects ignore tags = false')
@@ -141,7 +381,10 @@ class ProfilePackage:
     rule_limit_enabled: bool
 
 
-BadEntry = collections.namedtuple('BadEntry', ['data', 'text', 'device_group', 'entry_type'])
+# subject: Optional, for validators which can report several problems about the same rule or object,
+# such as its Source and Dest zones. It tells them apart, so that each one has its own problem ID.
+BadEntry = collections.namedtuple('BadEntry', ['data', 'text', 'device_group', 'entry_type', 'subject'],
+                                  defaults=(None,))
 
 
 @functools.lru_cache(maxsize=None)
@@ -177,14 +420,16 @@ def cached_fqdn_lookup(domain):
         return None
 
 
-@functools.lru_cache(maxsize=None)
+@element_cache
 def xml_object_to_dict(xml_obj):
+    # xmltodict is slow to import, so it's only imported once it's needed
+    import xmltodict
     obj_xml_string = xml.etree.ElementTree.tostring(xml_obj)
     obj_dict = xmltodict.parse(obj_xml_string)
     return obj_dict
 
 
-@functools.lru_cache(maxsize=None)
+@element_cache
 def get_single_ip_from_address(address_entry):
     """
     address_entry: Address object
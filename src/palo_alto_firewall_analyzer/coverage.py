@@ -0,0 +1,192 @@
+"""
+Whether a rule's traffic is all matched by a combination of earlier rules,
+rather than by a single broader rule.
+
+Each rule matches a hyper-rectangle of traffic: the product of its zones,
+addresses, users, applications, services, and so on. To check whether earlier
+rules cover a rule, each earlier rule is subtracted from the part of the rule
+which isn't covered yet. Subtracting a hyper-rectangle from another leaves at
+most one disjoint piece per field (the values outside the earlier rule's in
+that field, and inside it in the fields before), so the uncovered part is
+always a list of disjoint hyper-rectangles. The rule is covered once nothing
+is left, and the earlier rules which removed part of it form the cover.
+
+Values are compared the same way as for ShadowingRules: names only match the
+same name, and 'any' matches every name, including ones that aren't known.
+Addresses and services are intervals (see intervals.py), along with names for
+members which aren't IPs or ports. A field which a rule leaves empty is treated as matched by
+every earlier rule, as in shadowing_rules.is_shadowing().
+
+The number of pieces can grow exponentially with the number of overlapping
+rules, so the work per rule is bounded, and CoverageLimitExceeded is raised
+once it's used up.
+"""
+
+from palo_alto_firewall_analyzer.intervals import IntervalSet, MemberSet
+
+# The number of pieces subtracted from, per rule, before giving up
+DEFAULT_WORK_LIMIT = 10000
+
+
+class CoverageLimitExceeded(Exception):
+    """Raised when it can't be determined within the work limit whether a rule is covered"""
+
+
+class NameSet:
+    """A set of names which is either finite, or every name except a finite set of them (for 'any')"""
+    __slots__ = ('names', 'complement')
+
+    def __init__(self, names=frozenset(), complement=False):
+        self.names = frozenset(names)
+        self.complement = complement
+
+    @classmethod
+    def from_values(cls, values):
+        if 'any' in values:
+            return cls(complement=True)
+        return cls(values)
+
+    def intersection(self, other):
+        if self.complement and other.complement:
+            return NameSet(self.names | other.names, True)
+        if self.complement:
+            return NameSet(other.names - self.names)
+        if other.complement:
+            return NameSet(self.names - other.names)
+        return NameSet(self.names & other.names)
+
+    def difference(self, other):
+        if self.complement and other.complement:
+            return NameSet(other.names - self.names)
+        if self.complement:
+            return NameSet(self.names | other.names, True)
+        if other.complement:
+            return NameSet(self.names & other.names)
+        return NameSet(self.names - other.names)
+
+    def __bool__(self):
+        # There are always names which aren't excluded
+        return self.complement or bool(self.names)
+
+    def __repr__(self):
+        return f"NameSet({set(self.names)!r}, complement={self.complement})"
+
+
+class IntervalSpace:
+    """The intervals and names matched by a MemberSet, such as an AddressSet, where 'any' matches every value and name"""
+    __slots__ = ('intervals', 'names')
+
+    def __init__(self, intervals, names):
+        self.intervals = intervals
+        self.names = names
+
+    @classmethod
+    def from_member_set(cls, member_set):
+        if 'any' in member_set:
+            return cls(IntervalSet([(0, member_set.MAX_VALUE)]), NameSet(complement=True))
+        return cls(member_set.intervals, NameSet(member_set.names))
+
+    def intersection(self, other):
+        return IntervalSpace(self.intervals & other.intervals, self.names.intersection(other.names))
+
+    def difference(self, other):
+        return IntervalSpace(self.intervals - other.intervals, self.names.difference(other.names))
+
+    def __bool__(self):
+        return bool(self.intervals) or bool(self.names)
+
+    def __repr__(self):
+        return f"IntervalSpace({self.intervals!r}, {self.names!r})"
+
+
+def to_space(values):
+    """Converts a field of shadowing_rules.transform_rules()'s values to a set which supports subtraction"""
+    if isinstance(values, MemberSet):
+        return IntervalSpace.from_member_set(values)
+    return NameSet.from_values(values)
+
+
+def subtract(region, prior_region):
+    """
+    Returns the parts of region (a tuple of sets, one per field) outside prior_region, as disjoint regions.
+    Returns None if they don't overlap, so the region is unchanged.
+    """
+    intersections = []
+    for values, prior_values in zip(region, prior_region):
+        intersection = values.intersection(prior_values)
+        if not intersection:
+            return None
+        intersections.append(intersection)
+
+    pieces = []
+    for i, (values, prior_values) in enumerate(zip(region, prior_region)):
+        outside = values.difference(prior_values)
+        if outside:
+            pieces.append(tuple(intersections[:i]) + (outside,) + region[i + 1:])
+    return pieces
+
+
+class UnionCoverage:
+    """
+    transformed_rules: A list of (device group, rule type, rule name, rule entry, rule values),
+    as returned by shadowing_rules.transform_rules(). Each rule's fields are only converted
+    to sets once, however many rules it's compared with.
+    """
+
+    def __init__(self, transformed_rules, work_limit=DEFAULT_WORK_LIMIT):
+        self.rules = transformed_rules
+        self.work_limit = work_limit
+        self._spaces = {}
+
+    def _get_spaces(self, index):
+        if index not in self._spaces:
+            self._spaces[index] = {field: to_space(values) for field, values in self.rules[index][4].items()}
+        return self._spaces[index]
+
+    def find_cover(self, index, prior_indexes):
+        """
+        Returns the indexes of the rules among prior_indexes (in the order given) which together
+        cover rule index, or None if they don't. Rules are subtracted in the order given, so
+        only the rules which cover some part of the rule which isn't already covered are included.
+        Raises CoverageLimitExceeded if that can't be determined within the work limit.
+        """
+        rule_spaces = self._get_spaces(index)
+        # Intervals are the most expensive to intersect, so the other fields are compared first
+        fields = sorted((field for field, values in self.rules[index][4].items() if values),
+                        key=lambda field: isinstance(rule_spaces[field], IntervalSpace))
+        prior_regions = [(prior_index, tuple(self._get_spaces(prior_index)[field] for field in fields))
+                         for prior_index in prior_indexes]
+
+        # Each field must be covered on its own, which rules out most rules cheaply
+        for i, field in enumerate(fields):
+            uncovered = rule_spaces[field]
+            for _, prior_region in prior_regions:
+                uncovered = uncovered.difference(prior_region[i])
+                if not uncovered:
+                    break
+            if uncovered:
+                return None
+
+        remaining = [tuple(rule_spaces[field] for field in fields)]
+        cover = []
+        work = 0
+        for prior_index, prior_region in prior_regions:
+            overlapped = False
+            next_remaining = []
+            for region in remaining:
+                pieces = subtract(region, prior_region)
+                if pieces is None:
+                    next_remaining.append(region)
+                else:
+                    overlapped = True
+                    next_remaining += pieces
+            work += len(remaining)
+            if overlapped:
+                cover.append(prior_index)
+            remaining = next_remaining
+            if not remaining:
+                return cover
+            if work > self.work_limit:
+                raise CoverageLimitExceeded(f"Gave up on '{self.rules[index][2]}' after {work} subtractions, "
+                                            f"with {len(remaining)} parts of it left uncovered")
+        return None
@@ -1,10 +1,26 @@
-from . import consolidate_equivalent_objects
-from . import delete_disabled_policies
-from . import delete_unused_objects
-from . import disable_shadowed_rules
-from . import fix_bad_log_setting
-from . import fix_UnqualifiedFQDN
-from . import rename_unconventional_objects
-from . import remove_redundant_rule_addresses
-from . import remove_redundant_rule_services
-from . import replace_ips_with_resolving_fqdns
+"""
+The built-in fixers. As with the validators, a fixer's module is only imported
+once the fixer is used, so the names and descriptions are also listed here.
+"""
+
+# Mapping of fixer name -> (module, description)
+FIXERS = {
+    'ConsolidateServices': ('consolidate_equivalent_objects', 'Consolidate use of equivalent Service objects so only one object is used'),
+    'ConsolidateServiceGroups': ('consolidate_equivalent_objects', 'Consolidate use of equivalent ServiceGroup objects so only one object is used'),
+    'ConsolidateAddresses': ('consolidate_equivalent_objects', 'Consolidate use of equivalent Address objects so only one object is used'),
+    'ConsolidateAddressGroups': ('consolidate_equivalent_objects', 'Consolidate use of equivalent AddressGroup objects so only one object is used'),
+    'DeleteDisabledPolicies': ('delete_disabled_policies', 'Delete disabled policies'),
+    'DeleteUnusedAddresses': ('delete_unused_objects', "Delete Address objects that aren't in use"),
+    'DeleteUnusedAddressGroups': ('delete_unused_objects', "Delete AddressGroup objects that aren't in use"),
+    'DeleteUnusedServices': ('delete_unused_objects', "Delete Service objects that aren't in use"),
+    'DeleteUnusedServiceGroups': ('delete_unused_objects', "Delete Service Group objects that aren't in use"),
+    'DeleteUnusedObjects': ('delete_unused_objects', 'Convenience wrapper that calls DeleteUnusedAddressGroups, DeleteUnusedAddresses, DeleteUnusedServiceGroups, and DeleteUnusedServices'),
+    'DisableShadowedRules': ('disable_shadowed_rules', 'Disable shadowed rules'),
+    'FixBadLogSetting': ('fix_bad_log_setting', 'Fix bad log setting'),
+    'FixUnqualifiedFQDN': ('fix_UnqualifiedFQDN', 'Replace hostnames with FQDNs'),
+    'RenameUnconventionallyNamedServices': ('rename_unconventional_objects', 'Rename unconventional Services'),
+    'RenameUnconventionallyNamedAddresses': ('rename_unconventional_objects', 'Rename unconventional Addresses'),
+    'RemoveRedundantRuleAddresses': ('remove_redundant_rule_addresses', 'Remove redundant rule addresses'),
+    'RemoveRedundantRuleServices': ('remove_redundant_rule_services', 'Remove redundant rule services'),
+    'FixIPWithResolvingFQDN': ('replace_ips_with_resolving_fqdns', 'Replace IPs with FQDNs that resolve to them'),
+}
@@ -1,6 +1,6 @@
 import logging
 
-from palo_alto_firewall_analyzer.core import register_policy_fixer, get_policy_validators
+from palo_alto_firewall_analyzer.core import register_policy_fixer, get_policy_validator
 from palo_alto_firewall_analyzer import pan_api
 
 logger = logging.getLogger(__name__)
@@ -14,7 +14,7 @@ def consolidate_service_like_objects(profilepackage, object_friendly_type, valid
     logger.info("*"*80)
     logger.info(f"Checking for unused {object_friendly_type} objects to consolidate")
 
-    badentries_needing_consolidation = validator_function(profilepackage)
+    badentries_needing_consolidation = list(validator_function(profilepackage))
 
     if not badentries_needing_consolidation:
         return badentries_needing_consolidation
@@ -35,26 +35,26 @@ def consolidate_service_like_objects(profilepackage, object_friendly_type, valid
 @register_policy_fixer("ConsolidateServices", "Consolidate use of equivalent Service objects so only one object is used")
 def consolidate_services(profilepackage):
     object_friendly_type = "Service"
-    _, _, validator_function = get_policy_validators()['FindConsolidatableServices']
+    _, _, validator_function = get_policy_validator('FindConsolidatableServices')
     return consolidate_service_like_objects(profilepackage, object_friendly_type, validator_function)
 
 
 @register_policy_fixer("ConsolidateServiceGroups", "Consolidate use of equivalent ServiceGroup objects so only one object is used")
 def consolidate_servicegroups(profilepackage):
     object_friendly_type = "Service Group"
-    _, _, validator_function = get_policy_validators()['FindConsolidatableServiceGroups']
+    _, _, validator_function = get_policy_validator('FindConsolidatableServiceGroups')
     return consolidate_service_like_objects(profilepackage, object_friendly_type, validator_function)
 
 
 @register_policy_fixer("ConsolidateAddresses", "Consolidate use of equivalent Address objects so only one object is used")
 def consolidate_addresses(profilepackage):
     object_friendly_type = "Address"
-    _, _, validator_function = get_policy_validators()['FindConsolidatableAddresses']
+    _, _, validator_function = get_policy_validator('FindConsolidatableAddresses')
     return consolidate_service_like_objects(profilepackage, object_friendly_type, validator_function)
 
 
 @register_policy_fixer("ConsolidateAddressGroups", "Consolidate use of equivalent AddressGroup objects so only one object is used")
 def consolidate_addressgroups(profilepackage):
     object_friendly_type = "Address Group"
-    _, _, validator_function = get_policy_validators()['FindConsolidatableAddressGroups']
+    _, _, validator_function = get_policy_validator('FindConsolidatableAddressGroups')
     return consolidate_service_like_objects(profilepackage, object_friendly_type, validator_function)
\ No newline at end of file
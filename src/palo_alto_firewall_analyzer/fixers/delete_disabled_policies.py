@@ -2,7 +2,7 @@ import logging
 
 import requests
 
-from palo_alto_firewall_analyzer.core import register_policy_fixer, get_policy_validators
+from palo_alto_firewall_analyzer.core import register_policy_fixer, get_policy_validator
 from palo_alto_firewall_analyzer import pan_api
 
 logger = logging.getLogger(__name__)
@@ -14,8 +14,8 @@ def delete_disabled_policies(profilepackage):
     pan_config = profilepackage.pan_config
     version = pan_config.get_major_version()
 
-    _, _, validator_function = get_policy_validators()['DisabledPolicies']
-    policies_to_delete = validator_function(profilepackage)
+    _, _, validator_function = get_policy_validator('DisabledPolicies')
+    policies_to_delete = list(validator_function(profilepackage))
     if policies_to_delete:
         logger.info (f"Deleting {len(policies_to_delete)} disabled policies now")
         for policy_entry in policies_to_delete:
@@ -2,7 +2,7 @@ import logging
 
 import requests
 
-from palo_alto_firewall_analyzer.core import register_policy_fixer, get_policy_validators
+from palo_alto_firewall_analyzer.core import register_policy_fixer, get_policy_validator
 from palo_alto_firewall_analyzer import pan_api
 
 logger = logging.getLogger(__name__)
@@ -16,7 +16,7 @@ def delete_unused_object(profilepackage, object_type, object_friendly_type, vali
     logger.info("*" * 80)
     logger.info(f"Checking for unused {object_friendly_type} objects to delete")
 
-    results_to_delete = validator_function(profilepackage)
+    results_to_delete = list(validator_function(profilepackage))
 
     if not results_to_delete:
         logger.info(f"There were no {object_friendly_type} to delete")
@@ -40,7 +40,7 @@ def delete_unused_object(profilepackage, object_type, object_friendly_type, vali
 def delete_unused_addresses(profilepackage):
     object_type = "Addresses"
     object_friendly_type = "Address"
-    _, _, validator_function = get_policy_validators()['UnusedAddresses']
+    _, _, validator_function = get_policy_validator('UnusedAddresses')
     return delete_unused_object(profilepackage, object_type, object_friendly_type, validator_function)
 
 
@@ -48,7 +48,7 @@ def delete_unused_addresses(profilepackage):
 def delete_unused_addressgroups(profilepackage):
     object_type = "AddressGroups"
     object_friendly_type = "Address Group"
-    _, _, validator_function = get_policy_validators()['UnusedAddressGroups']
+    _, _, validator_function = get_policy_validator('UnusedAddressGroups')
     return delete_unused_object(profilepackage, object_type, object_friendly_type, validator_function)
 
 
@@ -56,7 +56,7 @@ def delete_unused_addressgroups(profilepackage):
 def delete_unused_services(profilepackage):
     object_type = "Services"
     object_friendly_type = "Service"
-    _, _, validator_function = get_policy_validators()['UnusedServices']
+    _, _, validator_function = get_policy_validator('UnusedServices')
     return delete_unused_object(profilepackage, object_type, object_friendly_type, validator_function)
 
 
@@ -64,7 +64,7 @@ def delete_unused_services(profilepackage):
 def delete_unused_servicegroups(profilepackage):
     object_type = "ServiceGroups"
     object_friendly_type = "Service Groups"
-    _, _, validator_function = get_policy_validators()['UnusedServiceGroups']
+    _, _, validator_function = get_policy_validator('UnusedServiceGroups')
     return delete_unused_object(profilepackage, object_type, object_friendly_type, validator_function)
 
 
@@ -1,6 +1,6 @@
 import logging
 
-from palo_alto_firewall_analyzer.core import register_policy_fixer, get_policy_validators, xml_object_to_dict
+from palo_alto_firewall_analyzer.core import register_policy_fixer, get_policy_validator, xml_object_to_dict
 from palo_alto_firewall_analyzer import pan_api
 
 logger = logging.getLogger(__name__)
@@ -12,11 +12,11 @@ def remove_redundant_rule_services(profilepackage):
     pan_config = profilepackage.pan_config
     version = pan_config.get_major_version()
 
-    _, _, validator_function = get_policy_validators()['RedundantRuleServices']
+    _, _, validator_function = get_policy_validator('RedundantRuleServices')
     logger.info("*"*80)
     logger.info("Checking for redundant rule services")
 
-    rules_to_update = validator_function(profilepackage)
+    rules_to_update = list(validator_function(profilepackage))
 
     logger.info(f"Replacing the contents of {len(rules_to_update)} Policies")
     for badentry in rules_to_update:
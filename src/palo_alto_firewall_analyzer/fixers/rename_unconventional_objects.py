@@ -2,7 +2,7 @@ import logging
 
 import requests
 
-from palo_alto_firewall_analyzer.core import register_policy_fixer, get_policy_validators
+from palo_alto_firewall_analyzer.core import register_policy_fixer, get_policy_validator
 from palo_alto_firewall_analyzer import pan_api
 
 logger = logging.getLogger(__name__)
@@ -13,8 +13,8 @@ def rename_unconventional_object(profilepackage, validator_name, object_type, ob
     pan_config = profilepackage.pan_config
     version = pan_config.get_major_version()
 
-    _, _, validator_function = get_policy_validators()[validator_name]
-    objects_to_rename = validator_function(profilepackage)
+    _, _, validator_function = get_policy_validator(validator_name)
+    objects_to_rename = list(validator_function(profilepackage))
     if not objects_to_rename:
         return objects_to_rename
 
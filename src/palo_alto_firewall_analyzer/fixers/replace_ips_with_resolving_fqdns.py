@@ -1,6 +1,6 @@
 import logging
 
-from palo_alto_firewall_analyzer.core import register_policy_fixer, get_policy_validators, xml_object_to_dict
+from palo_alto_firewall_analyzer.core import register_policy_fixer, get_policy_validator, xml_object_to_dict
 from palo_alto_firewall_analyzer import pan_api
 
 logger = logging.getLogger(__name__)
@@ -12,8 +12,8 @@ def fix_bad_log_setting(profilepackage):
     pan_config = profilepackage.pan_config
     version = pan_config.get_major_version()
 
-    _, _, validator = get_policy_validators()['IPWithResolvingFQDN']
-    problems = validator(profilepackage)
+    _, _, validator = get_policy_validator('IPWithResolvingFQDN')
+    problems = list(validator(profilepackage))
 
     for problem in problems:
         object_type = problem.entry_type
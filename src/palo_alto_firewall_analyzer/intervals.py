@@ -0,0 +1,288 @@
+"""
+Sets of IP addresses as sorted, merged intervals of integers, so that checking
+whether one set of addresses contains another compares ranges instead of names.
+For example, 10.0.0.0/24 contains both 10.0.0.5 and an address object named
+'web' with the value 10.0.0.80.
+
+IPv6 addresses are the integers below 2**128, and IPv4 addresses are mapped to
+the 2**32 integers above them, so that IPv4 and IPv6 addresses can be mixed within
+a set without overlapping: ::/0 doesn't contain 10.0.0.0/8, but 'any' contains both.
+
+Services are sets of (protocol, destination port, source port) triples, each
+encoded as a single integer with the source port in the lowest bits, so that a
+service which allows any source port is one interval per destination port range.
+For example, tcp-1-65535 contains both tcp-443 and a service group of tcp-80 and
+tcp-8080.
+"""
+
+import bisect
+import ipaddress
+
+IPV4_OFFSET = 2 ** 128
+MAX_ADDRESS = IPV4_OFFSET + 2 ** 32 - 1
+
+SERVICE_PROTOCOLS = ('tcp', 'udp', 'sctp')
+MAX_PORT = 65535
+MAX_SERVICE = (len(SERVICE_PROTOCOLS) << 32) - 1
+# Services limited to some source ports need an interval per destination port,
+# so ones with more than this many are only matched by name
+MAX_SOURCE_PORT_INTERVALS = 1024
+
+
+class IntervalSet:
+    """An immutable set of integers, stored as sorted, non-overlapping and non-adjacent (start, end) intervals,
+    where end is inclusive. Checking if it contains another set takes O(m log n) for m and n intervals."""
+    __slots__ = ('intervals', '_starts')
+
+    def __init__(self, intervals=()):
+        merged = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1] + 1:
+                if end > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        self.intervals = tuple(merged)
+        self._starts = tuple(start for start, _ in merged)
+
+    def issuperset(self, other):
+        intervals = self.intervals
+        for start, end in other.intervals:
+            # As the intervals are merged, one of other's intervals must be within a single interval
+            i = bisect.bisect_right(self._starts, start) - 1
+            if i < 0 or intervals[i][1] < end:
+                return False
+        return True
+
+    def issubset(self, other):
+        return other.issuperset(self)
+
+    def union(self, other):
+        return IntervalSet(self.intervals + other.intervals)
+
+    def intersection(self, other):
+        output = []
+        i = j = 0
+        while i < len(self.intervals) and j < len(other.intervals):
+            start = max(self.intervals[i][0], other.intervals[j][0])
+            end = min(self.intervals[i][1], other.intervals[j][1])
+            if start <= end:
+                output.append((start, end))
+            # Move past whichever interval ends first
+            if self.intervals[i][1] < other.intervals[j][1]:
+                i += 1
+            else:
+                j += 1
+        return IntervalSet(output)
+
+    def difference(self, other):
+        output = []
+        j = 0
+        for start, end in self.intervals:
+            # Skip other's intervals which end before this one
+            while j < len(other.intervals) and other.intervals[j][1] < start:
+                j += 1
+            k = j
+            while k < len(other.intervals) and other.intervals[k][0] <= end:
+                other_start, other_end = other.intervals[k]
+                if other_start > start:
+                    output.append((start, other_start - 1))
+                start = other_end + 1
+                if start > end:
+                    break
+                k += 1
+            if start <= end:
+                output.append((start, end))
+        return IntervalSet(output)
+
+    def __ge__(self, other):
+        return self.issuperset(other)
+
+    def __le__(self, other):
+        return self.issubset(other)
+
+    def __or__(self, other):
+        return self.union(other)
+
+    def __and__(self, other):
+        return self.intersection(other)
+
+    def __sub__(self, other):
+        return self.difference(other)
+
+    def __contains__(self, value):
+        i = bisect.bisect_right(self._starts, value) - 1
+        return i >= 0 and self.intervals[i][1] >= value
+
+    def __iter__(self):
+        return iter(self.intervals)
+
+    def __bool__(self):
+        return bool(self.intervals)
+
+    def __eq__(self, other):
+        return isinstance(other, IntervalSet) and self.intervals == other.intervals
+
+    def __hash__(self):
+        return hash(self.intervals)
+
+    def __repr__(self):
+        return f"IntervalSet({list(self.intervals)})"
+
+
+def _address_to_int(address):
+    if address.version == 4:
+        return IPV4_OFFSET + int(address)
+    return int(address)
+
+
+def parse_address(value):
+    """
+    Converts an IP address, a CIDR network, or a range (e.g., 10.0.0.1-10.0.0.9) to a (start, end) interval.
+    Returns None for anything else, such as FQDNs and wildcard masks.
+    """
+    try:
+        if '-' in value:
+            first, last = (ipaddress.ip_address(address.strip()) for address in value.split('-', 1))
+            # A range can't span both IPv4 and IPv6 addresses
+            if first.version != last.version or first > last:
+                return None
+            return _address_to_int(first), _address_to_int(last)
+        network = ipaddress.ip_network(value.strip(), strict=False)
+    except ValueError:
+        return None
+    return _address_to_int(network.network_address), _address_to_int(network.broadcast_address)
+
+
+def parse_ports(value):
+    """
+    Converts a comma-separated list of ports and port ranges (e.g., 80,8080-8090) to a list of (start, end) intervals.
+    Returns None if any of them aren't valid ports.
+    """
+    intervals = []
+    for port_range in value.split(','):
+        first, separator, last = port_range.strip().partition('-')
+        if not separator:
+            last = first
+        if not first.isdigit() or not last.isdigit():
+            return None
+        start, end = int(first), int(last)
+        if start > end or end > MAX_PORT:
+            return None
+        intervals.append((start, end))
+    return intervals
+
+
+def get_service_intervals(protocol, ports, source_ports=None):
+    """
+    Converts a service's destination ports and source ports (as returned by parse_ports(),
+    where None means any source port) to intervals of encoded (protocol, destination port, source port).
+    Returns None if the protocol isn't supported, or the source ports would need too many intervals.
+    """
+    if protocol not in SERVICE_PROTOCOLS:
+        return None
+    protocol_offset = SERVICE_PROTOCOLS.index(protocol) << 32
+    if source_ports is None or source_ports == [(0, MAX_PORT)]:
+        return [(protocol_offset + (start << 16), protocol_offset + (end << 16) + MAX_PORT) for start, end in ports]
+    if sum(end - start + 1 for start, end in ports) * len(source_ports) > MAX_SOURCE_PORT_INTERVALS:
+        return None
+    return [(protocol_offset + (port << 16) + source_start, protocol_offset + (port << 16) + source_end)
+            for start, end in ports for port in range(start, end + 1) for source_start, source_end in source_ports]
+
+
+class MemberSet:
+    """
+    The members of a rule's field, such as its sources or services. Members which resolve to intervals
+    are merged into an IntervalSet, and the others (including 'any') are kept as names, which can only
+    be matched by the same name. Subclasses set the largest value (which 'any' extends to), and how many
+    of the lowest bits RuleMatrix ignores when indexing the intervals.
+    """
+    __slots__ = ('intervals', 'names')
+    MAX_VALUE = None
+    BUCKET_BITS = None
+
+    def __init__(self, intervals=None, names=frozenset()):
+        self.intervals = intervals if intervals is not None else IntervalSet()
+        self.names = frozenset(names)
+
+    def issuperset(self, other):
+        return self.names >= other.names and self.intervals >= other.intervals
+
+    def __ge__(self, other):
+        return self.issuperset(other)
+
+    def __le__(self, other):
+        return other.issuperset(self)
+
+    def __contains__(self, name):
+        # So that a MemberSet can be checked for 'any', like the frozensets of names used for other fields
+        return name in self.names
+
+    def __bool__(self):
+        return bool(self.intervals) or bool(self.names)
+
+    def __eq__(self, other):
+        return type(other) is type(self) and self.intervals == other.intervals and self.names == other.names
+
+    def __hash__(self):
+        return hash((self.intervals, self.names))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.intervals!r}, {set(self.names)!r})"
+
+
+class AddressSet(MemberSet):
+    """
+    The addresses matched by a rule's sources or destinations. The names are FQDNs, regions,
+    External Dynamic Lists, dynamic address groups, and 'any'.
+    """
+    __slots__ = ()
+    MAX_VALUE = MAX_ADDRESS
+    # A /24 for IPv4 addresses
+    BUCKET_BITS = 8
+
+    @classmethod
+    def from_members(cls, members, address_intervals=None):
+        """address_intervals maps the names of address objects to their (start, end) interval,
+        or None if their value isn't an IP address"""
+        if address_intervals is None:
+            address_intervals = {}
+        intervals = []
+        names = set()
+        for member in members:
+            if member in address_intervals:
+                interval = address_intervals[member]
+            else:
+                interval = parse_address(member)
+            if interval is None:
+                names.add(member)
+            else:
+                intervals.append(interval)
+        return cls(IntervalSet(intervals), names)
+
+
+class ServiceSet(MemberSet):
+    """
+    The services matched by a rule. The names are 'application-default', 'any',
+    and services which can't be converted to intervals.
+    """
+    __slots__ = ()
+    MAX_VALUE = MAX_SERVICE
+    # A single destination port
+    BUCKET_BITS = 16
+
+    @classmethod
+    def from_members(cls, members, service_intervals=None):
+        """service_intervals maps the names of services to a list of their intervals,
+        as returned by get_service_intervals(), or None if they can't be converted"""
+        if service_intervals is None:
+            service_intervals = {}
+        intervals = []
+        names = set()
+        for member in members:
+            member_intervals = service_intervals.get(member)
+            if member_intervals is None:
+                names.add(member)
+            else:
+                intervals += member_intervals
+        return cls(IntervalSet(intervals), names)
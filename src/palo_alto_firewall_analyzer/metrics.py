@@ -0,0 +1,154 @@
+"""
+Collects metrics about an analyzer run and writes them to a file in the
+OpenMetrics text format. The file is meant to be picked up by a
+node-exporter textfile collector, so no network service is required.
+
+Metrics are kept in a module-level registry, in the same way that
+validators and fixers are registered in core.py.
+"""
+
+import collections
+import contextlib
+import math
+import os
+import tempfile
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600)
+
+# Mapping of metric family name -> (type, help text)
+_metric_families = {}
+# Mapping of metric family name -> {label tuple -> value}
+_counters = collections.defaultdict(dict)
+_gauges = collections.defaultdict(dict)
+# Mapping of metric family name -> {label tuple -> [bucket counts, sum, count]}
+_histograms = collections.defaultdict(dict)
+_histogram_buckets = {}
+
+
+def _labels_key(labels):
+    if not labels:
+        return ()
+    return tuple(sorted(labels.items()))
+
+
+def _register_family(name, metric_type, help_text):
+    if name not in _metric_families:
+        _metric_families[name] = (metric_type, help_text)
+    elif _metric_families[name][0] != metric_type:
+        raise KeyError(f"Metric '{name}' is already registered as a {_metric_families[name][0]}!")
+
+
+def inc_counter(name, help_text, labels=None, amount=1):
+    _register_family(name, 'counter', help_text)
+    key = _labels_key(labels)
+    _counters[name][key] = _counters[name].get(key, 0) + amount
+
+
+def set_counter(name, help_text, labels=None, value=0):
+    """For counters which are tracked elsewhere, such as the hits of an lru_cache"""
+    _register_family(name, 'counter', help_text)
+    _counters[name][_labels_key(labels)] = value
+
+
+def set_gauge(name, help_text, labels=None, value=0):
+    _register_family(name, 'gauge', help_text)
+    _gauges[name][_labels_key(labels)] = value
+
+
+def remove_gauges(name, labels=None):
+    """Removes the values of a gauge whose labels include all of labels, so that
+    the label values which are no longer set, such as an old Device Group, aren't exported"""
+    labels_items = set(_labels_key(labels))
+    for key in list(_gauges.get(name, {})):
+        if labels_items.issubset(key):
+            del _gauges[name][key]
+
+
+def observe(name, help_text, labels=None, value=0, buckets=DEFAULT_BUCKETS):
+    _register_family(name, 'histogram', help_text)
+    _histogram_buckets.setdefault(name, tuple(buckets))
+    key = _labels_key(labels)
+    if key not in _histograms[name]:
+        _histograms[name][key] = [[0] * len(_histogram_buckets[name]), 0, 0]
+    bucket_counts, _, _ = _histograms[name][key]
+    for i, upper_bound in enumerate(_histogram_buckets[name]):
+        if value <= upper_bound:
+            bucket_counts[i] += 1
+    _histograms[name][key][1] += value
+    _histograms[name][key][2] += 1
+
+
+@contextlib.contextmanager
+def timed(name, help_text, labels=None):
+    """Context manager that observes how long its body took, in seconds, in a histogram"""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, help_text, labels, time.perf_counter() - start_time)
+
+
+def reset():
+    _metric_families.clear()
+    _counters.clear()
+    _gauges.clear()
+    _histograms.clear()
+    _histogram_buckets.clear()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        return repr(value)
+    return str(value)
+
+
+def render():
+    """Returns all of the collected metrics in the OpenMetrics text format"""
+    lines = []
+    for name, (metric_type, help_text) in sorted(_metric_families.items()):
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.append(f"# HELP {name} {_escape(help_text)}")
+        if metric_type == 'counter':
+            for key, value in sorted(_counters[name].items()):
+                lines.append(f"{name}_total{_format_labels(key)} {_format_value(value)}")
+        elif metric_type == 'gauge':
+            for key, value in sorted(_gauges[name].items()):
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        elif metric_type == 'histogram':
+            for key, (bucket_counts, total, count) in sorted(_histograms[name].items()):
+                for upper_bound, bucket_count in zip(_histogram_buckets[name], bucket_counts):
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', _format_value(float(upper_bound)))])} {bucket_count}")
+                lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {count}")
+                lines.append(f"{name}_count{_format_labels(key)} {count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_value(float(total))}")
+    lines.append("# EOF")
+    return '\n'.join(lines) + '\n'
+
+
+def write_textfile(fname):
+    """Writes the metrics to fname. The file is written to a temporary file in the same
+    directory and then renamed, so a collector never reads a partially-written file."""
+    dirname = os.path.dirname(os.path.abspath(fname))
+    fd, tmp_fname = tempfile.mkstemp(dir=dirname, prefix='.' + os.path.basename(fname), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as fh:
+            fh.write(render())
+        os.chmod(tmp_fname, 0o644)
+        os.replace(tmp_fname, fname)
+    except BaseException:
+        os.unlink(tmp_fname)
+        raise
@@ -1,14 +1,14 @@
 import collections
 import functools
+import hashlib
 import json
 import logging
+import time
+import urllib.parse
 import xml.etree.ElementTree
 
-import requests
-import urllib
-import urllib3
+from palo_alto_firewall_analyzer import metrics
 
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 logger = logging.getLogger(__name__)
 
@@ -16,18 +16,41 @@ logger = logging.getLogger(__name__)
 # API functions
 ###############################################################################
 
+@functools.lru_cache(maxsize=None)
+def _import_requests():
+    # requests is slow to import, so it's only imported once an API request is made
+    import requests
+    import urllib3
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    return requests
+
+
 def pan_api(firewall, method, path, params, api_key=None, data=None):
     url = "https://{hostname}{path}".format(hostname=firewall, path=path)
     headers = {}
     if api_key:
         headers['X-PAN-KEY'] = api_key
 
+    # The XML API is always /api, so the request type distinguishes its endpoints
+    if params and 'type' in params:
+        request_type = params['type']
+    else:
+        request_type = ''
+    metric_labels = {'endpoint': path, 'type': request_type, 'method': method.upper()}
+
     # Try 3 times, in case of weird issues where the API responds 200, but with no data:
     for i in range(3):
-        response = requests.request(method, url, params=params, headers=headers, data=data, verify=False)
-        logger.debug(response.url)
-        logger.debug(response.status_code)
-        logger.debug(response.text)
+        start_time = time.perf_counter()
+        response = _import_requests().request(method, url, params=params, headers=headers, data=data, verify=False)
+        metrics.observe('pan_analyzer_api_request_duration_seconds', "Latency of API requests",
+                        metric_labels, time.perf_counter() - start_time)
+        metrics.inc_counter('pan_analyzer_api_requests', "Number of API requests",
+                            dict(metric_labels, status=response.status_code))
+        # The response can be many MB, so only decode it when it will be logged
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(response.url)
+            logger.debug(response.status_code)
+            logger.debug(response.text)
         if response.text:
             break
         logger.debug("Error: No content! Retry count: f{i+1}")
@@ -95,6 +118,45 @@ def export_configuration2(firewall, api_key):
     return response.text
 
 
+@functools.lru_cache(maxsize=None)
+def export_running_configuration(firewall, api_key):
+    """Returns the running configuration, as last committed"""
+    params = {
+        'type': 'config',
+        'action': 'show',
+        'xpath': '/config',
+    }
+
+    response = pan_api(firewall, method="get", path="/api", params=params, api_key=api_key)
+
+    return response.text
+
+
+@functools.lru_cache(maxsize=None)
+def export_candidate_configuration(firewall, api_key):
+    """Returns the candidate configuration, including changes which haven't been committed yet"""
+    params = {
+        'type': 'config',
+        'action': 'get',
+        'xpath': '/config',
+    }
+
+    response = pan_api(firewall, method="get", path="/api", params=params, api_key=api_key)
+
+    return response.text
+
+
+def get_config_version(panorama, api_key):
+    """Returns a value that changes whenever a new configuration version is saved,
+    without downloading the whole configuration. Not cached, so it can be polled."""
+    params = {
+        'type': 'op',
+        'cmd': '<show><config><audit><info></info></audit></config></show>',
+    }
+    response = pan_api(panorama, method="get", path="/api", params=params, api_key=api_key)
+    return hashlib.sha256(response.text.encode('utf-8')).hexdigest()
+
+
 @functools.lru_cache(maxsize=None)
 def get_interface(firewall, api_key, ip):
     params = {
@@ -6,16 +6,57 @@ download the XML configuration file once and retrieve the values from there.
 
 import collections
 import functools
+import hashlib
 import ipaddress
 import logging
+import weakref
 import xml.etree.ElementTree
 
-import xmltodict
-
 logger = logging.getLogger(__name__)
 
-@functools.lru_cache(maxsize=None)
+
+def config_cache(function):
+    '''
+    Like functools.lru_cache, but the results are cached on the PanConfig which is the
+    function's first argument, rather than globally. They're freed along with the PanConfig,
+    and one configuration's can be dropped with clear_lookups() without affecting the others.
+    '''
+    @functools.wraps(function)
+    def wrapper(pan_config, *args):
+        lookups = pan_config.lookups
+        key = (function, args)
+        try:
+            return lookups[key]
+        except KeyError:
+            result = lookups[key] = function(pan_config, *args)
+            return result
+    return wrapper
+
+
+def element_cache(function):
+    '''
+    Like functools.lru_cache for functions whose first argument is an XML element,
+    but the results are only kept while the element is, so they're freed along
+    with the configuration it came from.
+    '''
+    results = weakref.WeakKeyDictionary()
+
+    @functools.wraps(function)
+    def wrapper(element, *args):
+        element_results = results.setdefault(element, {})
+        try:
+            return element_results[args]
+        except KeyError:
+            result = element_results[args] = function(element, *args)
+            return result
+    wrapper.cache_clear = results.clear
+    return wrapper
+
+
+@element_cache
 def xml_object_to_dict(xml_obj):
+    # xmltodict is slow to import, so it's only imported once it's needed
+    import xmltodict
     obj_xml_string = xml.etree.ElementTree.tostring(xml_obj)
     obj_dict = xmltodict.parse(obj_xml_string)
     return obj_dict
@@ -41,9 +82,15 @@ class PanConfig:
             self.config_xml = {"version": conf.get("version"),"urldb": conf.get("urldb"),"detail-version":conf.get("detail-version")}                        
         else:
             self.configroot = xml.etree.ElementTree.fromstring(configdata).find('./result')
+            conf = self.configroot.find('./config') if self.configroot is not None else None
+            if conf is None:
+                conf = {}
+            self.config_xml = {"version": conf.get("version"),"urldb": conf.get("urldb"),"detail-version":conf.get("detail-version")}
+        # (method or function, arguments) -> result, for the lookups cached with config_cache
+        self.lookups = {}
 
 
-    @functools.lru_cache(maxsize=None)
+    @config_cache
     def get_device_groups(self):
         '''
         Returns the list of device groups present in the configuration file
@@ -53,7 +100,7 @@ class PanConfig:
         return device_groups
 
 
-    @functools.lru_cache(maxsize=None)
+    @config_cache
     def get_device_groups_hierarchy(self):
         '''
         Returns a tuple of two dict's.
@@ -182,7 +229,7 @@ class PanConfig:
     }
 
 
-    @functools.lru_cache(maxsize=None)
+    @config_cache
     def get_devicegroup_policy(self, policy_type, device_group):
         '''
         Returns all of a specified policy type for the specified device group
@@ -202,7 +249,7 @@ class PanConfig:
         return self.configroot.findall(xpath)
 
 
-    @functools.lru_cache(maxsize=None)
+    @config_cache
     def get_devicegroup_object(self, object_type, device_group):
         '''
         Returns all of a specified object type for the specified device group
@@ -246,7 +293,7 @@ class PanConfig:
         return all_objects
 
 
-    @functools.lru_cache(maxsize=None)
+    @config_cache
     def resolve_address_name(self, device_group, name):
         '''
         Determines which type of object an address object name refers to
@@ -282,7 +329,7 @@ class PanConfig:
             raise Exception("Unknown item!")
 
 
-    @functools.lru_cache(maxsize=None)
+    @config_cache
     def resolve_app_name(self, device_group, name):
         '''
         Determines which type of object an application object name refers to
@@ -308,7 +355,7 @@ class PanConfig:
         raise Exception("Unknown item!")
 
 
-    @functools.lru_cache(maxsize=None)
+    @config_cache
     def resolve_service_name(self, device_group, name):
         '''
         Determines which type of object an service object name refers to
@@ -332,7 +379,74 @@ class PanConfig:
 
         raise Exception("Unknown item!")
 
-    @functools.lru_cache(maxsize=None)
+    def get_section_digests(self):
+        '''
+        Returns a mapping of (device group, policy or object type) to a digest
+        of that section's contents. The Device Group hierarchy is included
+        under the key (None, None). Comparing the digests of two configurations
+        shows which sections changed.
+        '''
+        xpath = "./config/readonly/devices/entry[@name='localhost.localdomain']/device-group/entry"
+        section_digests = {(None, None): _digest_elements(self.configroot.findall(xpath))}
+        for device_group in self.get_device_groups() + ['shared']:
+            for policy_type in self.SUPPORTED_POLICY_TYPES:
+                section_digests[(device_group, policy_type)] = _digest_elements(self.get_devicegroup_policy(policy_type, device_group))
+            for object_type in self.SUPPORTED_OBJECT_TYPES:
+                section_digests[(device_group, object_type)] = _digest_elements(self.get_devicegroup_object(object_type, device_group))
+        return section_digests
+
+    @config_cache
+    def get_entry_locations(self):
+        '''
+        Returns a mapping of id(entry) -> (device group, policy or object type)
+        for every policy and object entry, to find where an entry came from.
+        '''
+        entry_locations = {}
+        for device_group in self.get_device_groups() + ['shared']:
+            for policy_type in self.SUPPORTED_POLICY_TYPES:
+                for entry in self.get_devicegroup_policy(policy_type, device_group):
+                    entry_locations[id(entry)] = (device_group, policy_type)
+            for object_type in self.SUPPORTED_OBJECT_TYPES:
+                for entry in self.get_devicegroup_object(object_type, device_group):
+                    entry_locations[id(entry)] = (device_group, object_type)
+        return entry_locations
+
+    def find_entry(self, device_group, entry_type, name, uuid=None):
+        '''
+        Returns the policy or object entry with the uuid (if specified) or name,
+        or None if it no longer exists
+        '''
+        if entry_type in self.SUPPORTED_POLICY_TYPES:
+            entries = self.get_devicegroup_policy(entry_type, device_group)
+        elif entry_type in self.SUPPORTED_OBJECT_TYPES:
+            entries = self.get_devicegroup_object(entry_type, device_group)
+        else:
+            return None
+        if uuid is not None:
+            for entry in entries:
+                if entry.get('uuid') == uuid:
+                    return entry
+        for entry in entries:
+            if entry.get('name') == name:
+                return entry
+        return None
+
+    def clear_lookups(self):
+        '''
+        Drops this configuration's cached lookups, including those of the functions
+        using config_cache, such as rule_insertion.compile_rulebase().
+        '''
+        self.lookups = {}
+
+    @classmethod
+    def clear_caches(cls):
+        '''
+        The lookups of each PanConfig are cached on it, and are freed along with it. Only the
+        conversions of XML elements are cached globally, until their configuration is freed.
+        '''
+        xml_object_to_dict.cache_clear()
+
+    @config_cache
     def get_major_version(self):
         ''''
         Returns the version number in the form '10.0.0'
@@ -342,7 +456,7 @@ class PanConfig:
         major_version = full_version.rsplit('.', 1)[0]
         return major_version
 
-    @functools.lru_cache(maxsize=None)
+    @config_cache
     def get_managed_serials(self):
         '''
         Returns a list of serial numbers of managed devices
@@ -352,6 +466,68 @@ class PanConfig:
         return serials
 
 
+def _digest_elements(elements):
+    digest = hashlib.sha256()
+    for element in elements:
+        digest.update(xml.etree.ElementTree.tostring(element))
+    return digest.hexdigest()
+
+
+def get_changed_sections(old_section_digests, new_section_digests):
+    '''
+    Given the section digests of two configurations, returns the set of
+    (device group, policy or object type) sections which were added, removed, or modified.
+    '''
+    all_sections = set(old_section_digests) | set(new_section_digests)
+    return {section for section in all_sections
+            if old_section_digests.get(section) != new_section_digests.get(section)}
+
+
+def _get_section_entries(pan_config, device_group, section_type):
+    if section_type in pan_config.SUPPORTED_POLICY_TYPES:
+        return pan_config.get_devicegroup_policy(section_type, device_group)
+    return pan_config.get_devicegroup_object(section_type, device_group)
+
+
+def get_changed_entries(old_pan_config, new_pan_config, changed_sections):
+    '''
+    Within the changed sections, compares the policy and object entries of two configurations,
+    matching them by uuid (or name if they don't have one). Returns two lists of
+    (device group, policy or object type, entry): the entries of new_pan_config which were added or
+    modified, and the entries of old_pan_config which were modified or removed.
+    Rules are ordered, so a rule which now follows a different rule counts as modified.
+    '''
+    added_or_modified = []
+    modified_or_removed = []
+    for device_group, section_type in sorted(changed_sections, key=str):
+        if section_type is None:
+            continue
+        is_ordered = section_type in new_pan_config.SUPPORTED_POLICY_TYPES
+        old_entries = {}
+        old_predecessors = {}
+        previous_key = None
+        for entry in _get_section_entries(old_pan_config, device_group, section_type):
+            key = entry.get('uuid') or entry.get('name')
+            old_entries[key] = entry
+            old_predecessors[key] = previous_key
+            previous_key = key
+
+        previous_key = None
+        for entry in _get_section_entries(new_pan_config, device_group, section_type):
+            key = entry.get('uuid') or entry.get('name')
+            old_entry = old_entries.pop(key, None)
+            moved = is_ordered and old_predecessors.get(key) != previous_key
+            previous_key = key
+            if old_entry is None:
+                added_or_modified.append((device_group, section_type, entry))
+            elif moved or xml.etree.ElementTree.tostring(old_entry) != xml.etree.ElementTree.tostring(entry):
+                added_or_modified.append((device_group, section_type, entry))
+                modified_or_removed.append((device_group, section_type, old_entry))
+        for old_entry in old_entries.values():
+            modified_or_removed.append((device_group, section_type, old_entry))
+    return added_or_modified, modified_or_removed
+
+
 def main():
     fname = "config_pretty.xml"
     with open(fname) as fh:
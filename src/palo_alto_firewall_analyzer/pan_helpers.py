@@ -4,31 +4,51 @@ import getpass
 import logging
 import os
 import os.path
+import time
 
-from palo_alto_firewall_analyzer import pan_api
+from palo_alto_firewall_analyzer import metrics, pan_api
 from palo_alto_firewall_analyzer.pan_config import PanConfig
-from palo_alto_firewall_analyzer.core import squash_all_devicegroups, ProfilePackage
+from palo_alto_firewall_analyzer.core import get_single_ip_from_address, squash_all_devicegroups, xml_object_to_dict, ProfilePackage
 
 logger = logging.getLogger(__name__)
 
 
-def load_config_package(configuration_settings, api_key, device_group, limit, xml_file=None):
+def _record_config_phase(phase, start_time):
+    metrics.set_gauge('pan_analyzer_config_phase_duration_seconds',
+                      "Time taken to load, parse, and index the configuration",
+                      {'phase': phase}, time.perf_counter() - start_time)
+
+
+def load_config_package(configuration_settings, api_key, device_group, limit, xml_file=None, config_type=None):
+    """config_type selects the 'running' or 'candidate' configuration when downloading it via the API"""
+    start_time = time.perf_counter()
     if xml_file:
         # The list of firewalls are not available from the API, so
         # these variables will remain empty
         logger.debug(f"Loading configuration from XML file: {xml_file}")
         with open(xml_file, encoding='utf-8') as fh:
             xml_config = fh.read()
+        _record_config_phase('load', start_time)
+        start_time = time.perf_counter()
         pan_config = PanConfig(xml_config, True)
+        _record_config_phase('parse', start_time)
         device_groups_and_firewalls = collections.defaultdict(list)
         active_firewalls_per_devicegroup = collections.defaultdict(list)
     else:
         # Load the XML configuration and list of firewalls via API requests
         logger.debug(f"Downloading XML configuration via API")
         panorama = configuration_settings.get('panorama')
-        xml_config = pan_api.export_configuration2(panorama, api_key)
+        if config_type == 'running':
+            xml_config = pan_api.export_running_configuration(panorama, api_key)
+        elif config_type == 'candidate':
+            xml_config = pan_api.export_candidate_configuration(panorama, api_key)
+        else:
+            xml_config = pan_api.export_configuration2(panorama, api_key)
+        _record_config_phase('load', start_time)
         logger.debug(f"Loading downloaded XML configuration")
+        start_time = time.perf_counter()
         pan_config = PanConfig(xml_config)
+        _record_config_phase('parse', start_time)
         device_groups_and_firewalls = pan_api.get_device_groups_and_firewalls(panorama, api_key)
         active_firewalls = pan_api.get_active_firewalls(panorama, api_key)
         # Build the mapping of active FWs in each device group
@@ -36,6 +56,20 @@ def load_config_package(configuration_settings, api_key, device_group, limit, xm
         for dg, firewalls in device_groups_and_firewalls.items():
             active_firewalls_per_devicegroup[dg] = [fw for fw in firewalls if fw in active_firewalls]
 
+    return build_profilepackage(configuration_settings, api_key, pan_config, device_group, limit,
+                                device_groups_and_firewalls, active_firewalls_per_devicegroup)
+
+
+def build_profilepackage(configuration_settings, api_key, pan_config, device_group=None, limit=None,
+                         device_groups_and_firewalls=None, active_firewalls_per_devicegroup=None):
+    """Indexes an already-parsed PanConfig into a ProfilePackage. Without the firewall
+    details from the API, validators which need them will not find anything."""
+    if device_groups_and_firewalls is None:
+        device_groups_and_firewalls = collections.defaultdict(list)
+    if active_firewalls_per_devicegroup is None:
+        active_firewalls_per_devicegroup = collections.defaultdict(list)
+
+    start_time = time.perf_counter()
     device_group_hierarchy_children, device_group_hierarchy_parent = pan_config.get_device_groups_hierarchy()
 
     # Build a mapping of device groups to their 'child' device groups
@@ -86,6 +120,7 @@ def load_config_package(configuration_settings, api_key, device_group, limit, xm
                 exclusive_objects = [entry for entry in devicegroup_objects[device_group][policy_type] if
                                      entry.get('@uuid') not in parent_policy_uuids]
                 devicegroup_exclusive_objects[device_group][policy_type] = exclusive_objects
+    _record_config_phase('index', start_time)
 
     profilepackage = ProfilePackage(
         api_key=api_key,
@@ -102,6 +137,20 @@ def load_config_package(configuration_settings, api_key, device_group, limit, xm
     return profilepackage
 
 
+def clear_config_caches():
+    """Drops the cached exports and lookups, so that the API requests are made again when a new
+    configuration is loaded. Each PanConfig's own lookups are freed along with it.
+    DNS lookups and firewall zones are kept warm."""
+    PanConfig.clear_caches()
+    xml_object_to_dict.cache_clear()
+    get_single_ip_from_address.cache_clear()
+    pan_api.export_configuration2.cache_clear()
+    pan_api.export_running_configuration.cache_clear()
+    pan_api.export_candidate_configuration.cache_clear()
+    pan_api.get_device_groups_and_firewalls.cache_clear()
+    pan_api.get_active_firewalls.cache_clear()
+
+
 @functools.lru_cache(maxsize=None)
 def get_firewall_zone(firewall, api_key, ip):
     interface = pan_api.get_interface(firewall, api_key, ip)
@@ -0,0 +1,235 @@
+"""
+Finds the first security rule which matches each flow, the way the firewall
+evaluates them: pre-rules top-down, then post-rules bottom-up, as returned by
+shadowing_rules.get_all_rules_for_dg().
+
+    from palo_alto_firewall_analyzer.policy_lookup import Flow, compile_policy
+
+    classifier = compile_policy(pan_config, 'my_dg')
+    rule = classifier.match(Flow('trust', 'untrust', '10.0.0.5', '8.8.8.8', 'udp', 53, 'dns'))
+
+Rather than comparing each flow with each rule, the rules are compiled into a
+bitset per value of each field, where bit i is the i-th rule, as in
+compiled_rules.py. The rules matching a flow are the AND of its values' bitsets,
+and the first match is the lowest bit that's left. Addresses and services are
+intervals (see intervals.py), so their boundaries split each space into
+segments which every rule either contains or doesn't, and a flow's segment
+is found with bisect.
+
+Some notes:
+Users, URL categories, and HIP profiles aren't part of a flow, so they aren't
+compared. A flow without an application isn't compared by application, and
+'application-default' matches any port, as its ports depend on the applications.
+FQDNs, regions and External Dynamic Lists aren't resolved, so they don't match
+any address. Likewise, services which aren't tcp, udp or sctp ports don't match
+any port. Disabled rules are skipped.
+"""
+
+import bisect
+import collections
+import csv
+
+from palo_alto_firewall_analyzer.intervals import MAX_PORT, SERVICE_PROTOCOLS, get_service_intervals, parse_address
+from palo_alto_firewall_analyzer.pan_config import config_cache
+from palo_alto_firewall_analyzer.rule_insertion import get_compiled_rule_cache
+
+# A flow to look up. The source port and application are optional.
+Flow = collections.namedtuple('Flow', ['source_zone', 'destination_zone', 'source', 'destination', 'protocol', 'port',
+                                       'application', 'source_port'], defaults=(None, None))
+
+# The column names of a CSV of flows, in the order of Flow's fields
+FLOW_COLUMNS = ('source_zone', 'destination_zone', 'source', 'destination', 'protocol', 'port', 'application', 'source_port')
+OPTIONAL_FLOW_COLUMNS = ('application', 'source_port')
+
+
+class IntervalIndex:
+    """
+    The rules containing each value of an interval field, such as their source addresses.
+    The rules' interval boundaries split the values into segments, and the bitset of
+    the rules containing each segment is computed once, in a single sweep.
+
+    rule_intervals: A list of (rule bit, IntervalSet)
+    any_rules: Bitset of the rules which match every value
+    negated_rules: Bitset of the rules which match the values outside their intervals
+    """
+
+    def __init__(self, rule_intervals, any_rules=0, negated_rules=0):
+        # boundary -> bitset of the rules whose intervals start or end (exclusively) there
+        toggles = collections.defaultdict(int)
+        for rule_bit, intervals in rule_intervals:
+            for start, end in intervals:
+                toggles[start] ^= rule_bit
+                toggles[end + 1] ^= rule_bit
+
+        self._starts = [0]
+        segment_rules = [0]
+        current = 0
+        for boundary in sorted(toggles):
+            current ^= toggles[boundary]
+            if boundary == 0:
+                segment_rules[0] = current
+            else:
+                self._starts.append(boundary)
+                segment_rules.append(current)
+        self._segment_rules = [(rules ^ negated_rules) | any_rules for rules in segment_rules]
+
+    def find_rules(self, start, end=None):
+        """Returns the bitset of the rules which contain every value from start to end (defaults to start)"""
+        first = bisect.bisect_right(self._starts, start) - 1
+        if end is None:
+            return self._segment_rules[first]
+        last = bisect.bisect_right(self._starts, end) - 1
+        rules = self._segment_rules[first]
+        for segment in range(first + 1, last + 1):
+            rules &= self._segment_rules[segment]
+        return rules
+
+
+def _parse_port(port):
+    if port is None or not str(port).isdigit() or int(port) > MAX_PORT:
+        raise ValueError(f"'{port}' is not a port between 0 and {MAX_PORT}")
+    return int(port)
+
+
+class PolicyClassifier:
+    """
+    transformed_rules: A list of (device group, rule type, rule name, rule entry, rule values),
+    in evaluation order, as returned by shadowing_rules.transform_rules() with the address
+    and service intervals.
+    """
+
+    def __init__(self, transformed_rules):
+        self.rules = transformed_rules
+        self.all_rules = (1 << len(transformed_rules)) - 1
+        # field -> value -> bitset of the rules containing that value
+        self._value_rules = {'src_zones': {}, 'dest_zones': {}, 'application': {}}
+        # field -> bitset of the rules matching any value
+        self._any_rules = dict.fromkeys(self._value_rules, 0)
+        self._intrazone_rules = 0
+        self._interzone_rules = 0
+
+        address_intervals = {'src_members': [], 'dest_members': []}
+        address_any_rules = dict.fromkeys(address_intervals, 0)
+        address_negated_rules = dict.fromkeys(address_intervals, 0)
+        negate_fields = {'src_members': 'negate-source', 'dest_members': 'negate-destination'}
+        service_intervals = []
+        # Rules which use 'application-default' match any port
+        self._any_service_rules = 0
+
+        for i, rule_tuple in enumerate(transformed_rules):
+            rule_bit = 1 << i
+            rule_values = rule_tuple[4]
+            rule_type = next(iter(rule_values['rule_type']))
+            if rule_type == 'intrazone':
+                self._intrazone_rules |= rule_bit
+            elif rule_type == 'interzone':
+                self._interzone_rules |= rule_bit
+
+            for field, value_rules in self._value_rules.items():
+                values = rule_values[field]
+                # Intrazone rules only match traffic within their source zones
+                if not values or 'any' in values or (field == 'dest_zones' and rule_type == 'intrazone'):
+                    self._any_rules[field] |= rule_bit
+                    continue
+                for value in values:
+                    value_rules[value] = value_rules.get(value, 0) | rule_bit
+
+            for field, rule_intervals in address_intervals.items():
+                values = rule_values[field]
+                negated = 'yes' in rule_values[negate_fields[field]]
+                if not values or 'any' in values:
+                    # Negating 'any' matches nothing
+                    if not negated:
+                        address_any_rules[field] |= rule_bit
+                    continue
+                if negated:
+                    address_negated_rules[field] |= rule_bit
+                rule_intervals.append((rule_bit, values.intervals))
+
+            services = rule_values['service']
+            if not services or 'any' in services or 'application-default' in services:
+                self._any_service_rules |= rule_bit
+            else:
+                service_intervals.append((rule_bit, services.intervals))
+
+        self._address_indexes = {field: IntervalIndex(rule_intervals, address_any_rules[field], address_negated_rules[field])
+                                 for field, rule_intervals in address_intervals.items()}
+        self._service_index = IntervalIndex(service_intervals, self._any_service_rules)
+
+    def _find_value_rules(self, field, value):
+        return self._value_rules[field].get(value, 0) | self._any_rules[field]
+
+    def _find_address_rules(self, field, address):
+        interval = parse_address(address)
+        if interval is None:
+            raise ValueError(f"'{address}' is not an IP address")
+        return self._address_indexes[field].find_rules(interval[0])
+
+    def _find_service_rules(self, protocol, port, source_port):
+        protocol = protocol.lower()
+        if protocol not in SERVICE_PROTOCOLS:
+            # Services only have ports for these protocols, so other protocols only match 'any'
+            return self._any_service_rules
+        port = _parse_port(port)
+        source_ports = None if source_port is None else [(_parse_port(source_port),) * 2]
+        # Without a source port, only the services which allow any source port match
+        [(start, end)] = get_service_intervals(protocol, [(port, port)], source_ports)
+        return self._service_index.find_rules(start, end)
+
+    def find_matching_rules(self, flow):
+        """Returns the bitset of every rule which matches the flow"""
+        matching = self.all_rules
+        matching &= self._find_value_rules('src_zones', flow.source_zone)
+        matching &= self._find_value_rules('dest_zones', flow.destination_zone)
+        if flow.source_zone == flow.destination_zone:
+            matching &= ~self._interzone_rules
+        else:
+            matching &= ~self._intrazone_rules
+        if flow.application:
+            matching &= self._find_value_rules('application', flow.application)
+        if not matching:
+            return 0
+        matching &= self._find_address_rules('src_members', flow.source)
+        matching &= self._find_address_rules('dest_members', flow.destination)
+        if matching:
+            matching &= self._find_service_rules(flow.protocol, flow.port, flow.source_port)
+        return matching
+
+    def lookup(self, flow):
+        """Returns the index of the first rule which matches the flow, or None"""
+        matching = self.find_matching_rules(flow)
+        if not matching:
+            return None
+        return (matching & -matching).bit_length() - 1
+
+    def match(self, flow):
+        """Returns the first rule which matches the flow, as (device group, rule type, rule name, rule entry), or None"""
+        index = self.lookup(flow)
+        if index is None:
+            return None
+        return self.rules[index][:4]
+
+
+@config_cache
+def compile_policy(pan_config, device_group):
+    """Compiles a Device Group's security rules (including those inherited from its parents) once,
+    so they can be reused for any number of flows"""
+    return PolicyClassifier(get_compiled_rule_cache(pan_config).get_transformed_rules(device_group))
+
+
+def get_firewall_device_group(device_groups_and_firewalls, firewall):
+    """Returns the Device Group which the firewall is in, from pan_api.get_device_groups_and_firewalls()"""
+    for device_group, firewalls in device_groups_and_firewalls.items():
+        if firewall in firewalls:
+            return device_group
+    raise KeyError(f"Firewall '{firewall}' is not in any Device Group")
+
+
+def read_flows(fh):
+    """Reads flows from a CSV file with a header row of FLOW_COLUMNS. Only the application and source_port columns are optional."""
+    reader = csv.DictReader(fh)
+    missing = [column for column in FLOW_COLUMNS if column not in OPTIONAL_FLOW_COLUMNS and column not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f"The flows are missing the columns: {', '.join(missing)}")
+    for row in reader:
+        yield Flow(*(row.get(column) or None for column in FLOW_COLUMNS))
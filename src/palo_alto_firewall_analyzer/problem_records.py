@@ -0,0 +1,150 @@
+"""
+Compact, serializable versions of the problems (BadEntry) reported by validators.
+
+A BadEntry's data holds the XML elements of the rules and objects involved,
+which keeps the whole configuration alive and can't be saved or sent to
+another process. A ProblemRecord instead references each element by its
+Device Group, type, name and uuid, and keeps the rest of the data (e.g., a
+replacement name or a log profile) as-is, as long as it can be stored as JSON.
+
+Each record has a stable ID derived from the validator, Device Group, and the
+identity of the rule or object the problem is about (the first one referenced),
+so the same problem reported by two runs has the same ID, even if its description
+or the other rules and objects involved (e.g., the rules shadowing it) changed.
+Validators which report several problems about the same rule or object, such as
+its Source and Dest zones, tell them apart with the BadEntry's subject.
+Fixers can rebuild the original BadEntry with ProblemRecord.to_bad_entry().
+"""
+
+import hashlib
+import json
+import xml.etree.ElementTree
+
+from palo_alto_firewall_analyzer.core import BadEntry
+
+# Marks a reference to an element within a ProblemRecord's details
+_REF_KEY = '$ref'
+
+
+class ProblemRecord:
+    __slots__ = ('problem_id', 'validator_name', 'device_group', 'entry_type', 'text', 'refs', 'details', 'subject')
+
+    def __init__(self, problem_id, validator_name, device_group, entry_type, text, refs, details, subject=None):
+        self.problem_id = problem_id
+        self.validator_name = validator_name
+        self.device_group = device_group
+        self.entry_type = entry_type
+        self.text = text
+        # Tuple of (device group, policy or object type, name, uuid) for each referenced element
+        self.refs = refs
+        # The BadEntry's data, with each element replaced by {'$ref': index into refs}
+        self.details = details
+        self.subject = subject
+
+    def __repr__(self):
+        return f"ProblemRecord({self.problem_id!r}, {self.validator_name!r}, {self.device_group!r}, {self.text!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, ProblemRecord):
+            return NotImplemented
+        return all(getattr(self, attr) == getattr(other, attr) for attr in self.__slots__)
+
+    @property
+    def names(self):
+        return [name for _, _, name, _ in self.refs]
+
+    @property
+    def uuids(self):
+        return [uuid for _, _, _, uuid in self.refs if uuid is not None]
+
+    @classmethod
+    def from_bad_entry(cls, validator_name, bad_entry, pan_config=None):
+        """pan_config is used to find which Device Group and type each element came from,
+        so that it can be found again. Without it, elements can't be resolved."""
+        if pan_config is not None and pan_config.configroot is not None:
+            entry_locations = pan_config.get_entry_locations()
+        else:
+            entry_locations = {}
+        refs = []
+        ref_indexes = {}
+
+        def compact(value):
+            if isinstance(value, xml.etree.ElementTree.Element):
+                if id(value) not in ref_indexes:
+                    device_group, entry_type = entry_locations.get(id(value), (None, None))
+                    ref_indexes[id(value)] = len(refs)
+                    refs.append((device_group, entry_type, value.get('name'), value.get('uuid')))
+                return {_REF_KEY: ref_indexes[id(value)]}
+            if isinstance(value, (list, tuple)):
+                return [compact(item) for item in value]
+            if isinstance(value, dict):
+                return {str(key): compact(item) for key, item in value.items()}
+            if value is None or isinstance(value, (str, int, float, bool)):
+                return value
+            return str(value)
+
+        details = compact(bad_entry.data)
+        refs = tuple(refs)
+        problem_id = build_problem_id(validator_name, bad_entry.device_group, bad_entry.entry_type, refs, bad_entry.text,
+                                      bad_entry.subject)
+        return cls(problem_id, validator_name, bad_entry.device_group, bad_entry.entry_type, bad_entry.text, refs, details,
+                   bad_entry.subject)
+
+    def to_bad_entry(self, pan_config):
+        """Rebuilds the BadEntry, looking up the referenced elements in pan_config.
+        Elements which no longer exist are None."""
+        elements = [pan_config.find_entry(device_group, entry_type, name, uuid)
+                    for device_group, entry_type, name, uuid in self.refs]
+
+        def expand(value):
+            if isinstance(value, list):
+                return [expand(item) for item in value]
+            if isinstance(value, dict):
+                if value.keys() == {_REF_KEY}:
+                    return elements[value[_REF_KEY]]
+                return {key: expand(item) for key, item in value.items()}
+            return value
+
+        return BadEntry(data=expand(self.details), text=self.text, device_group=self.device_group, entry_type=self.entry_type,
+                        subject=self.subject)
+
+    def to_dict(self):
+        return {"problem_id": self.problem_id,
+                "validator_name": self.validator_name,
+                "device_group": self.device_group,
+                "entry_type": self.entry_type,
+                "desc": self.text,
+                "refs": [list(ref) for ref in self.refs],
+                "details": self.details,
+                "subject": self.subject}
+
+    @classmethod
+    def from_dict(cls, record_dict):
+        return cls(record_dict['problem_id'], record_dict['validator_name'], record_dict['device_group'],
+                   record_dict['entry_type'], record_dict['desc'],
+                   tuple(tuple(ref) for ref in record_dict.get('refs', ())), record_dict.get('details'),
+                   record_dict.get('subject'))
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, json_text):
+        return cls.from_dict(json.loads(json_text))
+
+
+def build_problem_id(validator_name, device_group, entry_type, refs, text, subject=None):
+    """Derives a problem's ID from what it's about, which is its first reference and its subject, if any.
+    The other references are only details. The description is only used when the problem doesn't
+    reference any rules or objects."""
+    if refs:
+        ref_device_group, ref_type, name, uuid = refs[0]
+        identity = (ref_device_group, ref_type, uuid or name)
+    else:
+        identity = text
+    key_values = [validator_name, device_group, entry_type, identity]
+    # Only added when there is one, so that the IDs of the other problems don't change
+    if subject is not None:
+        key_values.append(subject)
+    key = json.dumps(key_values, separators=(',', ':'))
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:20]
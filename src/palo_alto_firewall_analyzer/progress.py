@@ -0,0 +1,102 @@
+"""
+Progress reporting for validators. Instead of logging a line for every
+Device Group or rule, validators update named counters, such as
+'device groups' or 'rules'. The counters are aggregated per validator and
+rendered to the console at most once every few seconds.
+
+Progress updates also act as cancellation points for the validator's
+time budget (see core.check_validator_budget).
+"""
+
+import contextlib
+import contextvars
+import logging
+import time
+
+from palo_alto_firewall_analyzer.core import check_validator_budget
+
+logger = logging.getLogger(__name__)
+
+# Minimum number of seconds between rendering progress to the console
+DEFAULT_RENDER_INTERVAL = 5
+
+
+class ProgressReporter:
+    """Tracks the counters of a single task (typically a validator)
+    and renders them, rate-limited, to the logger"""
+
+    def __init__(self, task, render_interval=DEFAULT_RENDER_INTERVAL, clock=time.monotonic):
+        self.task = task
+        self.render_interval = render_interval
+        self.clock = clock
+        # Mapping of counter name -> [completed, total]. total is None if unknown.
+        self.counters = {}
+        self.detail = None
+        self.last_render_time = clock()
+
+    def update(self, counter, completed, total=None, detail=None):
+        self.counters[counter] = [completed, total]
+        self._updated(detail)
+
+    def advance(self, counter, amount=1, detail=None):
+        if counter not in self.counters:
+            self.counters[counter] = [0, None]
+        self.counters[counter][0] += amount
+        self._updated(detail)
+
+    def _updated(self, detail):
+        if detail is not None:
+            self.detail = detail
+        now = self.clock()
+        if now - self.last_render_time >= self.render_interval:
+            self.last_render_time = now
+            logger.info(self.render())
+
+    def render(self):
+        counter_texts = []
+        for counter, (completed, total) in self.counters.items():
+            if total is None:
+                counter_texts.append(f"{counter} {completed}")
+            else:
+                counter_texts.append(f"{counter} {completed}/{total}")
+        text = f"{self.task}: {', '.join(counter_texts)}"
+        if self.detail is not None:
+            text += f" (checking {self.detail})"
+        return text
+
+    def get_counts(self):
+        """Returns a mapping of counter name -> number completed"""
+        return {counter: completed for counter, (completed, _) in self.counters.items()}
+
+
+_current_progress_reporter = contextvars.ContextVar('progress_reporter', default=None)
+
+
+@contextlib.contextmanager
+def progress_reporter(task, render_interval=DEFAULT_RENDER_INTERVAL):
+    """Context manager which collects the progress reported by the validator being run within it"""
+    reporter = ProgressReporter(task, render_interval)
+    context_token = _current_progress_reporter.set(reporter)
+    try:
+        yield reporter
+    finally:
+        _current_progress_reporter.reset(context_token)
+
+
+def update_progress(counter, completed, total=None, detail=None):
+    """Sets a counter, such as the number of Device Groups checked so far. detail
+    describes what is currently being checked, and is reported if the validator times out."""
+    reporter = _current_progress_reporter.get()
+    if reporter is not None:
+        reporter.update(counter, completed, total, detail)
+    if detail is not None:
+        check_validator_budget(detail)
+
+
+def advance_progress(counter, amount=1, detail=None):
+    """Increments a counter, such as the number of rules checked so far"""
+    reporter = _current_progress_reporter.get()
+    if reporter is not None:
+        reporter.advance(counter, amount, detail)
+    if detail is not None:
+        check_validator_budget(detail)
@@ -0,0 +1,288 @@
+"""
+Stores the results of every run in a local SQLite database, so that questions
+about their history can be answered with SQL instead of reading old output files.
+
+Runs are added from the same records written by the jsonl output ('run',
+'problem', 'validator_summary' and 'run_summary'), either while running or
+from a jsonl output file. For example, the number of shadowed rules per run:
+
+    SELECT runs.started_at, validator_metrics.total_problems FROM runs
+    JOIN validator_metrics USING (run_id)
+    WHERE validator_metrics.validator_name = 'ShadowingRules' ORDER BY runs.run_id
+
+Each run also records its scope: the Device Groups it checked, and whether its
+rules were limited with --limit. A problem is only considered gone once a
+complete run has checked its Device Group.
+"""
+
+import collections
+import datetime
+import json
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    config_version TEXT,
+    detail_version TEXT,
+    urldb TEXT,
+    runtime REAL,
+    total_problems INTEGER,
+    rule_limit_enabled INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS runs_started_at ON runs (started_at);
+
+-- The Device Groups checked by each run. Runs stored before their scope
+-- was recorded have none, and are assumed to have checked all of them.
+CREATE TABLE IF NOT EXISTS run_device_groups (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    device_group TEXT NOT NULL,
+    PRIMARY KEY (run_id, device_group)
+);
+
+CREATE TABLE IF NOT EXISTS validator_metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    validator_name TEXT NOT NULL,
+    total_problems INTEGER NOT NULL,
+    runtime REAL,
+    partial INTEGER NOT NULL DEFAULT 0,
+    progress TEXT,
+    sampled INTEGER NOT NULL DEFAULT 0,
+    estimate REAL,
+    estimate_lower REAL,
+    estimate_upper REAL,
+    PRIMARY KEY (run_id, validator_name)
+);
+CREATE INDEX IF NOT EXISTS validator_metrics_validator ON validator_metrics (validator_name, run_id);
+
+CREATE TABLE IF NOT EXISTS problems (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    problem_id TEXT NOT NULL,
+    validator_name TEXT NOT NULL,
+    device_group TEXT,
+    entry_type TEXT,
+    object_name TEXT,
+    description TEXT,
+    record TEXT
+);
+CREATE INDEX IF NOT EXISTS problems_run ON problems (run_id, validator_name);
+CREATE INDEX IF NOT EXISTS problems_validator ON problems (validator_name, device_group);
+CREATE INDEX IF NOT EXISTS problems_object ON problems (object_name);
+CREATE INDEX IF NOT EXISTS problems_problem_id ON problems (problem_id, run_id);
+
+-- Every rule and object referenced by a problem, not only the first
+CREATE TABLE IF NOT EXISTS problem_objects (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    problem_id TEXT NOT NULL,
+    device_group TEXT,
+    entry_type TEXT,
+    name TEXT,
+    uuid TEXT
+);
+CREATE INDEX IF NOT EXISTS problem_objects_name ON problem_objects (name, run_id);
+CREATE INDEX IF NOT EXISTS problem_objects_uuid ON problem_objects (uuid);
+"""
+
+# Runs in which the validator ran in full (no timeout, sampling or rule limit),
+# so that a problem missing from them has been resolved, if they checked its Device Group
+_COMPLETE_VALIDATOR_RUNS = """
+    SELECT runs.run_id, runs.started_at FROM runs JOIN validator_metrics USING (run_id)
+    WHERE validator_metrics.validator_name = :validator_name
+      AND validator_metrics.partial = 0 AND validator_metrics.sampled = 0 AND runs.rule_limit_enabled = 0
+"""
+
+
+def parse_execution_time(date_execution):
+    """Converts pan_analyzer's YYYYMMDD_HHMMSS timestamps to the ISO format used by SQLite's date functions"""
+    return datetime.datetime.strptime(date_execution, '%Y%m%d_%H%M%S').isoformat(sep=' ')
+
+
+def read_result_records(fname):
+    """Reads the records from a jsonl output file"""
+    with open(fname) as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+class ResultsStore:
+    def __init__(self, fname):
+        self.connection = sqlite3.connect(fname)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+        # Databases created before the runs' scope was recorded
+        run_columns = {row['name'] for row in self.connection.execute("PRAGMA table_info(runs)")}
+        if 'rule_limit_enabled' not in run_columns:
+            self.connection.execute("ALTER TABLE runs ADD COLUMN rule_limit_enabled INTEGER NOT NULL DEFAULT 0")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def add_run(self, records):
+        """Stores a run from its jsonl records, in a single transaction. Returns the run_id."""
+        problem_rows = []
+        problem_object_rows = []
+        with self.connection:
+            cursor = self.connection.cursor()
+            run_id = None
+            for record in records:
+                record_type = record['record_type']
+                if record_type == 'run':
+                    cursor.execute("INSERT INTO runs (started_at, config_version, detail_version, urldb, rule_limit_enabled) "
+                                   "VALUES (?, ?, ?, ?, ?)",
+                                   (parse_execution_time(record['date_execution']), record.get('config_version'),
+                                    record.get('detail-version'), record.get('urldb'),
+                                    int(bool(record.get('rule_limit_enabled')))))
+                    run_id = cursor.lastrowid
+                    cursor.executemany("INSERT OR IGNORE INTO run_device_groups VALUES (?, ?)",
+                                       [(run_id, device_group) for device_group in record.get('device_groups') or ()])
+                elif run_id is None:
+                    raise ValueError("The results must start with a 'run' record")
+                elif record_type == 'problem':
+                    refs = record.get('refs') or []
+                    object_name = refs[0][2] if refs else None
+                    problem_rows.append((run_id, record['problem_id'], record['validator_name'], record['device_group'],
+                                         record['entry_type'], object_name, record['desc'],
+                                         json.dumps({'refs': refs, 'details': record.get('details')}, separators=(',', ':'))))
+                    for device_group, entry_type, name, uuid in refs:
+                        problem_object_rows.append((run_id, record['problem_id'], device_group, entry_type, name, uuid))
+                elif record_type == 'validator_summary':
+                    estimate = record.get('estimate') or {}
+                    cursor.execute("INSERT INTO validator_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                   (run_id, record['validator_name'], record['total_problems'], record.get('runtime'),
+                                    int(record.get('partial', False)), record.get('progress'), int(bool(estimate)),
+                                    estimate.get('estimate'), estimate.get('lower'), estimate.get('upper')))
+                elif record_type == 'run_summary':
+                    cursor.execute("UPDATE runs SET runtime = ?, total_problems = ? WHERE run_id = ?",
+                                   (record['runtime'], record['total_problems'], run_id))
+            if run_id is None:
+                raise ValueError("The results must start with a 'run' record")
+            cursor.executemany("INSERT INTO problems VALUES (?, ?, ?, ?, ?, ?, ?, ?)", problem_rows)
+            cursor.executemany("INSERT INTO problem_objects VALUES (?, ?, ?, ?, ?, ?)", problem_object_rows)
+        return run_id
+
+    def get_runs(self):
+        return self.connection.execute("SELECT * FROM runs ORDER BY run_id").fetchall()
+
+    def get_run_id(self, run):
+        """Accepts a run_id, or 'latest' or 'previous' for the most recent runs"""
+        if run in ('latest', 'previous'):
+            offset = 0 if run == 'latest' else 1
+            row = self.connection.execute("SELECT run_id FROM runs ORDER BY run_id DESC LIMIT 1 OFFSET ?", (offset,)).fetchone()
+        else:
+            row = self.connection.execute("SELECT run_id FROM runs WHERE run_id = ?", (int(run),)).fetchone()
+        if row is None:
+            raise KeyError(f"Run '{run}' does not exist")
+        return row['run_id']
+
+    def get_run_records(self, run_id):
+        """Yields a stored run in the same records as the jsonl output"""
+        run = self.connection.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if run is None:
+            raise KeyError(f"Run '{run_id}' does not exist")
+        run_record = {"record_type": "run",
+                      "config_version": run['config_version'],
+                      "detail-version": run['detail_version'],
+                      "urldb": run['urldb'],
+                      "date_execution": datetime.datetime.fromisoformat(run['started_at']).strftime('%Y%m%d_%H%M%S'),
+                      "rule_limit_enabled": bool(run['rule_limit_enabled'])}
+        device_groups = self.get_run_device_groups(run_id)
+        if device_groups is not None:
+            run_record["device_groups"] = device_groups
+        yield run_record
+        for problem in self.connection.execute("SELECT * FROM problems WHERE run_id = ?", (run_id,)):
+            record = json.loads(problem['record'])
+            yield {"record_type": "problem",
+                   "problem_id": problem['problem_id'],
+                   "validator_name": problem['validator_name'],
+                   "device_group": problem['device_group'],
+                   "entry_type": problem['entry_type'],
+                   "desc": problem['description'],
+                   "refs": record['refs'],
+                   "details": record['details']}
+        for metrics in self.connection.execute("SELECT * FROM validator_metrics WHERE run_id = ?", (run_id,)):
+            summary_record = {"record_type": "validator_summary",
+                              "validator_name": metrics['validator_name'],
+                              "total_problems": metrics['total_problems'],
+                              "runtime": metrics['runtime']}
+            if metrics['partial']:
+                summary_record["partial"] = True
+                summary_record["progress"] = metrics['progress']
+            if metrics['sampled']:
+                summary_record["estimate"] = {"estimate": metrics['estimate'],
+                                              "lower": metrics['estimate_lower'],
+                                              "upper": metrics['estimate_upper']}
+            yield summary_record
+        yield {"record_type": "run_summary", "runtime": run['runtime'], "total_problems": run['total_problems']}
+
+    def get_run_device_groups(self, run_id):
+        """Returns the Device Groups checked by a run, or None if they weren't recorded"""
+        rows = self.connection.execute("SELECT device_group FROM run_device_groups WHERE run_id = ? ORDER BY device_group",
+                                       (run_id,)).fetchall()
+        return [row['device_group'] for row in rows] or None
+
+    def get_problem_trend(self, validator_name):
+        """Returns the (started_at, total_problems, partial) of each run of a validator"""
+        return self.connection.execute(
+            "SELECT runs.started_at, validator_metrics.total_problems, validator_metrics.partial "
+            "FROM runs JOIN validator_metrics USING (run_id) "
+            "WHERE validator_metrics.validator_name = ? ORDER BY runs.run_id", (validator_name,)).fetchall()
+
+    def get_persistent_problems(self, validator_name, min_days, now=None):
+        """
+        Returns the problems from the validator's latest complete run of each Device Group which have
+        been reported by every complete run of their Device Group for at least min_days, along with when
+        they were first seen. For example, the addresses which have been unused for 90 days.
+        Runs which didn't check a problem's Device Group (e.g., with --device-group) are ignored for it.
+        """
+        if now is None:
+            now = datetime.datetime.now()
+        cutoff = (now - datetime.timedelta(days=min_days)).isoformat(sep=' ')
+        parameters = {'validator_name': validator_name}
+        complete_runs = self.connection.execute(f"{_COMPLETE_VALIDATOR_RUNS} ORDER BY runs.run_id", parameters).fetchall()
+        run_device_groups = collections.defaultdict(set)
+        for row in self.connection.execute(f"SELECT run_device_groups.* FROM run_device_groups "
+                                           f"JOIN ({_COMPLETE_VALIDATOR_RUNS}) USING (run_id)", parameters):
+            run_device_groups[row['run_id']].add(row['device_group'])
+        # problem ID -> the complete runs which reported it
+        reporting_runs = collections.defaultdict(set)
+        for row in self.connection.execute(f"SELECT problems.problem_id, problems.run_id FROM problems "
+                                           f"JOIN ({_COMPLETE_VALIDATOR_RUNS}) USING (run_id) "
+                                           f"WHERE problems.validator_name = :validator_name", parameters):
+            reporting_runs[row['problem_id']].add(row['run_id'])
+
+        persistent_problems = []
+        for row in self.connection.execute("SELECT DISTINCT device_group FROM problems WHERE validator_name = ?",
+                                           (validator_name,)).fetchall():
+            device_group = row['device_group']
+            # Runs which didn't record their scope are assumed to have checked every Device Group
+            checking_runs = [run for run in complete_runs
+                             if run['run_id'] not in run_device_groups or device_group in run_device_groups[run['run_id']]]
+            if not checking_runs:
+                continue
+            latest_problems = self.connection.execute(
+                "SELECT problem_id, device_group, entry_type, object_name, description FROM problems "
+                "WHERE run_id = ? AND validator_name = ? AND device_group IS ?",
+                (checking_runs[-1]['run_id'], validator_name, device_group))
+            for problem in latest_problems:
+                # The first run of the streak of runs which reported the problem, up to the latest one
+                first_seen = None
+                for run in reversed(checking_runs):
+                    if run['run_id'] not in reporting_runs[problem['problem_id']]:
+                        break
+                    first_seen = run['started_at']
+                if first_seen <= cutoff:
+                    persistent_problems.append(dict(problem, first_seen=first_seen))
+        # Sorted like SQL's ORDER BY first_seen, device_group, object_name, with NULLs first
+        persistent_problems.sort(key=lambda problem: (problem['first_seen'],
+                                                      problem['device_group'] is not None, problem['device_group'] or '',
+                                                      problem['object_name'] is not None, problem['object_name'] or ''))
+        return persistent_problems
@@ -0,0 +1,212 @@
+"""
+What-if analysis for adding a security rule, without editing the configuration
+and re-running ShadowingRules and SupersedingRules over every rule.
+
+    from palo_alto_firewall_analyzer.rule_insertion import analyze_rule_insertion, parse_rule
+
+    rule = parse_rule('{"name": "new_rule", "source": ["10.0.0.0/24"], "service": ["tcp-22"], "action": "allow"}')
+    report = analyze_rule_insertion(pan_config, 'my_dg', rule, before='existing_rule')
+
+The Device Group's rules (including those inherited from its parents) are
+transformed the same way as for ShadowingRules, once per configuration, and
+compiled into a RuleMatrix (see compiled_rules.py), so each proposed rule is
+compared with the existing ones with a handful of bitwise ANDs. Rules inherited
+by several Device Groups are only transformed once per namespace.
+"""
+
+import bisect
+import collections
+import json
+import xml.etree.ElementTree
+
+from palo_alto_firewall_analyzer.compiled_rules import RuleMatrix, iter_bits
+from palo_alto_firewall_analyzer.pan_config import config_cache
+from palo_alto_firewall_analyzer.validators.shadowing_rules import CompiledRuleCache, get_all_rules_for_dg
+from palo_alto_firewall_analyzer.validators.shadowing_rules import transform_rules
+
+# The Device Group's rules, in evaluation order, along with the group and address mappings used to transform them,
+# the RuleMatrix of the transformed rules, and the bitset of the transformed rules with each action
+CompiledRulebase = collections.namedtuple('CompiledRulebase', ['all_rules', 'transformed_rules', 'rule_indexes',
+                                                               'group_mappings', 'rule_matrix', 'action_rules'])
+
+# The existing rules affected by a proposed rule, each as (device group, rule type, rule name):
+# shadowed_by: Earlier rules which match all of the proposed rule's traffic
+# redundant_with: The rules in shadowed_by with the same action, so adding the rule changes nothing
+# shadows: Later rules which would no longer match any traffic
+# supersedes: Earlier rules with the same action which the proposed rule makes unnecessary
+InsertionReport = collections.namedtuple('InsertionReport', ['shadowed_by', 'redundant_with', 'shadows', 'supersedes'])
+
+# Fields of a proposed rule which are 'any' when they're not specified
+DEFAULT_ANY_FIELDS = ('from', 'to', 'source', 'destination', 'source-user', 'category', 'application', 'service')
+# Older configurations don't have HIP profiles, so a missing one is treated as 'any' in every rule
+OPTIONAL_ANY_VALUES = ('source_hip', 'destination_hip')
+RULE_TYPES = ('SecurityPreRules', 'SecurityPostRules')
+
+
+@config_cache
+def get_compiled_rule_cache(pan_config):
+    """Shared by every Device Group, so the rules they inherit are only transformed once per namespace"""
+    return CompiledRuleCache(pan_config)
+
+
+@config_cache
+def compile_rulebase(pan_config, device_group):
+    """Transforms a Device Group's rules once, so they can be reused for any number of proposed rules"""
+    all_rules = get_all_rules_for_dg(pan_config, device_group)
+    compiled_rule_cache = get_compiled_rule_cache(pan_config)
+    group_mappings = compiled_rule_cache.get_group_mappings(device_group)
+    # The cached rules are shared with the other users of the cache, so they're copied rather than filled in
+    transformed_rules = [(dg, ruletype, rule_name, rule_entry, _fill_optional_values(rule_values))
+                         for dg, ruletype, rule_name, rule_entry, rule_values
+                         in compiled_rule_cache.get_transformed_rules(device_group)]
+    # Disabled rules aren't transformed, so this is each transformed rule's index within all_rules
+    rule_indexes_by_id = {id(rule_entry): i for i, (_, _, rule_entry) in enumerate(all_rules)}
+    rule_indexes = [rule_indexes_by_id[id(rule_tuple[3])] for rule_tuple in transformed_rules]
+    action_rules = {}
+    for i, rule_tuple in enumerate(transformed_rules):
+        action = _get_action(rule_tuple[3])
+        action_rules[action] = action_rules.get(action, 0) | (1 << i)
+    return CompiledRulebase(all_rules, transformed_rules, rule_indexes, group_mappings,
+                            RuleMatrix(transformed_rules), action_rules)
+
+
+def _fill_optional_values(rule_values):
+    """Returns a copy of the rule's values, with the missing optional values set to 'any'"""
+    rule_values = dict(rule_values)
+    for key in OPTIONAL_ANY_VALUES:
+        if not rule_values[key]:
+            rule_values[key] = frozenset(['any'])
+    return rule_values
+
+
+def _build_element(tag, value):
+    element = xml.etree.ElementTree.Element(tag)
+    if isinstance(value, dict):
+        for child_tag, child_value in value.items():
+            element.append(_build_element(child_tag, child_value))
+    elif isinstance(value, (list, tuple)):
+        for member in value:
+            xml.etree.ElementTree.SubElement(element, 'member').text = str(member)
+    else:
+        element.text = str(value)
+    return element
+
+
+def parse_rule(rule_source):
+    """
+    Parses a proposed security rule, either as an XML <entry> in the configuration's format,
+    or as JSON (or a dict) with the same fields, such as:
+    {"name": "new_rule", "from": ["trust"], "source": ["10.0.0.0/24"], "service": ["tcp-22"], "action": "allow"}
+    Lists are converted to members. Fields which aren't specified default to 'any'.
+    """
+    if isinstance(rule_source, xml.etree.ElementTree.Element):
+        rule_entry = rule_source
+    elif isinstance(rule_source, dict):
+        rule_source = dict(rule_source)
+        rule_entry = xml.etree.ElementTree.Element('entry', name=str(rule_source.pop('name', 'proposed_rule')))
+        for tag, value in rule_source.items():
+            rule_entry.append(_build_element(tag, value))
+    else:
+        if isinstance(rule_source, bytes):
+            rule_source = rule_source.decode('utf-8')
+        if rule_source.lstrip().startswith('<'):
+            rule_entry = xml.etree.ElementTree.fromstring(rule_source)
+        else:
+            return parse_rule(json.loads(rule_source))
+
+    if rule_entry.get('name') is None:
+        rule_entry.set('name', 'proposed_rule')
+    for tag in DEFAULT_ANY_FIELDS:
+        if rule_entry.find(tag) is None:
+            rule_entry.append(_build_element(tag, ['any']))
+    return rule_entry
+
+
+def get_rule_position(pan_config, device_group, rule_type, before=None, after=None):
+    """Returns the position within the Device Group's rules before or after the named rule"""
+    rule_names = [rule_entry.get('name') for rule_entry in pan_config.get_devicegroup_policy(rule_type, device_group)]
+    rule_name = before if before is not None else after
+    if rule_name not in rule_names:
+        raise KeyError(f"{device_group}'s {rule_type} has no rule named '{rule_name}'")
+    position = rule_names.index(rule_name)
+    if after is not None:
+        position += 1
+    return position
+
+
+def _get_insertion_index(all_rules, device_group, rule_type, position):
+    """Converts a position within the Device Group's pre-rules or post-rules to an index within all of its rules"""
+    section_indexes = [i for i, (dg, rule_type_, _) in enumerate(all_rules)
+                       if dg == device_group and rule_type_ == rule_type]
+    if section_indexes:
+        if position is None or position >= len(section_indexes):
+            return section_indexes[-1] + 1
+        return section_indexes[position]
+    # The Device Group's own pre-rules follow its parents' pre-rules, and its
+    # post-rules precede its parents' post-rules, so both start after the pre-rules
+    return sum(1 for _, rule_type_, _ in all_rules if rule_type_ == 'SecurityPreRules')
+
+
+def _get_action(rule_entry):
+    return rule_entry.findtext('./action')
+
+
+def analyze_rule_insertion(pan_config, device_group, rule, position=None, rule_type='SecurityPreRules',
+                           before=None, after=None):
+    """
+    Determines how a proposed rule would interact with the existing rules, if it was added to
+    the Device Group's pre-rules or post-rules at the position (or before or after the named rule).
+    The position is the index within those rules, and defaults to the end.
+
+    rule: Anything accepted by parse_rule()
+    """
+    if rule_type not in RULE_TYPES:
+        raise ValueError(f"Unsupported rule type '{rule_type}'. It must be one of {RULE_TYPES}")
+    if position is not None and position < 0:
+        raise ValueError(f"The position must not be negative, not {position}")
+    if before is not None or after is not None:
+        position = get_rule_position(pan_config, device_group, rule_type, before, after)
+
+    rule_entry = parse_rule(rule)
+    compiled_rulebase = compile_rulebase(pan_config, device_group)
+    transformed = transform_rules([(device_group, rule_type, rule_entry)], *compiled_rulebase.group_mappings)
+    if not transformed:
+        raise ValueError(f"Rule '{rule_entry.get('name')}' is disabled")
+    rule_values = _fill_optional_values(transformed[0][4])
+    same_action_rules = compiled_rulebase.action_rules.get(_get_action(rule_entry), 0)
+
+    insertion_index = _get_insertion_index(compiled_rulebase.all_rules, device_group, rule_type, position)
+    split = bisect.bisect_left(compiled_rulebase.rule_indexes, insertion_index)
+    rule_matrix = compiled_rulebase.rule_matrix
+    prior_rules = (1 << split) - 1
+    later_rules = rule_matrix.all_rules & ~prior_rules
+
+    shadowed_by = rule_matrix.find_covering_rules(rule_values, prior_rules)
+    supersedes = rule_matrix.find_covered_rules(rule_values, prior_rules & same_action_rules & ~shadowed_by)
+    shadows = rule_matrix.find_covered_rules(rule_values, later_rules)
+
+    def get_rule_names(bitset):
+        return [compiled_rulebase.transformed_rules[i][:3] for i in iter_bits(bitset)]
+
+    return InsertionReport(get_rule_names(shadowed_by), get_rule_names(shadowed_by & same_action_rules),
+                           get_rule_names(shadows), get_rule_names(supersedes))
+
+
+def format_insertion_report(rule_name, report):
+    """Describes the report, one line per finding"""
+    def describe(rules):
+        return ", ".join(f"{dg}'s {ruletype} '{name}'" for dg, ruletype, name in rules)
+
+    lines = []
+    if report.redundant_with:
+        lines.append(f"'{rule_name}' is redundant, as it would be shadowed by rules with the same action: "
+                     f"{describe(report.redundant_with)}")
+    if len(report.shadowed_by) > len(report.redundant_with):
+        lines.append(f"'{rule_name}' would be shadowed by: {describe(report.shadowed_by)}")
+    if report.shadows:
+        lines.append(f"'{rule_name}' would shadow: {describe(report.shadows)}")
+    if report.supersedes:
+        lines.append(f"'{rule_name}' would supersede: {describe(report.supersedes)}")
+    if not lines:
+        lines.append(f"'{rule_name}' would not be shadowed by, shadow, or supersede any rules")
+    return lines
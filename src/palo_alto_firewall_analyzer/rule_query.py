@@ -0,0 +1,198 @@
+"""
+Finds every security rule in a Device Group (including those inherited from
+its parents) which matches a partial query, for audits such as which rules
+allow tcp/3389 from the untrust zone:
+
+    from palo_alto_firewall_analyzer.rule_query import load_rule_index
+
+    rule_index = load_rule_index(xml_config, 'my_dg', index_dir)
+    rule_index.query(source_zone='untrust', service='tcp/3389', action='allow')
+
+A rule matches if it contains all of the query's values, including through
+groups, address objects and service ports: its destination covers 10.1.2.3 if
+it includes 10.1.0.0/16, and it allows tcp/3389 if it includes tcp-3000-4000.
+'any' matches everything, unless include_any is False, which only finds the
+rules that actually list the values. Addresses and services are compared as
+in ShadowingRules (see shadowing_rules.py), so 'application-default' doesn't
+match any ports, and FQDNs are only matched by name. Disabled rules aren't included.
+
+The rules are transformed and compiled into a RuleMatrix (see compiled_rules.py),
+so each query is a handful of bitwise ANDs. Building the index takes about as long
+as ShadowingRules, so load_rule_index() saves it to a file, named after a digest of
+the configuration and the Device Group, and reuses it for later queries of the
+same configuration. Only load indexes from a directory which only you can write to,
+as they're pickled.
+"""
+
+import hashlib
+import os
+import pickle
+
+from palo_alto_firewall_analyzer.analyzer import parse_config
+from palo_alto_firewall_analyzer.compiled_rules import RuleMatrix, iter_bits
+from palo_alto_firewall_analyzer.intervals import AddressSet, IntervalSet, MAX_PORT, ServiceSet, get_service_intervals, parse_ports
+from palo_alto_firewall_analyzer.rule_insertion import get_compiled_rule_cache
+
+# Changed whenever the index's contents change, so that older index files aren't loaded
+INDEX_FORMAT_VERSION = 2
+
+# Query argument -> the field of the transformed rules it's compared with
+QUERY_FIELDS = {'source_zone': 'src_zones', 'destination_zone': 'dest_zones', 'source': 'src_members',
+                'destination': 'dest_members', 'application': 'application', 'service': 'service'}
+NEGATE_FIELDS = {'src_members': 'negate-source', 'dest_members': 'negate-destination'}
+# The fields of the transformed rules which are kept in the index
+INDEXED_FIELDS = (*QUERY_FIELDS.values(), *NEGATE_FIELDS.values())
+
+
+def parse_service_query(value):
+    """Converts a protocol with optional destination ports, such as tcp, tcp/3389, or udp/5060-5061,8000, to a ServiceSet"""
+    protocol, _, ports = value.partition('/')
+    port_intervals = parse_ports(ports) if ports else [(0, MAX_PORT)]
+    intervals = None if port_intervals is None else get_service_intervals(protocol.strip().lower(), port_intervals)
+    if intervals is None:
+        raise ValueError(f"'{value}' is not a tcp, udp, or sctp service with optional ports, such as tcp/3389")
+    return ServiceSet(IntervalSet(intervals))
+
+
+class RuleIndex:
+    """
+    transformed_rules: A list of (device group, rule type, rule name, rule entry, rule values),
+    as returned by shadowing_rules.transform_rules() with the address and service intervals.
+    The rule entries and the fields which can't be queried aren't kept, so the index
+    can be pickled without the configuration.
+    """
+
+    def __init__(self, transformed_rules):
+        # (device group, rule type, rule name, action), in evaluation order
+        self.rules = [(dg, ruletype, rule_name, rule_entry.findtext('./action'))
+                      for dg, ruletype, rule_name, rule_entry, _ in transformed_rules]
+        # Equal values are shared, so that the pickled index only includes each of them once
+        interned_values = {}
+        indexed_rules = []
+        for dg, ruletype, rule_name, _, rule_values in transformed_rules:
+            indexed_values = {field: interned_values.setdefault(rule_values[field], rule_values[field])
+                              for field in INDEXED_FIELDS}
+            indexed_rules.append((dg, ruletype, rule_name, None, indexed_values))
+        self.rule_matrix = RuleMatrix(indexed_rules)
+        # action -> bitset of the rules with that action
+        self._action_rules = {}
+        # field -> bitset of the rules containing 'any'
+        self._any_rules = dict.fromkeys(QUERY_FIELDS.values(), 0)
+        # field -> bitset of the rules which match the addresses outside of their members
+        self._negated_rules = dict.fromkeys(NEGATE_FIELDS, 0)
+        for i, (_, _, _, _, rule_values) in enumerate(indexed_rules):
+            rule_bit = 1 << i
+            action = self.rules[i][3]
+            self._action_rules[action] = self._action_rules.get(action, 0) | rule_bit
+            for field in self._any_rules:
+                if 'any' in rule_values[field]:
+                    self._any_rules[field] |= rule_bit
+            for field, negate_field in NEGATE_FIELDS.items():
+                if 'yes' in rule_values[negate_field]:
+                    self._negated_rules[field] |= rule_bit
+
+    def __len__(self):
+        return len(self.rules)
+
+    @staticmethod
+    def _build_query_values(query):
+        query_values = {}
+        for argument, value in query.items():
+            if argument not in QUERY_FIELDS:
+                raise TypeError(f"Unsupported query field '{argument}'. It must be one of {tuple(QUERY_FIELDS)}")
+            if value is None:
+                continue
+            field = QUERY_FIELDS[argument]
+            if field in NEGATE_FIELDS:
+                query_values[field] = AddressSet.from_members([value])
+            elif field == 'service':
+                query_values[field] = parse_service_query(value)
+            else:
+                query_values[field] = frozenset([value])
+        return query_values
+
+    def _matches_negated(self, index, query_values):
+        """Whether a rule with negated addresses matches the query's addresses"""
+        rule_values = self.rule_matrix.rules[index][4]
+        for field, values in query_values.items():
+            if field not in NEGATE_FIELDS:
+                continue
+            rule_members = rule_values[field]
+            if not self._negated_rules[field] & (1 << index):
+                if not ('any' in rule_members or rule_members >= values):
+                    return False
+            # A negated rule matches the addresses which none of its members include
+            elif 'any' in rule_members or rule_members.intervals & values.intervals or rule_members.names & values.names:
+                return False
+        return True
+
+    def find_matching_rules(self, include_any=True, action=None, **query):
+        """Returns the bitset of the rules which match the query. See query() for the arguments."""
+        query_values = self._build_query_values(query)
+        candidates = self.rule_matrix.all_rules if action is None else self._action_rules.get(action, 0)
+        if not include_any:
+            for field in query_values:
+                candidates &= ~self._any_rules[field]
+
+        negated = 0
+        for field in NEGATE_FIELDS:
+            if field in query_values:
+                negated |= self._negated_rules[field]
+        matching = self.rule_matrix.find_covering_rules(query_values, candidates & ~negated)
+        if candidates & negated:
+            # Rules with negated addresses are rare, so their addresses are compared one at a time
+            other_values = {field: values for field, values in query_values.items() if field not in NEGATE_FIELDS}
+            for i in iter_bits(self.rule_matrix.find_covering_rules(other_values, candidates & negated)):
+                if self._matches_negated(i, query_values):
+                    matching |= 1 << i
+        return matching
+
+    def query(self, include_any=True, action=None, **query):
+        """
+        Returns every rule which matches the query, in evaluation order, as (device group, rule type, rule name, action).
+        The query's fields are any of: source_zone, destination_zone, source, destination (an IP, network, range,
+        or the name of an address which isn't an IP, such as an FQDN), application, and service (e.g., tcp/3389).
+        Fields which are None or missing aren't compared.
+
+        include_any: Whether rules with 'any' for the queried fields match
+        action: Only find the rules with this action, such as 'allow'
+        """
+        return [self.rules[i] for i in iter_bits(self.find_matching_rules(include_any, action, **query))]
+
+
+def build_rule_index(pan_config, device_group):
+    """Builds the index for a Device Group's rules, without saving it"""
+    return RuleIndex(get_compiled_rule_cache(pan_config).get_transformed_rules(device_group))
+
+
+def get_rule_index_path(xml_config, device_group, index_dir):
+    """Returns the path of the index file for a configuration's Device Group"""
+    if isinstance(xml_config, str):
+        xml_config = xml_config.encode('utf-8')
+    digest = hashlib.sha256(f"{INDEX_FORMAT_VERSION}\0{device_group}\0".encode('utf-8'))
+    digest.update(xml_config)
+    return os.path.join(index_dir, f"rule_index_{digest.hexdigest()}.pickle")
+
+
+def load_rule_index(xml_config, device_group, index_dir):
+    """
+    Returns the RuleIndex for the configuration's Device Group, from index_dir if it was already built.
+    Otherwise, the configuration is parsed and the index is built and saved to index_dir.
+    Raises KeyError if the Device Group doesn't exist.
+    """
+    index_path = get_rule_index_path(xml_config, device_group, index_dir)
+    if os.path.exists(index_path):
+        with open(index_path, 'rb') as fh:
+            return pickle.load(fh)
+
+    pan_config = parse_config(xml_config)
+    if device_group not in pan_config.get_device_groups() + ['shared']:
+        raise KeyError(f"Device Group '{device_group}' does not exist")
+    rule_index = build_rule_index(pan_config, device_group)
+    os.makedirs(index_dir, exist_ok=True)
+    # Written to a temporary file first, so that a partially-written index is never loaded
+    temporary_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'wb') as fh:
+        pickle.dump(rule_index, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, index_path)
+    return rule_index
@@ -0,0 +1,144 @@
+"""
+Statistical sampling for very large rulebases. Instead of checking every
+rule or object, validators only check a random fraction of them, and the
+total number of problems is estimated from what was found in the sample.
+
+Whether an entry is sampled only depends on the seed, its Device Group,
+and its name (or uuid), so runs with the same seed check the same entries
+regardless of the order in which they're visited. Entries are still read
+in full wherever they're needed as context; for example, the unused object
+validators sample the objects to check, but look for them in every rule.
+
+Validators call is_sampled() for each rule or object they check. Validators
+which don't are run in full, and their totals are exact.
+
+The same hook also lets a validator check only a chosen set of entries, such
+as the rules and objects changed by a pending commit (see selecting()).
+"""
+
+import collections
+import contextlib
+import contextvars
+import hashlib
+import math
+
+# z-score for a 95% confidence interval
+CONFIDENCE_Z = 1.96
+
+# The estimated total problems for a validator, along with its 95% confidence interval
+SampleEstimate = collections.namedtuple('SampleEstimate', ['found', 'estimate', 'lower', 'upper', 'sampled', 'population'])
+
+
+class Sampler:
+    """Selects a reproducible random fraction of the entries checked by a single validator,
+    and keeps count of how many were considered and sampled"""
+
+    def __init__(self, fraction, seed=0):
+        if not 0 < fraction <= 1:
+            raise ValueError(f"The sample fraction must be between 0 and 1, not {fraction}")
+        self.fraction = fraction
+        self.seed = seed
+        self._threshold = int(fraction * 2**64)
+        # Number of entries considered, and how many of those were checked
+        self.population = 0
+        self.sampled = 0
+
+    def includes(self, device_group, entry):
+        self.population += 1
+        key = get_entry_key(entry)
+        digest = hashlib.blake2b(f"{self.seed}\0{device_group}\0{key}".encode('utf-8'), digest_size=8).digest()
+        if int.from_bytes(digest, 'big') < self._threshold:
+            self.sampled += 1
+            return True
+        return False
+
+    def estimate(self, found):
+        """Estimates the total number of problems from the number found in the sample.
+        This assumes that each problem is reported for a single sampled entry."""
+        population, sampled = self.population, self.sampled
+        if sampled == population:
+            # Everything was checked, so the total is exact
+            return SampleEstimate(found, found, found, found, sampled, population)
+        if sampled == 0:
+            return SampleEstimate(found, 0, 0, population, sampled, population)
+
+        # Wilson score interval for the proportion of entries with a problem, which
+        # remains meaningful when few (or no) problems are found in the sample
+        rate = min(found / sampled, 1)
+        z_squared = CONFIDENCE_Z ** 2
+        denominator = 1 + z_squared / sampled
+        center = (rate + z_squared / (2 * sampled)) / denominator
+        half_width = CONFIDENCE_Z * math.sqrt(rate * (1 - rate) / sampled + z_squared / (4 * sampled ** 2)) / denominator
+        # Finite population correction: the interval narrows as more of the entries are sampled
+        half_width *= math.sqrt((population - sampled) / (population - 1))
+
+        estimate = found * population / sampled
+        lower = min(estimate, max(found, (center - half_width) * population))
+        upper = max(estimate, (center + half_width) * population)
+        return SampleEstimate(found, round(estimate, 1), round(lower, 1), round(upper, 1), sampled, population)
+
+
+class EntrySelection:
+    """Selects the entries whose (Device Group, uuid or name) keys are listed.
+    A Device Group of None selects the entry in every Device Group."""
+
+    def __init__(self, entry_keys):
+        self.entry_keys = frozenset(entry_keys)
+        self.population = 0
+        self.sampled = 0
+
+    def includes(self, device_group, entry):
+        self.population += 1
+        key = get_entry_key(entry)
+        if (device_group, key) in self.entry_keys or (None, key) in self.entry_keys:
+            self.sampled += 1
+            return True
+        return False
+
+
+def get_entry_key(entry):
+    return entry.get('uuid') or entry.get('name')
+
+
+_current_sampler = contextvars.ContextVar('sampler', default=None)
+
+
+@contextlib.contextmanager
+def sampling(fraction, seed=0):
+    """Context manager which samples the entries checked by the validator being run within it.
+    A fraction of None checks everything, and yields None."""
+    if fraction is None:
+        yield None
+        return
+    sampler = Sampler(fraction, seed)
+    context_token = _current_sampler.set(sampler)
+    try:
+        yield sampler
+    finally:
+        _current_sampler.reset(context_token)
+
+
+@contextlib.contextmanager
+def selecting(entry_keys):
+    """Context manager which only checks the entries with the (Device Group, uuid or name) keys,
+    for validators which support sampling. Unlike sampling(), it applies to every validator
+    run within it, and no totals are estimated."""
+    selection = EntrySelection(entry_keys)
+    context_token = _current_sampler.set(selection)
+    try:
+        yield selection
+    finally:
+        _current_sampler.reset(context_token)
+
+
+def is_sampled(device_group, entry):
+    """Determines if a validator should check a rule or object. Always True when not sampling."""
+    sampler = _current_sampler.get()
+    if sampler is None:
+        return True
+    return sampler.includes(device_group, entry)
+
+
+def format_estimate(sample_estimate):
+    return (f"~{sample_estimate.estimate:g} (95% CI {sample_estimate.lower:g}-{sample_estimate.upper:g}), "
+            f"from {sample_estimate.found} found in {sample_estimate.sampled} of {sample_estimate.population} entries")
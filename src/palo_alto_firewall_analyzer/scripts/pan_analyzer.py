@@ -6,13 +6,23 @@ import os.path
 import sys
 import time
 import json
-
-# Used to trigger loading the validators and fixers
-import palo_alto_firewall_analyzer.validators
-import palo_alto_firewall_analyzer.fixers
-
-from palo_alto_firewall_analyzer.core import get_policy_validators, get_policy_fixers, ConfigurationSettings
-from palo_alto_firewall_analyzer.pan_helpers import load_config_package, load_API_key
+import collections
+import dataclasses
+import glob
+import xml.etree.ElementTree
+
+from palo_alto_firewall_analyzer.core import get_policy_validator, get_policy_validators, get_policy_fixer, ConfigurationSettings
+from palo_alto_firewall_analyzer.core import list_policy_validators, list_policy_fixers
+from palo_alto_firewall_analyzer.core import get_validator_timeout, validator_budget, ValidatorTimeout
+from palo_alto_firewall_analyzer.core import cached_dns_lookup, cached_dns_ex_lookup, cached_fqdn_lookup
+from palo_alto_firewall_analyzer.core import is_validator_affected, is_validator_selected, COST_CLASSES, COST_LINEAR
+from palo_alto_firewall_analyzer.pan_config import get_changed_entries, get_changed_sections
+from palo_alto_firewall_analyzer import metrics, pan_api
+from palo_alto_firewall_analyzer.problem_records import ProblemRecord
+from palo_alto_firewall_analyzer.results_store import ResultsStore, read_result_records
+from palo_alto_firewall_analyzer.progress import progress_reporter
+from palo_alto_firewall_analyzer.sampling import get_entry_key, sampling, selecting, format_estimate
+from palo_alto_firewall_analyzer.pan_helpers import clear_config_caches, load_config_package, load_API_key
 
 DEFAULT_CONFIG_DIR = os.path.expanduser("~" + os.sep + ".pan_policy_analyzer" + os.sep)
 DEFAULT_CONFIGFILE = DEFAULT_CONFIG_DIR + "PAN_CONFIG.cfg"
@@ -26,7 +36,12 @@ logger = logging.getLogger('palo_alto_firewall_analyzer')
 # General helper functions
 ###############################################################################
 def configure_logging(enable_debug_log, console_enabled):
-    logger.setLevel(logging.DEBUG)
+    # Only log debug messages when they're written somewhere, so that
+    # building them (e.g., large API responses) is skipped otherwise
+    if enable_debug_log:
+        logger.setLevel(logging.DEBUG)
+    else:
+        logger.setLevel(logging.INFO)
     formatter = logging.Formatter('%(name)s - %(levelname)s - %(message)s')
 
     if enable_debug_log:
@@ -43,6 +58,36 @@ def configure_logging(enable_debug_log, console_enabled):
         logger.addHandler(ch)
 
 
+def record_validator_metrics(validator_name, problems_per_devicegroup, duration, partial, progress_counts=None):
+    metrics.observe('pan_analyzer_validator_duration_seconds', "Time taken by each validator",
+                    {'validator': validator_name}, duration)
+    if progress_counts:
+        for counter, completed in progress_counts.items():
+            metrics.set_gauge('pan_analyzer_validator_progress', "Items checked by each validator, as reported by its progress counters",
+                              {'validator': validator_name, 'counter': counter}, completed)
+    metrics.set_gauge('pan_analyzer_validator_partial', "Whether a validator timed out and only has partial results",
+                      {'validator': validator_name}, int(partial))
+    # Watch mode re-runs the validator, so the Device Groups which no longer have any problems are removed
+    metrics.remove_gauges('pan_analyzer_problems', {'validator': validator_name})
+    for device_group, count in problems_per_devicegroup.items():
+        metrics.set_gauge('pan_analyzer_problems', "Problems detected per validator and Device Group",
+                          {'validator': validator_name, 'device_group': device_group}, count)
+
+
+def record_run_metrics(total_problems, runtime):
+    metrics.set_gauge('pan_analyzer_run_problems', "Total problems detected by the run", None, total_problems)
+    metrics.set_gauge('pan_analyzer_run_duration_seconds', "Time taken by the full run", None, runtime)
+    metrics.set_gauge('pan_analyzer_run_timestamp_seconds', "When the run completed", None, time.time())
+    for lookup_name, lookup_function in [('gethostbyname', cached_dns_lookup),
+                                         ('gethostbyname_ex', cached_dns_ex_lookup),
+                                         ('getfqdn', cached_fqdn_lookup)]:
+        cache_info = lookup_function.cache_info()
+        metrics.set_counter('pan_analyzer_dns_cache_hits', "DNS lookups answered from the cache",
+                            {'lookup': lookup_name}, cache_info.hits)
+        metrics.set_counter('pan_analyzer_dns_cache_misses', "DNS lookups which required a DNS query",
+                            {'lookup': lookup_name}, cache_info.misses)
+
+
 def run_policy_fixers(fixers, profilepackage, output_fname):
     problems = {}
     total_problems = 0
@@ -57,25 +102,146 @@ def run_policy_fixers(fixers, profilepackage, output_fname):
     return problems, total_problems
 
 
-def run_policy_validators(validators, profilepackage, output_fname):
+def run_policy_validators(validators, profilepackage, output_fname, validator_timeout=None,
+                          sample_fraction=None, sample_seed=0, estimates=None, runtimes=None):
+    """Runs the validators and returns their problems, the total number of problems,
+    and a mapping of the validators which timed out to how far they got.
+    When sampling, estimates is filled with the estimated totals of the validators which sampled.
+    If provided, runtimes is filled with how long each validator took."""
     problems = {}
     total_problems = 0
+    timed_out = {}
     logger.info("Running validators")
 
     for name, validator_values in validators.items():
         validator_name, validator_description, validator_function = validator_values
-        validator_problems = validator_function(profilepackage)
+        timeout = get_validator_timeout(profilepackage.settings, validator_name, validator_timeout)
+        validator_problems = []
+        validator_start_time = time.perf_counter()
+        with validator_budget(timeout), progress_reporter(validator_name) as reporter, \
+                sampling(sample_fraction, sample_seed) as sampler:
+            try:
+                # Validators yield their problems, so the problems found before a timeout are kept.
+                # Validators which return a list instead lose them.
+                for problem_entry in validator_function(profilepackage):
+                    validator_problems.append(problem_entry)
+            except ValidatorTimeout as err:
+                logger.warning(f"{validator_name} {err}. Its results are partial.")
+                timed_out[validator_name] = err.progress
+        validator_runtime = time.perf_counter() - validator_start_time
+        if runtimes is not None:
+            runtimes[validator_name] = validator_runtime
+        record_sample_estimate(validator_name, sampler, len(validator_problems), estimates)
+        problems_per_devicegroup = collections.Counter(entry.device_group for entry in validator_problems)
+        record_validator_metrics(validator_name, problems_per_devicegroup,
+                                 validator_runtime, validator_name in timed_out,
+                                 reporter.get_counts())
         problems[(validator_name, validator_description)] = validator_problems
         total_problems += len(validator_problems)
 
-    return problems, total_problems
+    return problems, total_problems, timed_out
+
+
+def record_sample_estimate(validator_name, sampler, found, estimates):
+    """Estimates a validator's total problems, if it sampled the entries it checked"""
+    if sampler is None or not sampler.population:
+        return None
+    sample_estimate = sampler.estimate(found)
+    logger.info(f"{validator_name} estimated total problems: {format_estimate(sample_estimate)}")
+    if estimates is not None:
+        estimates[validator_name] = sample_estimate
+    return sample_estimate
+
+
+def build_run_record(profilepackage):
+    config_xml = profilepackage.pan_config.config_xml
+    return {"record_type": "run",
+            "config_version": config_xml['version'],
+            "detail-version": config_xml['detail-version'],
+            "urldb": config_xml['urldb'],
+            "date_execution": EXECUTION_START_TIME,
+            "device_groups": profilepackage.device_groups,
+            "rule_limit_enabled": profilepackage.rule_limit_enabled}
+
+
+def get_problem_record(validator_name, problem_entry, pan_config=None):
+    """problem_entry is either a BadEntry, or a ProblemRecord which was already built
+    with the configuration that the problem was found in"""
+    if isinstance(problem_entry, ProblemRecord):
+        return problem_entry
+    return ProblemRecord.from_bad_entry(validator_name, problem_entry, pan_config)
 
 
-def write_analyzer_output(problems, fname, profilepackage, out_format = 'text'):
-    supported_output_formats = ["text", "json"]
+def build_problem_record(validator_name, problem_entry, pan_config=None):
+    problem_record = get_problem_record(validator_name, problem_entry, pan_config)
+    return {"record_type": "problem", **problem_record.to_dict()}
+
+
+def stream_policy_validators(validators, profilepackage, fname, validator_timeout=None,
+                             sample_fraction=None, sample_seed=0):
+    """Runs the validators and writes each problem to fname as a JSON line as soon as
+    it is reported, followed by a summary record for each validator. Nothing is held in
+    memory, so the results of the validators that completed survive a crash."""
+    total_problems = 0
+    logger.info("Running validators")
+
+    # Line buffering flushes every record to disk as soon as it's written
+    with open(fname, 'w', buffering=1) as fh:
+        fh.write(json.dumps(build_run_record(profilepackage)) + '\n')
+
+        for name, validator_values in validators.items():
+            validator_name, validator_description, validator_function = validator_values
+            validator_start_time = time.time()
+            validator_total = 0
+            problems_per_devicegroup = collections.Counter()
+            timeout = get_validator_timeout(profilepackage.settings, validator_name, validator_timeout)
+            progress = None
+            with validator_budget(timeout), progress_reporter(validator_name) as reporter, \
+                    sampling(sample_fraction, sample_seed) as sampler:
+                try:
+                    # Validators which are generators will have their problems written as they're found
+                    for problem_entry in validator_function(profilepackage):
+                        fh.write(json.dumps(build_problem_record(validator_name, problem_entry, profilepackage.pan_config)) + '\n')
+                        validator_total += 1
+                        problems_per_devicegroup[problem_entry.device_group] += 1
+                except ValidatorTimeout as err:
+                    logger.warning(f"{validator_name} {err}. Its results are partial.")
+                    progress = err.progress
+            sample_estimate = record_sample_estimate(validator_name, sampler, validator_total, None)
+
+            summary_record = {"record_type": "validator_summary",
+                              "validator_name": validator_name,
+                              "validator_description": validator_description,
+                              "total_problems": validator_total,
+                              "runtime": round(time.time() - validator_start_time, 2)}
+            if progress is not None:
+                summary_record["partial"] = True
+                summary_record["progress"] = progress
+            if sample_estimate is not None:
+                summary_record["estimate"] = sample_estimate._asdict()
+            record_validator_metrics(validator_name, problems_per_devicegroup,
+                                     time.time() - validator_start_time, progress is not None,
+                                     reporter.get_counts())
+            fh.write(json.dumps(summary_record) + '\n')
+            total_problems += validator_total
+
+        end_record = {"record_type": "run_summary",
+                      "runtime": round(time.time() - RUNTIME_START, 2),
+                      "total_problems": total_problems}
+        fh.write(json.dumps(end_record) + '\n')
+
+    return total_problems
+
+
+def write_analyzer_output(problems, fname, profilepackage, out_format = 'text', timed_out=None, estimates=None):
+    supported_output_formats = ["text", "json", "jsonl"]
     if out_format is None:
         out_format = 'text'
-        
+    if timed_out is None:
+        timed_out = {}
+    if estimates is None:
+        estimates = {}
+
     if out_format not in supported_output_formats:
         raise Exception(
             f"Unsupported output format of {out_format}! Output format must be one of {supported_output_formats}")
@@ -87,6 +253,10 @@ def write_analyzer_output(problems, fname, profilepackage, out_format = 'text'):
 
                 fh.write("#" * 80 + '\n')
                 fh.write(f"{validator_name}: {validator_description} ({len(problem_entries)})\n")
+                if validator_name in timed_out:
+                    fh.write(f"PARTIAL RESULTS: Timed out while checking {timed_out[validator_name]}\n")
+                if validator_name in estimates:
+                    fh.write(f"SAMPLED RESULTS: Estimated total problems {format_estimate(estimates[validator_name])}\n")
                 fh.write("#" * 80 + '\n')
                 for problem_entry in problem_entries:
                     # fh.write(f"Output for config name: {config_name} \n\n")
@@ -104,11 +274,18 @@ def write_analyzer_output(problems, fname, profilepackage, out_format = 'text'):
             
             problems = []
             for problem_entry in problem_entries:                
-                problem = {"desc":problem_entry.text}                
+                problem_record = get_problem_record(validator_name, problem_entry, profilepackage.pan_config)
+                problem = {"problem_id":problem_record.problem_id, "device_group":problem_entry.device_group,
+                           "entry_type":problem_entry.entry_type, "desc":problem_entry.text}
                 problems.append(problem)
                 total_problems+=1
                 
             entry = {"validator_name":validator_name, "problems":problems}            
+            if validator_name in timed_out:
+                entry["partial"] = True
+                entry["progress"] = timed_out[validator_name]
+            if validator_name in estimates:
+                entry["estimate"] = estimates[validator_name]._asdict()
             
             entries.append(entry)
         
@@ -118,6 +295,8 @@ def write_analyzer_output(problems, fname, profilepackage, out_format = 'text'):
                 "detail-version":profilepackage.pan_config.config_xml['detail-version'],
                 "urldb":profilepackage.pan_config.config_xml['urldb'],
                 "date_execution": EXECUTION_START_TIME,
+                "device_groups": profilepackage.device_groups,
+                "rule_limit_enabled": profilepackage.rule_limit_enabled,
                 "runtime":round(end_time - RUNTIME_START, 2),                
                 "total_problems": total_problems,
                 "entries":entries
@@ -125,6 +304,255 @@ def write_analyzer_output(problems, fname, profilepackage, out_format = 'text'):
         
         with open(fname,'w') as fh:
             json.dump(data,fh)
+    elif out_format == 'jsonl':
+        with open(fname, 'w') as fh:
+            for record in build_result_records(problems, profilepackage, timed_out, estimates):
+                fh.write(json.dumps(record) + '\n')
+
+
+def build_result_records(problems, profilepackage, timed_out=None, estimates=None, runtimes=None):
+    """Yields the records written by the jsonl output, for problems which were already found"""
+    if timed_out is None:
+        timed_out = {}
+    if estimates is None:
+        estimates = {}
+    if runtimes is None:
+        runtimes = {}
+    total_problems = 0
+    yield build_run_record(profilepackage)
+    for validator_info, problem_entries in problems.items():
+        validator_name, validator_description = validator_info
+        for problem_entry in problem_entries:
+            yield build_problem_record(validator_name, problem_entry, profilepackage.pan_config)
+        summary_record = {"record_type": "validator_summary",
+                          "validator_name": validator_name,
+                          "validator_description": validator_description,
+                          "total_problems": len(problem_entries)}
+        if validator_name in runtimes:
+            summary_record["runtime"] = round(runtimes[validator_name], 2)
+        if validator_name in timed_out:
+            summary_record["partial"] = True
+            summary_record["progress"] = timed_out[validator_name]
+        if validator_name in estimates:
+            summary_record["estimate"] = estimates[validator_name]._asdict()
+        yield summary_record
+        total_problems += len(problem_entries)
+    yield {"record_type": "run_summary",
+           "runtime": round(time.time() - RUNTIME_START, 2),
+           "total_problems": total_problems}
+
+
+def get_watched_xml_file(xml_path):
+    """Returns xml_path, or the most recently modified XML file if xml_path is a directory"""
+    if not os.path.isdir(xml_path):
+        return xml_path
+    xml_files = glob.glob(os.path.join(xml_path, '*.xml'))
+    if not xml_files:
+        return None
+    return max(xml_files, key=os.path.getmtime)
+
+
+def get_watched_version(xml_path, panorama, api_key):
+    """Returns a value that changes whenever a new configuration is available"""
+    if xml_path:
+        xml_file = get_watched_xml_file(xml_path)
+        if xml_file is None:
+            return None
+        file_stat = os.stat(xml_file)
+        return (xml_file, file_stat.st_mtime_ns, file_stat.st_size)
+    return pan_api.get_config_version(panorama, api_key)
+
+
+def watch_policy_validators(validators, parsed_args, configuration_settings, api_key, output_fname):
+    """Polls for new configurations, either the newest XML file in a directory or a new
+    config version via the API. When one is found, only the validators whose inputs changed
+    are re-run, and the output is rewritten with the combined results.
+    The problems are kept as ProblemRecords, built with the configuration they were found in, so the
+    results of the validators which aren't re-run don't keep the older configurations alive."""
+    problems = {}
+    timed_out = {}
+    section_digests = {}
+    last_version = None
+    panorama = configuration_settings.get('panorama')
+
+    logger.info(f"Watching for configuration changes every {parsed_args.watch_interval} seconds")
+    while True:
+        version = get_watched_version(parsed_args.xml, panorama, api_key)
+        if version is not None and version != last_version:
+            start_time = time.time()
+            clear_config_caches()
+            xml_file = get_watched_xml_file(parsed_args.xml) if parsed_args.xml else None
+            try:
+                profilepackage = load_config_package(configuration_settings, api_key, parsed_args.device_group,
+                                                     parsed_args.limit, xml_file)
+            except xml.etree.ElementTree.ParseError as err:
+                # The export may still be in the process of being written
+                logger.warning(f"Unable to parse the configuration, will retry: {err}")
+                time.sleep(parsed_args.watch_interval)
+                continue
+
+            new_section_digests = profilepackage.pan_config.get_section_digests()
+            if last_version is None:
+                affected_validators = validators
+            else:
+                changed_sections = get_changed_sections(section_digests, new_section_digests)
+                affected_validators = {name: validator_values for name, validator_values in validators.items()
+                                       if is_validator_affected(name, changed_sections)}
+            logger.info(f"New configuration detected. Running {len(affected_validators)} of {len(validators)} validators")
+
+            new_problems, _, new_timed_out = run_policy_validators(affected_validators, profilepackage, output_fname,
+                                                                   parsed_args.validator_timeout)
+            for validator_name in affected_validators:
+                timed_out.pop(validator_name, None)
+            timed_out.update(new_timed_out)
+            for (validator_name, _), validator_problems in new_problems.items():
+                problems[validator_name] = [ProblemRecord.from_bad_entry(validator_name, problem_entry, profilepackage.pan_config)
+                                            for problem_entry in validator_problems]
+
+            all_problems = {(validator_name, validator_description): problems[validator_name]
+                            for validator_name, validator_description, _ in validators.values()}
+            total_problems = sum(len(validator_problems) for validator_problems in all_problems.values())
+            write_analyzer_output(all_problems, output_fname, profilepackage, parsed_args.output, timed_out)
+            end_time = time.time()
+            logger.info(f"Validation took {round(end_time - start_time, 2)} seconds and detected a total of "
+                        f"{total_problems} problems. Wrote results to {output_fname}")
+            if parsed_args.metrics_file:
+                record_run_metrics(total_problems, end_time - start_time)
+                metrics.write_textfile(parsed_args.metrics_file)
+
+            section_digests = new_section_digests
+            last_version = version
+        time.sleep(parsed_args.watch_interval)
+
+
+def get_entry_texts(entry):
+    """Returns the text of every element within an entry, which includes the names of the objects it uses"""
+    return {element.text.strip() for element in entry.iter() if element.text and element.text.strip()}
+
+
+def get_review_entry_keys(pan_config, added_or_modified, modified_or_removed):
+    """
+    Returns the (Device Group, uuid or name) keys of the entries to check for a change:
+    the added and modified entries, the objects they use (or used) which may now be unused,
+    and the rules which use a changed object, directly or through a group.
+    """
+    entry_keys = set()
+    changed_object_names = set()
+    for device_group, entry_type, entry in added_or_modified:
+        entry_keys.add((device_group, get_entry_key(entry)))
+    for device_group, entry_type, entry in added_or_modified + modified_or_removed:
+        entry_keys.update((None, text) for text in get_entry_texts(entry))
+        if entry_type in pan_config.SUPPORTED_OBJECT_TYPES:
+            changed_object_names.add(entry.get('name'))
+    if not changed_object_names:
+        return entry_keys
+
+    all_device_groups = pan_config.get_device_groups() + ['shared']
+    group_texts = {}
+    for device_group in all_device_groups:
+        for object_type in ('AddressGroups', 'ServiceGroups', 'ApplicationGroups'):
+            for entry in pan_config.get_devicegroup_object(object_type, device_group):
+                group_texts[entry.get('name')] = get_entry_texts(entry)
+    # Groups can contain other groups, so repeat until no more groups are found
+    while True:
+        containing_groups = {name for name, texts in group_texts.items()
+                             if name not in changed_object_names and not texts.isdisjoint(changed_object_names)}
+        if not containing_groups:
+            break
+        changed_object_names |= containing_groups
+
+    for device_group in all_device_groups:
+        for policy_type in pan_config.SUPPORTED_POLICY_TYPES:
+            for entry in pan_config.get_devicegroup_policy(policy_type, device_group):
+                if not get_entry_texts(entry).isdisjoint(changed_object_names):
+                    entry_keys.add((device_group, get_entry_key(entry)))
+    return entry_keys
+
+
+def get_review_device_groups(profilepackage, changed_sections):
+    """The Device Groups with changed sections, along with the Device Groups which inherit from them"""
+    changed_device_groups = {device_group for device_group, _ in changed_sections}
+    if None in changed_device_groups or 'shared' in changed_device_groups:
+        return list(profilepackage.device_groups)
+    review_device_groups = set()
+    for device_group in changed_device_groups:
+        if device_group in profilepackage.devicegroup_objects:
+            review_device_groups.update(profilepackage.devicegroup_objects[device_group]['all_child_device_groups'])
+    return [device_group for device_group in profilepackage.device_groups if device_group in review_device_groups]
+
+
+def find_new_problems(validators, running_profilepackage, candidate_profilepackage, validator_timeout=None):
+    """
+    Finds the problems which the candidate configuration's changes would add to the running configuration.
+    Only the validators whose inputs changed are run, only on the affected Device Groups, and
+    validators which support sampling only check the changed entries (see get_review_entry_keys).
+    They're run against both configurations, so that problems which already exist aren't reported.
+    Returns the new problems, and the validators which timed out.
+    """
+    running_config = running_profilepackage.pan_config
+    candidate_config = candidate_profilepackage.pan_config
+    changed_sections = get_changed_sections(running_config.get_section_digests(), candidate_config.get_section_digests())
+    affected_validators = {name: validator_values for name, validator_values in validators.items()
+                           if is_validator_affected(name, changed_sections)}
+    if not affected_validators:
+        return {}, {}
+    added_or_modified, modified_or_removed = get_changed_entries(running_config, candidate_config, changed_sections)
+    logger.info(f"{len(added_or_modified)} entries were added or modified and {len(modified_or_removed)} were modified "
+                f"or removed. Running {len(affected_validators)} of {len(validators)} validators")
+    entry_keys = get_review_entry_keys(candidate_config, added_or_modified, modified_or_removed)
+    entry_keys |= get_review_entry_keys(running_config, [], modified_or_removed)
+
+    review_device_groups = get_review_device_groups(candidate_profilepackage, changed_sections)
+    candidate_profilepackage = dataclasses.replace(candidate_profilepackage, device_groups=review_device_groups)
+    running_profilepackage = dataclasses.replace(
+        running_profilepackage, device_groups=[device_group for device_group in review_device_groups
+                                               if device_group in running_profilepackage.devicegroup_objects])
+    with selecting(entry_keys):
+        running_problems, _, _ = run_policy_validators(affected_validators, running_profilepackage, None,
+                                                       validator_timeout)
+        candidate_problems, _, timed_out = run_policy_validators(affected_validators, candidate_profilepackage, None,
+                                                                 validator_timeout)
+
+    new_problems = {}
+    for validator_info, problem_entries in candidate_problems.items():
+        validator_name, _ = validator_info
+        existing_problems = {ProblemRecord.from_bad_entry(validator_name, problem_entry, running_config).problem_id
+                             for problem_entry in running_problems[validator_info]}
+        new_problems[validator_info] = [
+            problem_entry for problem_entry in problem_entries
+            if ProblemRecord.from_bad_entry(validator_name, problem_entry, candidate_config).problem_id not in existing_problems]
+    return new_problems, timed_out
+
+
+def review_candidate_changes(validators, parsed_args, configuration_settings, api_key, output_fname):
+    """Checks the candidate configuration's uncommitted changes against the running configuration.
+    Returns the exit code, which is 1 if the changes add problems."""
+    start_time = time.time()
+    if parsed_args.candidate_xml:
+        running_xml, candidate_xml = parsed_args.xml, parsed_args.candidate_xml
+    else:
+        running_xml, candidate_xml = None, None
+    running_profilepackage = load_config_package(configuration_settings, api_key, parsed_args.device_group,
+                                                 parsed_args.limit, running_xml, 'running')
+    candidate_profilepackage = load_config_package(configuration_settings, api_key, parsed_args.device_group,
+                                                   parsed_args.limit, candidate_xml, 'candidate')
+
+    new_problems, timed_out = find_new_problems(validators, running_profilepackage, candidate_profilepackage,
+                                                parsed_args.validator_timeout)
+    total_problems = sum(len(problem_entries) for problem_entries in new_problems.values())
+    write_analyzer_output(new_problems, output_fname, candidate_profilepackage, parsed_args.output, timed_out)
+    for (validator_name, _), problem_entries in new_problems.items():
+        for problem_entry in problem_entries:
+            logger.warning(f"New problem from {validator_name}: {problem_entry.text}")
+    logger.info(f"Review took {round(time.time() - start_time, 2)} seconds and found {total_problems} new problems. "
+                f"Wrote results to {output_fname}")
+    if total_problems:
+        return 1
+    if timed_out:
+        logger.warning(f"Unable to fully review the changes, as {', '.join(timed_out)} timed out")
+        return 2
+    return 0
+
 
 def build_output_fname(parsed_args):
     # Build the name of the output file
@@ -152,33 +580,76 @@ def build_output_fname(parsed_args):
     else:
         limit_string = ""
 
+    if parsed_args.sample is not None:
+        sample_string = f"_sample{parsed_args.sample:g}"
+    elif parsed_args.candidate or parsed_args.candidate_xml:
+        sample_string = "_candidate"
+    else:
+        sample_string = ""
+
     if parsed_args.output == 'json':
         extension = '.json'
+    elif parsed_args.output == 'jsonl':
+        extension = '.jsonl'
     else:    
         extension = '.txt'
 
-    output_fname = f'pan_analyzer_output_{EXECUTION_START_TIME}{devicegroup_string}{xml_string}{validators_string}{fixers_string}{limit_string}'+extension
+    output_fname = f'pan_analyzer_output_{EXECUTION_START_TIME}{devicegroup_string}{xml_string}{validators_string}{fixers_string}{limit_string}{sample_string}'+extension
     return output_fname
 
 
-def main():
-    description = "Checks or fixes Palo Alto Firewall issues."
-    validator_listing = '\n'.join(f" * {readable_name} - {description}" for readable_name, description, f in
-                                       sorted(get_policy_validators().values()))
-    validator_epilog = f"""Here is a detailed list of the {len(get_policy_validators().keys())} supported validators:\n{validator_listing}\n"""
+def build_epilog():
+    validators = list_policy_validators()
+    validator_listing = '\n'.join(f" * {readable_name} - {description}" for readable_name, description in
+                                       sorted(validators.items()))
+    validator_epilog = f"""Here is a detailed list of the {len(validators)} supported validators:\n{validator_listing}\n"""
+
+    fixers = list_policy_fixers()
+    fixer_listing = '\n'.join(f" * {readable_name} - {description}" for readable_name, description in
+                                       sorted(fixers.items()))
+    fixer_epilog = f"""Here is a detailed list of the {len(fixers)} supported fixers:\n{fixer_listing}\n"""
+
+    return validator_epilog + "\n\n" + fixer_epilog
+
+
+class AnalyzerArgumentParser(argparse.ArgumentParser):
+    """Only lists the validators and fixers when the help is displayed,
+    as finding the installed plugins is slow"""
+
+    def format_help(self):
+        if self.epilog is None:
+            self.epilog = build_epilog()
+        return super().format_help()
+
+
+def select_validators(parser, validator_names, max_cost=None, allow_network=True):
+    """Loads the requested validators (or all of them), only importing the modules that are needed.
+    Validators more expensive than max_cost, or that use DNS or the API when allow_network
+    is False, are skipped. Returns the validators and the names of those that were skipped."""
+    if not validator_names:
+        if max_cost is None and allow_network:
+            return get_policy_validators(), []
+        validator_names = list_policy_validators()
+    validators = {}
+    skipped = []
+    for validator_name in validator_names:
+        try:
+            if not is_validator_selected(validator_name, max_cost, allow_network):
+                skipped.append(validator_name)
+                continue
+            validators[validator_name] = get_policy_validator(validator_name)
+        except KeyError:
+            parser.error(f"argument --validator: invalid choice: '{validator_name}' (see --help for the supported validators)")
+    return validators, skipped
 
-    fixer_listing = '\n'.join(f" * {readable_name} - {description}" for readable_name, description, f in
-                                       sorted(get_policy_fixers().values()))
-    fixer_epilog = f"""Here is a detailed list of the {len(get_policy_fixers().keys())} supported fixers:\n{fixer_listing}\n"""
 
-    epilog = validator_epilog + "\n\n" + fixer_epilog
-    parser = argparse.ArgumentParser(description=description, epilog=epilog,
-                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+def main():
+    description = "Checks or fixes Palo Alto Firewall issues."
+    parser = AnalyzerArgumentParser(description=description, formatter_class=argparse.RawDescriptionHelpFormatter)
     # TODO: Make this a positional argument, where only one can be selected, and influences which of the remaining arguments are available.
     group = parser.add_mutually_exclusive_group()
-    group.add_argument("--validator", help="Only run specified validators (repeat for multiple)",
-                        choices=sorted(get_policy_validators().keys()), action='append')
-    group.add_argument("--fixer", help="Fixer to run", choices=sorted(get_policy_fixers().keys()))
+    group.add_argument("--validator", help="Only run specified validators (repeat for multiple)", action='append')
+    group.add_argument("--fixer", help="Fixer to run")
 
     parser.add_argument("--device-group", help="Device Group to run through validator (defaults to all)")
     parser.add_argument("--quiet", help="Silence output", action='store_true')
@@ -190,12 +661,63 @@ def main():
 
     parser.add_argument("--debug", help="Write all debug output to pan_validator_debug_YYMMDD_HHMMSS.log", action='store_true')
     parser.add_argument("--limit", help="Limit processing to the first N rules (useful for debugging)", type=int)
-    parser.add_argument("--output", help="Type File Output (text, json), default = text", type=str)
+    parser.add_argument("--watch", help="Keep running, and re-run the affected validators whenever a new configuration is available. "
+                                        "With --xml, watches the file or the newest XML file in the directory, otherwise polls the API "
+                                        "for a new config version", action='store_true')
+    parser.add_argument("--watch-interval", help="Seconds between checks for a new configuration (default is 10)",
+                        type=float, default=10)
+    parser.add_argument("--metrics-file", help="Write run metrics to this file in the OpenMetrics text format "
+                                               "(e.g., for a node-exporter textfile collector)")
+    parser.add_argument("--validator-timeout", help="Stop each validator after this many seconds and report its results as partial. "
+                                                    "Per-validator budgets in the config file take precedence", type=float)
+    parser.add_argument("--output", help="Type File Output (text, json, jsonl), default = text. "
+                                         "jsonl writes each problem as soon as it's found", type=str)
+    parser.add_argument("--max-cost", help="Skip validators which are more expensive than this cost class. "
+                                           "Validators with an unknown cost (e.g., from plugins) are skipped", choices=COST_CLASSES)
+    parser.add_argument("--no-network", help="Skip validators which perform DNS lookups or API requests", action='store_true')
+    parser.add_argument("--fast-only", help="Only run the fast validators, for pre-commit checks. Same as --max-cost linear --no-network",
+                        action='store_true')
+    parser.add_argument("--sample", help="Only check a random fraction (between 0 and 1) of the rules and objects in each Device Group, "
+                                         "and report the estimated total problems with 95%% confidence intervals", type=float)
+    parser.add_argument("--sample-seed", help="Seed for --sample. Runs with the same seed check the same rules and objects (default is 0)",
+                        type=int, default=0)
+    parser.add_argument("--results-db", help="Also add this run's problems and metrics to a SQLite database, "
+                                             "to keep a history of the results across runs")
+    parser.add_argument("--candidate", help="Only check the candidate configuration's uncommitted changes, by comparing it with the "
+                                            "running configuration. Exits with 1 if the changes add problems, or 2 if a validator "
+                                            "timed out (for pre-commit checks)", action='store_true')
+    parser.add_argument("--candidate-xml", help="With --candidate, read the candidate configuration from this XML file, "
+                                                "and the running configuration from --xml")
     parsed_args = parser.parse_args()
+    if parsed_args.candidate_xml and not parsed_args.xml:
+        parser.error("argument --candidate-xml: requires --xml for the running configuration")
+    if parsed_args.candidate_xml:
+        parsed_args.candidate = True
+    if parsed_args.sample is not None and not 0 < parsed_args.sample <= 1:
+        parser.error("argument --sample: must be between 0 and 1")
+
+    max_cost = parsed_args.max_cost
+    allow_network = not parsed_args.no_network
+    if parsed_args.fast_only:
+        max_cost = COST_LINEAR
+        allow_network = False
+
+    validators = None
+    skipped_validators = []
+    fixers = None
+    if parsed_args.fixer:
+        try:
+            fixers = {parsed_args.fixer: get_policy_fixer(parsed_args.fixer)}
+        except KeyError:
+            parser.error(f"argument --fixer: invalid choice: '{parsed_args.fixer}' (see --help for the supported fixers)")
+    else:
+        validators, skipped_validators = select_validators(parser, parsed_args.validator, max_cost, allow_network)
 
     configure_logging(parsed_args.debug, not parsed_args.quiet)
     logger.debug(f"Script launched with the following arguments {' '.join(sys.argv)}")
     logger.debug(f"Execution began at {EXECUTION_START_TIME}")
+    if skipped_validators:
+        logger.info(f"Skipping {len(skipped_validators)} validators due to their cost: {', '.join(skipped_validators)}")
 
     output_fname = build_output_fname(parsed_args)
     logger.debug(f"Writing output to {output_fname}")
@@ -218,26 +740,67 @@ def main():
         logger.error("Cannot run fixers against an XML file! --fixer and --xml are mutually exclusive")
         return 1
 
+    if parsed_args.candidate:
+        if parsed_args.fixer or parsed_args.watch or parsed_args.sample is not None or parsed_args.results_db:
+            logger.error("--candidate cannot be combined with --fixer, --watch, --sample, or --results-db")
+            return 1
+        if parsed_args.xml and not parsed_args.candidate_xml:
+            logger.error("--candidate with --xml requires --candidate-xml for the candidate configuration")
+            return 1
+        return review_candidate_changes(validators, parsed_args, configuration_settings, api_key, output_fname)
+
+    if parsed_args.watch:
+        if parsed_args.fixer:
+            logger.error("Cannot run fixers in watch mode! --fixer and --watch are mutually exclusive")
+            return 1
+        if parsed_args.sample is not None:
+            logger.error("Cannot sample in watch mode! --sample and --watch are mutually exclusive")
+            return 1
+        if parsed_args.results_db:
+            logger.error("Cannot store results in watch mode! --results-db and --watch are mutually exclusive")
+            return 1
+        try:
+            watch_policy_validators(validators, parsed_args, configuration_settings, api_key, output_fname)
+        except KeyboardInterrupt:
+            logger.info("Stopped watching for configuration changes")
+        return 0
+
     start_time = time.time()
     profilepackage = load_config_package(configuration_settings, api_key, parsed_args.device_group,
                                          parsed_args.limit, parsed_args.xml)
 
     if parsed_args.fixer:
-        fixers = {parsed_args.fixer: get_policy_fixers()[parsed_args.fixer]}
         problems, total_problems = run_policy_fixers(fixers, profilepackage, output_fname)
+        write_analyzer_output(problems, output_fname, profilepackage, parsed_args.output)
     else:
-        if parsed_args.validator:
-            validators = {validator: get_policy_validators()[validator] for validator in parsed_args.validator}
+        if parsed_args.output == 'jsonl':
+            total_problems = stream_policy_validators(validators, profilepackage, output_fname,
+                                                      parsed_args.validator_timeout,
+                                                      parsed_args.sample, parsed_args.sample_seed)
+            result_records = read_result_records(output_fname)
         else:
-            validators = get_policy_validators()
-        problems, total_problems = run_policy_validators(validators, profilepackage, output_fname)
-
-    write_analyzer_output(problems, output_fname, profilepackage, parsed_args.output)
+            estimates = {}
+            runtimes = {}
+            problems, total_problems, timed_out = run_policy_validators(validators, profilepackage, output_fname,
+                                                                        parsed_args.validator_timeout,
+                                                                        parsed_args.sample, parsed_args.sample_seed,
+                                                                        estimates, runtimes)
+            write_analyzer_output(problems, output_fname, profilepackage, parsed_args.output, timed_out, estimates)
+            result_records = build_result_records(problems, profilepackage, timed_out, estimates, runtimes)
+        if parsed_args.results_db:
+            with ResultsStore(parsed_args.results_db) as results_store:
+                run_id = results_store.add_run(result_records)
+            logger.info(f"Added the results to {parsed_args.results_db} as run {run_id}")
     end_time = time.time()
 
     logger.info(f"Full run took {round(end_time - start_time, 2)} seconds")
     logger.info(f"Detected a total of {total_problems} problems")
 
+    if parsed_args.metrics_file:
+        record_run_metrics(total_problems, end_time - start_time)
+        metrics.write_textfile(parsed_args.metrics_file)
+        logger.debug(f"Wrote metrics to {parsed_args.metrics_file}")
+
     return 0
 
 
@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+"""
+Runs a local HTTP service which analyzes configurations and returns the problems as JSON.
+Parsing and indexing a large configuration is slow, so the most recently used
+configurations are kept in memory and reused by later requests.
+
+Endpoints:
+    GET  /validators                          List the validators
+    GET  /configs                             List the cached configurations
+    POST /configs                             Upload an XML configuration, and return its config_id
+    POST /analyze?validator=X                 Analyze the XML configuration in the request body
+    GET  /analyze?config_id=ID&validator=X    Analyze a previously-uploaded configuration
+    GET  /analyze?snapshot=NAME&validator=X   Analyze an XML file from the --snapshot-dir
+    POST /whatif?config_id=ID&device_group=DG Report how the proposed security rule in the request
+                                              body (XML or JSON) would interact with the existing rules
+
+/analyze runs all validators unless one or more are specified with 'validator',
+and checks all Device Groups unless one or more are specified with 'device_group'.
+
+/whatif also accepts a snapshot instead of a config_id, and adds the rule to the end of
+the Device Group's pre-rules unless 'rule_type', 'position', 'before' or 'after' are specified.
+"""
+
+import argparse
+import collections
+import hashlib
+import http.server
+import json
+import logging
+import os
+import threading
+import time
+import urllib.parse
+import xml.etree.ElementTree
+
+from palo_alto_firewall_analyzer.analyzer import analyze, load_profilepackage
+from palo_alto_firewall_analyzer.core import BadEntry, ConfigurationSettings, list_policy_validators
+from palo_alto_firewall_analyzer.problem_records import ProblemRecord
+from palo_alto_firewall_analyzer.rule_insertion import analyze_rule_insertion, parse_rule
+
+logger = logging.getLogger('palo_alto_firewall_analyzer')
+
+
+class ServerError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ConfigCache:
+    """
+    A least-recently-used cache of indexed configurations (ProfilePackages),
+    keyed by the sha256 of the XML they were loaded from.
+    """
+
+    def __init__(self, max_size, settings):
+        self.max_size = max_size
+        self.settings = settings
+        self._profilepackages = collections.OrderedDict()
+        # Mapping of (path, mtime, size) -> config_id, so snapshots aren't re-read to be hashed
+        self._snapshot_ids = {}
+        self._lock = threading.Lock()
+
+    def get(self, config_id):
+        with self._lock:
+            if config_id not in self._profilepackages:
+                return None
+            self._profilepackages.move_to_end(config_id)
+            return self._profilepackages[config_id]
+
+    def list(self):
+        with self._lock:
+            return list(self._profilepackages)
+
+    def add(self, xml_config):
+        """Returns the config_id, the ProfilePackage, and whether it was already cached"""
+        config_id = hashlib.sha256(xml_config).hexdigest()
+        profilepackage = self.get(config_id)
+        if profilepackage is not None:
+            return config_id, profilepackage, True
+
+        # Loading can take a while, so other requests are not blocked in the meantime
+        try:
+            profilepackage = load_profilepackage(xml_config, self.settings)
+        except xml.etree.ElementTree.ParseError as err:
+            raise ServerError(400, f"Unable to parse the configuration: {err}")
+        evicted = []
+        with self._lock:
+            self._profilepackages[config_id] = profilepackage
+            while len(self._profilepackages) > self.max_size:
+                evicted.append(self._profilepackages.popitem(last=False)[1])
+        for evicted_profilepackage in evicted:
+            # Only the evicted configuration's lookups are dropped, so the remaining ones stay warm.
+            # Requests which are still analyzing it will re-populate them as needed.
+            evicted_profilepackage.pan_config.clear_lookups()
+        return config_id, profilepackage, False
+
+    def add_file(self, path):
+        file_stat = os.stat(path)
+        snapshot_key = (path, file_stat.st_mtime_ns, file_stat.st_size)
+        with self._lock:
+            config_id = self._snapshot_ids.get(snapshot_key)
+        if config_id is not None:
+            profilepackage = self.get(config_id)
+            if profilepackage is not None:
+                return config_id, profilepackage, True
+        with open(path, 'rb') as fh:
+            config_id, profilepackage, cached = self.add(fh.read())
+        with self._lock:
+            self._snapshot_ids[snapshot_key] = config_id
+        return config_id, profilepackage, cached
+
+
+class AnalyzerRequestHandler(http.server.BaseHTTPRequestHandler):
+    server_version = "pan_analyzer_server"
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def handle_request(self, method):
+        url = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        routes = {('GET', '/validators'): self.get_validators,
+                  ('GET', '/configs'): self.get_configs,
+                  ('POST', '/configs'): self.post_config,
+                  ('GET', '/analyze'): self.analyze,
+                  ('POST', '/analyze'): self.analyze,
+                  ('POST', '/whatif'): self.whatif}
+        try:
+            if (method, url.path) not in routes:
+                raise ServerError(404, f"Unknown endpoint: {method} {url.path}")
+            response = routes[(method, url.path)](query)
+            self.send_json(200, response)
+        except ServerError as err:
+            self.send_json(err.status, {"error": str(err)})
+        except Exception as err:
+            logger.exception(f"Error handling {method} {self.path}")
+            self.send_json(500, {"error": str(err)})
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} - {format % args}")
+
+    def read_body(self, expected_content="an XML configuration"):
+        content_length = int(self.headers.get('Content-Length') or 0)
+        if not content_length:
+            raise ServerError(400, f"The request body must contain {expected_content}")
+        return self.rfile.read(content_length)
+
+    def get_validators(self, query):
+        return {"validators": list_policy_validators()}
+
+    def get_configs(self, query):
+        return {"configs": self.server.config_cache.list()}
+
+    def post_config(self, query):
+        config_id, profilepackage, cached = self.server.config_cache.add(self.read_body())
+        return {"config_id": config_id, "cached": cached, "device_groups": profilepackage.device_groups}
+
+    def load_requested_config(self, query, from_body=True):
+        config_cache = self.server.config_cache
+        if self.command == 'POST' and from_body:
+            return config_cache.add(self.read_body())
+        if 'config_id' in query:
+            config_id = query['config_id'][0]
+            profilepackage = config_cache.get(config_id)
+            if profilepackage is None:
+                raise ServerError(404, f"Configuration '{config_id}' is not cached. Please upload it again.")
+            return config_id, profilepackage, True
+        if 'snapshot' in query:
+            snapshot_dir = self.server.snapshot_dir
+            # Only file names are accepted, so that other files can't be read
+            snapshot_name = os.path.basename(query['snapshot'][0])
+            if not snapshot_dir or not os.path.isfile(os.path.join(snapshot_dir, snapshot_name)):
+                raise ServerError(404, f"Snapshot '{snapshot_name}' does not exist")
+            return config_cache.add_file(os.path.join(snapshot_dir, snapshot_name))
+        if not from_body:
+            raise ServerError(400, "Specify a config_id or snapshot")
+        raise ServerError(400, "Either POST a configuration, or specify a config_id or snapshot")
+
+    def analyze(self, query):
+        available_validators = list_policy_validators()
+        validator_names = query.get('validator')
+        for validator_name in validator_names or []:
+            if validator_name not in available_validators:
+                raise ServerError(400, f"Unknown validator '{validator_name}'")
+        device_groups = query.get('device_group')
+
+        start_time = time.perf_counter()
+        config_id, profilepackage, cached = self.load_requested_config(query)
+        if device_groups:
+            unknown_device_groups = set(device_groups) - set(profilepackage.device_groups)
+            if unknown_device_groups:
+                raise ServerError(400, f"Unknown Device Groups: {sorted(unknown_device_groups)}")
+
+        problems = []
+        timed_out = {}
+        for result in analyze(profilepackage, validator_names, device_groups,
+                              validator_timeout=self.server.validator_timeout, timed_out=timed_out):
+            problem_record = ProblemRecord.from_bad_entry(result.validator_name, BadEntry(*result[1:]), profilepackage.pan_config)
+            problems.append({"problem_id": problem_record.problem_id,
+                             "validator_name": result.validator_name,
+                             "device_group": result.device_group,
+                             "entry_type": result.entry_type,
+                             "desc": result.text})
+        return {"config_id": config_id,
+                "cached": cached,
+                "runtime": round(time.perf_counter() - start_time, 3),
+                "total_problems": len(problems),
+                "timed_out": timed_out,
+                "problems": problems}
+
+    def whatif(self, query):
+        start_time = time.perf_counter()
+        config_id, profilepackage, cached = self.load_requested_config(query, from_body=False)
+        device_group = query.get('device_group', [None])[0]
+        if device_group not in profilepackage.devicegroup_objects:
+            raise ServerError(400, f"Unknown Device Group: {device_group}")
+        try:
+            rule = parse_rule(self.read_body("the proposed rule"))
+            position = int(query['position'][0]) if 'position' in query else None
+            report = analyze_rule_insertion(profilepackage.pan_config, device_group, rule, position,
+                                            query.get('rule_type', ['SecurityPreRules'])[0],
+                                            query.get('before', [None])[0], query.get('after', [None])[0])
+        except (json.JSONDecodeError, xml.etree.ElementTree.ParseError) as err:
+            raise ServerError(400, f"Unable to parse the rule: {err}")
+        except (KeyError, ValueError) as err:
+            raise ServerError(400, str(err.args[0]))
+        return {"config_id": config_id,
+                "cached": cached,
+                "runtime": round(time.perf_counter() - start_time, 3),
+                "rule_name": rule.get('name'),
+                **report._asdict()}
+
+
+class AnalyzerServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, server_address, config_cache, snapshot_dir=None, validator_timeout=None):
+        super().__init__(server_address, AnalyzerRequestHandler)
+        self.config_cache = config_cache
+        self.snapshot_dir = snapshot_dir
+        self.validator_timeout = validator_timeout
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs an HTTP service which analyzes configurations and returns JSON",
+                                     epilog=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", help="Address to listen on (default is 127.0.0.1)", default="127.0.0.1")
+    parser.add_argument("--port", help="Port to listen on (default is 8080)", type=int, default=8080)
+    parser.add_argument("--config", help="Config file with the validators' settings (defaults to the default settings)")
+    parser.add_argument("--cache-size", help="Number of parsed configurations to keep in memory (default is 4)",
+                        type=int, default=4)
+    parser.add_argument("--snapshot-dir", help="Directory of XML configurations which can be analyzed by name")
+    parser.add_argument("--validator-timeout", help="Stop each validator after this many seconds and report its results as partial",
+                        type=float)
+    parsed_args = parser.parse_args()
+
+    logging.basicConfig(format='%(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+    settings = ConfigurationSettings(parsed_args.config).get_config()
+    config_cache = ConfigCache(parsed_args.cache_size, settings)
+    server = AnalyzerServer((parsed_args.host, parsed_args.port), config_cache,
+                            parsed_args.snapshot_dir, parsed_args.validator_timeout)
+    logger.info(f"Listening on http://{parsed_args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Finds the first security rule which matches each flow in a CSV file, in the
+order the rules are evaluated. The CSV file has a header row with the columns:
+
+    source_zone,destination_zone,source,destination,protocol,port,application,source_port
+
+The application and source_port columns are optional. The flows are written
+to stdout as CSV, along with the matching rule's Device Group, rule type, name,
+and action, which are left empty if no rule matches.
+"""
+
+import argparse
+import csv
+import os
+import sys
+
+from palo_alto_firewall_analyzer import pan_api
+from palo_alto_firewall_analyzer.analyzer import parse_config
+from palo_alto_firewall_analyzer.pan_helpers import load_API_key
+from palo_alto_firewall_analyzer.policy_lookup import FLOW_COLUMNS, compile_policy, get_firewall_device_group, read_flows
+
+DEFAULT_CONFIG_DIR = os.path.expanduser("~" + os.sep + ".pan_policy_analyzer" + os.sep)
+DEFAULT_API_KEYFILE = DEFAULT_CONFIG_DIR + "API_KEY.txt"
+
+RESULT_COLUMNS = ('device_group', 'rule_type', 'rule_name', 'action')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Finds the first security rule which matches each flow",
+                                     epilog=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("flows", help="CSV file with the flows ('-' reads them from stdin)")
+    target_group = parser.add_mutually_exclusive_group(required=True)
+    target_group.add_argument("--device-group", help="Device Group whose rules are evaluated")
+    target_group.add_argument("--firewall", help="Evaluate the rules of this firewall's Device Group (requires --panorama)")
+    config_group = parser.add_mutually_exclusive_group(required=True)
+    config_group.add_argument("--xml", help="XML file from 'Export Panorama configuration version'")
+    config_group.add_argument("--panorama", help="Download the configuration from this Panorama")
+    parser.add_argument("--api", help=f"File with API Key (default is {DEFAULT_API_KEYFILE})", default=DEFAULT_API_KEYFILE)
+    parsed_args = parser.parse_args()
+
+    if parsed_args.firewall and not parsed_args.panorama:
+        parser.error("argument --firewall: The firewalls' Device Groups are only available with --panorama")
+
+    if parsed_args.xml:
+        with open(parsed_args.xml, encoding='utf-8') as fh:
+            pan_config = parse_config(fh.read())
+        device_group = parsed_args.device_group
+    else:
+        api_key = load_API_key(parsed_args.api)
+        pan_config = parse_config(pan_api.export_configuration2(parsed_args.panorama, api_key))
+        if parsed_args.firewall:
+            device_groups_and_firewalls = pan_api.get_device_groups_and_firewalls(parsed_args.panorama, api_key)
+            try:
+                device_group = get_firewall_device_group(device_groups_and_firewalls, parsed_args.firewall)
+            except KeyError as err:
+                parser.error(f"argument --firewall: {err.args[0]}")
+        else:
+            device_group = parsed_args.device_group
+    if device_group not in pan_config.get_device_groups() + ['shared']:
+        parser.error(f"argument --device-group: Device Group '{device_group}' does not exist")
+
+    classifier = compile_policy(pan_config, device_group)
+    writer = csv.writer(sys.stdout)
+    writer.writerow(FLOW_COLUMNS + RESULT_COLUMNS)
+
+    if parsed_args.flows == '-':
+        flows_fh = sys.stdin
+    else:
+        flows_fh = open(parsed_args.flows, encoding='utf-8', newline='')
+    with flows_fh:
+        try:
+            for flow in read_flows(flows_fh):
+                rule_tuple = classifier.match(flow)
+                if rule_tuple is None:
+                    result = ('',) * len(RESULT_COLUMNS)
+                else:
+                    dg, ruletype, rule_name, rule_entry = rule_tuple
+                    result = (dg, ruletype, rule_name, rule_entry.findtext('./action') or '')
+                writer.writerow(tuple('' if value is None else value for value in flow) + result)
+        except ValueError as err:
+            parser.error(str(err))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""
+Lists every security rule in a Device Group (including those inherited from its
+parents) which matches a query. For example, the rules allowing tcp/3389 from
+the untrust zone:
+
+    pan_rule_query --xml 12345.xml --device-group my_dg --source-zone untrust --service tcp/3389 --action allow
+
+The index of the Device Group's rules is saved in the index directory, so later
+queries of the same configuration don't need to parse and transform it again.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from palo_alto_firewall_analyzer import pan_api
+from palo_alto_firewall_analyzer.pan_helpers import load_API_key
+from palo_alto_firewall_analyzer.rule_query import load_rule_index
+
+DEFAULT_CONFIG_DIR = os.path.expanduser("~" + os.sep + ".pan_policy_analyzer" + os.sep)
+DEFAULT_API_KEYFILE = DEFAULT_CONFIG_DIR + "API_KEY.txt"
+DEFAULT_INDEX_DIR = DEFAULT_CONFIG_DIR + "rule_indexes"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lists every security rule which matches a query",
+                                     epilog=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--device-group", help="Device Group whose rules are queried", required=True)
+    config_group = parser.add_mutually_exclusive_group(required=True)
+    config_group.add_argument("--xml", help="XML file from 'Export Panorama configuration version'")
+    config_group.add_argument("--panorama", help="Download the configuration from this Panorama")
+    parser.add_argument("--api", help=f"File with API Key (default is {DEFAULT_API_KEYFILE})", default=DEFAULT_API_KEYFILE)
+    parser.add_argument("--index-dir", help=f"Directory to save the rule indexes in (default is {DEFAULT_INDEX_DIR})",
+                        default=DEFAULT_INDEX_DIR)
+    query_group = parser.add_argument_group("query", "Rules must match all of the specified values")
+    query_group.add_argument("--source-zone", help="Source zone")
+    query_group.add_argument("--destination-zone", help="Destination zone")
+    query_group.add_argument("--source", help="Source IP, network, or range")
+    query_group.add_argument("--destination", help="Destination IP, network, or range")
+    query_group.add_argument("--application", help="Application")
+    query_group.add_argument("--service", help="Protocol with optional ports, such as tcp/3389")
+    query_group.add_argument("--action", help="Rule action, such as allow or deny")
+    query_group.add_argument("--exclude-any", help="Exclude rules which match the queried fields with 'any'", action='store_true')
+    parser.add_argument("--format", help="Output format (default is text)", choices=['text', 'json'], default='text')
+    parsed_args = parser.parse_args()
+
+    if parsed_args.xml:
+        with open(parsed_args.xml, 'rb') as fh:
+            xml_config = fh.read()
+    else:
+        api_key = load_API_key(parsed_args.api)
+        xml_config = pan_api.export_configuration2(parsed_args.panorama, api_key)
+
+    try:
+        rule_index = load_rule_index(xml_config, parsed_args.device_group, parsed_args.index_dir)
+        rules = rule_index.query(include_any=not parsed_args.exclude_any, action=parsed_args.action,
+                                 source_zone=parsed_args.source_zone, destination_zone=parsed_args.destination_zone,
+                                 source=parsed_args.source, destination=parsed_args.destination,
+                                 application=parsed_args.application, service=parsed_args.service)
+    except KeyError as err:
+        parser.error(f"argument --device-group: {err.args[0]}")
+    except ValueError as err:
+        parser.error(str(err))
+
+    for dg, ruletype, rule_name, action in rules:
+        if parsed_args.format == 'json':
+            print(json.dumps({"device_group": dg, "rule_type": ruletype, "rule_name": rule_name, "action": action}))
+        else:
+            print(f"{dg}'s {ruletype} '{rule_name}' ({action})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
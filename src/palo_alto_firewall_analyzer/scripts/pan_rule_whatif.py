@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Reports how a proposed security rule would interact with the existing rules if it was
+added to a Device Group: whether it would be shadowed (or is redundant), and which
+rules it would shadow or supersede. The rule is a file with either an XML <entry>
+in the configuration's format, or JSON with the same fields, for example:
+
+    {"name": "new_rule", "from": ["trust"], "to": ["untrust"], "source": ["10.0.0.0/24"],
+     "application": ["ssh"], "service": ["application-default"], "action": "allow"}
+
+Fields which aren't specified default to 'any'. The exit code is 1 if the rule
+would be shadowed, or would shadow or supersede other rules.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from palo_alto_firewall_analyzer import pan_api
+from palo_alto_firewall_analyzer.analyzer import parse_config
+from palo_alto_firewall_analyzer.pan_helpers import load_API_key
+from palo_alto_firewall_analyzer.rule_insertion import RULE_TYPES, analyze_rule_insertion, format_insertion_report, parse_rule
+
+DEFAULT_CONFIG_DIR = os.path.expanduser("~" + os.sep + ".pan_policy_analyzer" + os.sep)
+DEFAULT_API_KEYFILE = DEFAULT_CONFIG_DIR + "API_KEY.txt"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reports how a proposed security rule would interact with the existing rules",
+                                     epilog=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("rule", help="File with the proposed rule, as XML or JSON ('-' reads it from stdin)")
+    parser.add_argument("--device-group", help="Device Group to add the rule to", required=True)
+    parser.add_argument("--rule-type", help="Add the rule to the pre-rules or post-rules (default is SecurityPreRules)",
+                        choices=RULE_TYPES, default='SecurityPreRules')
+    position_group = parser.add_mutually_exclusive_group()
+    position_group.add_argument("--position", help="Position within the Device Group's rules, starting from 0 (default is the end)", type=int)
+    position_group.add_argument("--before", help="Add the rule before the rule with this name")
+    position_group.add_argument("--after", help="Add the rule after the rule with this name")
+    config_group = parser.add_mutually_exclusive_group(required=True)
+    config_group.add_argument("--xml", help="XML file from 'Export Panorama configuration version'")
+    config_group.add_argument("--panorama", help="Download the configuration from this Panorama")
+    parser.add_argument("--api", help=f"File with API Key (default is {DEFAULT_API_KEYFILE})", default=DEFAULT_API_KEYFILE)
+    parser.add_argument("--format", help="Output format (default is text)", choices=['text', 'json'], default='text')
+    parsed_args = parser.parse_args()
+
+    if parsed_args.rule == '-':
+        rule = parse_rule(sys.stdin.read())
+    else:
+        with open(parsed_args.rule, encoding='utf-8') as fh:
+            rule = parse_rule(fh.read())
+
+    if parsed_args.xml:
+        with open(parsed_args.xml, encoding='utf-8') as fh:
+            pan_config = parse_config(fh.read())
+    else:
+        api_key = load_API_key(parsed_args.api)
+        pan_config = parse_config(pan_api.export_configuration2(parsed_args.panorama, api_key))
+    if parsed_args.device_group not in pan_config.get_device_groups() + ['shared']:
+        parser.error(f"argument --device-group: Device Group '{parsed_args.device_group}' does not exist")
+
+    try:
+        report = analyze_rule_insertion(pan_config, parsed_args.device_group, rule, parsed_args.position,
+                                        parsed_args.rule_type, parsed_args.before, parsed_args.after)
+    except (KeyError, ValueError) as err:
+        parser.error(str(err.args[0]))
+
+    if parsed_args.format == 'json':
+        print(json.dumps({"rule_name": rule.get('name'), **report._asdict()}))
+    else:
+        for line in format_insertion_report(rule.get('name'), report):
+            print(line)
+    if report.shadowed_by or report.shadows or report.supersedes:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
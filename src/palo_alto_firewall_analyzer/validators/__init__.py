@@ -1,23 +1,94 @@
-from . import bad_group_profile
-from . import bad_hostnames
-from . import bad_log_setting
-from . import consolidatable_addresses_and_groups
-from . import consolidatable_service_and_groups
-from . import disabled_policies
-from . import equivalent_objects
-from . import fqdn_contains_ip
-from . import group_replacements
-from . import ip_with_resolving_fqdn
-from . import misleading_objects
-from . import redundant_rule_members
-from . import rules_missing_security_profile
-from . import shadowing_addresses_and_groups
-from . import shadowing_rules
-from . import shadowing_services_and_groups
-from . import similar_objects
-from . import unconventionally_named_objects
-from . import unqualified_fqdn
-from . import unused_addresses_and_groups
-from . import unused_security_profile_groups
-from . import unused_services_and_groups
-from . import zone_based_checks
+"""
+The built-in validators. To keep startup fast, a validator's module is only
+imported once the validator is used, so the names and descriptions are also
+listed here, along with what they cost to run. tests/test_Registry.py checks
+that this matches the register_policy_validator() calls in each module.
+"""
+
+from palo_alto_firewall_analyzer.core import COST_LINEAR, COST_QUADRATIC, RESOURCE_API, RESOURCE_DNS
+
+# Mapping of validator name -> (module, description, cost class, external resources)
+VALIDATORS = {
+    'BadGroupProfile': ('bad_group_profile', 'Rule uses an incorrect group profile',
+                       COST_LINEAR, ()),
+    'BadHostname': ('bad_hostnames', "Address contains a hostname that doesn't resolve",
+                   COST_LINEAR, (RESOURCE_DNS,)),
+    'BadHostnameUsage': ('bad_hostnames', "AddressGroups and Security Rules using Address objects which don't resolve",
+                        COST_LINEAR, (RESOURCE_DNS,)),
+    'BadLogSetting': ('bad_log_setting', 'Rule uses an incorrect log profile',
+                     COST_LINEAR, ()),
+    'FindConsolidatableAddresses': ('consolidatable_addresses_and_groups', 'Consolidate use of equivalent Address objects so only one object is used',
+                                   COST_LINEAR, ()),
+    'FindConsolidatableAddressGroups': ('consolidatable_addresses_and_groups', 'Consolidate use of equivalent AddressGroup objects so only one object is used',
+                                       COST_LINEAR, ()),
+    'FindConsolidatableServices': ('consolidatable_service_and_groups', 'Consolidate use of equivalent Service objects so only one object is used',
+                                  COST_LINEAR, ()),
+    'FindConsolidatableServiceGroups': ('consolidatable_service_and_groups', 'Consolidate use of equivalent ServiceGroup objects so only one object is used',
+                                       COST_LINEAR, ()),
+    'DisabledPolicies': ('disabled_policies', 'Policy objects that are disabled',
+                        COST_LINEAR, ()),
+    'EquivalentAddresses': ('equivalent_objects', 'Addresses objects that are equivalent with each other',
+                           COST_LINEAR, ()),
+    'EquivalentAddressGroups': ('equivalent_objects', 'Address Group objects that are equivalent with each other',
+                               COST_LINEAR, ()),
+    'EquivalentServices': ('equivalent_objects', 'Service objects that are equivalent with each other',
+                          COST_LINEAR, ()),
+    'EquivalentServiceGroups': ('equivalent_objects', 'Service Group objects that are equivalent with each other',
+                               COST_LINEAR, ()),
+    'FQDNContainsIP': ('fqdn_contains_ip', 'Address contains an FQDN that is actually an IP address',
+                      COST_LINEAR, ()),
+    'AddressesShouldBeGroups': ('group_replacements', 'Detects rules with Addresses that can be replaced with Address Groups',
+                               COST_LINEAR, ()),
+    'ServicesShouldBeGroups': ('group_replacements', 'Detects rules with Services that can be replaced with Service Groups',
+                              COST_LINEAR, ()),
+    'IPWithResolvingFQDN': ('ip_with_resolving_fqdn', 'Address object contains an IP that an existing FQDN resolves to',
+                           COST_LINEAR, (RESOURCE_DNS,)),
+    'MisleadingAddresses': ('misleading_objects', 'Address objects that have a misleading name',
+                           COST_LINEAR, ()),
+    'MisleadingServices': ('misleading_objects', 'Service objects that have a misleading name',
+                          COST_LINEAR, ()),
+    'NATShadowingRules': ('nat_shadowing_rules', 'NAT Shadowing Rules: Detects a broader NAT rule followed by a narrower NAT rule',
+                         COST_QUADRATIC, ()),
+    'RedundantRuleAddresses': ('redundant_rule_members', 'Detects rules with redundant entries in the source or destination addresses',
+                              COST_LINEAR, ()),
+    'RedundantRuleServices': ('redundant_rule_members', 'Detects rules with redundant Service entries',
+                             COST_LINEAR, ()),
+    'RulesMissingSecurityProfile': ('rules_missing_security_profile', 'Detect rules with no Security Profile Groups attached',
+                                   COST_LINEAR, ()),
+    'ShadowingAddressesAndGroups': ('shadowing_addresses_and_groups', 'Address and AddressGroup objects that have the same name and shadow each other',
+                                   COST_LINEAR, ()),
+    'ShadowingRules': ('shadowing_rules', 'Shadowing Rules: Detects a broader rule followed by a narrower rule',
+                      COST_QUADRATIC, ()),
+    'ShadowingServices': ('shadowing_services_and_groups', 'Service objects that have the same name and shadow each other',
+                         COST_LINEAR, ()),
+    'ShadowingServiceGroups': ('shadowing_services_and_groups', 'Service Group objects that have the same name and shadow each other',
+                              COST_LINEAR, ()),
+    'SimilarAddressesAndGroups': ('similar_objects', 'Address and AddressGroup objects with similar, but different, names',
+                                 COST_LINEAR, ()),
+    'SimilarServicesAndGroups': ('similar_objects', 'Service and ServiceGroup objects with similar, but different, names',
+                                COST_LINEAR, ()),
+    'UnionShadowingRules': ('union_shadowing_rules', 'Union Shadowing Rules: Detects a rule whose traffic is all matched by a combination of preceeding rules',
+                           COST_QUADRATIC, ()),
+    'UnconventionallyNamedServices': ('unconventionally_named_objects', "Service objects that don't match the configured naming convention",
+                                     COST_LINEAR, ()),
+    'UnconventionallyNamedAddresses': ('unconventionally_named_objects', "Address objects that don't match the configured naming convention",
+                                      COST_LINEAR, ()),
+    'UnqualifiedFQDN': ('unqualified_fqdn', 'Address contains a hostname instead of an FQDN',
+                       COST_LINEAR, (RESOURCE_DNS,)),
+    'UnusedAddresses': ('unused_addresses_and_groups', "Address objects that aren't in use",
+                       COST_LINEAR, ()),
+    'UnusedAddressGroups': ('unused_addresses_and_groups', "AddressGroup objects that aren't in use",
+                           COST_LINEAR, ()),
+    'UnusedSecurityProfileGroups': ('unused_security_profile_groups', "Security Profile Group objects that aren't in use",
+                                   COST_LINEAR, ()),
+    'UnusedServices': ('unused_services_and_groups', "Services objects that aren't in use",
+                      COST_LINEAR, ()),
+    'UnusedServiceGroups': ('unused_services_and_groups', "Service Group objects that aren't in use",
+                           COST_LINEAR, ()),
+    'MissingZones': ('zone_based_checks', 'Rule is missing a Zone!',
+                    COST_LINEAR, (RESOURCE_API,)),
+    'ExtraZones': ('zone_based_checks', 'Rule has an extra Zone!',
+                  COST_LINEAR, (RESOURCE_API,)),
+    'ExtraRules': ('zone_based_checks', 'Rule has a single Source/Dest Zone! Rule is not needed!',
+                  COST_LINEAR, (RESOURCE_API,)),
+}
@@ -1,22 +1,23 @@
 import logging
 
-from palo_alto_firewall_analyzer.core import register_policy_validator, BadEntry
+from palo_alto_firewall_analyzer.core import register_policy_validator, BadEntry, SECURITY_POLICY_TYPES, COST_LINEAR
+from palo_alto_firewall_analyzer.sampling import is_sampled
 
 logger = logging.getLogger(__name__)
 
-@register_policy_validator("BadGroupProfile", "Rule uses an incorrect group profile")
+@register_policy_validator("BadGroupProfile", "Rule uses an incorrect group profile",
+                           inputs=SECURITY_POLICY_TYPES,
+                           cost=COST_LINEAR, resources=())
 def find_bad_group_profile_setting(profilepackage):
     device_groups = profilepackage.device_groups
     devicegroup_exclusive_objects = profilepackage.devicegroup_exclusive_objects
 
     if not profilepackage.settings.get('Allowed Group Profiles'):
         logger.debug("Allowed Group Profiles are not set; skipping")
-        return []
+        return
 
     allowed_group_profiles = profilepackage.settings.get('Allowed Group Profiles').split(',')
 
-    badentries = []
-
     logger.info("*"*80)
     logger.info("Checking for incorrect group profile")
 
@@ -29,6 +30,8 @@ def find_bad_group_profile_setting(profilepackage):
                 # Disabled rules can be ignored
                 if entry.find("./disabled") is not None and entry.find("./disabled").text == "yes":
                     continue
+                if not is_sampled(device_group, entry):
+                    continue
 
                 rule_name = entry.get('name')
                 group_profile_setting_node = entry.find("./profile-setting/group/member")
@@ -41,6 +44,4 @@ def find_bad_group_profile_setting(profilepackage):
                     text = f"Device Group {device_group}'s {ruletype} '{rule_name}' doesn't use an approved group " \
                            f"profile '{allowed_group_profiles}', instead it uses '{group_profile_setting}' "
                     logger.debug(text)
-                    badentries.append( BadEntry(data=entry, text=text, device_group=device_group, entry_type=ruletype) )
-
-    return badentries
\ No newline at end of file
+                    yield BadEntry(data=entry, text=text, device_group=device_group, entry_type=ruletype)
\ No newline at end of file
@@ -1,19 +1,21 @@
 import logging
 
-from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator
+from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator, SECURITY_POLICY_TYPES, COST_LINEAR
+from palo_alto_firewall_analyzer.progress import update_progress
+from palo_alto_firewall_analyzer.sampling import is_sampled
 
 logger = logging.getLogger(__name__)
 
-@register_policy_validator("BadLogSetting", "Rule uses an incorrect log profile")
+@register_policy_validator("BadLogSetting", "Rule uses an incorrect log profile",
+                           inputs=SECURITY_POLICY_TYPES,
+                           cost=COST_LINEAR, resources=())
 def find_bad_log_setting(profilepackage):
     mandated_log_profile = profilepackage.settings.get('Mandated Logging Profile')
     device_groups = profilepackage.device_groups
     pan_config = profilepackage.pan_config
 
     if not mandated_log_profile:
-        return []
-
-    badentries = []
+        return
 
     logger.info("*" * 80)
     logger.info("Checking for incorrect log settings")
@@ -21,13 +23,15 @@ def find_bad_log_setting(profilepackage):
     for i, device_group in enumerate(device_groups):
         for ruletype in ('SecurityPreRules', 'SecurityPostRules'):
             rules = pan_config.get_devicegroup_policy(ruletype, device_group)
-            logger.info(f"({i+1}/{len(device_groups)}) Checking {device_group}'s {ruletype}")
+            update_progress("device groups", i + 1, len(device_groups), f"{device_group}'s {ruletype}")
 
             for entry in rules:
                 rule_name = entry.get('name')
                 # Disabled rules can be ignored
                 if entry.find("./disabled") is not None and entry.find("./disabled").text == "yes":
                     continue
+                if not is_sampled(device_group, entry):
+                    continue
 
                 log_setting_node = entry.find("./log-setting")
 
@@ -44,10 +48,8 @@ def find_bad_log_setting(profilepackage):
                 elif log_setting is None:
                     text = f"Device Group {device_group}'s {ruletype} '{rule_name}' doesn't use any log profile!"
                     logger.debug(text)
-                    badentries.append(BadEntry(data=[entry, mandated_log_profile], text=text, device_group=device_group, entry_type=ruletype))
+                    yield BadEntry(data=[entry, mandated_log_profile], text=text, device_group=device_group, entry_type=ruletype)
                 elif log_setting != mandated_log_profile:
                     text = f"Device Group {device_group}'s {ruletype} '{rule_name}' doesn't use log profile '{mandated_log_profile}', instead it uses '{log_setting}'"
                     logger.debug(text)
-                    badentries.append(BadEntry(data=[entry, mandated_log_profile], text=text, device_group=device_group, entry_type=ruletype))
-
-    return badentries
+                    yield BadEntry(data=[entry, mandated_log_profile], text=text, device_group=device_group, entry_type=ruletype)
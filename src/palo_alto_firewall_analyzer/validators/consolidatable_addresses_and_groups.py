@@ -2,7 +2,7 @@ import collections
 import copy
 import logging
 
-from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator, get_policy_validators, xml_object_to_dict
+from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator, get_policy_validator, xml_object_to_dict, ALL_POLICY_TYPES, COST_LINEAR
 
 logger = logging.getLogger(__name__)
 
@@ -82,7 +82,6 @@ def find_objects_policies_needing_replacement(pan_config, devicegroup_objects, d
 
 
 def replace_addressgroup_contents(addressgroups_needing_replacement, address_to_replacement):
-    badentries = []
     for object_dg, object_type, object_entry in addressgroups_needing_replacement:
         object_policy_dict = xml_object_to_dict(object_entry)['entry']
         new_addresses = []
@@ -112,8 +111,7 @@ def replace_addressgroup_contents(addressgroups_needing_replacement, address_to_
 
         object_policy_dict['static']['member'] = new_addresses
         text = f"Replace the following Address members in {object_dg}'s {object_type} {object_entry.get('name')}: {sorted([k + ' with ' + v for k, v in replacements_made.items()])}"
-        badentries.append(BadEntry(data=[object_entry, object_policy_dict], text=text, device_group=object_dg, entry_type=object_type))
-    return badentries
+        yield BadEntry(data=[object_entry, object_policy_dict], text=text, device_group=object_dg, entry_type=object_type)
 
 def replace_member_contents(address_like_entries, address_to_replacement, replacements_made):
     replacements_made = copy.deepcopy(replacements_made)
@@ -153,10 +151,9 @@ def replace_member_contents(address_like_entries, address_to_replacement, replac
 
 
 def replace_policy_contents(policies_needing_replacement, address_to_replacement):
-    badentries = []
     for policy_dg, policy_type, policy_entry in policies_needing_replacement:
         object_policy_dict = xml_object_to_dict(policy_entry)['entry']
-        logger.debug(f"object_policy_dict: {object_policy_dict}")
+        logger.debug("object_policy_dict: %s", object_policy_dict)
         replacements_made = {}
         for direction in ('source', 'destination'):
             object_policy_dict[direction]['member'], replacements_made = replace_member_contents(object_policy_dict[direction]['member'], address_to_replacement, replacements_made)
@@ -173,8 +170,7 @@ def replace_policy_contents(policies_needing_replacement, address_to_replacement
                 if object_policy_dict[translation].get('static-ip', {}).get('translated-address', {}).get('member'):
                     object_policy_dict[translation]['static-ip']['translated-address']['member'], replacements_made = replace_member_contents(object_policy_dict[translation]['static-ip']['translated-address']['member'], address_to_replacement, replacements_made)
         text = f"Replace the following Address members in {policy_dg}'s {policy_type} {policy_entry.get('name')}: {sorted([k + ' with ' + v for k, v in replacements_made.items()])}"
-        badentries.append(BadEntry(data=[policy_entry, object_policy_dict], text=text, device_group=policy_dg, entry_type=policy_type))
-    return badentries
+        yield BadEntry(data=[policy_entry, object_policy_dict], text=text, device_group=policy_dg, entry_type=policy_type)
 
 def consolidate_address_like_objects(profilepackage, object_type, object_friendly_type, validator_function):
     pan_config = profilepackage.pan_config
@@ -188,9 +184,8 @@ def consolidate_address_like_objects(profilepackage, object_type, object_friendl
     dg_to_objects_to_consolidate = find_objects_needing_consolidation(equivalent_objects)
     if not dg_to_objects_to_consolidate:
         logger.info (f"There were no {object_friendly_type} to consolidate")
-        return dg_to_objects_to_consolidate
+        return
 
-    badentries = []
     for device_group, objects_to_consolidate in dg_to_objects_to_consolidate.items():
         # Determine which object is most commonly-used to minimize the amount of changes that will be needed
         address_to_replacement = find_replacement_objects(pan_config, devicegroup_objects, device_group, objects_to_consolidate)
@@ -199,22 +194,24 @@ def consolidate_address_like_objects(profilepackage, object_type, object_friendl
         # Now that we know which objects need replacements, we can iterate through
         # and make those replacements!
         # First replace the contents of addressgroups
-        badentries += replace_addressgroup_contents(addressgroups_needing_replacement, address_to_replacement)
+        yield from replace_addressgroup_contents(addressgroups_needing_replacement, address_to_replacement)
         # Then replace the contents of policies
-        badentries += replace_policy_contents(policies_needing_replacement, address_to_replacement)
+        yield from replace_policy_contents(policies_needing_replacement, address_to_replacement)
 
-    return badentries
-
-@register_policy_validator("FindConsolidatableAddresses", "Consolidate use of equivalent Address objects so only one object is used")
+@register_policy_validator("FindConsolidatableAddresses", "Consolidate use of equivalent Address objects so only one object is used",
+                           inputs=('Addresses', 'AddressGroups', *ALL_POLICY_TYPES),
+                           cost=COST_LINEAR, resources=())
 def find_consolidatable_addresses(profilepackage):
     object_type = "Addresses"
     object_friendly_type = "Address"
-    _, _, validator_function = get_policy_validators()['EquivalentAddresses']
+    _, _, validator_function = get_policy_validator('EquivalentAddresses')
     return consolidate_address_like_objects(profilepackage, object_type, object_friendly_type, validator_function)
 
-@register_policy_validator("FindConsolidatableAddressGroups", "Consolidate use of equivalent AddressGroup objects so only one object is used")
+@register_policy_validator("FindConsolidatableAddressGroups", "Consolidate use of equivalent AddressGroup objects so only one object is used",
+                           inputs=('Addresses', 'AddressGroups', *ALL_POLICY_TYPES),
+                           cost=COST_LINEAR, resources=())
 def find_consolidatable_addressgroups(profilepackage):
     object_type = "AddressGroups"
     object_friendly_type = "Address Group"
-    _, _, validator_function = get_policy_validators()['EquivalentAddressGroups']
+    _, _, validator_function = get_policy_validator('EquivalentAddressGroups')
     return consolidate_address_like_objects(profilepackage, object_type, object_friendly_type, validator_function)
@@ -1,7 +1,7 @@
 import collections
 import logging
 
-from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator, get_policy_validators, xml_object_to_dict
+from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator, get_policy_validator, xml_object_to_dict, ALL_POLICY_TYPES, COST_LINEAR
 
 logger = logging.getLogger(__name__)
 
@@ -95,9 +95,8 @@ def consolidate_service_like_objects(profilepackage, object_type, object_friendl
 
     if not dg_to_objects_to_consolidate:
         logger.info (f"There were no {object_friendly_type} to consolidate")
-        return dg_to_objects_to_consolidate
+        return
 
-    badentries = []
     for device_group, objects_to_consolidate in dg_to_objects_to_consolidate.items():
         # Determine which object is most commonly-used to minimize the amount of changes that will be needed
         service_to_replacement = find_replacement_objects(pan_config, devicegroup_objects, device_group, objects_to_consolidate)
@@ -128,12 +127,12 @@ def consolidate_service_like_objects(profilepackage, object_type, object_friendl
             assert object_policy_dict['members']['member'] != new_services
             object_policy_dict['members']['member'] = new_services
             text = f"Replace the following Service members in {object_dg}'s {object_type} {object_entry.get('name')}: {sorted([k + ' with ' + v for k, v in replacements_made.items()])}"
-            badentries.append(BadEntry(data=[object_entry, object_policy_dict], text=text, device_group=object_dg, entry_type=object_type))
+            yield BadEntry(data=[object_entry, object_policy_dict], text=text, device_group=object_dg, entry_type=object_type)
 
         # Then replace the contents of policies
         for policy_dg, policy_type, policy_entry in policies_needing_replacement:
             object_policy_dict = xml_object_to_dict(policy_entry)['entry']
-            logger.debug(f"object_policy_dict: {object_policy_dict}")
+            logger.debug("object_policy_dict: %s", object_policy_dict)
             replacements_made = {}
             if policy_type in ("NATPreRules", "NATPostRules"):
                 # NAT rules are limited to a single service
@@ -166,19 +165,22 @@ def consolidate_service_like_objects(profilepackage, object_type, object_friendl
                 assert object_policy_dict['service']['member'] != new_services
                 object_policy_dict['service']['member'] = new_services
             text = f"Replace the following Service members in {policy_dg}'s {policy_type} {policy_entry.get('name')}: {sorted([k + ' with ' + v for k, v in replacements_made.items()])}"
-            badentries.append(BadEntry(data=[policy_entry, object_policy_dict], text=text, device_group=policy_dg, entry_type=policy_type))
-    return badentries
+            yield BadEntry(data=[policy_entry, object_policy_dict], text=text, device_group=policy_dg, entry_type=policy_type)
 
-@register_policy_validator("FindConsolidatableServices", "Consolidate use of equivalent Service objects so only one object is used")
+@register_policy_validator("FindConsolidatableServices", "Consolidate use of equivalent Service objects so only one object is used",
+                           inputs=('Services', 'ServiceGroups', *ALL_POLICY_TYPES),
+                           cost=COST_LINEAR, resources=())
 def find_consolidatable_services(profilepackage):
     object_type = "Services"
     object_friendly_type = "Service"
-    _, _, validator_function = get_policy_validators()['EquivalentServices']
+    _, _, validator_function = get_policy_validator('EquivalentServices')
     return consolidate_service_like_objects(profilepackage, object_type, object_friendly_type, validator_function)
 
-@register_policy_validator("FindConsolidatableServiceGroups", "Consolidate use of equivalent ServiceGroup objects so only one object is used")
+@register_policy_validator("FindConsolidatableServiceGroups", "Consolidate use of equivalent ServiceGroup objects so only one object is used",
+                           inputs=('Services', 'ServiceGroups', *ALL_POLICY_TYPES),
+                           cost=COST_LINEAR, resources=())
 def find_consolidatable_servicesgroups(profilepackage):
     object_type = "ServiceGroups"
     object_friendly_type = "Service Group"
-    _, _, validator_function = get_policy_validators()['EquivalentServiceGroups']
+    _, _, validator_function = get_policy_validator('EquivalentServiceGroups')
     return consolidate_service_like_objects(profilepackage, object_type, object_friendly_type, validator_function)
@@ -6,7 +6,8 @@ import xml.etree.ElementTree
 
 import xmltodict
 
-from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator
+from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator, COST_LINEAR
+from palo_alto_firewall_analyzer.progress import update_progress
 
 logger = logging.getLogger(__name__)
 
@@ -89,13 +90,11 @@ def find_equivalent_objects(profilepackage, object_type):
     ignore_description = profilepackage.settings.getboolean("Equivalent objects ignore description", False)
     ignore_tags = profilepackage.settings.getboolean("Equivalent objects ignore tags", False)
 
-    badentries = []
-
     logger.info("*" * 80)
     logger.info(f"Checking for equivalent {object_type} objects")
 
     for i, device_group in enumerate(device_groups):
-        logger.info(f"({i + 1}/{len(device_groups)}) Checking {device_group}'s address objects")
+        update_progress("device groups", i + 1, len(device_groups), f"{device_group}'s address objects")
         # An object can be inherited from any parent device group. Need to check all of them.
         # Basic strategy: Normalize all objects, then report on the subset present in this device group
         parent_dgs = []
@@ -126,25 +125,32 @@ def find_equivalent_objects(profilepackage, object_type):
                     equivalency_text = f'Device Group: {dg}, Name: {obj.get("name")}'
                     equivalency_texts.append(equivalency_text)
                 text = f"Device Group {device_group} has the following equivalent {object_type}: {equivalency_texts}"
-                badentries.append(BadEntry(data=entries, text=text, device_group=device_group, entry_type=object_type))
-    return badentries
+                yield BadEntry(data=entries, text=text, device_group=device_group, entry_type=object_type)
 
 
-@register_policy_validator("EquivalentAddresses", "Addresses objects that are equivalent with each other")
+@register_policy_validator("EquivalentAddresses", "Addresses objects that are equivalent with each other",
+                           inputs=('Addresses',),
+                           cost=COST_LINEAR, resources=())
 def find_equivalent_addresses(profilepackage):
     return find_equivalent_objects(profilepackage, "Addresses")
 
 
-@register_policy_validator("EquivalentAddressGroups", "Address Group objects that are equivalent with each other")
+@register_policy_validator("EquivalentAddressGroups", "Address Group objects that are equivalent with each other",
+                           inputs=('AddressGroups',),
+                           cost=COST_LINEAR, resources=())
 def find_equivalent_addressesgroups(profilepackage):
     return find_equivalent_objects(profilepackage, "AddressGroups")
 
 
-@register_policy_validator("EquivalentServices", "Service objects that are equivalent with each other")
+@register_policy_validator("EquivalentServices", "Service objects that are equivalent with each other",
+                           inputs=('Services',),
+                           cost=COST_LINEAR, resources=())
 def find_equivalent_services(profilepackage):
     return find_equivalent_objects(profilepackage, "Services")
 
 
-@register_policy_validator("EquivalentServiceGroups", "Service Group objects that are equivalent with each other")
+@register_policy_validator("EquivalentServiceGroups", "Service Group objects that are equivalent with each other",
+                           inputs=('ServiceGroups',),
+                           cost=COST_LINEAR, resources=())
 def find_equivalent_servicegroups(profilepackage):
     return find_equivalent_objects(profilepackage, "ServiceGroups")
@@ -1,6 +1,7 @@
 import logging
 
-from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator
+from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator, SECURITY_POLICY_TYPES, COST_LINEAR
+from palo_alto_firewall_analyzer.progress import update_progress
 
 logger = logging.getLogger(__name__)
 
@@ -31,18 +32,18 @@ def build_group_member_mapping(pan_config, device_group, object_type, xpath):
     return group_to_contained_members
 
 
-@register_policy_validator("AddressesShouldBeGroups", "Detects rules with Addresses that can be replaced with Address Groups")
+@register_policy_validator("AddressesShouldBeGroups", "Detects rules with Addresses that can be replaced with Address Groups",
+                           inputs=('AddressGroups', *SECURITY_POLICY_TYPES),
+                           cost=COST_LINEAR, resources=())
 def find_redundant_addresses(profilepackage):
     device_groups = profilepackage.device_groups
     pan_config = profilepackage.pan_config
 
-    badentries = []
-
     logger.info("*" * 80)
     logger.info("Checking for redundant rule address members")
 
     for i, device_group in enumerate(device_groups):
-        logger.info(f"Checking Device group {device_group}")
+        update_progress("device groups", i + 1, len(device_groups), f"Device Group {device_group}")
         # Build the list of all AddressGroups:
         object_type = 'AddressGroups'
         addressgroup_member_xpath = './static/member'
@@ -74,22 +75,21 @@ def find_redundant_addresses(profilepackage):
                         direction_string = f"{direction} addresses can be replaced with '{groupname}'"
                         direction_strings += [direction_string]
                     text += " and ".join(direction_strings)
-                    badentries.append(BadEntry(data=(ruletype, rule_entry, members_to_replace), text=text, device_group=device_group, entry_type='Address'))
-    return badentries
+                    yield BadEntry(data=(ruletype, rule_entry, members_to_replace), text=text, device_group=device_group, entry_type='Address')
 
 
-@register_policy_validator("ServicesShouldBeGroups", "Detects rules with Services that can be replaced with Service Groups")
+@register_policy_validator("ServicesShouldBeGroups", "Detects rules with Services that can be replaced with Service Groups",
+                           inputs=('ServiceGroups', *SECURITY_POLICY_TYPES),
+                           cost=COST_LINEAR, resources=())
 def find_redundant_members(profilepackage):
     device_groups = profilepackage.device_groups
     pan_config = profilepackage.pan_config
 
-    badentries = []
-
     logger.info("*" * 80)
     logger.info("Checking for redundant rule members")
 
     for i, device_group in enumerate(device_groups):
-        logger.info(f"Checking Device group {device_group}")
+        update_progress("device groups", i + 1, len(device_groups), f"Device Group {device_group}")
         # Build the list of all ServiceGroups:
         object_type = 'ServiceGroups'
         service_member_xpath = './members/member'
@@ -114,5 +114,4 @@ def find_redundant_members(profilepackage):
                     groupname = members_to_groupnames[service_members]
                     rule_name = rule_entry.get('name')
                     text = f"Device Group {device_group}'s {ruletype} '{rule_name}' Services can be replaced with ServiceGroup: {groupname}"
-                    badentries.append(BadEntry(data=(ruletype, rule_entry, groupname), text=text, device_group=device_group, entry_type='Address'))
-    return badentries
+                    yield BadEntry(data=(ruletype, rule_entry, groupname), text=text, device_group=device_group, entry_type='Address')
@@ -1,24 +1,25 @@
 import collections
 import logging
 
-from palo_alto_firewall_analyzer.core import BadEntry, cached_dns_ex_lookup, register_policy_validator, xml_object_to_dict
+from palo_alto_firewall_analyzer.core import BadEntry, cached_dns_ex_lookup, register_policy_validator, xml_object_to_dict, COST_LINEAR, RESOURCE_DNS
+from palo_alto_firewall_analyzer.progress import update_progress
 
 logger = logging.getLogger(__name__)
 
-@register_policy_validator("IPWithResolvingFQDN", "Address object contains an IP that an existing FQDN resolves to")
+@register_policy_validator("IPWithResolvingFQDN", "Address object contains an IP that an existing FQDN resolves to",
+                           inputs=('Addresses',),
+                           cost=COST_LINEAR, resources=(RESOURCE_DNS,))
 def find_IPandFQDN(profilepackage):
     device_groups = profilepackage.device_groups
     pan_config = profilepackage.pan_config
 
-    badentries = []
-
     logger.info("*" * 80)
 
     for i, device_group in enumerate(device_groups):
         fqdns = []
         ips = collections.defaultdict(list)
         ips_fqdns_resolve_to = collections.Counter()
-        logger.info(f"({i + 1}/{len(device_groups)}) Checking {device_group}'s Addresses")
+        update_progress("device groups", i + 1, len(device_groups), f"{device_group}'s Addresses")
         for entry in pan_config.get_devicegroup_object('Addresses', device_group):
             entry_name = entry.get('name')
             entry_dict = xml_object_to_dict(entry)
@@ -43,5 +44,4 @@ def find_IPandFQDN(profilepackage):
             if ip in ips and ips_fqdns_resolve_to[ip] == 1:
                 for address_name, ipnetmask_value, address_entry in ips[ip]:
                     text = f"Device Group {device_group}'s address {address_name} with IP {ipnetmask_value} can be replaced with an fqdn of {fqdn}"
-                    badentries.append(BadEntry(data=(address_entry, fqdn), text=text, device_group=device_group, entry_type='Addresses'))
-    return badentries
+                    yield BadEntry(data=(address_entry, fqdn), text=text, device_group=device_group, entry_type='Addresses')
@@ -0,0 +1,89 @@
+'''
+Detects Shadowed NAT rules
+
+NAT rules are evaluated top-down like Security rules, and only the first
+rule matching the original packet is applied. A NAT rule is shadowed if it's
+preceeded by a broader NAT rule that would match every original packet that
+the rule would match, so the rule is never applied.
+
+The original packet is matched by its source and destination zones, the
+destination interface, source and destination addresses, and service. These
+are compared the same way as for ShadowingRules (see shadowing_rules.py):
+groups are replaced by their members, and addresses and services are
+compared as ranges of IPs and ports. Rules of different NAT types (ipv4,
+nat64, nptv6) never shadow each other.
+'''
+
+import logging
+
+from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator, NAT_POLICY_TYPES, COST_QUADRATIC
+from palo_alto_firewall_analyzer.intervals import AddressSet, ServiceSet
+from palo_alto_firewall_analyzer.progress import update_progress
+from palo_alto_firewall_analyzer.validators.shadowing_rules import CompiledRuleCache, find_shadowing, replace_groups_with_underlying_members
+
+logger = logging.getLogger(__name__)
+
+
+def transform_nat_rules(rules, addressgroups_to_underlying_addresses, applicationgroups_to_underlying_services, servicegroups_to_underlying_services,
+                        address_intervals=None, service_intervals=None):
+    """Transforms a list of NAT rules into a list of tuples with a value for each field
+    of the original packet, in the same form as shadowing_rules.transform_rules().
+    NAT rules don't have applications, so applicationgroups_to_underlying_services is unused.
+    """
+    transformed_rules = []
+    for device_group, ruletype, rule_entry in rules:
+        # Disabled rules can be ignored
+        if rule_entry.find("./disabled") is not None and rule_entry.find("./disabled").text == "yes":
+            continue
+
+        rule_name = rule_entry.get('name')
+        rule_values = {}
+        rule_values['negate'] = frozenset([elem.text for elem in rule_entry.findall('./target/negate')])
+        rule_values['src_zones'] = frozenset([elem.text for elem in rule_entry.findall('./from/member')])
+        rule_values['dest_zones'] = frozenset([elem.text for elem in rule_entry.findall('./to/member')])
+        rule_values['to_interface'] = frozenset([elem.text for elem in rule_entry.findall('./to-interface')])
+        rule_values['src_members'] = AddressSet.from_members(replace_groups_with_underlying_members([elem.text for elem in rule_entry.findall('./source/member')], addressgroups_to_underlying_addresses), address_intervals)
+        rule_values['dest_members'] = AddressSet.from_members(replace_groups_with_underlying_members([elem.text for elem in rule_entry.findall('./destination/member')], addressgroups_to_underlying_addresses), address_intervals)
+        # A NAT rule has a single service, rather than a list of members
+        rule_values['service'] = ServiceSet.from_members(replace_groups_with_underlying_members([elem.text for elem in rule_entry.findall('./service')], servicegroups_to_underlying_services), service_intervals)
+        rule_values['nat_type'] = frozenset([elem.text for elem in rule_entry.findall('./nat-type')])
+        # Assign default values if not present:
+        if not rule_values['to_interface']:
+            rule_values['to_interface'] = frozenset(["any"])
+        if not rule_values['service']:
+            rule_values['service'] = ServiceSet.from_members(["any"])
+        if not rule_values['nat_type']:
+            rule_values['nat_type'] = frozenset(["ipv4"])
+        transformed_rules.append((device_group, ruletype, rule_name, rule_entry, rule_values))
+    return transformed_rules
+
+
+@register_policy_validator("NATShadowingRules",
+                           "NAT Shadowing Rules: Detects a broader NAT rule followed by a narrower NAT rule",
+                           inputs=('Addresses', 'AddressGroups', 'Services', 'ServiceGroups', *NAT_POLICY_TYPES),
+                           cost=COST_QUADRATIC, resources=())
+def find_nat_shadowing_rules(profilepackage):
+    device_groups = profilepackage.device_groups
+    pan_config = profilepackage.pan_config
+
+    logger.info("*" * 80)
+    logger.info("Checking for shadowing NAT rules")
+
+    compiled_rule_cache = CompiledRuleCache(pan_config, NAT_POLICY_TYPES, transform_nat_rules)
+    for i, device_group in enumerate(device_groups):
+        update_progress("device groups", i + 1, len(device_groups), f"Device Group {device_group}")
+        # As NAT rules are inherited from parent device groups, we'll need to check those too.
+        transformed_rules = compiled_rule_cache.get_transformed_rules(device_group)
+        if not transformed_rules:
+            continue
+
+        # The rules are indexed by RuleMatrix, so only the rules which can cover each rule are compared
+        shadowing_rules = find_shadowing(device_group, transformed_rules)
+
+        for shadowed_tuple, prior_tuples in shadowing_rules:
+            dg, ruletype, rule_name, rule_entry = shadowed_tuple
+            text = f"{dg}'s {ruletype} '{rule_name}' is shadowed by: "
+            text += ", ".join(f"{prior_dg}'s {prior_ruletype} '{prior_rule_name}'"
+                              for prior_dg, prior_ruletype, prior_rule_name, _ in prior_tuples)
+            logger.debug(text)
+            yield BadEntry(data=(shadowed_tuple, prior_tuples), text=text, device_group=device_group, entry_type=None)
@@ -1,7 +1,11 @@
 import collections
 import logging
 
-from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator
+from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator, SECURITY_POLICY_TYPES, COST_LINEAR
+from palo_alto_firewall_analyzer.intervals import ServiceSet
+from palo_alto_firewall_analyzer.progress import update_progress
+from palo_alto_firewall_analyzer.sampling import is_sampled
+from palo_alto_firewall_analyzer.validators.shadowing_rules import build_service_interval_mapping
 
 logger = logging.getLogger(__name__)
 
@@ -32,18 +36,18 @@ def build_group_member_mapping(pan_config, device_group, object_type, xpath):
     return group_to_contained_members
 
 
-@register_policy_validator("RedundantRuleAddresses", "Detects rules with redundant entries in the source or destination addresses")
+@register_policy_validator("RedundantRuleAddresses", "Detects rules with redundant entries in the source or destination addresses",
+                           inputs=('AddressGroups', *SECURITY_POLICY_TYPES),
+                           cost=COST_LINEAR, resources=())
 def find_redundant_addresses(profilepackage):
     device_groups = profilepackage.device_groups
     pan_config = profilepackage.pan_config
 
-    badentries = []
-
     logger.info("*" * 80)
     logger.info("Checking for redundant rule members")
 
     for i, device_group in enumerate(device_groups):
-        logger.info(f"Checking Device group {device_group}")
+        update_progress("device groups", i + 1, len(device_groups), f"Device Group {device_group}")
         # Build the list of all AddressGroups:
         object_type = 'AddressGroups'
         addressgroup_member_xpath = './static/member'
@@ -54,6 +58,8 @@ def find_redundant_addresses(profilepackage):
                 # Skip disabled rules:
                 if rule_entry.find("./disabled") is not None and rule_entry.find("./disabled").text == "yes":
                     continue
+                if not is_sampled(device_group, rule_entry):
+                    continue
                 members_to_remove = collections.defaultdict(list)
                 for direction in ('source', 'destination'):
                     # Determine which entries are Address Groups
@@ -74,32 +80,67 @@ def find_redundant_addresses(profilepackage):
                         entries_string = ", ".join([f"'{entry[0]}' is in '{entry[1]}'" for entry in entries])
                         direction_string = f"For {direction}: {entries_string}"
                         text += direction_string
-                    badentries.append(BadEntry(data=(ruletype, rule_entry, members_to_remove), text=text, device_group=device_group, entry_type='Address'))
-    return badentries
-
-
-@register_policy_validator("RedundantRuleServices", "Detects rules with redundant Service entries")
+                    yield BadEntry(data=(ruletype, rule_entry, members_to_remove), text=text, device_group=device_group, entry_type='Address')
+
+
+def find_services_with_contained_ports(service_members, servicegroups_to_underlying_services, service_intervals,
+                                       redundant_members=()):
+    """
+    Finds the services whose ports are all within another of the services, such as tcp-443 and tcp-1-65535.
+    Of services with the same ports, the first one is kept. The redundant_members are already being
+    removed, so they aren't checked, and can't contain the others.
+    :return: List of tuples: (contained service, containing service)
+    """
+    service_sets = []
+    for service_member in service_members:
+        if service_member in servicegroups_to_underlying_services:
+            # Only services have ports, so the Service Groups nested within don't need to be included
+            underlying_services = [member for member in servicegroups_to_underlying_services[service_member]
+                                   if member not in servicegroups_to_underlying_services]
+        else:
+            underlying_services = [service_member]
+        service_sets.append(ServiceSet.from_members(underlying_services, service_intervals))
+
+    contained = []
+    for i, (service_member, service_set) in enumerate(zip(service_members, service_sets)):
+        # Services which can't be converted to ports (such as application-default) are only compared by name
+        if service_member in redundant_members or service_set.names or not service_set.intervals:
+            continue
+        for j, (other_member, other_set) in enumerate(zip(service_members, service_sets)):
+            if other_member == service_member or other_member in redundant_members or not other_set >= service_set:
+                continue
+            if service_set >= other_set and j > i:
+                continue
+            contained.append((service_member, other_member))
+            break
+    return contained
+
+
+@register_policy_validator("RedundantRuleServices", "Detects rules with redundant Service entries",
+                           inputs=('Services', 'ServiceGroups', *SECURITY_POLICY_TYPES),
+                           cost=COST_LINEAR, resources=())
 def find_redundant_services(profilepackage):
     device_groups = profilepackage.device_groups
     pan_config = profilepackage.pan_config
 
-    badentries = []
-
     logger.info("*" * 80)
     logger.info("Checking for redundant rule members")
 
     for i, device_group in enumerate(device_groups):
-        logger.info(f"Checking Device group {device_group}")
+        update_progress("device groups", i + 1, len(device_groups), f"Device Group {device_group}")
         # Build the list of all ServiceGroups:
         object_type = 'ServiceGroups'
         service_member_xpath = './members/member'
         servicegroups_to_underlying_services = build_group_member_mapping(pan_config, device_group, object_type, service_member_xpath)
+        service_intervals = build_service_interval_mapping(pan_config, device_group)
 
         for ruletype in ('SecurityPreRules', 'SecurityPostRules'):
             for rule_entry in pan_config.get_devicegroup_policy(ruletype, device_group):
                 # Skip disabled rules:
                 if rule_entry.find("./disabled") is not None and rule_entry.find("./disabled").text == "yes":
                     continue
+                if not is_sampled(device_group, rule_entry):
+                    continue
                 members_to_remove = []
                 # Determine which entries are Service Groups
                 service_members = [elem.text for elem in rule_entry.findall('./service/member')]
@@ -112,10 +153,13 @@ def find_redundant_services(profilepackage):
                     for sg in servicegroups_in_use:
                         if service_like_member in servicegroups_to_underlying_services[sg]:
                             members_to_remove += [(service_like_member, sg)]
+                # As well as those whose ports are within another of the rule's services
+                redundant_members = set(redundant_member for redundant_member, _ in members_to_remove)
+                members_to_remove += find_services_with_contained_ports(
+                    service_members, servicegroups_to_underlying_services, service_intervals, redundant_members)
 
                 if members_to_remove:
                     rule_name = rule_entry.get('name')
                     entries_string = ", ".join([f"'{redundant_entry}' is in '{containing_entry}'" for redundant_entry, containing_entry in members_to_remove])
                     text = f"Device Group {device_group}'s {ruletype} '{rule_name}'\'s services list contains redundant members: {entries_string}"
-                    badentries.append(BadEntry(data=(ruletype, rule_entry, members_to_remove), text=text, device_group=device_group, entry_type='Address'))
-    return badentries
+                    yield BadEntry(data=(ruletype, rule_entry, members_to_remove), text=text, device_group=device_group, entry_type='Address')
@@ -1,12 +1,16 @@
 import collections
 import logging
 
-from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator
+from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator, SECURITY_POLICY_TYPES, COST_LINEAR
 from palo_alto_firewall_analyzer.core import xml_object_to_dict
+from palo_alto_firewall_analyzer.progress import update_progress
+from palo_alto_firewall_analyzer.sampling import is_sampled
 
 logger = logging.getLogger(__name__)
 
-@register_policy_validator("RulesMissingSecurityProfile", "Detect rules with no Security Profile Groups attached")
+@register_policy_validator("RulesMissingSecurityProfile", "Detect rules with no Security Profile Groups attached",
+                           inputs=SECURITY_POLICY_TYPES,
+                           cost=COST_LINEAR, resources=())
 def find_missing_group_profile(profilepackage):
     device_groups = profilepackage.device_groups
     pan_config = profilepackage.pan_config
@@ -14,13 +18,12 @@ def find_missing_group_profile(profilepackage):
     logger.info("*"*80)
     logger.info("Checking for rules with no security profiles attached")
 
-    badentries = []
     device_groups_to_ruletypes_to_policies_needing_updates = {}
     for i, device_group in enumerate(device_groups):
         device_groups_to_ruletypes_to_policies_needing_updates[device_group] = collections.defaultdict(list)
         for ruletype in ('SecurityPreRules', 'SecurityPostRules'):
             rules = pan_config.get_devicegroup_policy(ruletype, device_group)
-            logger.info(f"({i+1}/{len(device_groups)}) Checking {device_group}'s {ruletype}")
+            update_progress("device groups", i + 1, len(device_groups), f"{device_group}'s {ruletype}")
 
             for entry in rules:
                 rule_name = entry.get('name')
@@ -30,6 +33,8 @@ def find_missing_group_profile(profilepackage):
                 # Disabled rules can be ignored
                 if disabled == 'yes':
                     continue
+                if not is_sampled(device_group, entry):
+                    continue
 
                 # Only allow rules trigger security profile groups
                 # So we only care about 'allow' rules missing a security profile group
@@ -49,6 +54,5 @@ def find_missing_group_profile(profilepackage):
                 # 2) The rule is used to allow traffic
                 # 3) The rule does not have any security profile group or profile attached
                 text = f"Device Group {device_group}'s {ruletype} '{rule_name}' does not have a Security Profile Group attached!"
-                logger.info(text)
-                badentries.append( BadEntry(data=entry, text=text, device_group=device_group, entry_type=ruletype) )
-    return badentries
+                logger.debug(text)
+                yield BadEntry(data=entry, text=text, device_group=device_group, entry_type=ruletype)
@@ -1,12 +1,15 @@
 import collections
 import logging
 
-from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator
+from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator, COST_LINEAR
+from palo_alto_firewall_analyzer.progress import update_progress
 
 logger = logging.getLogger(__name__)
 
 @register_policy_validator("ShadowingAddressesAndGroups",
-                           "Address and AddressGroup objects that have the same name and shadow each other")
+                           "Address and AddressGroup objects that have the same name and shadow each other",
+                           inputs=('Addresses', 'AddressGroups'),
+                           cost=COST_LINEAR, resources=())
 def find_shadowing_addresses_and_groups(profilepackage):
     device_groups = profilepackage.device_groups
     devicegroup_objects = profilepackage.devicegroup_objects
@@ -14,15 +17,13 @@ def find_shadowing_addresses_and_groups(profilepackage):
     rule_limit_enabled = profilepackage.rule_limit_enabled
 
     if rule_limit_enabled:
-        return []
-
-    badentries = []
+        return
 
     logger.info("*" * 80)
     logger.info("Checking for shadowing Address and Address Group objects")
 
     for i, device_group in enumerate(device_groups):
-        logger.info(f"({i + 1}/{len(device_groups)}) Checking {device_group}'s address objects")
+        update_progress("device groups", i + 1, len(device_groups), f"{device_group}'s address objects")
         object_entries = {}
         object_entries['Addresses'] = {entry.get('name'): (device_group, 'Addresses', entry) for entry in devicegroup_objects[device_group]['Addresses']}
         object_entries['AddressGroups'] = {entry.get('name'): (device_group, 'AddressGroups', entry) for entry in devicegroup_objects[device_group]['AddressGroups']}
@@ -79,13 +80,10 @@ def find_shadowing_addresses_and_groups(profilepackage):
 
                 data = [object_entries[obj_type][shadowing_address_name]] + shadowing_addresses + shadowing_addressgroups
                 text = f"Device Group {device_group}'s {obj_type} {shadowing_address_name} is already present {suffix_text}"
-                badentries.append(
-                    BadEntry(data=data, text=text, device_group=device_group, entry_type=obj_type))
+                yield BadEntry(data=data, text=text, device_group=device_group, entry_type=obj_type)
 
         for local_overlap in local_shadowing_names:
             text = f"Device Group {device_group}'s contains both an Address and Address Group with the same name of '{local_overlap}' Address: {object_entries['Addresses'][local_overlap]}, AddressGroups: {object_entries['AddressGroups'][local_overlap]}"
             data = [object_entries['AddressGroups'][local_overlap],object_entries['Addresses'][local_overlap]]
-            badentries.append(BadEntry(data=data, text=text, device_group=device_group,
-                                       entry_type='Addresses'))
-
-    return badentries
\ No newline at end of file
+            yield BadEntry(data=data, text=text, device_group=device_group,
+                                       entry_type='Addresses')
\ No newline at end of file
@@ -14,24 +14,37 @@ Allow * to 192.168.1.3/32
 
 Some notes:
 This implementation is very simple: It looks
-for a single preceeding rule that is broader than a following rule. A more
-intelligent algorithm would be able to combine all previous
-rules and use a solver like Z3 to determine which combination
-of previous rules would provide the same coverage as the shadowed rule.
-
-It also doesn't resolve FQDNs, because their resolved address can
-change and so that would lead to inconsistent results.
-
-A future enhancement would be to also check IP ranges and subnets, so that
-127.0.0.0/24 would also be detected as shadowing 127.0.0.1/32.
+for a single preceeding rule that is broader than a following rule.
+UnionShadowingRules (union_shadowing_rules.py) detects rules which are
+only covered by a combination of preceeding rules.
+
+Source and destination addresses are compared as ranges of IPs, so that
+127.0.0.0/24 is detected as shadowing 127.0.0.1/32, and an address object
+is matched against a literal IP with the same value (see intervals.py).
+
+Services are compared as ranges of ports for each protocol, including any
+source ports, so that a service for tcp/1-65535 shadows one for tcp/443.
+'application-default' is only matched by itself or 'any', as its ports
+depend on the applications.
+
+It doesn't resolve FQDNs, because their resolved address can
+change and so that would lead to inconsistent results. FQDNs, regions, and
+External Dynamic Lists are only matched by name.
 '''
 
 import logging
 
-from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator
+from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator, SECURITY_POLICY_TYPES, COST_QUADRATIC
+from palo_alto_firewall_analyzer.compiled_rules import RuleMatrix, iter_bits
+from palo_alto_firewall_analyzer.intervals import AddressSet, ServiceSet, get_service_intervals, parse_address, parse_ports
+from palo_alto_firewall_analyzer.progress import advance_progress, update_progress
+from palo_alto_firewall_analyzer.sampling import is_sampled
 
 logger = logging.getLogger(__name__)
 
+# The predefined services, which can be used without being defined in the configuration
+PREDEFINED_SERVICES = {'service-http': ('tcp', '80,8080'), 'service-https': ('tcp', '443')}
+
 def get_contained_objects(group_name, all_groups_to_members):
     """Given a the name of an AddressGroup or ServiceGroup, retrieves a set of all the names of objects effectively contained within"""
     # Note: Same code as from group_replacements.py
@@ -67,6 +80,46 @@ def build_group_member_mapping(pan_config, device_group, object_type):
     return group_to_contained_members
 
 
+def build_address_interval_mapping(pan_config, device_group):
+    """Creates a mapping of Address objects to their (start, end) interval of IPs,
+    or None for addresses which aren't IPs, such as FQDNs"""
+    address_intervals = {}
+    # Objects in the Device Group take precedence over those of the same name in its parents
+    for address_entry in pan_config.get_devicegroup_all_objects('Addresses', device_group):
+        name = address_entry.get('name')
+        if name in address_intervals:
+            continue
+        value = address_entry.findtext('./ip-netmask') or address_entry.findtext('./ip-range')
+        address_intervals[name] = parse_address(value) if value else None
+    return address_intervals
+
+
+def build_service_interval_mapping(pan_config, device_group):
+    """Creates a mapping of Service objects to the intervals of their protocol, ports and source ports,
+    or None for services which can't be converted to intervals"""
+    service_intervals = {}
+    # Objects in the Device Group take precedence over those of the same name in its parents
+    for service_entry in pan_config.get_devicegroup_all_objects('Services', device_group):
+        name = service_entry.get('name')
+        if name in service_intervals:
+            continue
+        service_intervals[name] = None
+        protocol_entry = service_entry.find('./protocol/*')
+        if protocol_entry is None:
+            continue
+        ports = parse_ports(protocol_entry.findtext('./port', ''))
+        source_ports = protocol_entry.findtext('./source-port')
+        if source_ports:
+            source_ports = parse_ports(source_ports)
+            if source_ports is None:
+                continue
+        if ports is not None:
+            service_intervals[name] = get_service_intervals(protocol_entry.tag, ports, source_ports or None)
+    for name, (protocol, ports) in PREDEFINED_SERVICES.items():
+        service_intervals.setdefault(name, get_service_intervals(protocol, parse_ports(ports)))
+    return service_intervals
+
+
 def replace_groups_with_underlying_members(members, mappings):
     output = []
     for member in members:
@@ -74,16 +127,8 @@ def replace_groups_with_underlying_members(members, mappings):
     return output
 
 
-def get_all_rules_for_dg(pan_config, device_group):
-    """
-    Per https://docs.paloaltonetworks.com/panorama/9-1/panorama-admin/panorama-overview/centralized-firewall-configuration-and-update-management/device-groups/device-group-policies
-    The order is: pre-rules top-down, local rules, then post-rules bottom up.
-
-    :param pan_config: PanConfig instance
-    :param device_group: Device Group to get rules for
-    :return: List of tuples: (device group, rule type, rule entry)
-    """
-
+def get_device_group_ancestry(pan_config, device_group):
+    """Returns the Device Group followed by its parents, up to shared"""
     _, device_group_hierarchy_parent = pan_config.get_device_groups_hierarchy()
 
     dg_hierarchy = [device_group]
@@ -91,27 +136,57 @@ def get_all_rules_for_dg(pan_config, device_group):
     while current_dg:
         dg_hierarchy.append(current_dg)
         current_dg = device_group_hierarchy_parent.get(current_dg)
+    return dg_hierarchy
 
-    # Now that we have the DG hierarchy, we can build the list of rules:
-    all_rules = []
-    rule_type = 'SecurityPreRules'
-    for dg in dg_hierarchy[::-1]:
-        for rule in pan_config.get_devicegroup_policy(rule_type, dg):
-            all_rules += [(dg, rule_type, rule)]
 
+def get_rule_sections(pan_config, device_group, rule_types=SECURITY_POLICY_TYPES):
+    """
+    Per https://docs.paloaltonetworks.com/panorama/9-1/panorama-admin/panorama-overview/centralized-firewall-configuration-and-update-management/device-groups/device-group-policies
+    The order is: pre-rules top-down, local rules, then post-rules bottom up.
+
+    :param rule_types: The pre-rule and post-rule types, such as SECURITY_POLICY_TYPES or NAT_POLICY_TYPES
+    :return: List of tuples: (device group, rule type), in the order they're evaluated
+    """
+    pre_rule_type, post_rule_type = rule_types
+    dg_hierarchy = get_device_group_ancestry(pan_config, device_group)
+    sections = [(dg, pre_rule_type) for dg in dg_hierarchy[::-1]]
     # Doesn't support local rules, since those are stored on the firewall
+    sections += [(dg, post_rule_type) for dg in dg_hierarchy]
+    return sections
 
-    rule_type = 'SecurityPostRules'
-    for dg in dg_hierarchy:
+
+def get_all_rules_for_dg(pan_config, device_group):
+    """
+    :param pan_config: PanConfig instance
+    :param device_group: Device Group to get rules for
+    :return: List of tuples: (device group, rule type, rule entry), in the order they're evaluated
+    """
+    all_rules = []
+    for dg, rule_type in get_rule_sections(pan_config, device_group):
         for rule in pan_config.get_devicegroup_policy(rule_type, dg):
             all_rules += [(dg, rule_type, rule)]
     return all_rules
 
 
-def transform_rules(rules, addressgroups_to_underlying_addresses, applicationgroups_to_underlying_services, servicegroups_to_underlying_services):
+def transform_rules(rules, addressgroups_to_underlying_addresses, applicationgroups_to_underlying_services, servicegroups_to_underlying_services,
+                    address_intervals=None, service_intervals=None):
     """Transforms a list of rules into a list of tuples with
     a frozenset for each field, to detect if a rule shadows another.
+    If address_intervals is provided, the sources and destinations are AddressSets instead,
+    so that they're compared by their IPs. Likewise, if service_intervals is provided,
+    the services are ServiceSets, compared by their ports.
     """
+    if address_intervals is None:
+        build_addresses = frozenset
+    else:
+        def build_addresses(members):
+            return AddressSet.from_members(members, address_intervals)
+    if service_intervals is None:
+        build_services = frozenset
+    else:
+        def build_services(members):
+            return ServiceSet.from_members(members, service_intervals)
+
     transformed_rules = []
     for device_group, ruletype, rule_entry in rules:
         # Disabled rules can be ignored
@@ -123,15 +198,15 @@ def transform_rules(rules, addressgroups_to_underlying_addresses, applicationgro
         rule_values['negate'] = frozenset([elem.text for elem in rule_entry.findall('./target/negate')])
         rule_values['negate-source'] = frozenset([elem.text for elem in rule_entry.findall('./negate-source')])
         rule_values['src_zones'] = frozenset([elem.text for elem in rule_entry.findall('./from/member')])
-        rule_values['src_members'] = frozenset(replace_groups_with_underlying_members([elem.text for elem in rule_entry.findall('./source/member')], addressgroups_to_underlying_addresses))
+        rule_values['src_members'] = build_addresses(replace_groups_with_underlying_members([elem.text for elem in rule_entry.findall('./source/member')], addressgroups_to_underlying_addresses))
         rule_values['source_hip'] = frozenset([elem.text for elem in rule_entry.findall('./source-hip/member')])
         rule_values['users'] = frozenset([elem.text for elem in rule_entry.findall('./source-user/')])
         rule_values['negate-destination'] = frozenset([elem.text for elem in rule_entry.findall('./negate-destination')])
         rule_values['dest_zones'] = frozenset([elem.text for elem in rule_entry.findall('./to/member')])
-        rule_values['dest_members'] = frozenset(replace_groups_with_underlying_members([elem.text for elem in rule_entry.findall('./destination/member')], addressgroups_to_underlying_addresses))
+        rule_values['dest_members'] = build_addresses(replace_groups_with_underlying_members([elem.text for elem in rule_entry.findall('./destination/member')], addressgroups_to_underlying_addresses))
         rule_values['destination_hip'] = frozenset([elem.text for elem in rule_entry.findall('./destination-hip/member')])
         rule_values['application'] = frozenset(replace_groups_with_underlying_members([elem.text for elem in rule_entry.findall('./application/')], applicationgroups_to_underlying_services))
-        rule_values['service'] = frozenset(replace_groups_with_underlying_members([elem.text for elem in rule_entry.findall('./service/')], servicegroups_to_underlying_services))
+        rule_values['service'] = build_services(replace_groups_with_underlying_members([elem.text for elem in rule_entry.findall('./service/')], servicegroups_to_underlying_services))
         rule_values['url_category'] = frozenset([elem.text for elem in rule_entry.findall('./category/')])
         rule_values['rule_type'] = frozenset([elem.text for elem in rule_entry.findall('./rule-type')])
         # Assign default values if not present:
@@ -145,6 +220,61 @@ def transform_rules(rules, addressgroups_to_underlying_addresses, applicationgro
     return transformed_rules
 
 
+class CompiledRuleCache:
+    """
+    Transforms each Device Group's rules once per namespace in which they're evaluated,
+    rather than once per Device Group which inherits them.
+
+    A rule's transformed values depend on the groups and addresses it resolves, which
+    are those of the Device Group being evaluated and its parents. A Device Group which
+    doesn't define any of those objects resolves them the same way as its parent, so both
+    share a namespace: the Device Groups in their ancestry which define such objects.
+    The group mappings are built once per namespace, and each section of rules (a Device
+    Group's pre-rules or post-rules) is transformed once per namespace.
+    """
+    NAMESPACE_OBJECT_TYPES = ('AddressGroups', 'ApplicationGroups', 'ServiceGroups', 'Addresses', 'Services')
+
+    def __init__(self, pan_config, rule_types=SECURITY_POLICY_TYPES, transform_function=transform_rules):
+        """transform_function takes the rules and the group mappings, and is transform_rules() for security rules"""
+        self.pan_config = pan_config
+        self.rule_types = rule_types
+        self.transform_function = transform_function
+        # namespace -> (address group, application group, service group, address interval, service interval mappings)
+        self._group_mappings = {}
+        # (namespace, device group, rule type) -> transformed rules
+        self._sections = {}
+
+    def get_namespace(self, device_group):
+        return tuple(dg for dg in get_device_group_ancestry(self.pan_config, device_group)
+                     if any(self.pan_config.get_devicegroup_object(object_type, dg)
+                            for object_type in self.NAMESPACE_OBJECT_TYPES))
+
+    def get_group_mappings(self, device_group):
+        """Returns the arguments to transform_rules() for the Device Group's rules"""
+        namespace = self.get_namespace(device_group)
+        if namespace not in self._group_mappings:
+            self._group_mappings[namespace] = (build_group_member_mapping(self.pan_config, device_group, 'AddressGroups'),
+                                               build_group_member_mapping(self.pan_config, device_group, 'ApplicationGroups'),
+                                               build_group_member_mapping(self.pan_config, device_group, 'ServiceGroups'),
+                                               build_address_interval_mapping(self.pan_config, device_group),
+                                               build_service_interval_mapping(self.pan_config, device_group))
+        return self._group_mappings[namespace]
+
+    def get_transformed_rules(self, device_group):
+        """The same as transform_rules() on get_all_rules_for_dg(), with the sections
+        inherited from the Device Group's parents reused where the namespace is the same"""
+        namespace = self.get_namespace(device_group)
+        group_mappings = self.get_group_mappings(device_group)
+        transformed_rules = []
+        for dg, rule_type in get_rule_sections(self.pan_config, device_group, self.rule_types):
+            key = (namespace, dg, rule_type)
+            if key not in self._sections:
+                rules = [(dg, rule_type, rule) for rule in self.pan_config.get_devicegroup_policy(rule_type, dg)]
+                self._sections[key] = self.transform_function(rules, *group_mappings)
+            transformed_rules += self._sections[key]
+        return transformed_rules
+
+
 def is_shadowing(prior_rule, current_rule):
     """Returns True if all values in the current
     rule are contained in the prior rule"""
@@ -166,44 +296,47 @@ def find_shadowing(device_group, transformed_rules):
     :return:
     """
     shadowing_rules = []
+    rule_matrix = None
     for i, rule_tuple in enumerate(transformed_rules):
         dg, ruletype, rule_name, rule_entry, rule_values = rule_tuple
         # Move forward until we get to the device group we're examining
         if dg != device_group:
             continue
+        # Only the rules being checked are sampled. They're still compared against all preceding rules.
+        if not is_sampled(dg, rule_entry):
+            continue
+        advance_progress("rules", detail=f"{dg}'s {ruletype} '{rule_name}'")
+        if rule_matrix is None:
+            rule_matrix = RuleMatrix(transformed_rules)
         # Now check if this rule is shadowed by any of the preceeding rules:
         shadowed_by = []
-        for prior_dg, prior_ruletype, prior_rule_name, prior_rule_entry, prior_rule_values in transformed_rules[:i]:
-            if is_shadowing(prior_rule_values, rule_values):
-                shadowed_by += [(prior_dg, prior_ruletype, prior_rule_name, prior_rule_entry)]
+        for prior_index in iter_bits(rule_matrix.find_covering_rules(rule_values, (1 << i) - 1)):
+            prior_dg, prior_ruletype, prior_rule_name, prior_rule_entry, _ = transformed_rules[prior_index]
+            shadowed_by += [(prior_dg, prior_ruletype, prior_rule_name, prior_rule_entry)]
         if shadowed_by:
             shadowing_rules.append([(dg, ruletype, rule_name, rule_entry), shadowed_by])
     return shadowing_rules
 
 
 @register_policy_validator("ShadowingRules",
-                           "Shadowing Rules: Detects a broader rule followed by a narrower rule")
+                           "Shadowing Rules: Detects a broader rule followed by a narrower rule",
+                           inputs=('Addresses', 'AddressGroups', 'Services', 'ServiceGroups', 'ApplicationGroups', *SECURITY_POLICY_TYPES),
+                           cost=COST_QUADRATIC, resources=())
 def find_shadowing_rules(profilepackage):
     device_groups = profilepackage.device_groups
     pan_config = profilepackage.pan_config
 
-    badentries = []
-
     logger.info("*" * 80)
     logger.info("Checking for shadowing rules")
 
+    compiled_rule_cache = CompiledRuleCache(pan_config)
     for i, device_group in enumerate(device_groups):
-        logger.info(f"Checking Device group {device_group}")
-        # As security rules are inherited from parent device groups, we'll need to check those too
-        all_rules = get_all_rules_for_dg(pan_config, device_group)
-        # Filter disabled rules:
-        all_rules = [(dg, rule_type, rule) for (dg, rule_type, rule) in all_rules if rule.find("./disabled") is None or rule.find("./disabled").text != "yes"]
-        if not all_rules:
+        update_progress("device groups", i + 1, len(device_groups), f"Device Group {device_group}")
+        # As security rules are inherited from parent device groups, we'll need to check those too.
+        # Disabled rules aren't transformed.
+        transformed_rules = compiled_rule_cache.get_transformed_rules(device_group)
+        if not transformed_rules:
             continue
-        addressgroups_to_underlying_addresses = build_group_member_mapping(pan_config, device_group, 'AddressGroups')
-        servicegroups_to_underlying_services = build_group_member_mapping(pan_config, device_group, 'ServiceGroups')
-        applicationgroups_to_underlying_services = build_group_member_mapping(pan_config, device_group, 'ApplicationGroups')
-        transformed_rules = transform_rules(all_rules, addressgroups_to_underlying_addresses, applicationgroups_to_underlying_services, servicegroups_to_underlying_services)
 
         shadowing_rules = find_shadowing(device_group, transformed_rules)
 
@@ -216,8 +349,5 @@ def find_shadowing_rules(profilepackage):
                 prior_dg, prior_ruletype, prior_rule_name, prior_rule_entry = prior_tuple
                 shadowing_list += [f"{prior_dg}'s {prior_ruletype} '{prior_rule_name}'"]
             text += ", ".join(shadowing_list)
-            logger.info(text)
-            badentries.append(
-                BadEntry(data=(shadowed_tuple, prior_tuples), text=text, device_group=device_group, entry_type=None))
-
-    return badentries
+            logger.debug(text)
+            yield BadEntry(data=(shadowed_tuple, prior_tuples), text=text, device_group=device_group, entry_type=None)
@@ -6,7 +6,8 @@ import xml.etree.ElementTree
 
 import xmltodict
 
-from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator
+from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator, COST_LINEAR
+from palo_alto_firewall_analyzer.progress import update_progress
 
 logger = logging.getLogger(__name__)
 
@@ -32,13 +33,11 @@ def find_shadowing_objects(profilepackage, object_type):
     devicegroup_objects = profilepackage.devicegroup_objects
     device_group_hierarchy_parent = profilepackage.device_group_hierarchy_parent
 
-    badentries = []
-
     logger.info("*" * 80)
     logger.info(f"Checking for shadowing {object_type} objects")
 
     for i, device_group in enumerate(device_groups):
-        logger.info(f"({i + 1}/{len(device_groups)}) Checking {device_group}'s address objects")
+        update_progress("device groups", i + 1, len(device_groups), f"{device_group}'s address objects")
         names_to_obj = {entry.get('name'): entry for entry in devicegroup_objects[device_group][object_type]}
 
         # An object can be inherited from any parent device group. Need to check all of them.
@@ -77,18 +76,19 @@ def find_shadowing_objects(profilepackage, object_type):
                 same_text = "and the contents are NOT equivalent"
             data = names_to_dg_obj_from_parent_dgs[overlapping_name] + [[device_group, local_obj]]
             text = f"Device Group {device_group}'s {object_type} '{overlapping_name}' is already present in Device Group {sorted_dgs} {same_text}"
-            badentries.append(
-                BadEntry(data=data, text=text, device_group=device_group, entry_type=object_type))
-
-    return badentries
+            yield BadEntry(data=data, text=text, device_group=device_group, entry_type=object_type)
 
 
-@register_policy_validator("ShadowingServices", "Service objects that have the same name and shadow each other")
+@register_policy_validator("ShadowingServices", "Service objects that have the same name and shadow each other",
+                           inputs=('Services',),
+                           cost=COST_LINEAR, resources=())
 def find_shadowing_services(profilepackage):
     return find_shadowing_objects(profilepackage, "Services")
 
 
 @register_policy_validator("ShadowingServiceGroups",
-                           "Service Group objects that have the same name and shadow each other")
+                           "Service Group objects that have the same name and shadow each other",
+                           inputs=('ServiceGroups',),
+                           cost=COST_LINEAR, resources=())
 def find_shadowing_service_groups(profilepackage):
     return find_shadowing_objects(profilepackage, "ServiceGroups")
@@ -1,7 +1,8 @@
 import collections
 import logging
 
-from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator
+from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator, COST_LINEAR
+from palo_alto_firewall_analyzer.progress import update_progress
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +17,6 @@ def find_local_similar_names(devicegroup_objects, device_group, object_type1, ob
             local_obj_name = local_obj.get('name')
             names_to_objects[local_obj_name.lower()].append((device_group, obj_type, local_obj))
 
-    badentries = []
     for _, dupes in names_to_objects.items():
         if len(dupes) == 1:
             continue
@@ -33,37 +33,34 @@ def find_local_similar_names(devicegroup_objects, device_group, object_type1, ob
             suffix_text = obj2s_text
 
         text = f"Device Group {device_group} contains objects with similar names: {suffix_text}"
-        badentries.append(BadEntry(data=dupes, text=text, device_group=device_group, entry_type=object_type1))
-    return badentries
+        yield BadEntry(data=dupes, text=text, device_group=device_group, entry_type=object_type1)
 
 @register_policy_validator("SimilarAddressesAndGroups",
-                           "Address and AddressGroup objects with similar, but different, names")
+                           "Address and AddressGroup objects with similar, but different, names",
+                           inputs=('Addresses', 'AddressGroups'),
+                           cost=COST_LINEAR, resources=())
 def find_similar_addresses_and_groups(profilepackage):
     device_groups = profilepackage.device_groups
     devicegroup_objects = profilepackage.devicegroup_objects
 
-    badentries = []
-
     logger.info("*" * 80)
     logger.info("Checking for similarly-named Address and Address Group objects")
 
     for i, device_group in enumerate(device_groups):
-        logger.info(f"({i + 1}/{len(device_groups)}) Checking {device_group}'s address objects")
-        badentries.extend(find_local_similar_names(devicegroup_objects, device_group, 'Addresses', 'AddressGroups'))
-    return badentries
+        update_progress("device groups", i + 1, len(device_groups), f"{device_group}'s address objects")
+        yield from find_local_similar_names(devicegroup_objects, device_group, 'Addresses', 'AddressGroups')
 
 @register_policy_validator("SimilarServicesAndGroups",
-                           "Service and ServiceGroup objects with similar, but different, names")
+                           "Service and ServiceGroup objects with similar, but different, names",
+                           inputs=('Services', 'ServiceGroups'),
+                           cost=COST_LINEAR, resources=())
 def find_similar_services_and_groups(profilepackage):
     device_groups = profilepackage.device_groups
     devicegroup_objects = profilepackage.devicegroup_objects
 
-    badentries = []
-
     logger.info("*" * 80)
     logger.info("Checking for similarly-named Service and Service Group objects")
 
     for i, device_group in enumerate(device_groups):
-        logger.info(f"({i + 1}/{len(device_groups)}) Checking {device_group}'s Service objects")
-        badentries.extend(find_local_similar_names(devicegroup_objects, device_group, 'Services', 'ServiceGroups'))
-    return badentries
\ No newline at end of file
+        update_progress("device groups", i + 1, len(device_groups), f"{device_group}'s Service objects")
+        yield from find_local_similar_names(devicegroup_objects, device_group, 'Services', 'ServiceGroups')
\ No newline at end of file
@@ -1,27 +1,28 @@
 import logging
 
-from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator
+from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator, COST_LINEAR
 from palo_alto_firewall_analyzer.core import xml_object_to_dict
+from palo_alto_firewall_analyzer.progress import update_progress
 
 logger = logging.getLogger(__name__)
 
-@register_policy_validator("UnconventionallyNamedServices", "Service objects that don't match the configured naming convention")
+@register_policy_validator("UnconventionallyNamedServices", "Service objects that don't match the configured naming convention",
+                           inputs=('Services',),
+                           cost=COST_LINEAR, resources=())
 def find_unconventional_services(profilepackage):
     device_groups = profilepackage.device_groups
     pan_config = profilepackage.pan_config
 
     service_name_format = profilepackage.settings.get('service name format')
     if not service_name_format:
-        return []
-
-    badentries = []
+        return
 
     logger.info("*"*80)
     logger.info("Checking for misleading Service objects")
 
     PROTOCOL_TYPES = ('tcp', 'udp')
     for i, device_group in enumerate(device_groups):
-        logger.info(f"({i+1}/{len(device_groups)}) Checking {device_group}'s Service objects")
+        update_progress("device groups", i + 1, len(device_groups), f"{device_group}'s Service objects")
         for service_entry in pan_config.get_devicegroup_object('Services', device_group):
             # For simplicity, convert the XML object to a dict:
             service_dict = xml_object_to_dict(service_entry)
@@ -48,11 +49,12 @@ def find_unconventional_services(profilepackage):
 
             if service_name != calculated_name:
                 text = f"Device Group {device_group}'s Service {service_name} should instead be named {calculated_name}"
-                badentries.append(BadEntry(data=[service_entry, calculated_name], text=text, device_group=device_group, entry_type='Services'))
-    return badentries
+                yield BadEntry(data=[service_entry, calculated_name], text=text, device_group=device_group, entry_type='Services')
 
 
-@register_policy_validator("UnconventionallyNamedAddresses", "Address objects that don't match the configured naming convention")
+@register_policy_validator("UnconventionallyNamedAddresses", "Address objects that don't match the configured naming convention",
+                           inputs=('Addresses',),
+                           cost=COST_LINEAR, resources=())
 def find_unconventional_addresses(profilepackage):
     device_groups = profilepackage.device_groups
     pan_config = profilepackage.pan_config
@@ -64,16 +66,14 @@ def find_unconventional_addresses(profilepackage):
     net_name_format = profilepackage.settings.get('net name format')
     colon_replacement = profilepackage.settings.get('ipv6 colon replacement char')
     if not fqdn_name_format or not host_name_format or not net_name_format or not range_name_format or not wildcard_name_format:
-        return []
-
-    badentries = []
+        return
 
     logger.info("*"*80)
     logger.info("Checking for misleading Address objects")
 
     ADDRESS_TYPES = ('fqdn', 'ip-netmask', 'ip-range', 'ip-wildcard')
     for i, device_group in enumerate(device_groups):
-        logger.info(f"({i+1}/{len(device_groups)}) Checking {device_group}'s Address objects")
+        update_progress("device groups", i + 1, len(device_groups), f"{device_group}'s Address objects")
         for address_entry in pan_config.get_devicegroup_object('Addresses', device_group):
             # For simplicity, convert the XML object to a dict:
             address_dict = xml_object_to_dict(address_entry)
@@ -117,5 +117,4 @@ def find_unconventional_addresses(profilepackage):
             calculated_name = calculated_name[:63]
             if address_name != calculated_name:
                 text = f"Device Group {device_group}'s Address {address_name} should instead be named {calculated_name}"
-                badentries.append(BadEntry(data=[address_entry, calculated_name], text=text, device_group=device_group, entry_type='Addresses'))
-    return badentries
+                yield BadEntry(data=[address_entry, calculated_name], text=text, device_group=device_group, entry_type='Addresses')
@@ -0,0 +1,104 @@
+'''
+Detects rules which are shadowed by a combination of preceeding rules,
+none of which is broader than the rule on its own.
+
+For example, Rule 3 below would be shadowed by Rules 1 and 2 together:
+
+Rule 1:
+Allow * to 192.168.1.0/25
+
+Rule 2:
+Allow * to 192.168.1.128/25
+
+Rule 3:
+Allow * to 192.168.1.0/24
+
+Rules shadowed by a single rule are left to ShadowingRules. See coverage.py
+for how the rules are compared, and the limit on the work done for each rule,
+which can be changed with 'Union shadowing work limit'.
+'''
+
+import logging
+
+from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator, SECURITY_POLICY_TYPES, COST_QUADRATIC
+from palo_alto_firewall_analyzer.compiled_rules import RuleMatrix, iter_bits
+from palo_alto_firewall_analyzer.coverage import CoverageLimitExceeded, DEFAULT_WORK_LIMIT, UnionCoverage
+from palo_alto_firewall_analyzer.progress import advance_progress, update_progress
+from palo_alto_firewall_analyzer.sampling import is_sampled
+from palo_alto_firewall_analyzer.validators.shadowing_rules import CompiledRuleCache
+
+logger = logging.getLogger(__name__)
+
+
+def find_union_shadowing(device_group, transformed_rules, work_limit=DEFAULT_WORK_LIMIT):
+    """
+    :param device_group: Only report on prerules and postrules in this device group,
+    which are shadowed by a combination of others
+    :param transformed_rules: list of transformed rules to examine for shadowing
+    :param work_limit: Passed to UnionCoverage
+    :return: (list of [shadowed rule tuple, list of the prior rule tuples covering it],
+              number of rules which couldn't be checked within the work limit)
+    """
+    shadowed_rules = []
+    undetermined = 0
+    rule_matrix = None
+    union_coverage = None
+    for i, rule_tuple in enumerate(transformed_rules):
+        dg, ruletype, rule_name, rule_entry, rule_values = rule_tuple
+        if dg != device_group:
+            continue
+        if not is_sampled(dg, rule_entry):
+            continue
+        advance_progress("rules", detail=f"{dg}'s {ruletype} '{rule_name}'")
+        if rule_matrix is None:
+            rule_matrix = RuleMatrix(transformed_rules)
+            union_coverage = UnionCoverage(transformed_rules, work_limit)
+        prior_rules = (1 << i) - 1
+        # Rules shadowed by a single rule are reported by ShadowingRules
+        if rule_matrix.find_covering_rules(rule_values, prior_rules):
+            continue
+        candidates = list(iter_bits(rule_matrix.find_overlapping_rules(rule_values, prior_rules)))
+        if len(candidates) < 2:
+            continue
+        try:
+            cover = union_coverage.find_cover(i, candidates)
+        except CoverageLimitExceeded as e:
+            logger.debug(f"{dg}'s {ruletype}: {e}")
+            undetermined += 1
+            continue
+        if cover:
+            cover_tuples = [transformed_rules[prior_index][:4] for prior_index in cover]
+            shadowed_rules.append([(dg, ruletype, rule_name, rule_entry), cover_tuples])
+    return shadowed_rules, undetermined
+
+
+@register_policy_validator("UnionShadowingRules",
+                           "Union Shadowing Rules: Detects a rule whose traffic is all matched by a combination of preceeding rules",
+                           inputs=('Addresses', 'AddressGroups', 'Services', 'ServiceGroups', 'ApplicationGroups', *SECURITY_POLICY_TYPES),
+                           cost=COST_QUADRATIC, resources=())
+def find_union_shadowing_rules(profilepackage):
+    device_groups = profilepackage.device_groups
+    pan_config = profilepackage.pan_config
+    work_limit = profilepackage.settings.getint('Union shadowing work limit', DEFAULT_WORK_LIMIT)
+
+    logger.info("*" * 80)
+    logger.info("Checking for rules shadowed by a combination of rules")
+
+    compiled_rule_cache = CompiledRuleCache(pan_config)
+    for i, device_group in enumerate(device_groups):
+        update_progress("device groups", i + 1, len(device_groups), f"Device Group {device_group}")
+        transformed_rules = compiled_rule_cache.get_transformed_rules(device_group)
+        if not transformed_rules:
+            continue
+
+        shadowed_rules, undetermined = find_union_shadowing(device_group, transformed_rules, work_limit)
+        if undetermined:
+            logger.info(f"{undetermined} of {device_group}'s rules overlap too many rules to check within the work limit")
+
+        for shadowed_tuple, prior_tuples in shadowed_rules:
+            dg, ruletype, rule_name, rule_entry = shadowed_tuple
+            text = f"{dg}'s {ruletype} '{rule_name}' is shadowed by the combination of: "
+            text += ", ".join(f"{prior_dg}'s {prior_ruletype} '{prior_rule_name}'"
+                              for prior_dg, prior_ruletype, prior_rule_name, _ in prior_tuples)
+            logger.debug(text)
+            yield BadEntry(data=(shadowed_tuple, prior_tuples), text=text, device_group=device_group, entry_type=None)
@@ -1,23 +1,26 @@
 import logging
 
-from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator
+from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator, ALL_POLICY_TYPES, COST_LINEAR
+from palo_alto_firewall_analyzer.progress import update_progress
+from palo_alto_firewall_analyzer.sampling import is_sampled
 
 logger = logging.getLogger(__name__)
 
-@register_policy_validator("UnusedAddresses", "Address objects that aren't in use")
+@register_policy_validator("UnusedAddresses", "Address objects that aren't in use",
+                           inputs=('Addresses', 'AddressGroups', *ALL_POLICY_TYPES),
+                           cost=COST_LINEAR, resources=())
 def find_unused_addresses(profilepackage):
     device_groups = profilepackage.device_groups
     devicegroup_objects = profilepackage.devicegroup_objects
     pan_config = profilepackage.pan_config
 
-    badentries = []
-
     logger.info ("*"*80)
     logger.info ("Checking for unused Address objects")
 
     for i, device_group in enumerate(device_groups):
-        logger.info (f"({i+1}/{len(device_groups)}) Checking {device_group}'s address objects")
-        addresses = {entry.get('name'):entry for entry in devicegroup_objects[device_group]['Addresses']}
+        update_progress("device groups", i + 1, len(device_groups), f"{device_group}'s address objects")
+        addresses = {entry.get('name'):entry for entry in devicegroup_objects[device_group]['Addresses']
+                     if is_sampled(device_group, entry)}
 
         # An address or group can be used by any child device group's Address group or policy. Need to check all of them.
         addresses_and_groups_in_use = set()
@@ -54,24 +57,23 @@ def find_unused_addresses(profilepackage):
         unused_addresses = sorted(set(addresses.keys()) - addresses_and_groups_in_use)
         for unused_address in unused_addresses:
             text = f"Device Group {device_group}'s Address {unused_address} is not in use for any policies or address groups"
-            badentries.append(BadEntry(data=[addresses[unused_address]], text=text, device_group=device_group, entry_type='Addresses'))
-
-    return badentries
+            yield BadEntry(data=[addresses[unused_address]], text=text, device_group=device_group, entry_type='Addresses')
 
-@register_policy_validator("UnusedAddressGroups", "AddressGroup objects that aren't in use")
+@register_policy_validator("UnusedAddressGroups", "AddressGroup objects that aren't in use",
+                           inputs=('AddressGroups', *ALL_POLICY_TYPES),
+                           cost=COST_LINEAR, resources=())
 def find_unused_addressgroups(profilepackage):
     device_groups = profilepackage.device_groups
     devicegroup_objects = profilepackage.devicegroup_objects
     pan_config = profilepackage.pan_config
 
-    badentries = []
-
     logger.info ("*"*80)
     logger.info ("Checking for unused Address Group objects")
 
     for i, device_group in enumerate(device_groups):
-        logger.info (f"({i+1}/{len(device_groups)}) Checking {device_group}'s Address Group objects")
-        addressgroups = {entry.get('name'):entry for entry in devicegroup_objects[device_group]['AddressGroups']}
+        update_progress("device groups", i + 1, len(device_groups), f"{device_group}'s Address Group objects")
+        addressgroups = {entry.get('name'):entry for entry in devicegroup_objects[device_group]['AddressGroups']
+                         if is_sampled(device_group, entry)}
 
         # An address or group can be used by any child device group's Address group or policy. Need to check all of them.
         addresses_and_groups_in_use = set()
@@ -108,6 +110,4 @@ def find_unused_addressgroups(profilepackage):
         unused_addressgroups = sorted((addressgroups.keys()) - addresses_and_groups_in_use)
         for unused_addressgroup in unused_addressgroups:
             text = f"Device Group {device_group}'s Address Group {unused_addressgroup} is not in use for any policies or address groups"
-            badentries.append(BadEntry(data=[addressgroups[unused_addressgroup]], text=text, device_group=device_group, entry_type='AddressGroups'))
-
-    return badentries
\ No newline at end of file
+            yield BadEntry(data=[addressgroups[unused_addressgroup]], text=text, device_group=device_group, entry_type='AddressGroups')
\ No newline at end of file
@@ -1,6 +1,7 @@
 import logging
 
-from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator
+from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator, SECURITY_POLICY_TYPES, COST_LINEAR
+from palo_alto_firewall_analyzer.progress import update_progress
 
 logger = logging.getLogger(__name__)
 
@@ -11,15 +12,13 @@ def find_unused_security_profile_groups(profilepackage, object_type, object_frie
     rule_limit_enabled = profilepackage.rule_limit_enabled
 
     if rule_limit_enabled:
-        return []
-
-    badentries = []
+        return
 
     logger.info("*" * 80)
     logger.info(f"Checking for unused {object_friendly_type} objects")
 
     for i, device_group in enumerate(device_groups):
-        logger.info(f"({i + 1}/{len(device_groups)}) Checking {device_group}'s {object_friendly_type} objects")
+        update_progress("device groups", i + 1, len(device_groups), f"{device_group}'s {object_friendly_type} objects")
         groups = {entry.get('name'): entry for entry in pan_config.get_devicegroup_object(object_type, device_group)}
         if not groups:
             continue
@@ -35,14 +34,13 @@ def find_unused_security_profile_groups(profilepackage, object_type, object_frie
         unused_groups = sorted(set(groups.keys()) - groups_in_use)
         for unused_group in unused_groups:
             text = f"Device Group {device_group}'s {object_friendly_type} '{unused_group}' is not used by any Security Policies"
-            badentries.append(
-                BadEntry(data=[groups[unused_group]], text=text, device_group=device_group, entry_type=object_type))
-    return badentries
+            yield BadEntry(data=[groups[unused_group]], text=text, device_group=device_group, entry_type=object_type)
 
 
-@register_policy_validator("UnusedSecurityProfileGroups", "Security Profile Group objects that aren't in use")
+@register_policy_validator("UnusedSecurityProfileGroups", "Security Profile Group objects that aren't in use",
+                           inputs=('SecurityProfileGroups', *SECURITY_POLICY_TYPES),
+                           cost=COST_LINEAR, resources=())
 def find_unused_services(profilepackage):
     object_type = "SecurityProfileGroups"
     object_friendly_type = "Security Profile Group"
-    badentries = find_unused_security_profile_groups(profilepackage, object_type, object_friendly_type)
-    return badentries
+    yield from find_unused_security_profile_groups(profilepackage, object_type, object_friendly_type)
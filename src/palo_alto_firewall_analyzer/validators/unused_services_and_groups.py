@@ -1,6 +1,8 @@
 import logging
 
-from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator
+from palo_alto_firewall_analyzer.core import BadEntry, register_policy_validator, ALL_POLICY_TYPES, COST_LINEAR
+from palo_alto_firewall_analyzer.progress import update_progress
+from palo_alto_firewall_analyzer.sampling import is_sampled
 
 logger = logging.getLogger(__name__)
 
@@ -12,16 +14,15 @@ def find_unused_service_like_object(profilepackage, object_type, object_friendly
     rule_limit_enabled = profilepackage.rule_limit_enabled
 
     if rule_limit_enabled:
-        return []
-
-    badentries = []
+        return
 
     logger.info("*" * 80)
     logger.info(f"Checking for unused {object_friendly_type} objects")
 
     for i, device_group in enumerate(device_groups):
-        logger.info(f"({i + 1}/{len(device_groups)}) Checking {device_group}'s {object_friendly_type} objects")
-        services = {entry.get('name'): entry for entry in devicegroup_objects[device_group][object_type]}
+        update_progress("device groups", i + 1, len(device_groups), f"{device_group}'s {object_friendly_type} objects")
+        services = {entry.get('name'): entry for entry in devicegroup_objects[device_group][object_type]
+                    if is_sampled(device_group, entry)}
 
         # A Services object can be used by any child device group's Services Group or Policy. Need to check all of them.
         services_in_use = set()
@@ -43,22 +44,21 @@ def find_unused_service_like_object(profilepackage, object_type, object_friendly
         unused_services = sorted(set(services.keys()) - services_in_use)
         for unused_service in unused_services:
             text = f"Device Group {device_group}'s {object_friendly_type} {unused_service} is not in use for any Policies or Service Groups"
-            badentries.append(
-                BadEntry(data=[services[unused_service]], text=text, device_group=device_group, entry_type=object_type))
-
-    return badentries
+            yield BadEntry(data=[services[unused_service]], text=text, device_group=device_group, entry_type=object_type)
 
 
-@register_policy_validator("UnusedServices", "Services objects that aren't in use")
+@register_policy_validator("UnusedServices", "Services objects that aren't in use",
+                           inputs=('Services', 'ServiceGroups', *ALL_POLICY_TYPES),
+                           cost=COST_LINEAR, resources=())
 def find_unused_services(profilepackage):
     object_type = "Services"
     object_friendly_type = "Service"
-    badentries = find_unused_service_like_object(profilepackage, object_type, object_friendly_type)
-    return badentries
+    yield from find_unused_service_like_object(profilepackage, object_type, object_friendly_type)
 
-@register_policy_validator("UnusedServiceGroups", "Service Group objects that aren't in use")
+@register_policy_validator("UnusedServiceGroups", "Service Group objects that aren't in use",
+                           inputs=('ServiceGroups', *ALL_POLICY_TYPES),
+                           cost=COST_LINEAR, resources=())
 def find_unused_servicegroups(profilepackage):
     object_type = "ServiceGroups"
     object_friendly_type = "Service Groups"
-    badentries = find_unused_service_like_object(profilepackage, object_type, object_friendly_type)
-    return badentries
+    yield from find_unused_service_like_object(profilepackage, object_type, object_friendly_type)
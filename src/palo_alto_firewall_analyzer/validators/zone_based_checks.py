@@ -2,8 +2,10 @@ import collections
 import ipaddress
 import logging
 
-from palo_alto_firewall_analyzer.core import BadEntry, get_single_ip_from_address, register_policy_validator, xml_object_to_dict
+from palo_alto_firewall_analyzer.core import BadEntry, get_single_ip_from_address, register_policy_validator, xml_object_to_dict, SECURITY_POLICY_TYPES, COST_LINEAR, RESOURCE_API
 from palo_alto_firewall_analyzer.pan_helpers import get_firewall_zone
+from palo_alto_firewall_analyzer.progress import advance_progress, update_progress
+from palo_alto_firewall_analyzer.sampling import is_sampled
 
 logger = logging.getLogger(__name__)
 
@@ -88,7 +90,9 @@ def get_zone_for_source_member(firewall, api_key, member_name, address_groups, a
         return [], False
 
 
-@register_policy_validator("MissingZones", "Rule is missing a Zone!")
+@register_policy_validator("MissingZones", "Rule is missing a Zone!",
+                           inputs=('Addresses', 'AddressGroups', *SECURITY_POLICY_TYPES),
+                           cost=COST_LINEAR, resources=(RESOURCE_API,))
 def find_missing_zones(profilepackage):
     device_groups = profilepackage.device_groups
     devicegroup_objects = profilepackage.devicegroup_objects
@@ -98,9 +102,8 @@ def find_missing_zones(profilepackage):
     enable_many_api = profilepackage.settings.getboolean('Enable validators with many API requests')
 
     if not enable_many_api:
-        return []
+        return
 
-    badentries = []
     logger.info ("*"*80)
     logger.info ("Checking for Missing Zones")
     for i, device_group in enumerate(device_groups):
@@ -125,14 +128,15 @@ def find_missing_zones(profilepackage):
 
         for ruletype in ('SecurityPreRules', 'SecurityPostRules'):
             rules = devicegroup_exclusive_objects[device_group][ruletype]
-            logger.info (f"({i+1}/{len(device_groups)}) Checking {device_group}'s {ruletype}")
+            update_progress("device groups", i + 1, len(device_groups), f"{device_group}'s {ruletype}")
 
-            total_entries = len(rules)
-            for j, entry in enumerate(rules):
-                logger.info (f'({j+1}/{total_entries}) {entry.get("name")}')
+            for entry in rules:
+                advance_progress("rules", detail=f"{device_group}'s {ruletype} '{entry.get('name')}'")
                 # Disabled rules can be ignored
                 if entry.find("./disabled") is not None and entry.find("./disabled").text == "yes":
                     continue
+                if not is_sampled(device_group, entry):
+                    continue
 
                 rule_name = entry.get('name')
                 src_zones = sorted([elem.text for elem in entry.findall('./from/member')])
@@ -160,11 +164,12 @@ def find_missing_zones(profilepackage):
                         missing_template = "Members {members} require {zonetype} zone '{zone}'."
                         missing_text = " ".join([missing_template.format(zone=zone, members=sorted(set(calculated_zones_to_members[zone])), zonetype=zonetype) for zone in missing_zones])
                         text = f"Device Group '{device_group}'s {ruletype} '{rule_name}' uses {zonetype} zones {zones}. " + missing_text
-                        logger.info (text)
-                        badentries.append(BadEntry(data=entry, text=text, device_group=device_group, entry_type=ruletype))
-    return badentries
+                        logger.debug(text)
+                        yield BadEntry(data=entry, text=text, device_group=device_group, entry_type=ruletype, subject=zonetype)
 
-@register_policy_validator("ExtraZones", "Rule has an extra Zone!")
+@register_policy_validator("ExtraZones", "Rule has an extra Zone!",
+                           inputs=('Addresses', 'AddressGroups', *SECURITY_POLICY_TYPES),
+                           cost=COST_LINEAR, resources=(RESOURCE_API,))
 def find_extra_zones(profilepackage):
     device_groups = profilepackage.device_groups
     devicegroup_objects = profilepackage.devicegroup_objects
@@ -174,9 +179,8 @@ def find_extra_zones(profilepackage):
     enable_many_api = profilepackage.settings.getboolean('Enable validators with many API requests')
 
     if not enable_many_api:
-        return []
+        return
 
-    badentries = []
     logger.info ("*"*80)
     logger.info ("Checking for Extra Zones")
     for i, device_group in enumerate(device_groups):
@@ -201,14 +205,15 @@ def find_extra_zones(profilepackage):
 
         for ruletype in ('SecurityPreRules', 'SecurityPostRules'):
             rules = devicegroup_exclusive_objects[device_group][ruletype]
-            logger.info (f"({i+1}/{len(device_groups)}) Checking {device_group}'s {ruletype}")
+            update_progress("device groups", i + 1, len(device_groups), f"{device_group}'s {ruletype}")
 
-            total_entries = len(rules)
-            for j, entry in enumerate(rules):
-                logger.info (f'({j+1}/{total_entries}) {entry.get("name")}')
+            for entry in rules:
+                advance_progress("rules", detail=f"{device_group}'s {ruletype} '{entry.get('name')}'")
                 # Disabled rules can be ignored
                 if entry.find("./disabled") is not None and entry.find("./disabled").text == "yes":
                     continue
+                if not is_sampled(device_group, entry):
+                    continue
 
                 rule_name = entry.get('name')
                 src_zones = sorted([elem.text for elem in entry.findall('./from/member')])
@@ -242,11 +247,12 @@ def find_extra_zones(profilepackage):
                     extra_zones = sorted(set(zones) - set(calculated_zones_to_members))
                     if extra_zones:
                         text = f"Device Group '{device_group}'s {ruletype} '{rule_name}' uses {zonetype} zones {zones}. The {zonetype} zones should be {sorted(calculated_zones_to_members)}. The following {zonetype} zones are not needed: {extra_zones}"
-                        logger.info (text)
-                        badentries.append( BadEntry(data=entry, text=text, device_group=device_group, entry_type=ruletype) )
-    return badentries
+                        logger.debug(text)
+                        yield BadEntry(data=entry, text=text, device_group=device_group, entry_type=ruletype, subject=zonetype)
 
-@register_policy_validator("ExtraRules", "Rule has a single Source/Dest Zone! Rule is not needed!")
+@register_policy_validator("ExtraRules", "Rule has a single Source/Dest Zone! Rule is not needed!",
+                           inputs=('Addresses', 'AddressGroups', *SECURITY_POLICY_TYPES),
+                           cost=COST_LINEAR, resources=(RESOURCE_API,))
 def find_extra_rules(profilepackage):
     device_groups = profilepackage.device_groups
     devicegroup_objects = profilepackage.devicegroup_objects
@@ -256,9 +262,8 @@ def find_extra_rules(profilepackage):
     enable_many_api = profilepackage.settings.getboolean('Enable validators with many API requests')
 
     if not enable_many_api:
-        return []
+        return
 
-    badentries = []
     logger.info ("*"*80)
     logger.info ("Checking for Extra rules")
     for i, device_group in enumerate(device_groups):
@@ -283,14 +288,15 @@ def find_extra_rules(profilepackage):
 
         for ruletype in ('SecurityPreRules', 'SecurityPostRules'):
             rules = devicegroup_exclusive_objects[device_group][ruletype]
-            logger.info (f"({i+1}/{len(device_groups)}) Checking {device_group}'s {ruletype}")
+            update_progress("device groups", i + 1, len(device_groups), f"{device_group}'s {ruletype}")
 
-            total_entries = len(rules)
-            for j, entry in enumerate(rules):
-                logger.info (f'({j+1}/{total_entries}) {entry.get("name")}')
+            for entry in rules:
+                advance_progress("rules", detail=f"{device_group}'s {ruletype} '{entry.get('name')}'")
                 # Disabled rules can be ignored
                 if entry.find("./disabled") is not None and entry.find("./disabled").text == "yes":
                     continue
+                if not is_sampled(device_group, entry):
+                    continue
 
                 rule_name = entry.get('name')
                 src_members = sorted([elem.text for elem in entry.findall('./source/member')])
@@ -355,6 +361,5 @@ def find_extra_rules(profilepackage):
 
                 if len(calculated_src_zones) == 1 and calculated_src_zones == calculated_dest_zones:
                     text = f"Device Group '{device_group}'s {ruletype} '{rule_name}' was calculated to only need the same source and dest zone of '{list(calculated_dest_zones)[0]}'."
-                    logger.info (text)
-                    badentries.append( BadEntry(data=entry, text=text, device_group=device_group, entry_type=ruletype) )
-    return badentries
+                    logger.debug(text)
+                    yield BadEntry(data=entry, text=text, device_group=device_group, entry_type=ruletype)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+import os
+import tempfile
+import unittest
+
+from palo_alto_firewall_analyzer.analyzer import analyze, load_profilepackage, parse_config
+from palo_alto_firewall_analyzer.pan_config import PanConfig
+
+
+class TestAnalyzer(unittest.TestCase):
+    # Two Device Groups with a disabled rule each, in the format of an XML export
+    exported_xml = """\
+    <config version="10.1.0" urldb="paloaltonetworks" detail-version="10.1.3">
+      <devices><entry><device-group>
+        <entry name="dg1">
+          <pre-rulebase><security><rules>
+            <entry name="dg1_disabled" uuid="1"><disabled>yes</disabled></entry>
+            <entry name="dg1_enabled" uuid="2"><disabled>no</disabled></entry>
+          </rules></security></pre-rulebase>
+        </entry>
+        <entry name="dg2">
+          <pre-rulebase><security><rules>
+            <entry name="dg2_disabled" uuid="3"><disabled>yes</disabled></entry>
+          </rules></security></pre-rulebase>
+        </entry>
+      </device-group></entry></devices>
+      <readonly><devices><entry name="localhost.localdomain"><device-group>
+        <entry name="dg1"></entry>
+        <entry name="dg2"></entry>
+      </device-group></entry></devices></readonly>
+    </config>
+    """
+
+    def test_config_sources(self):
+        api_xml = f'<?xml version="1.0"?><response status="success"><result>{self.exported_xml}</result></response>'
+        self.assertEqual(parse_config(api_xml).get_device_groups(), ['dg1', 'dg2'])
+        self.assertEqual(parse_config(self.exported_xml.encode()).get_device_groups(), ['dg1', 'dg2'])
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir, 'config.xml')
+            with open(fname, 'w') as fh:
+                fh.write(self.exported_xml)
+            sources = [fname, self.exported_xml, PanConfig(self.exported_xml, True),
+                       load_profilepackage(self.exported_xml)]
+            for source in sources:
+                results = list(analyze(source, validators=['DisabledPolicies']))
+                self.assertEqual([(result.validator_name, result.device_group) for result in results],
+                                 [('DisabledPolicies', 'dg1'), ('DisabledPolicies', 'dg2')])
+
+    def test_reuse_and_filter(self):
+        profilepackage = load_profilepackage(self.exported_xml)
+        results = list(analyze(profilepackage, validators=['DisabledPolicies'], device_groups=['dg2']))
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].data[0].get('name'), 'dg2_disabled')
+        # The shared ProfilePackage is not modified
+        self.assertEqual(profilepackage.device_groups, ['dg1', 'dg2', 'shared'])
+
+    def test_lazy_results(self):
+        results = analyze(self.exported_xml, validators=['DisabledPolicies', 'BadLogSetting'])
+        first_result = next(results)
+        self.assertEqual(first_result.text, 'Device Group dg1\'s SecurityPreRules "dg1_disabled" is disabled')
+        results.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
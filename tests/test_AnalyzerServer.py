@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+import json
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from palo_alto_firewall_analyzer.core import ConfigurationSettings, xml_object_to_dict
+from palo_alto_firewall_analyzer.rule_insertion import compile_rulebase
+from palo_alto_firewall_analyzer.scripts.pan_analyzer_server import AnalyzerServer, ConfigCache
+
+
+class TestAnalyzerServer(unittest.TestCase):
+    test_xml = """\
+    <config version="10.1.0" urldb="paloaltonetworks" detail-version="10.1.3">
+      <devices><entry><device-group>
+        <entry name="test_dg">
+          <pre-rulebase><security><rules>
+            <entry name="disabled_rule" uuid="1"><disabled>yes</disabled></entry>
+          </rules></security></pre-rulebase>
+        </entry>
+      </device-group></entry></devices>
+      <readonly><devices><entry name="localhost.localdomain"><device-group>
+        <entry name="test_dg"></entry>
+      </device-group></entry></devices></readonly>
+    </config>
+    """
+
+    def setUp(self):
+        self.snapshot_dir = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.snapshot_dir.name, 'snapshot.xml'), 'w') as fh:
+            fh.write(self.test_xml)
+        config_cache = ConfigCache(2, ConfigurationSettings().get_config())
+        self.server = AnalyzerServer(('127.0.0.1', 0), config_cache, self.snapshot_dir.name)
+        self.server_thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05})
+        self.server_thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.server_thread.join()
+        self.snapshot_dir.cleanup()
+
+    def request(self, path, data=None):
+        try:
+            with urllib.request.urlopen(self.base_url + path, data=data) as response:
+                return response.status, json.load(response)
+        except urllib.error.HTTPError as err:
+            return err.code, json.load(err)
+
+    def test_upload_and_analyze(self):
+        status, response = self.request('/configs', self.test_xml.encode())
+        self.assertEqual(status, 200)
+        self.assertFalse(response['cached'])
+        config_id = response['config_id']
+
+        status, response = self.request(f'/analyze?config_id={config_id}&validator=DisabledPolicies')
+        self.assertEqual(status, 200)
+        self.assertTrue(response['cached'])
+        self.assertEqual(response['total_problems'], 1)
+        self.assertEqual(response['problems'][0]['validator_name'], 'DisabledPolicies')
+        self.assertEqual(response['problems'][0]['device_group'], 'test_dg')
+
+        # Uploading the same configuration again reuses the parsed copy
+        status, response = self.request('/analyze?validator=DisabledPolicies&device_group=test_dg', self.test_xml.encode())
+        self.assertEqual(response['config_id'], config_id)
+        self.assertTrue(response['cached'])
+
+    def test_snapshot(self):
+        status, response = self.request('/analyze?snapshot=snapshot.xml&validator=DisabledPolicies')
+        self.assertEqual(status, 200)
+        self.assertEqual(response['total_problems'], 1)
+        status, response = self.request('/analyze?snapshot=snapshot.xml&validator=DisabledPolicies')
+        self.assertTrue(response['cached'])
+        status, response = self.request('/analyze?snapshot=../missing.xml')
+        self.assertEqual(status, 404)
+
+    def test_errors(self):
+        self.assertEqual(self.request('/analyze?config_id=unknown')[0], 404)
+        self.assertEqual(self.request('/analyze?validator=NotAValidator', self.test_xml.encode())[0], 400)
+        self.assertEqual(self.request('/configs', b'<config')[0], 400)
+        self.assertEqual(self.request('/unknown')[0], 404)
+        status, response = self.request('/validators')
+        self.assertIn('DisabledPolicies', response['validators'])
+
+    def test_whatif(self):
+        rule = b'{"name": "new_rule", "action": "allow"}'
+        status, response = self.request('/whatif?snapshot=snapshot.xml&device_group=test_dg', rule)
+        self.assertEqual(status, 200)
+        self.assertEqual(response['rule_name'], 'new_rule')
+        # The only existing rule is disabled
+        self.assertEqual(response['shadowed_by'], [])
+        self.assertEqual(response['shadows'], [])
+        self.assertEqual(self.request('/whatif?snapshot=snapshot.xml&device_group=missing_dg', rule)[0], 400)
+        self.assertEqual(self.request('/whatif?snapshot=snapshot.xml&device_group=test_dg', b'{')[0], 400)
+
+    def test_eviction(self):
+        config_cache = self.server.config_cache
+        profilepackages = [config_cache.add(self.test_xml.replace('test_dg', f'dg{i}').encode())[1] for i in range(2)]
+        compiled_rulebase = compile_rulebase(profilepackages[1].pan_config, 'dg1')
+        rule_dict = xml_object_to_dict(profilepackages[1].pan_config.get_devicegroup_policy('SecurityPreRules', 'dg1')[0])
+        config_ids = [config_cache.add(self.test_xml.replace('test_dg', f'dg{i}').encode())[0] for i in range(3)]
+        self.assertEqual(config_cache.list(), config_ids[1:])
+
+        # Only the evicted configuration's lookups are dropped
+        self.assertEqual(profilepackages[0].pan_config.lookups, {})
+        self.assertIs(compile_rulebase(profilepackages[1].pan_config, 'dg1'), compiled_rulebase)
+        self.assertIs(xml_object_to_dict(profilepackages[1].pan_config.get_devicegroup_policy('SecurityPreRules', 'dg1')[0]),
+                      rule_dict)
+
+
+if __name__ == "__main__":
+    unittest.main()
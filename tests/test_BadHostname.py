@@ -65,7 +65,7 @@ class TestBadHostname(unittest.TestCase):
         profilepackage = self.create_profilepackage(addresses, address_groups, rules, ignored_dns_prefixes)
 
         _, _, validator_function = get_policy_validators()['BadHostname']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0].data.get('name'), 'invalid_fqdn')
 
@@ -103,7 +103,7 @@ class TestBadHostname(unittest.TestCase):
         profilepackage = self.create_profilepackage(addresses, address_groups, rules, ignored_dns_prefixes)
 
         _, _, validator_function = get_policy_validators()['BadHostnameUsage']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 2)
         self.assertEqual(results[0].data.get('name'), 'Sample invalid AG')
         self.assertEqual(results[1].data.get('name'), 'test_rule')
@@ -44,7 +44,7 @@ class TestBadLogSetting(unittest.TestCase):
         profilepackage = self.create_profilepackage(pan_config, mandated_log_profile)
 
         _, _, validator_function = get_policy_validators()['BadLogSetting']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 2)
         self.assertEqual(results[0].data[0].get('name'), 'missing_log-setting')
         self.assertEqual(results[1].data[0].get('name'), 'wrong_log-setting')
@@ -66,7 +66,7 @@ class TestBadLogSetting(unittest.TestCase):
         pan_config = PanConfig(test_xml)
         profilepackage = self.create_profilepackage(pan_config, mandated_log_profile)
         _, _, validator_function = get_policy_validators()['BadLogSetting']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 0)
 
 
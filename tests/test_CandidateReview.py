@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+import unittest
+
+from palo_alto_firewall_analyzer.analyzer import load_profilepackage
+from palo_alto_firewall_analyzer.core import get_policy_validator
+from palo_alto_firewall_analyzer.pan_config import PanConfig, get_changed_entries, get_changed_sections
+from palo_alto_firewall_analyzer.scripts.pan_analyzer import find_new_problems
+
+
+def build_rule(name, uuid, source):
+    return f"""
+      <entry name="{name}" uuid="{uuid}">
+        <to><member>any</member></to><from><member>any</member></from>
+        <source><member>{source}</member></source><destination><member>any</member></destination>
+        <source-user><member>any</member></source-user><category><member>any</member></category>
+        <application><member>dns</member></application><service><member>application-default</member></service>
+        <source-hip><member>any</member></source-hip><destination-hip><member>any</member></destination-hip>
+      </entry>"""
+
+
+def build_config(rules):
+    return f"""\
+    <response status="success"><result><config version="10.1.0" urldb="paloaltonetworks" detail-version="10.1.3">
+      <devices><entry><device-group>
+        <entry name="test_dg">
+          <address>
+            <entry name="address1"><ip-netmask>10.0.0.1</ip-netmask></entry>
+            <entry name="address2"><ip-netmask>10.0.0.2</ip-netmask></entry>
+          </address>
+          <pre-rulebase><security><rules>{''.join(build_rule(*rule) for rule in rules)}</rules></security></pre-rulebase>
+        </entry>
+        <entry name="other_dg">
+          <pre-rulebase><security><rules>{build_rule('other_broad', 10, 'any')}{build_rule('other_narrow', 11, 'any')}</rules></security></pre-rulebase>
+        </entry>
+      </device-group></entry></devices>
+      <readonly><devices><entry name="localhost.localdomain"><device-group>
+        <entry name="test_dg"></entry>
+        <entry name="other_dg"></entry>
+      </device-group></entry></devices></readonly>
+    </config></result></response>
+    """
+
+
+class TestCandidateReview(unittest.TestCase):
+    running_rules = [('broad', 1, 'any'), ('already_shadowed', 2, 'address2'), ('uses_address1', 3, 'address1')]
+    # A new rule is shadowed, and removing uses_address1 leaves address1 unused
+    candidate_rules = [('broad', 1, 'any'), ('new_shadowed', 4, 'address2'), ('already_shadowed', 2, 'address2')]
+
+    def setUp(self):
+        PanConfig.clear_caches()
+
+    def test_changed_entries(self):
+        running_config = PanConfig(build_config(self.running_rules))
+        candidate_config = PanConfig(build_config(self.candidate_rules))
+        changed_sections = get_changed_sections(running_config.get_section_digests(), candidate_config.get_section_digests())
+        self.assertEqual(changed_sections, {('test_dg', 'SecurityPreRules')})
+
+        added_or_modified, modified_or_removed = get_changed_entries(running_config, candidate_config, changed_sections)
+        # already_shadowed is unchanged, but now follows a different rule
+        self.assertEqual([entry.get('name') for _, _, entry in added_or_modified], ['new_shadowed', 'already_shadowed'])
+        self.assertEqual([entry.get('name') for _, _, entry in modified_or_removed], ['already_shadowed', 'uses_address1'])
+
+    def test_new_problems(self):
+        validators = {validator_name: get_policy_validator(validator_name)
+                      for validator_name in ('ShadowingRules', 'UnusedAddresses', 'UnqualifiedFQDN')}
+        running_profilepackage = load_profilepackage(build_config(self.running_rules))
+        candidate_profilepackage = load_profilepackage(build_config(self.candidate_rules))
+        new_problems, timed_out = find_new_problems(validators, running_profilepackage, candidate_profilepackage)
+
+        self.assertEqual(timed_out, {})
+        # UnqualifiedFQDN doesn't look at rules, so it isn't run
+        self.assertEqual([validator_name for validator_name, _ in new_problems], ['ShadowingRules', 'UnusedAddresses'])
+        new_problems = {validator_name: problem_entries for (validator_name, _), problem_entries in new_problems.items()}
+        # already_shadowed and other_dg's rules were already shadowed
+        self.assertEqual([problem_entry.data[0][2] for problem_entry in new_problems['ShadowingRules']], ['new_shadowed'])
+        self.assertEqual([problem_entry.data[0].get('name') for problem_entry in new_problems['UnusedAddresses']], ['address1'])
+
+        # Without any changes, there's nothing to check
+        self.assertEqual(find_new_problems(validators, running_profilepackage, running_profilepackage), ({}, {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
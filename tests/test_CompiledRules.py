@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+import random
+import unittest
+
+from palo_alto_firewall_analyzer.compiled_rules import RuleMatrix, covers, iter_bits
+from palo_alto_firewall_analyzer.coverage import subtract, to_space
+from palo_alto_firewall_analyzer.intervals import AddressSet
+from palo_alto_firewall_analyzer.validators.shadowing_rules import is_shadowing
+
+
+class TestCompiledRules(unittest.TestCase):
+    @staticmethod
+    def build_rules(count, seed):
+        rng = random.Random(seed)
+        address_choices = ['any', '10.0.0.0/8', '10.0.0.0/24', '10.0.0.5', '10.0.0.1-10.0.0.9', '10.0.1.0/25',
+                           '2001:db8::/32', '2001:db8::1', 'fqdn_object']
+        rules = []
+        for i in range(count):
+            rule_values = {
+                'src_zones': frozenset(rng.sample(['any', 'trust', 'untrust', 'dmz'], rng.randint(1, 2))),
+                'application': frozenset(rng.sample(['any', 'ssh', 'dns', 'web-browsing'], rng.randint(1, 2))),
+                'src_members': AddressSet.from_members(rng.sample(address_choices, rng.randint(1, 3))),
+            }
+            rules.append(('test_dg', 'SecurityPreRules', f'rule{i}', None, rule_values))
+        return rules
+
+    def test_iter_bits(self):
+        self.assertEqual(list(iter_bits(0b101001)), [0, 3, 5])
+        self.assertEqual(list(iter_bits(0)), [])
+        # Past the first bits, the rest are found in the binary string
+        positions = list(range(1, 1000, 3))
+        self.assertEqual(list(iter_bits(sum(1 << position for position in positions))), positions)
+
+    def test_matches_is_shadowing(self):
+        rules = self.build_rules(300, seed=1)
+        rule_matrix = RuleMatrix(rules)
+        for i, rule_tuple in enumerate(rules):
+            expected = [j for j, prior_tuple in enumerate(rules[:i]) if is_shadowing(prior_tuple[4], rule_tuple[4])]
+            self.assertEqual(list(iter_bits(rule_matrix.find_covering_rules(rule_tuple[4], (1 << i) - 1))), expected)
+
+    def test_covered_rules(self):
+        rules = self.build_rules(300, seed=2)
+        # Rules without a value for a field are only covered by rules without one (or 'any')
+        rules.append(('test_dg', 'SecurityPreRules', 'empty', None, dict(rules[0][4], application=frozenset())))
+        rule_matrix = RuleMatrix(rules)
+        for rule_tuple in rules:
+            expected = [j for j, other_tuple in enumerate(rules) if covers(rule_tuple[4], other_tuple[4])]
+            self.assertEqual(list(iter_bits(rule_matrix.find_covered_rules(rule_tuple[4]))), expected)
+
+    def test_overlapping_rules(self):
+        rules = self.build_rules(150, seed=3)
+        rule_matrix = RuleMatrix(rules)
+        for rule_tuple in rules:
+            region = tuple(to_space(values) for values in rule_tuple[4].values())
+            overlapping = set(iter_bits(rule_matrix.find_overlapping_rules(rule_tuple[4])))
+            for j, other_tuple in enumerate(rules):
+                if subtract(region, tuple(to_space(values) for values in other_tuple[4].values())) is not None:
+                    self.assertIn(j, overlapping)
+
+    def test_wide_ranges(self):
+        # 10.0.0.0/8 overlaps too many buckets to be indexed by them, but is still compared
+        rules = [('test_dg', 'SecurityPreRules', name, None, {'src_members': AddressSet.from_members([address])})
+                 for name, address in [('wide', '10.0.0.0/8'), ('narrow', '10.1.2.0/24'), ('single', '10.1.2.3')]]
+        rule_matrix = RuleMatrix(rules)
+        self.assertEqual(list(iter_bits(rule_matrix.find_covering_rules(rules[2][4]))), [0, 1, 2])
+        self.assertEqual(list(iter_bits(rule_matrix.find_covering_rules(rules[0][4]))), [0])
+        outside = {'src_members': AddressSet.from_members(['192.168.0.1'])}
+        self.assertEqual(rule_matrix.find_covering_rules(outside), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
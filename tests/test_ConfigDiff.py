@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+import argparse
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from palo_alto_firewall_analyzer.core import ConfigurationSettings, get_policy_validators, get_policy_validator_metadata
+from palo_alto_firewall_analyzer.core import is_validator_affected
+from palo_alto_firewall_analyzer.pan_config import PanConfig, get_changed_sections
+from palo_alto_firewall_analyzer.scripts.pan_analyzer import watch_policy_validators
+
+
+class TestConfigDiff(unittest.TestCase):
+    @staticmethod
+    def build_config(address_value, rule_action):
+        return f"""\
+        <response status="success"><result><config>
+          <shared>
+            <address><entry name="shared_address"><ip-netmask>10.0.0.1</ip-netmask></entry></address>
+          </shared>
+          <devices><entry><device-group><entry name="test_dg">
+            <address><entry name="dg_address"><ip-netmask>{address_value}</ip-netmask></entry></address>
+            <pre-rulebase><security><rules>
+              <entry name="rule1"><action>{rule_action}</action></entry>
+            </rules></security></pre-rulebase>
+          </entry></device-group></entry></devices>
+          <readonly><devices><entry name="localhost.localdomain"><device-group>
+            <entry name="test_dg"></entry>
+          </device-group></entry></devices></readonly>
+        </config></result></response>
+        """
+
+    def test_changed_sections(self):
+        old_digests = PanConfig(self.build_config('10.0.0.2', 'allow')).get_section_digests()
+        PanConfig.clear_caches()
+        new_digests = PanConfig(self.build_config('10.0.0.3', 'allow')).get_section_digests()
+        self.assertEqual(get_changed_sections(old_digests, new_digests), {('test_dg', 'Addresses')})
+
+        PanConfig.clear_caches()
+        new_digests = PanConfig(self.build_config('10.0.0.2', 'deny')).get_section_digests()
+        self.assertEqual(get_changed_sections(old_digests, new_digests), {('test_dg', 'SecurityPreRules')})
+        self.assertEqual(get_changed_sections(old_digests, old_digests), set())
+
+    def test_affected_validators(self):
+        get_policy_validators()
+        changed_sections = {('test_dg', 'SecurityPreRules')}
+        self.assertTrue(is_validator_affected('ShadowingRules', changed_sections))
+        self.assertFalse(is_validator_affected('UnqualifiedFQDN', changed_sections))
+        self.assertTrue(is_validator_affected('UnqualifiedFQDN', {('test_dg', 'Addresses')}))
+        # A change to the Device Group hierarchy affects everything
+        self.assertTrue(is_validator_affected('UnqualifiedFQDN', {(None, None)}))
+        self.assertFalse(is_validator_affected('ShadowingRules', set()))
+        # Every registered validator declares its inputs
+        for validator_name, metadata in get_policy_validator_metadata().items():
+            self.assertIsNotNone(metadata['inputs'], validator_name)
+
+    def test_watch_keeps_problem_ids(self):
+        # DisabledPolicies isn't affected by the address change, so its problems are kept from the first configuration
+        config_template = """\
+        <config version="10.1.0" urldb="paloaltonetworks" detail-version="10.1.3">
+          <devices><entry><device-group><entry name="test_dg">
+            <address><entry name="dg_address"><ip-netmask>{address_value}</ip-netmask></entry></address>
+            <pre-rulebase><security><rules>
+              <entry name="rule1" uuid="1234"><action>allow</action><disabled>yes</disabled></entry>
+            </rules></security></pre-rulebase>
+          </entry></device-group></entry></devices>
+          <readonly><devices><entry name="localhost.localdomain"><device-group>
+            <entry name="test_dg"></entry>
+          </device-group></entry></devices></readonly>
+        </config>
+        """
+        validators = {'DisabledPolicies': get_policy_validators()['DisabledPolicies']}
+        outputs = []
+
+        class StopWatching(Exception):
+            pass
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            xml_file = os.path.join(tmpdir, 'config.xml')
+            output_fname = os.path.join(tmpdir, 'output.jsonl')
+            with open(xml_file, 'w') as fh:
+                fh.write(config_template.format(address_value='10.0.0.2'))
+
+            def reload_config(seconds):
+                with open(output_fname) as fh:
+                    outputs.append([json.loads(line) for line in fh])
+                if len(outputs) == 2:
+                    raise StopWatching()
+                with open(xml_file, 'w') as fh:
+                    fh.write(config_template.format(address_value='10.0.0.3'))
+                os.utime(xml_file, ns=(0, 10 ** 9))
+
+            parsed_args = argparse.Namespace(xml=xml_file, device_group=None, limit=None, validator_timeout=None,
+                                             output='jsonl', metrics_file=None, watch_interval=0)
+            with patch('palo_alto_firewall_analyzer.scripts.pan_analyzer.time.sleep', side_effect=reload_config):
+                with self.assertRaises(StopWatching):
+                    watch_policy_validators(validators, parsed_args, ConfigurationSettings().get_config(), '', output_fname)
+
+        problems = [[record for record in output if record['record_type'] == 'problem'] for output in outputs]
+        self.assertEqual(len(problems[0]), 1)
+        self.assertEqual(problems[0][0]['refs'], [['test_dg', 'SecurityPreRules', 'rule1', '1234']])
+        self.assertEqual(problems[1], problems[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -70,7 +70,7 @@ class TestExtraRules(unittest.TestCase):
         profilepackage = self.create_profilepackage(rules, addresses)
         get_firewall_zone.side_effect = ['src_zone', 'src_zone']
         _, _, validator_function = get_policy_validators()['ExtraRules']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0].data.get('name'), 'same_zone_rule')
 
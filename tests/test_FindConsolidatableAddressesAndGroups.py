@@ -75,7 +75,7 @@ class TestFindConsolidatableAddressesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(pan_config)
 
         _, _, validator_function = get_policy_validators()['FindConsolidatableAddresses']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 2)
         self.assertEqual(len(results[0].data), 2)
         self.assertEqual(results[0].data[0].get('name'), 'address_group3')
@@ -130,7 +130,7 @@ class TestFindConsolidatableAddressesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(pan_config)
 
         _, _, validator_function = get_policy_validators()['FindConsolidatableAddressGroups']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 1)
         self.assertEqual(len(results[0].data), 2)
         self.assertEqual(results[0].data[0].get('name'), 'rule3')
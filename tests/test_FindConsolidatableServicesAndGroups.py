@@ -79,7 +79,7 @@ class TestFindConsolidatableServicesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(pan_config)
 
         _, _, validator_function = get_policy_validators()['FindConsolidatableServices']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 1)
         self.assertEqual(len(results[0].data), 2)
 
@@ -140,7 +140,7 @@ class TestFindConsolidatableServicesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(pan_config)
 
         _, _, validator_function = get_policy_validators()['FindConsolidatableServiceGroups']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 1)
         self.assertEqual(len(results[0].data), 2)
 
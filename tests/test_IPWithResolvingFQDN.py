@@ -51,7 +51,7 @@ class TestIPWithResolvingFQDN(unittest.TestCase):
         profilepackage = self.create_profilepackage(pan_config)
 
         _, _, validator_function = get_policy_validators()['IPWithResolvingFQDN']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0].data[0].get('name'), 'redundant_ip')
         self.assertEqual(results[0].data[1], 'valid.tld')
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+import unittest
+
+from palo_alto_firewall_analyzer.intervals import AddressSet, IntervalSet, ServiceSet, get_service_intervals, parse_address, parse_ports
+
+
+class TestIntervals(unittest.TestCase):
+    def test_interval_set(self):
+        interval_set = IntervalSet([(10, 20), (0, 5), (6, 8), (15, 30)])
+        # Overlapping and adjacent intervals are merged
+        self.assertEqual(interval_set.intervals, ((0, 8), (10, 30)))
+        self.assertTrue(interval_set >= IntervalSet([(1, 2), (12, 30)]))
+        self.assertFalse(interval_set >= IntervalSet([(7, 10)]))
+        self.assertTrue(interval_set >= IntervalSet())
+        self.assertTrue(IntervalSet([(7, 10)]) <= IntervalSet([(0, 100)]))
+        self.assertIn(25, interval_set)
+        self.assertNotIn(9, interval_set)
+        self.assertEqual(interval_set | IntervalSet([(9, 9)]), IntervalSet([(0, 30)]))
+        self.assertEqual(interval_set & IntervalSet([(5, 12), (20, 40)]), IntervalSet([(5, 8), (10, 12), (20, 30)]))
+        self.assertEqual(interval_set - IntervalSet([(5, 12), (20, 25)]), IntervalSet([(0, 4), (13, 19), (26, 30)]))
+        self.assertEqual(interval_set - IntervalSet([(0, 100)]), IntervalSet())
+
+    def test_many_members(self):
+        # Thousands of single IPs are merged into a single interval
+        single_ips = IntervalSet(parse_address(f"10.0.{i // 256}.{i % 256}") for i in range(4096))
+        self.assertEqual(single_ips, IntervalSet([parse_address("10.0.0.0/20")]))
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address("10.0.0.0/24")[1] - parse_address("10.0.0.0/24")[0], 255)
+        self.assertEqual(parse_address("10.0.0.5"), parse_address("10.0.0.5/32"))
+        self.assertEqual(parse_address("10.0.0.1-10.0.0.9")[1] - parse_address("10.0.0.1-10.0.0.9")[0], 8)
+        # IPv4 addresses don't overlap with any IPv6 addresses, including IPv4-mapped ones
+        self.assertNotEqual(parse_address("10.0.0.1"), parse_address("::ffff:10.0.0.1"))
+        self.assertFalse(IntervalSet([parse_address("::/0")]) >= IntervalSet([parse_address("10.0.0.0/8")]))
+        self.assertFalse(IntervalSet([parse_address("0.0.0.0/0")]) >= IntervalSet([parse_address("2001:db8::1")]))
+        self.assertIsNone(parse_address("10.0.0.9-10.0.0.1"))
+        self.assertIsNone(parse_address("10.0.0.1-2001:db8::1"))
+        self.assertIsNone(parse_address("example.com"))
+        self.assertIsNone(parse_address("10.0.0.0/0.0.255.0"))
+
+    def test_address_set(self):
+        address_intervals = {'web': parse_address("10.0.0.80"), 'fqdn': None}
+        subnet = AddressSet.from_members(["10.0.0.0/24", "fqdn"], address_intervals)
+        self.assertTrue(subnet >= AddressSet.from_members(["web", "10.0.0.1-10.0.0.3"], address_intervals))
+        self.assertTrue(subnet >= AddressSet.from_members(["fqdn"], address_intervals))
+        self.assertFalse(subnet >= AddressSet.from_members(["other_fqdn"], address_intervals))
+        self.assertFalse(subnet >= AddressSet.from_members(["2001:db8::1"], address_intervals))
+        self.assertIn('any', AddressSet.from_members(["any"]))
+
+    def test_service_set(self):
+        self.assertEqual(parse_ports("80, 8080-8090"), [(80, 80), (8080, 8090)])
+        self.assertIsNone(parse_ports("80-"))
+        self.assertIsNone(parse_ports("65536"))
+        self.assertIsNone(get_service_intervals('icmp', [(0, 0)]))
+        service_intervals = {
+            'tcp-all': get_service_intervals('tcp', parse_ports("1-65535")),
+            'tcp-443': get_service_intervals('tcp', parse_ports("443")),
+            'udp-443': get_service_intervals('udp', parse_ports("443")),
+            'tcp-443-from-high-ports': get_service_intervals('tcp', parse_ports("443"), parse_ports("1024-65535")),
+            # Hundreds of ranges are merged with the ones next to them
+            'tcp-many': get_service_intervals('tcp', [(port, port) for port in range(1000, 1500)]),
+        }
+        tcp_all = ServiceSet.from_members(['tcp-all'], service_intervals)
+        self.assertTrue(tcp_all >= ServiceSet.from_members(['tcp-443', 'tcp-many'], service_intervals))
+        self.assertFalse(tcp_all >= ServiceSet.from_members(['udp-443'], service_intervals))
+        self.assertEqual(len(ServiceSet.from_members(['tcp-many'], service_intervals).intervals.intervals), 1)
+        # A service limited to some source ports is within the same service from any source port, but not vice versa
+        tcp_443 = ServiceSet.from_members(['tcp-443'], service_intervals)
+        from_high_ports = ServiceSet.from_members(['tcp-443-from-high-ports'], service_intervals)
+        self.assertTrue(tcp_443 >= from_high_ports)
+        self.assertFalse(from_high_ports >= tcp_443)
+        # Services without ports are only matched by name
+        self.assertFalse(tcp_all >= ServiceSet.from_members(['application-default'], service_intervals))
+        self.assertIn('any', ServiceSet.from_members(['any'], service_intervals))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from palo_alto_firewall_analyzer.core import BadEntry, ProfilePackage, ConfigurationSettings, get_policy_validator
+from palo_alto_firewall_analyzer.pan_config import PanConfig
+from palo_alto_firewall_analyzer.scripts.pan_analyzer import stream_policy_validators
+
+
+class TestJSONLOutput(unittest.TestCase):
+    default_xml = """\
+        <response status="success"><result><config version="10.1.0" urldb="paloaltonetworks" detail-version="10.1.3">
+        </config></result></response>
+        """
+
+    @classmethod
+    def create_profilepackage(cls, test_xml=default_xml, device_groups=('test_dg',)):
+        profilepackage = ProfilePackage(
+            api_key='',
+            pan_config=PanConfig(test_xml),
+            settings=ConfigurationSettings().get_config(),
+            device_group_hierarchy_children={},
+            device_group_hierarchy_parent={},
+            device_groups_and_firewalls={},
+            device_groups=list(device_groups),
+            devicegroup_objects={},
+            devicegroup_exclusive_objects={},
+            rule_limit_enabled=False
+        )
+        return profilepackage
+
+    def test_stream_output(self):
+        def list_validator(profilepackage):
+            return [BadEntry(data=None, text='list problem', device_group='test_dg', entry_type='Addresses')]
+
+        def generator_validator(profilepackage):
+            yield BadEntry(data=None, text='first problem', device_group='test_dg', entry_type=None)
+            yield BadEntry(data=None, text='second problem', device_group='shared', entry_type=None)
+
+        validators = {'ListValidator': ('ListValidator', 'Returns a list', list_validator),
+                      'GeneratorValidator': ('GeneratorValidator', 'Is a generator', generator_validator)}
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir, 'output.jsonl')
+            total_problems = stream_policy_validators(validators, self.create_profilepackage(), fname)
+            with open(fname) as fh:
+                records = [json.loads(line) for line in fh]
+
+        self.assertEqual(total_problems, 3)
+        self.assertEqual([record['record_type'] for record in records],
+                         ['run', 'problem', 'validator_summary', 'problem', 'problem', 'validator_summary', 'run_summary'])
+        self.assertEqual(records[0]['config_version'], '10.1.0')
+        self.assertEqual(records[1]['desc'], 'list problem')
+        self.assertEqual(records[1]['entry_type'], 'Addresses')
+        self.assertEqual(records[2]['validator_name'], 'ListValidator')
+        self.assertEqual(records[2]['total_problems'], 1)
+        self.assertEqual(records[4]['device_group'], 'shared')
+        self.assertEqual(records[5]['total_problems'], 2)
+        self.assertEqual(records[6]['total_problems'], 3)
+
+    def test_crash_keeps_partial_output(self):
+        def crashing_validator(profilepackage):
+            yield BadEntry(data=None, text='found before crash', device_group='test_dg', entry_type=None)
+            raise RuntimeError("Validator crashed")
+
+        validators = {'CrashingValidator': ('CrashingValidator', 'Crashes', crashing_validator)}
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir, 'output.jsonl')
+            with self.assertRaises(RuntimeError):
+                stream_policy_validators(validators, self.create_profilepackage(), fname)
+            with open(fname) as fh:
+                records = [json.loads(line) for line in fh]
+
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[1]['desc'], 'found before crash')
+
+    def test_problems_written_before_validator_finishes(self):
+        rules = """
+            <pre-rulebase><security><rules>
+              <entry name="Allow all">
+                <from><member>any</member></from><to><member>any</member></to>
+                <source><member>any</member></source><destination><member>any</member></destination>
+                <application><member>any</member></application><service><member>any</member></service>
+              </entry>
+              <entry name="Allow web">
+                <from><member>any</member></from><to><member>any</member></to>
+                <source><member>any</member></source><destination><member>any</member></destination>
+                <application><member>web-browsing</member></application><service><member>any</member></service>
+              </entry>
+            </rules></security></pre-rulebase>"""
+        test_xml = f"""\
+        <response status="success"><result><config version="10.1.0" urldb="paloaltonetworks" detail-version="10.1.3">
+          <devices><entry><device-group>
+            <entry name="first_dg">{rules}</entry>
+            <entry name="second_dg">{rules}</entry>
+          </device-group></entry></devices>
+          <readonly><devices><entry name="localhost.localdomain"><device-group>
+            <entry name="first_dg"></entry>
+            <entry name="second_dg"></entry>
+          </device-group></entry></devices></readonly>
+        </config></result></response>
+        """
+        validators = {'ShadowingRules': get_policy_validator('ShadowingRules')}
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir, 'output.jsonl')
+            # What was written by the time ShadowingRules starts on each Device Group
+            written = []
+
+            def read_output(*args, **kwargs):
+                with open(fname) as fh:
+                    written.append([json.loads(line)['record_type'] for line in fh])
+
+            with patch('palo_alto_firewall_analyzer.validators.shadowing_rules.update_progress', side_effect=read_output):
+                total_problems = stream_policy_validators(validators, self.create_profilepackage(test_xml, ('first_dg', 'second_dg')), fname)
+
+        self.assertEqual(total_problems, 2)
+        # first_dg's problem is on disk while ShadowingRules is still checking second_dg
+        self.assertEqual(written, [['run'], ['run', 'problem']])
+
+
+if __name__ == "__main__":
+    unittest.main()
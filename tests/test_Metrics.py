@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+import os
+import tempfile
+import unittest
+
+from palo_alto_firewall_analyzer import metrics
+from palo_alto_firewall_analyzer.scripts.pan_analyzer import record_validator_metrics
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def tearDown(self):
+        metrics.reset()
+
+    def test_render(self):
+        metrics.inc_counter('test_requests', "Requests", {'endpoint': '/api'})
+        metrics.inc_counter('test_requests', "Requests", {'endpoint': '/api'}, 2)
+        metrics.set_gauge('test_problems', "Problems", {'validator': 'BadLogSetting', 'device_group': 'dg "1"'}, 5)
+        metrics.observe('test_duration_seconds', "Durations", {'validator': 'ShadowingRules'}, 0.5, buckets=(0.1, 1))
+        metrics.observe('test_duration_seconds', "Durations", {'validator': 'ShadowingRules'}, 2, buckets=(0.1, 1))
+
+        lines = metrics.render().splitlines()
+        self.assertIn('# TYPE test_requests counter', lines)
+        self.assertIn('test_requests_total{endpoint="/api"} 3', lines)
+        self.assertIn('# TYPE test_problems gauge', lines)
+        self.assertIn('test_problems{device_group="dg \\"1\\"",validator="BadLogSetting"} 5', lines)
+        self.assertIn('# TYPE test_duration_seconds histogram', lines)
+        self.assertIn('test_duration_seconds_bucket{validator="ShadowingRules",le="0.1"} 0', lines)
+        self.assertIn('test_duration_seconds_bucket{validator="ShadowingRules",le="1.0"} 1', lines)
+        self.assertIn('test_duration_seconds_bucket{validator="ShadowingRules",le="+Inf"} 2', lines)
+        self.assertIn('test_duration_seconds_count{validator="ShadowingRules"} 2', lines)
+        self.assertIn('test_duration_seconds_sum{validator="ShadowingRules"} 2.5', lines)
+        self.assertEqual(lines[-1], '# EOF')
+
+    def test_conflicting_types(self):
+        metrics.inc_counter('test_metric', "A counter")
+        with self.assertRaises(KeyError):
+            metrics.set_gauge('test_metric', "A gauge")
+
+    def test_remove_gauges(self):
+        metrics.set_gauge('test_problems', "Problems", {'validator': 'BadLogSetting', 'device_group': 'dg1'}, 5)
+        metrics.set_gauge('test_problems', "Problems", {'validator': 'BadLogSetting', 'device_group': 'dg2'}, 1)
+        metrics.set_gauge('test_problems', "Problems", {'validator': 'DisabledPolicies', 'device_group': 'dg1'}, 2)
+        metrics.remove_gauges('test_problems', {'validator': 'BadLogSetting'})
+        metrics.set_gauge('test_problems', "Problems", {'validator': 'BadLogSetting', 'device_group': 'dg2'}, 3)
+
+        lines = metrics.render().splitlines()
+        self.assertNotIn('test_problems{device_group="dg1",validator="BadLogSetting"} 5', lines)
+        self.assertIn('test_problems{device_group="dg2",validator="BadLogSetting"} 3', lines)
+        self.assertIn('test_problems{device_group="dg1",validator="DisabledPolicies"} 2', lines)
+        metrics.remove_gauges('missing_gauge')
+
+    def test_validator_metrics(self):
+        # When a re-run validator no longer finds problems in a Device Group, its old count isn't exported
+        record_validator_metrics('BadLogSetting', {'dg1': 5, 'dg2': 1}, 0.1, False)
+        record_validator_metrics('BadLogSetting', {'dg2': 2}, 0.1, False)
+        problem_lines = [line for line in metrics.render().splitlines() if line.startswith('pan_analyzer_problems{')]
+        self.assertEqual(problem_lines, ['pan_analyzer_problems{device_group="dg2",validator="BadLogSetting"} 2'])
+
+    def test_write_textfile(self):
+        metrics.set_gauge('test_gauge', "A gauge", None, 1)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir, 'pan_analyzer.prom')
+            metrics.write_textfile(fname)
+            self.assertEqual(os.listdir(tmpdir), ['pan_analyzer.prom'])
+            with open(fname) as fh:
+                self.assertIn('test_gauge 1\n', fh.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
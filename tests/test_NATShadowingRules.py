@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+import unittest
+
+from palo_alto_firewall_analyzer.core import get_policy_validators
+from palo_alto_firewall_analyzer.core import ProfilePackage, ConfigurationSettings
+from palo_alto_firewall_analyzer.pan_config import PanConfig
+
+
+class TestNATShadowingRules(unittest.TestCase):
+    @staticmethod
+    def create_profilepackage(pan_config):
+        profilepackage = ProfilePackage(
+            api_key='',
+            pan_config=pan_config,
+            settings=ConfigurationSettings().get_config(),
+            device_group_hierarchy_children={},
+            device_group_hierarchy_parent={},
+            device_groups_and_firewalls={},
+            device_groups=["test_dg"],
+            devicegroup_objects={},
+            devicegroup_exclusive_objects={},
+            rule_limit_enabled=False
+        )
+        return profilepackage
+
+    def test_nat_shadowing_rules(self):
+        rule_template = """
+            <entry name="{name}">
+              <from><member>trust</member></from><to><member>untrust</member></to>{extra}
+              <source>{sources}</source><destination><member>any</member></destination>
+              <service>{service}</service>
+              <source-translation><dynamic-ip-and-port><interface-address><interface>ethernet1/1</interface></interface-address></dynamic-ip-and-port></source-translation>
+            </entry>"""
+        pre_rules = [('Subnet', '<member>internal</member>', 'any', ''),
+                     ('Host', '<member>10.0.0.5</member>', 'service-https', ''),
+                     ('Other subnet', '<member>10.1.0.0/24</member>', 'any', ''),
+                     ('Other interface', '<member>10.1.0.5</member>', 'any', '<to-interface>ethernet1/2</to-interface>'),
+                     ('Disabled', '<member>10.2.0.0/16</member>', 'any', '<disabled>yes</disabled>'),
+                     ('After disabled', '<member>10.2.0.1</member>', 'tcp-22', ''),
+                     ('Other NAT type', '<member>10.0.0.6</member>', 'any', '<nat-type>nat64</nat-type>')]
+        post_rules = [('Port in group', '<member>10.1.0.7</member>', 'ssh-group', '')]
+        test_xml = f"""\
+        <response status="success"><result><config>
+          <devices><entry><device-group><entry name="test_dg">
+            <pre-rulebase><nat><rules>
+              {''.join(rule_template.format(name=name, sources=sources, service=service, extra=extra)
+                       for name, sources, service, extra in pre_rules)}
+            </rules></nat></pre-rulebase>
+            <post-rulebase><nat><rules>
+              {''.join(rule_template.format(name=name, sources=sources, service=service, extra=extra)
+                       for name, sources, service, extra in post_rules)}
+            </rules></nat></post-rulebase>
+            <address>
+              <entry name="internal"><ip-netmask>10.0.0.0/24</ip-netmask></entry>
+            </address>
+            <service>
+              <entry name="tcp-22"><protocol><tcp><port>22</port></tcp></protocol></entry>
+            </service>
+            <service-group>
+              <entry name="ssh-group"><members><member>tcp-22</member></members></entry>
+            </service-group>
+          </entry></device-group></entry></devices>
+          <readonly><devices><entry name="localhost.localdomain"><device-group>
+            <entry name="test_dg"><id>11</id></entry>
+          </device-group></entry></devices></readonly>
+        </config></result></response>
+        """
+        profilepackage = self.create_profilepackage(PanConfig(test_xml))
+        _, _, validator_function = get_policy_validators()['NATShadowingRules']
+        results = list(validator_function(profilepackage))
+        shadowed = {result.data[0][2]: [prior[2] for prior in result.data[1]] for result in results}
+        self.assertEqual(shadowed, {'Host': ['Subnet'],
+                                    'Other interface': ['Other subnet'],
+                                    'Port in group': ['Other subnet']})
+        self.assertEqual(results[0].text, "test_dg's NATPreRules 'Host' is shadowed by: test_dg's NATPreRules 'Subnet'")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+import io
+import random
+import unittest
+
+from palo_alto_firewall_analyzer.intervals import IntervalSet
+from palo_alto_firewall_analyzer.pan_config import PanConfig
+from palo_alto_firewall_analyzer.policy_lookup import Flow, IntervalIndex, compile_policy, get_firewall_device_group, read_flows
+
+
+class TestPolicyLookup(unittest.TestCase):
+    rule_template = """
+        <entry name="{name}">
+          <from>{from_zones}</from><to><member>untrust</member></to>
+          <source>{sources}</source><destination><member>any</member></destination>
+          <source-user><member>any</member></source-user><category><member>any</member></category>
+          <application>{applications}</application><service>{services}</service>
+          <action>{action}</action>{extra}
+        </entry>"""
+
+    def build_rules(self, rules):
+        return ''.join(self.rule_template.format(name=name, from_zones=from_zones, sources=sources, applications=applications,
+                                                 services=services, action=action, extra=extra)
+                       for name, from_zones, sources, applications, services, action, extra in rules)
+
+    def setUp(self):
+        PanConfig.clear_caches()
+        parent_pre_rules = [
+            ('Deny bad host', '<member>any</member>', '<member>10.0.0.66</member>', '<member>any</member>',
+             '<member>any</member>', 'deny', ''),
+        ]
+        pre_rules = [
+            ('Disabled', '<member>any</member>', '<member>any</member>', '<member>any</member>',
+             '<member>any</member>', 'deny', '<disabled>yes</disabled>'),
+            ('Web', '<member>trust</member>', '<member>internal</member>', '<member>any</member>',
+             '<member>service-https</member>', 'allow', ''),
+            ('SSH', '<member>trust</member>', '<member>10.0.0.0/8</member>', '<member>ssh</member>',
+             '<member>application-default</member>', 'allow', ''),
+            ('Not internal', '<member>trust</member>', '<member>internal</member>', '<member>any</member>',
+             '<member>dns-group</member>', 'allow', '<negate-source>yes</negate-source>'),
+        ]
+        parent_post_rules = [
+            ('Default deny', '<member>any</member>', '<member>any</member>', '<member>any</member>',
+             '<member>any</member>', 'deny', ''),
+        ]
+        test_xml = f"""\
+        <response status="success"><result><config>
+          <devices><entry><device-group>
+            <entry name="parent_dg">
+              <pre-rulebase><security><rules>{self.build_rules(parent_pre_rules)}</rules></security></pre-rulebase>
+              <post-rulebase><security><rules>{self.build_rules(parent_post_rules)}</rules></security></post-rulebase>
+            </entry>
+            <entry name="test_dg">
+              <pre-rulebase><security><rules>{self.build_rules(pre_rules)}</rules></security></pre-rulebase>
+              <address>
+                <entry name="internal"><ip-netmask>10.0.0.0/24</ip-netmask></entry>
+              </address>
+              <service>
+                <entry name="udp-53"><protocol><udp><port>53</port></udp></protocol></entry>
+                <entry name="tcp-53-from-1024"><protocol><tcp><port>53</port><source-port>1024-65535</source-port></tcp></protocol></entry>
+              </service>
+              <service-group>
+                <entry name="dns-group"><members><member>udp-53</member><member>tcp-53-from-1024</member></members></entry>
+              </service-group>
+            </entry>
+          </device-group></entry></devices>
+          <readonly><devices><entry name="localhost.localdomain"><device-group>
+            <entry name="parent_dg"></entry>
+            <entry name="test_dg"><parent-dg>parent_dg</parent-dg></entry>
+          </device-group></entry></devices></readonly>
+        </config></result></response>
+        """
+        self.pan_config = PanConfig(test_xml)
+
+    def test_first_match(self):
+        classifier = compile_policy(self.pan_config, 'test_dg')
+
+        def match_name(*flow):
+            rule_tuple = classifier.match(Flow(*flow))
+            return None if rule_tuple is None else rule_tuple[:3]
+
+        self.assertEqual(match_name('trust', 'untrust', '10.0.0.66', '8.8.8.8', 'tcp', 443),
+                         ('parent_dg', 'SecurityPreRules', 'Deny bad host'))
+        self.assertEqual(match_name('trust', 'untrust', '10.0.0.5', '8.8.8.8', 'tcp', 443),
+                         ('test_dg', 'SecurityPreRules', 'Web'))
+        self.assertEqual(match_name('trust', 'untrust', '10.0.0.5', '8.8.8.8', 'tcp', 22, 'ssh')[2], 'SSH')
+        # The application isn't known, so it's not compared
+        self.assertEqual(match_name('trust', 'untrust', '10.1.0.5', '8.8.8.8', 'tcp', 22)[2], 'SSH')
+        self.assertEqual(match_name('trust', 'untrust', '10.1.0.5', '8.8.8.8', 'tcp', 22, 'web-browsing')[2], 'Default deny')
+        # The source is negated, so only addresses outside of 'internal' match
+        self.assertEqual(match_name('trust', 'untrust', '192.168.0.1', '8.8.8.8', 'udp', 53, 'dns')[2], 'Not internal')
+        self.assertEqual(match_name('trust', 'untrust', '10.0.0.5', '8.8.8.8', 'udp', 53, 'dns')[2], 'Default deny')
+        # tcp-53-from-1024 only matches when the source port is known to be within its range
+        self.assertEqual(match_name('trust', 'untrust', '192.168.0.1', '8.8.8.8', 'tcp', 53, 'dns', 2048)[2], 'Not internal')
+        self.assertEqual(match_name('trust', 'untrust', '192.168.0.1', '8.8.8.8', 'tcp', 53, 'dns', 53)[2], 'Default deny')
+        self.assertEqual(match_name('trust', 'untrust', '192.168.0.1', '8.8.8.8', 'tcp', 53, 'dns')[2], 'Default deny')
+        # Other protocols only match services which are 'any'
+        self.assertEqual(match_name('trust', 'untrust', '10.0.0.5', '8.8.8.8', 'icmp', None, 'ping')[2], 'Default deny')
+        self.assertEqual(match_name('trust', 'untrust', '10.0.0.66', '2001:db8::1', 'tcp', 443)[2], 'Deny bad host')
+
+        with self.assertRaises(ValueError):
+            classifier.match(Flow('trust', 'untrust', 'web.example.com', '8.8.8.8', 'tcp', 443))
+        with self.assertRaises(ValueError):
+            classifier.match(Flow('trust', 'untrust', '10.0.0.5', '8.8.8.8', 'tcp', 70000))
+
+    def test_intrazone(self):
+        rules = [('Intrazone', '<member>trust</member>', '<member>any</member>', '<member>any</member>',
+                  '<member>any</member>', 'allow', '<rule-type>intrazone</rule-type>'),
+                 ('Interzone', '<member>trust</member>', '<member>any</member>', '<member>any</member>',
+                  '<member>any</member>', 'deny', '<rule-type>interzone</rule-type>')]
+        test_xml = f"""\
+        <response status="success"><result><config>
+          <devices><entry><device-group><entry name="test_dg">
+            <pre-rulebase><security><rules>{self.build_rules(rules)}</rules></security></pre-rulebase>
+          </entry></device-group></entry></devices>
+          <readonly><devices><entry name="localhost.localdomain"><device-group>
+            <entry name="test_dg"></entry>
+          </device-group></entry></devices></readonly>
+        </config></result></response>
+        """
+        classifier = compile_policy(PanConfig(test_xml), 'test_dg')
+        self.assertEqual(classifier.match(Flow('trust', 'trust', '10.0.0.1', '10.0.0.2', 'tcp', 22))[2], 'Intrazone')
+        self.assertEqual(classifier.match(Flow('trust', 'untrust', '10.0.0.1', '10.0.0.2', 'tcp', 22))[2], 'Interzone')
+        self.assertIsNone(classifier.match(Flow('dmz', 'untrust', '10.0.0.1', '10.0.0.2', 'tcp', 22)))
+
+    def test_interval_index(self):
+        # Each value is matched by the rules containing it, which is the same as checking each rule
+        rng = random.Random(1)
+        rule_intervals = []
+        for i in range(30):
+            intervals = []
+            for _ in range(rng.randint(1, 3)):
+                start = rng.randint(0, 200)
+                intervals.append((start, start + rng.randint(0, 30)))
+            rule_intervals.append((1 << i, IntervalSet(intervals)))
+        negated_rules = (1 << 3) | (1 << 7)
+        index = IntervalIndex(rule_intervals, any_rules=1 << 5, negated_rules=negated_rules)
+        for value in range(0, 250):
+            expected = 1 << 5
+            for rule_bit, intervals in rule_intervals:
+                if (value in intervals) != bool(rule_bit & negated_rules):
+                    expected |= rule_bit
+            self.assertEqual(index.find_rules(value), expected)
+        for start in range(0, 250, 7):
+            expected = 1 << 5
+            for rule_bit, intervals in rule_intervals:
+                if not rule_bit & negated_rules and intervals >= IntervalSet([(start, start + 5)]):
+                    expected |= rule_bit
+            self.assertEqual(index.find_rules(start, start + 5) & ~negated_rules, expected & ~negated_rules)
+
+    def test_read_flows(self):
+        flows = list(read_flows(io.StringIO("source_zone,destination_zone,source,destination,protocol,port\n"
+                                            "trust,untrust,10.0.0.5,8.8.8.8,udp,53\n")))
+        self.assertEqual(flows, [Flow('trust', 'untrust', '10.0.0.5', '8.8.8.8', 'udp', '53')])
+        with self.assertRaises(ValueError):
+            list(read_flows(io.StringIO("source,destination\n10.0.0.5,8.8.8.8\n")))
+
+    def test_firewall_device_group(self):
+        device_groups_and_firewalls = {'shared': [], 'test_dg': ['fw1', 'fw2']}
+        self.assertEqual(get_firewall_device_group(device_groups_and_firewalls, 'fw2'), 'test_dg')
+        with self.assertRaises(KeyError):
+            get_firewall_device_group(device_groups_and_firewalls, 'fw3')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+import pickle
+import unittest
+
+from palo_alto_firewall_analyzer.core import BadEntry
+from palo_alto_firewall_analyzer.pan_config import PanConfig
+from palo_alto_firewall_analyzer.problem_records import ProblemRecord
+
+
+class TestProblemRecords(unittest.TestCase):
+    test_xml = """\
+    <response status="success"><result><config>
+      <devices><entry><device-group><entry name="test_dg">
+        <address>
+          <entry name="{address_name}"><ip-netmask>127.0.0.1</ip-netmask></entry>
+        </address>
+        <pre-rulebase><security><rules>
+          <entry name="{rule_name}" uuid="1234"><log-setting>wrong</log-setting></entry>
+          <entry name="other_rule" uuid="5678"><log-setting>wrong</log-setting></entry>
+        </rules></security></pre-rulebase>
+      </entry></device-group></entry></devices>
+      <readonly><devices><entry name="localhost.localdomain"><device-group>
+        <entry name="test_dg"/>
+      </device-group></entry></devices></readonly>
+    </config></result></response>
+    """
+
+    def create_record(self, rule_name='rule1', rule_index=0, text='problem', address_name='address1'):
+        pan_config = PanConfig(self.test_xml.format(rule_name=rule_name, address_name=address_name))
+        rule = pan_config.get_devicegroup_policy('SecurityPreRules', 'test_dg')[rule_index]
+        address = pan_config.get_devicegroup_object('Addresses', 'test_dg')[0]
+        bad_entry = BadEntry(data=(rule, [address, 'correct'], {'address': address}), text=text,
+                             device_group='test_dg', entry_type='SecurityPreRules')
+        return pan_config, ProblemRecord.from_bad_entry('BadLogSetting', bad_entry, pan_config)
+
+    def test_record(self):
+        pan_config, record = self.create_record()
+        self.assertEqual(record.refs, (('test_dg', 'SecurityPreRules', 'rule1', '1234'),
+                                       ('test_dg', 'Addresses', 'address1', None)))
+        self.assertEqual(record.names, ['rule1', 'address1'])
+        self.assertEqual(record.uuids, ['1234'])
+        self.assertEqual(record.details, [{'$ref': 0}, [{'$ref': 1}, 'correct'], {'address': {'$ref': 1}}])
+
+        bad_entry = record.to_bad_entry(pan_config)
+        self.assertIs(bad_entry.data[0], pan_config.get_devicegroup_policy('SecurityPreRules', 'test_dg')[0])
+        self.assertIs(bad_entry.data[2]['address'], pan_config.get_devicegroup_object('Addresses', 'test_dg')[0])
+        self.assertEqual(bad_entry.data[1][1], 'correct')
+
+    def test_serialization(self):
+        _, record = self.create_record()
+        self.assertEqual(ProblemRecord.from_json(record.to_json()), record)
+        self.assertEqual(pickle.loads(pickle.dumps(record)), record)
+        with self.assertRaises(AttributeError):
+            record.extra = True
+
+    def test_stable_id(self):
+        _, record = self.create_record()
+        # Reloading the configuration, renaming a rule with a uuid, or changing the description keeps the ID
+        self.assertEqual(self.create_record()[1].problem_id, record.problem_id)
+        self.assertEqual(self.create_record(rule_name='renamed')[1].problem_id, record.problem_id)
+        self.assertEqual(self.create_record(text='new description')[1].problem_id, record.problem_id)
+        # Only the first reference is what the problem is about, the others are details
+        self.assertEqual(self.create_record(address_name='address2')[1].problem_id, record.problem_id)
+        self.assertNotEqual(self.create_record(rule_index=1)[1].problem_id, record.problem_id)
+
+    def test_subject(self):
+        # A rule's Source and Dest problems from the same validator each have their own ID
+        pan_config = PanConfig(self.test_xml.format(rule_name='rule1', address_name='address1'))
+        rule = pan_config.get_devicegroup_policy('SecurityPreRules', 'test_dg')[0]
+        records = [ProblemRecord.from_bad_entry('MissingZones', BadEntry(data=rule, text=f"{direction} problem", device_group='test_dg',
+                                                                        entry_type='SecurityPreRules', subject=direction), pan_config)
+                   for direction in ('Source', 'Dest')]
+        self.assertNotEqual(records[0].problem_id, records[1].problem_id)
+
+        self.assertEqual(ProblemRecord.from_json(records[1].to_json()), records[1])
+        self.assertEqual(records[1].to_bad_entry(pan_config).subject, 'Dest')
+
+
+if __name__ == "__main__":
+    unittest.main()
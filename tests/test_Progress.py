@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+import logging
+import time
+import unittest
+
+from palo_alto_firewall_analyzer.core import validator_budget, ValidatorTimeout
+from palo_alto_firewall_analyzer.progress import ProgressReporter, advance_progress, progress_reporter, update_progress
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestProgress(unittest.TestCase):
+    def test_rate_limited_rendering(self):
+        clock = FakeClock()
+        reporter = ProgressReporter('ShadowingRules', render_interval=5, clock=clock)
+        progress_logger = logging.getLogger('palo_alto_firewall_analyzer.progress')
+        with self.assertLogs(progress_logger, logging.INFO) as logs:
+            reporter.update("device groups", 1, 2, "Device Group dg1")
+            for i in range(1000):
+                reporter.advance("rules", detail=f"rule {i}")
+            clock.now = 5
+            reporter.advance("rules", detail="rule 1000")
+            reporter.advance("rules", detail="rule 1001")
+        self.assertEqual(logs.output,
+                         ["INFO:palo_alto_firewall_analyzer.progress:ShadowingRules: device groups 1/2, rules 1001 (checking rule 1000)"])
+        self.assertEqual(reporter.get_counts(), {"device groups": 1, "rules": 1002})
+
+    def test_context(self):
+        # Without a reporter, progress updates are ignored
+        advance_progress("rules")
+        with progress_reporter('BadLogSetting') as reporter:
+            update_progress("device groups", 3, 4)
+            advance_progress("rules", 10)
+        self.assertEqual(reporter.get_counts(), {"device groups": 3, "rules": 10})
+
+    def test_progress_checks_budget(self):
+        with self.assertRaises(ValidatorTimeout) as context:
+            with validator_budget(0.01):
+                advance_progress("rules", detail="rule 1")
+                time.sleep(0.02)
+                advance_progress("rules", detail="rule 2")
+        self.assertEqual(context.exception.progress, "rule 2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -57,7 +57,7 @@ class TestRedundantRuleMembers(unittest.TestCase):
 
         profilepackage = self.create_profilepackage(pan_config)
         _, _, validator_function = get_policy_validators()['RedundantRuleAddresses']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 1)
         ruletype, rule_entry, members_to_remove = results[0].data
         self.assertEqual(ruletype, 'SecurityPreRules')
@@ -49,7 +49,7 @@ class TestRedundantRuleServices(unittest.TestCase):
 
         profilepackage = self.create_profilepackage(pan_config)
         _, _, validator_function = get_policy_validators()['RedundantRuleServices']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 1)
         ruletype, rule_entry, members_to_remove = results[0].data
         self.assertEqual(ruletype, 'SecurityPreRules')
@@ -57,5 +57,41 @@ class TestRedundantRuleServices(unittest.TestCase):
         self.assertEqual(members_to_remove, [('tcp-123', 'myservicegroup')])
 
 
+    def test_contained_ports(self):
+        test_xml = """\
+        <response status="success"><result><config>
+          <devices><entry><device-group><entry name="test_dg">
+            <pre-rulebase><security><rules>
+              <entry name="port_rule">
+                <service>
+                  <member>tcp-443</member>
+                  <member>tcp-high-ports</member>
+                  <member>tcp-8443</member>
+                  <member>also-tcp-8443</member>
+                  <member>application-default</member>
+                </service>
+              </entry>
+            </rules></security></pre-rulebase>
+            <service>
+              <entry name="tcp-443"><protocol><tcp><port>443</port></tcp></protocol></entry>
+              <entry name="tcp-1024-65535"><protocol><tcp><port>1024-65535</port></tcp></protocol></entry>
+              <entry name="tcp-8443"><protocol><tcp><port>8443</port></tcp></protocol></entry>
+              <entry name="also-tcp-8443"><protocol><tcp><port>8443</port></tcp></protocol></entry>
+            </service>
+            <service-group><entry name="tcp-high-ports"><members><member>tcp-1024-65535</member></members></entry></service-group>
+          </entry></device-group></entry></devices>
+          <readonly><devices><entry name="localhost.localdomain"><device-group>
+            <entry name="test_dg"><id>11</id></entry>
+          </device-group></entry></devices></readonly>
+        </config></result></response>
+        """
+        profilepackage = self.create_profilepackage(PanConfig(test_xml))
+        _, _, validator_function = get_policy_validators()['RedundantRuleServices']
+        results = list(validator_function(profilepackage))
+        self.assertEqual(len(results), 1)
+        _, _, members_to_remove = results[0].data
+        self.assertEqual(members_to_remove, [('tcp-8443', 'tcp-high-ports'), ('also-tcp-8443', 'tcp-high-ports')])
+
+
 if __name__ == "__main__":
     unittest.main()
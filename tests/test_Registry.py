@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+import importlib
+import unittest
+from unittest.mock import patch
+
+from palo_alto_firewall_analyzer import core
+from palo_alto_firewall_analyzer.core import get_policy_validator, get_policy_validators, get_policy_fixers
+from palo_alto_firewall_analyzer.core import list_policy_validators, list_policy_fixers, register_policy_validator
+from palo_alto_firewall_analyzer.core import get_policy_validator_metadata, is_validator_selected, COST_LINEAR, COST_QUADRATIC
+from palo_alto_firewall_analyzer.fixers import FIXERS
+from palo_alto_firewall_analyzer.validators import VALIDATORS
+
+
+class FakeEntryPoint:
+    def __init__(self, name, value, load_function):
+        self.name = name
+        self.value = value
+        self.load = load_function
+
+
+class TestRegistry(unittest.TestCase):
+    def check_listing(self, builtins, registry, package):
+        for module_name in set(builtin[0] for builtin in builtins.values()):
+            importlib.import_module(f"{package}.{module_name}")
+            registered_names = [name for name, (_, _, f) in registry.items()
+                                if f.__module__ == f"{package}.{module_name}"]
+            listed_names = [name for name, builtin in builtins.items() if builtin[0] == module_name]
+            self.assertEqual(sorted(registered_names), sorted(listed_names), module_name)
+        for name, builtin in builtins.items():
+            _, registered_description, _ = registry[name]
+            self.assertEqual(registered_description, builtin[1], name)
+
+    def test_validator_listing_matches_modules(self):
+        self.check_listing(VALIDATORS, get_policy_validators(), 'palo_alto_firewall_analyzer.validators')
+        metadata = get_policy_validator_metadata()
+        for name, (_, _, cost, resources) in VALIDATORS.items():
+            self.assertEqual(metadata[name]['cost'], cost, name)
+            self.assertEqual(metadata[name]['resources'], frozenset(resources), name)
+
+    def test_validator_selection(self):
+        self.assertTrue(is_validator_selected('BadLogSetting', max_cost=COST_LINEAR, allow_network=False))
+        self.assertFalse(is_validator_selected('ShadowingRules', max_cost=COST_LINEAR))
+        self.assertTrue(is_validator_selected('ShadowingRules', max_cost=COST_QUADRATIC, allow_network=False))
+        self.assertFalse(is_validator_selected('BadHostname', allow_network=False))
+        self.assertFalse(is_validator_selected('ExtraZones', allow_network=False))
+        self.assertTrue(is_validator_selected('ExtraZones', max_cost=COST_LINEAR))
+
+    def test_fixer_listing_matches_modules(self):
+        self.check_listing(FIXERS, get_policy_fixers(), 'palo_alto_firewall_analyzer.fixers')
+
+    def test_listing_without_plugins(self):
+        with patch('palo_alto_firewall_analyzer.core.get_plugins', return_value={}):
+            self.assertEqual(list_policy_validators()['BadLogSetting'], 'Rule uses an incorrect log profile')
+            self.assertIn('DeleteUnusedObjects', list_policy_fixers())
+            with self.assertRaises(KeyError):
+                get_policy_validator('NotAValidator')
+
+    def test_plugin(self):
+        def load_plugin():
+            @register_policy_validator("TestPluginValidator", "Validator from a plugin")
+            def find_nothing(profilepackage):
+                return []
+
+        entry_point = FakeEntryPoint('TestPluginValidator', 'test_plugin.validators', load_plugin)
+        with patch('palo_alto_firewall_analyzer.core.get_plugins', return_value={'TestPluginValidator': entry_point}):
+            try:
+                self.assertEqual(list_policy_validators()['TestPluginValidator'], "Plugin from test_plugin.validators")
+                name, description, validator_function = get_policy_validator('TestPluginValidator')
+                self.assertEqual(description, "Validator from a plugin")
+                self.assertIn('TestPluginValidator', get_policy_validators())
+                # Plugins which don't declare their cost are only run when there are no limits
+                self.assertTrue(is_validator_selected('TestPluginValidator'))
+                self.assertFalse(is_validator_selected('TestPluginValidator', max_cost=COST_QUADRATIC))
+                self.assertFalse(is_validator_selected('TestPluginValidator', allow_network=False))
+            finally:
+                core.policy_validator_registry.pop('TestPluginValidator', None)
+                core.policy_validator_metadata.pop('TestPluginValidator', None)
+
+
+if __name__ == "__main__":
+    unittest.main()
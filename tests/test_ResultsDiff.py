@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from palo_alto_firewall_analyzer.core import BadEntry, ConfigurationSettings, ProfilePackage
+from palo_alto_firewall_analyzer.pan_config import PanConfig
+from palo_alto_firewall_analyzer.problem_records import ProblemRecord
+from palo_alto_firewall_analyzer.results_store import ResultsStore
+from palo_alto_firewall_analyzer.scripts.pan_analyzer import write_analyzer_output
+from palo_alto_firewall_analyzer.scripts.pan_analyzer_diff import diff_results, load_results, write_text_diff
+
+
+JSON_OUTPUT_XML = """\
+<response status="success"><result><config version="10.1.0" urldb="paloaltonetworks" detail-version="10.1.3">
+</config></result></response>
+"""
+
+
+def build_records(problems, partial_validators=(), device_groups=None, rule_limit_enabled=False):
+    """problems are (validator name, problem ID), or (validator name, problem ID, Device Group) outside of test_dg"""
+    run_record = {"record_type": "run", "config_version": "10.1.0", "detail-version": "10.1.3",
+                  "urldb": "paloaltonetworks", "date_execution": "20240101_000000", "rule_limit_enabled": rule_limit_enabled}
+    if device_groups is not None:
+        run_record["device_groups"] = device_groups
+    records = [run_record]
+    for validator_name, problem_id, *device_group in problems:
+        records.append({"record_type": "problem", "problem_id": problem_id, "validator_name": validator_name,
+                        "device_group": device_group[0] if device_group else "test_dg", "entry_type": None,
+                        "desc": f"problem {problem_id}", "refs": [], "details": None})
+    for validator_name in ('UnusedAddresses', 'ShadowingRules'):
+        summary_record = {"record_type": "validator_summary", "validator_name": validator_name,
+                          "total_problems": sum(1 for name, *_ in problems if name == validator_name)}
+        if validator_name in partial_validators:
+            summary_record["partial"] = True
+            summary_record["progress"] = "somewhere"
+        records.append(summary_record)
+    records.append({"record_type": "run_summary", "runtime": 1, "total_problems": len(problems)})
+    return records
+
+
+class TestResultsDiff(unittest.TestCase):
+    old_problems = [('UnusedAddresses', 'a'), ('UnusedAddresses', 'b'), ('ShadowingRules', 'c')]
+    new_problems = [('UnusedAddresses', 'a'), ('UnusedAddresses', 'd')]
+
+    def check_diff(self, results_diff):
+        self.assertEqual([problem['problem_id'] for problem in results_diff.new], ['d'])
+        self.assertEqual([problem['problem_id'] for problem in results_diff.resolved], ['b'])
+        self.assertEqual([problem['problem_id'] for problem in results_diff.unchanged], ['a'])
+        # ShadowingRules timed out, so 'c' may still be there
+        self.assertEqual([problem['problem_id'] for problem in results_diff.unverified], ['c'])
+
+    def test_jsonl_files(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fnames = []
+            for name, records in [('old.jsonl', build_records(self.old_problems)),
+                                  ('new.jsonl', build_records(self.new_problems, ['ShadowingRules']))]:
+                fnames.append(os.path.join(tmpdir, name))
+                with open(fnames[-1], 'w') as fh:
+                    fh.writelines(json.dumps(record) + '\n' for record in records)
+            results_diff = diff_results(load_results(fnames[0]), load_results(fnames[1]))
+        self.check_diff(results_diff)
+
+        output = io.StringIO()
+        write_text_diff(output, results_diff, 'old.jsonl', 'new.jsonl', False)
+        lines = output.getvalue().splitlines()
+        self.assertIn("New: 1, Resolved: 1, Unchanged: 1, Unverified: 1", lines)
+        self.assertIn("UnusedAddresses: 1 new, 1 resolved, 1 unchanged", lines)
+        self.assertIn("RESOLVED: problem b", lines)
+        self.assertNotIn("UNCHANGED: problem a", lines)
+
+    def test_stored_runs(self):
+        with ResultsStore(':memory:') as results_store:
+            results_store.add_run(build_records(self.old_problems))
+            results_store.add_run(build_records(self.new_problems, ['ShadowingRules']))
+            results_diff = diff_results(load_results('previous', results_store), load_results('latest', results_store))
+        self.check_diff(results_diff)
+
+    def test_run_scope(self):
+        old_problems = [('UnusedAddresses', 'a'), ('UnusedAddresses', 'b', 'other_dg')]
+        with ResultsStore(':memory:') as results_store:
+            results_store.add_run(build_records(old_problems, device_groups=['other_dg', 'test_dg']))
+            # Only test_dg was checked, so 'b' may still be in other_dg
+            results_store.add_run(build_records([], device_groups=['test_dg']))
+            results_diff = diff_results(load_results('1', results_store), load_results('2', results_store))
+            self.assertEqual([problem['problem_id'] for problem in results_diff.resolved], ['a'])
+            self.assertEqual([problem['problem_id'] for problem in results_diff.unverified], ['b'])
+
+            # Only the first rules were checked, so neither may have been resolved
+            results_store.add_run(build_records([], device_groups=['other_dg', 'test_dg'], rule_limit_enabled=True))
+            results_diff = diff_results(load_results('1', results_store), load_results('3', results_store))
+            self.assertEqual(results_diff.resolved, [])
+            self.assertEqual([problem['problem_id'] for problem in results_diff.unverified], ['a', 'b'])
+
+    def test_json_file(self):
+        profilepackage = ProfilePackage(api_key='', pan_config=PanConfig(JSON_OUTPUT_XML), settings=ConfigurationSettings().get_config(),
+                                        device_group_hierarchy_children={}, device_group_hierarchy_parent={},
+                                        device_groups_and_firewalls={}, device_groups=['test_dg', 'shared'],
+                                        devicegroup_objects={}, devicegroup_exclusive_objects={}, rule_limit_enabled=False)
+        problem = BadEntry(data=None, text='problem a', device_group='test_dg', entry_type='SecurityPreRules')
+        # An older json output, which didn't include the problems' Device Groups
+        legacy_data = {"config_version": "10.1.0", "date_execution": "20240101_000000", "device_groups": ["test_dg"], "entries": [
+            {"validator_name": "DisabledPolicies", "problems": [{"problem_id": "b", "desc": "problem b"}]},
+            {"validator_name": "ShadowingRules", "problems": [], "partial": True, "progress": "somewhere"}]}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            old_fname, new_fname, legacy_fname = (os.path.join(tmpdir, f'{name}.json') for name in ('old', 'new', 'legacy'))
+            write_analyzer_output({('DisabledPolicies', 'Disabled'): [problem]}, old_fname, profilepackage, 'json')
+            write_analyzer_output({('DisabledPolicies', 'Disabled'): []}, new_fname, profilepackage, 'json')
+            with open(legacy_fname, 'w') as fh:
+                json.dump(legacy_data, fh)
+            old_results, new_results, legacy_results = (load_results(fname) for fname in (old_fname, new_fname, legacy_fname))
+
+        problem_record = ProblemRecord.from_bad_entry('DisabledPolicies', problem, profilepackage.pan_config)
+        self.assertEqual(old_results.problems[problem_record.problem_id]['device_group'], 'test_dg')
+        self.assertEqual(old_results.run['device_groups'], ['test_dg', 'shared'])
+        results_diff = diff_results(old_results, new_results)
+        self.assertEqual([problem['desc'] for problem in results_diff.resolved], ['problem a'])
+        self.assertEqual(results_diff.unverified, [])
+
+        self.assertEqual(list(legacy_results.problems), ['b'])
+        self.assertIsNone(legacy_results.problems['b']['device_group'])
+        self.assertTrue(legacy_results.validators['ShadowingRules']['partial'])
+        # The newer run checked every Device Group the older run did, so problem b was resolved
+        self.assertEqual([problem['problem_id'] for problem in diff_results(legacy_results, new_results).resolved], ['b'])
+        legacy_results.run['device_groups'] = ['test_dg', 'other_dg']
+        self.assertEqual([problem['problem_id'] for problem in diff_results(legacy_results, new_results).unverified], ['b'])
+
+if __name__ == "__main__":
+    unittest.main()
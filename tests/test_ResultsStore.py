@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+import datetime
+import os
+import tempfile
+import unittest
+
+from palo_alto_firewall_analyzer.results_store import ResultsStore
+
+
+def build_records(date_execution, problem_ids, partial=False, device_groups=None, rule_limit_enabled=False):
+    """problem_ids are in test_dg, unless they're (problem ID, Device Group)"""
+    run_record = {"record_type": "run", "config_version": "10.1.0", "detail-version": "10.1.3",
+                  "urldb": "paloaltonetworks", "date_execution": date_execution, "rule_limit_enabled": rule_limit_enabled}
+    if device_groups is not None:
+        run_record["device_groups"] = device_groups
+    records = [run_record]
+    for problem_id in problem_ids:
+        problem_id, device_group = problem_id if isinstance(problem_id, tuple) else (problem_id, 'test_dg')
+        records.append({"record_type": "problem", "problem_id": problem_id, "validator_name": "UnusedAddresses",
+                        "device_group": device_group, "entry_type": "Addresses", "desc": f"{problem_id} is unused",
+                        "refs": [[device_group, "Addresses", f"address_{problem_id}", None]], "details": [{"$ref": 0}]})
+    summary_record = {"record_type": "validator_summary", "validator_name": "UnusedAddresses",
+                      "validator_description": "Address objects that aren't in use",
+                      "total_problems": len(problem_ids), "runtime": 1.5}
+    if partial:
+        summary_record["partial"] = True
+        summary_record["progress"] = "test_dg's address objects"
+    records.append(summary_record)
+    records.append({"record_type": "run_summary", "runtime": 2, "total_problems": len(problem_ids)})
+    return records
+
+
+class TestResultsStore(unittest.TestCase):
+    def test_history(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir, 'results.sqlite')
+            with ResultsStore(fname) as results_store:
+                results_store.add_run(build_records('20240101_000000', ['a', 'b', 'c']))
+                results_store.add_run(build_records('20240201_000000', ['a', 'c']))
+                # A partial run doesn't show that 'c' was resolved
+                results_store.add_run(build_records('20240215_000000', ['a'], partial=True))
+                results_store.add_run(build_records('20240401_000000', ['a', 'c', 'd']))
+
+            # The history is kept across connections
+            with ResultsStore(fname) as results_store:
+                runs = results_store.get_runs()
+                self.assertEqual(len(runs), 4)
+                self.assertEqual(runs[0]['started_at'], '2024-01-01 00:00:00')
+                self.assertEqual(runs[0]['total_problems'], 3)
+
+                trend = [tuple(row) for row in results_store.get_problem_trend('UnusedAddresses')]
+                self.assertEqual(trend, [('2024-01-01 00:00:00', 3, 0), ('2024-02-01 00:00:00', 2, 0),
+                                         ('2024-02-15 00:00:00', 1, 1), ('2024-04-01 00:00:00', 3, 0)])
+
+                now = datetime.datetime(2024, 4, 1)
+                persistent = results_store.get_persistent_problems('UnusedAddresses', 60, now)
+                self.assertEqual([(row['object_name'], row['first_seen']) for row in persistent],
+                                 [('address_a', '2024-01-01 00:00:00'), ('address_c', '2024-01-01 00:00:00')])
+                persistent = results_store.get_persistent_problems('UnusedAddresses', 0, now)
+                self.assertEqual([row['object_name'] for row in persistent], ['address_a', 'address_c', 'address_d'])
+
+                rows = results_store.connection.execute(
+                    "SELECT run_id FROM problem_objects WHERE name = 'address_c' ORDER BY run_id").fetchall()
+                self.assertEqual([row['run_id'] for row in rows], [1, 2, 4])
+
+    def test_run_scope(self):
+        with ResultsStore(':memory:') as results_store:
+            all_device_groups = ['other_dg', 'test_dg']
+            results_store.add_run(build_records('20240101_000000', ['a', ('x', 'other_dg')], device_groups=all_device_groups))
+            # Neither a run of only test_dg, nor a run limited to the first rules, shows that 'x' was resolved
+            run_id = results_store.add_run(build_records('20240201_000000', ['a'], device_groups=['test_dg']))
+            results_store.add_run(build_records('20240215_000000', ['a'], device_groups=all_device_groups,
+                                                rule_limit_enabled=True))
+            self.assertEqual(results_store.get_run_device_groups(run_id), ['test_dg'])
+            self.assertEqual(next(results_store.get_run_records(run_id))['device_groups'], ['test_dg'])
+
+            now = datetime.datetime(2024, 4, 1)
+            persistent = results_store.get_persistent_problems('UnusedAddresses', 60, now)
+            self.assertEqual([(row['object_name'], row['first_seen']) for row in persistent],
+                             [('address_x', '2024-01-01 00:00:00'), ('address_a', '2024-01-01 00:00:00')])
+
+            # A complete run of other_dg does
+            results_store.add_run(build_records('20240301_000000', [], device_groups=['other_dg']))
+            persistent = results_store.get_persistent_problems('UnusedAddresses', 60, now)
+            self.assertEqual([row['object_name'] for row in persistent], ['address_a'])
+
+    def test_missing_run_record(self):
+        with ResultsStore(':memory:') as results_store:
+            with self.assertRaises(ValueError):
+                results_store.add_run(build_records('20240101_000000', ['a'])[1:])
+            self.assertEqual(results_store.get_runs(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+import unittest
+
+from palo_alto_firewall_analyzer.pan_config import PanConfig
+from palo_alto_firewall_analyzer.rule_insertion import analyze_rule_insertion, format_insertion_report, get_compiled_rule_cache
+from palo_alto_firewall_analyzer.rule_insertion import _fill_optional_values, compile_rulebase, parse_rule
+from palo_alto_firewall_analyzer.validators.shadowing_rules import is_shadowing, transform_rules
+
+
+class TestRuleInsertion(unittest.TestCase):
+    test_xml = """\
+    <response status="success"><result><config>
+      <devices><entry><device-group><entry name="test_dg">
+        <address>
+          <entry name="address1"><ip-netmask>10.0.0.1</ip-netmask></entry>
+          <entry name="address2"><ip-netmask>10.0.0.2</ip-netmask></entry>
+        </address>
+        <address-group>
+          <entry name="group1"><static><member>address1</member></static></entry>
+        </address-group>
+        <pre-rulebase><security><rules>
+          <entry name="ssh_allow">
+            <from><member>any</member></from><to><member>any</member></to>
+            <source><member>address1</member></source><destination><member>any</member></destination>
+            <source-user><member>any</member></source-user><category><member>any</member></category>
+            <application><member>ssh</member></application><service><member>application-default</member></service>
+            <source-hip><member>any</member></source-hip><destination-hip><member>any</member></destination-hip>
+            <action>allow</action>
+          </entry>
+          <entry name="address2_deny">
+            <from><member>any</member></from><to><member>any</member></to>
+            <source><member>address2</member></source><destination><member>any</member></destination>
+            <source-user><member>any</member></source-user><category><member>any</member></category>
+            <application><member>any</member></application><service><member>any</member></service>
+            <source-hip><member>any</member></source-hip><destination-hip><member>any</member></destination-hip>
+            <action>deny</action>
+          </entry>
+        </rules></security></pre-rulebase>
+      </entry></device-group></entry></devices>
+      <readonly><devices><entry name="localhost.localdomain"><device-group>
+        <entry name="test_dg"></entry>
+      </device-group></entry></devices></readonly>
+    </config></result></response>
+    """
+
+    def setUp(self):
+        PanConfig.clear_caches()
+        self.pan_config = PanConfig(self.test_xml)
+
+    def test_redundant(self):
+        # The group only contains address1, so this rule is already allowed by ssh_allow
+        rule = '{"name": "new_rule", "source": ["group1"], "application": ["ssh"], "service": ["application-default"], "action": "allow"}'
+        report = analyze_rule_insertion(self.pan_config, 'test_dg', rule)
+        self.assertEqual(report.shadowed_by, [('test_dg', 'SecurityPreRules', 'ssh_allow')])
+        self.assertEqual(report.redundant_with, [('test_dg', 'SecurityPreRules', 'ssh_allow')])
+        self.assertEqual(report.shadows, [])
+        self.assertIn("'new_rule' is redundant", format_insertion_report('new_rule', report)[0])
+
+        # Before ssh_allow, the new rule would shadow it instead
+        report = analyze_rule_insertion(self.pan_config, 'test_dg', rule, before='ssh_allow')
+        self.assertEqual(report.shadowed_by, [])
+        self.assertEqual(report.shadows, [('test_dg', 'SecurityPreRules', 'ssh_allow')])
+
+    def test_broad_rule(self):
+        rule = parse_rule('<entry name="allow_all"><action>allow</action></entry>')
+        self.assertEqual(rule.findtext('./source/member'), 'any')
+
+        # At the end, it makes ssh_allow unnecessary, but not the rule with a different action
+        report = analyze_rule_insertion(self.pan_config, 'test_dg', rule)
+        self.assertEqual(report.supersedes, [('test_dg', 'SecurityPreRules', 'ssh_allow')])
+        self.assertEqual(report.shadowed_by, [])
+
+        report = analyze_rule_insertion(self.pan_config, 'test_dg', rule, position=0)
+        self.assertEqual(report.shadows, [('test_dg', 'SecurityPreRules', 'ssh_allow'),
+                                          ('test_dg', 'SecurityPreRules', 'address2_deny')])
+        report = analyze_rule_insertion(self.pan_config, 'test_dg', rule, after='ssh_allow')
+        self.assertEqual(report.shadows, [('test_dg', 'SecurityPreRules', 'address2_deny')])
+
+        # Post-rules are evaluated after every pre-rule
+        report = analyze_rule_insertion(self.pan_config, 'test_dg', rule, position=0, rule_type='SecurityPostRules')
+        self.assertEqual(report.shadows, [])
+        self.assertEqual(len(report.supersedes), 1)
+
+    def test_shared_rules_unchanged(self):
+        # Without HIP profiles, ssh_allow's are treated as 'any', but only within the analysis
+        pan_config = PanConfig(self.test_xml.replace(
+            '<source-hip><member>any</member></source-hip><destination-hip><member>any</member></destination-hip>', '', 1))
+        report = analyze_rule_insertion(pan_config, 'test_dg', parse_rule('<entry name="allow_all"><action>allow</action></entry>'))
+        self.assertEqual(report.supersedes, [('test_dg', 'SecurityPreRules', 'ssh_allow')])
+        rule_values = get_compiled_rule_cache(pan_config).get_transformed_rules('test_dg')[0][4]
+        self.assertEqual(rule_values['source_hip'], frozenset())
+        self.assertEqual(rule_values['destination_hip'], frozenset())
+
+    def test_matches_pairwise_comparison(self):
+        # The compiled rules find the same rules as comparing the proposed rule with each of them
+        rules = ['<entry name="allow_all"><action>allow</action></entry>',
+                 '{"source": ["address1", "address2"], "action": "deny"}',
+                 '{"source": ["10.0.0.0/30"], "application": ["ssh"], "action": "allow"}',
+                 '{"source": ["address2"], "service": ["application-default"], "action": "deny"}']
+        compiled_rulebase = compile_rulebase(self.pan_config, 'test_dg')
+        transformed_rules = compiled_rulebase.transformed_rules
+        for rule in rules:
+            rule_entry = parse_rule(rule)
+            action = rule_entry.findtext('./action')
+            rule_values = _fill_optional_values(transform_rules([('test_dg', 'SecurityPreRules', rule_entry)],
+                                                                *compiled_rulebase.group_mappings)[0][4])
+            for position in range(len(transformed_rules) + 1):
+                report = analyze_rule_insertion(self.pan_config, 'test_dg', rule, position=position)
+                prior_rules, later_rules = transformed_rules[:position], transformed_rules[position:]
+                shadowed_by = [rule_tuple for rule_tuple in prior_rules if is_shadowing(rule_tuple[4], rule_values)]
+                self.assertEqual(report.shadowed_by, [rule_tuple[:3] for rule_tuple in shadowed_by])
+                self.assertEqual(report.redundant_with, [rule_tuple[:3] for rule_tuple in shadowed_by
+                                                         if rule_tuple[3].findtext('./action') == action])
+                self.assertEqual(report.supersedes, [rule_tuple[:3] for rule_tuple in prior_rules
+                                                     if rule_tuple[3].findtext('./action') == action
+                                                     and rule_tuple not in shadowed_by
+                                                     and is_shadowing(rule_values, rule_tuple[4])])
+                self.assertEqual(report.shadows, [rule_tuple[:3] for rule_tuple in later_rules
+                                                  if is_shadowing(rule_values, rule_tuple[4])])
+
+    def test_errors(self):
+        with self.assertRaises(KeyError):
+            analyze_rule_insertion(self.pan_config, 'test_dg', {"name": "new_rule"}, before='missing_rule')
+        with self.assertRaises(ValueError):
+            analyze_rule_insertion(self.pan_config, 'test_dg', {"name": "new_rule", "disabled": "yes"})
+
+
+if __name__ == "__main__":
+    unittest.main()
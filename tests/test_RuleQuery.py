@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+import os
+import tempfile
+import unittest
+
+from palo_alto_firewall_analyzer.pan_config import PanConfig
+from palo_alto_firewall_analyzer.rule_query import build_rule_index, load_rule_index, parse_service_query
+
+
+RULE_TEMPLATE = """
+    <entry name="{name}">
+      <from><member>{from_zone}</member></from><to><member>any</member></to>
+      <source><member>any</member></source><destination>{destinations}</destination>
+      <source-user><member>any</member></source-user><category><member>any</member></category>
+      <application>{applications}</application><service>{services}</service>
+      <action>{action}</action>{extra}
+    </entry>"""
+RULES = [
+    ('RDP', 'untrust', '<member>servers</member>', '<member>any</member>', '<member>tcp-3000-4000</member>', 'allow', ''),
+    ('SSH', 'trust', '<member>10.1.0.0/16</member>', '<member>ssh</member>',
+     '<member>application-default</member>', 'allow', ''),
+    ('Deny all', 'any', '<member>any</member>', '<member>any</member>', '<member>any</member>', 'deny', ''),
+    ('Not servers', 'trust', '<member>servers</member>', '<member>web-group</member>', '<member>any</member>', 'allow',
+     '<negate-destination>yes</negate-destination>'),
+    ('Disabled', 'untrust', '<member>any</member>', '<member>any</member>', '<member>any</member>', 'allow',
+     '<disabled>yes</disabled>'),
+]
+
+
+class TestRuleQuery(unittest.TestCase):
+    test_xml = f"""\
+    <response status="success"><result><config>
+      <devices><entry><device-group><entry name="test_dg">
+        <address>
+          <entry name="servers"><ip-netmask>10.1.2.0/24</ip-netmask></entry>
+        </address>
+        <service>
+          <entry name="tcp-3000-4000"><protocol><tcp><port>3000-4000</port></tcp></protocol></entry>
+        </service>
+        <application-group>
+          <entry name="web-group"><members><member>web-browsing</member><member>ssl</member></members></entry>
+        </application-group>
+        <pre-rulebase><security><rules>
+          {''.join(RULE_TEMPLATE.format(name=name, from_zone=from_zone, destinations=destinations, applications=applications,
+                                        services=services, action=action, extra=extra)
+                   for name, from_zone, destinations, applications, services, action, extra in RULES)}
+        </rules></security></pre-rulebase>
+      </entry></device-group></entry></devices>
+      <readonly><devices><entry name="localhost.localdomain"><device-group>
+        <entry name="test_dg"></entry>
+      </device-group></entry></devices></readonly>
+    </config></result></response>
+    """
+
+    def setUp(self):
+        PanConfig.clear_caches()
+        self.rule_index = build_rule_index(PanConfig(self.test_xml), 'test_dg')
+
+    def query_names(self, **query):
+        return [rule_name for _, _, rule_name, _ in self.rule_index.query(**query)]
+
+    def test_query(self):
+        self.assertEqual(self.query_names(), ['RDP', 'SSH', 'Deny all', 'Not servers'])
+        self.assertEqual(self.query_names(destination='10.1.2.3'), ['RDP', 'SSH', 'Deny all'])
+        self.assertEqual(self.query_names(destination='10.1.2.0/25'), ['RDP', 'SSH', 'Deny all'])
+        self.assertEqual(self.query_names(destination='10.1.0.0/16'), ['SSH', 'Deny all'])
+        # The destination is negated, so it matches the addresses outside of 'servers'
+        self.assertEqual(self.query_names(destination='10.1.3.3'), ['SSH', 'Deny all', 'Not servers'])
+        self.assertEqual(self.query_names(destination='10.1.3.3', include_any=False), ['SSH', 'Not servers'])
+        self.assertEqual(self.query_names(application='ssh', include_any=False), ['SSH'])
+        self.assertEqual(self.query_names(application='ssl'), ['RDP', 'Deny all', 'Not servers'])
+        self.assertEqual(self.query_names(source_zone='untrust', service='tcp/3389', action='allow'), ['RDP'])
+        self.assertEqual(self.query_names(source_zone='untrust', service='tcp/3389'), ['RDP', 'Deny all'])
+        self.assertEqual(self.query_names(service='tcp/3389-4001'), ['Deny all', 'Not servers'])
+        self.assertEqual(self.query_names(service='udp', action='deny'), ['Deny all'])
+        self.assertEqual(self.query_names(action='drop'), [])
+
+        with self.assertRaises(ValueError):
+            parse_service_query('icmp/3389')
+        with self.assertRaises(TypeError):
+            self.rule_index.query(users='admin')
+
+    def test_load_rule_index(self):
+        with tempfile.TemporaryDirectory() as index_dir:
+            rule_index = load_rule_index(self.test_xml, 'test_dg', index_dir)
+            self.assertEqual(len(os.listdir(index_dir)), 1)
+            self.assertEqual(len(rule_index), 4)
+            # The saved index is loaded, rather than parsing the configuration again
+            loaded_rule_index = load_rule_index(self.test_xml.encode('utf-8'), 'test_dg', index_dir)
+            self.assertIsNot(loaded_rule_index, rule_index)
+            self.assertEqual(loaded_rule_index.query(destination='10.1.3.3'), rule_index.query(destination='10.1.3.3'))
+            self.assertEqual(len(os.listdir(index_dir)), 1)
+
+            # Changing the configuration builds a new index
+            load_rule_index(self.test_xml.replace('tcp-3000-4000', 'tcp-3000-4001'), 'test_dg', index_dir)
+            self.assertEqual(len(os.listdir(index_dir)), 2)
+            with self.assertRaises(KeyError):
+                load_rule_index(self.test_xml, 'missing_dg', index_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+import unittest
+import xml.etree.ElementTree
+
+from palo_alto_firewall_analyzer.core import get_policy_validator
+from palo_alto_firewall_analyzer.core import ProfilePackage, ConfigurationSettings
+from palo_alto_firewall_analyzer.pan_config import PanConfig
+from palo_alto_firewall_analyzer.sampling import Sampler, is_sampled, sampling
+from palo_alto_firewall_analyzer.scripts.pan_analyzer import run_policy_validators
+
+
+class TestSampling(unittest.TestCase):
+    @staticmethod
+    def create_profilepackage(pan_config):
+        profilepackage = ProfilePackage(
+            api_key='',
+            pan_config=pan_config,
+            settings=ConfigurationSettings().get_config(),
+            device_group_hierarchy_children={},
+            device_group_hierarchy_parent={},
+            device_groups_and_firewalls={},
+            device_groups=['test_dg'],
+            devicegroup_objects={},
+            devicegroup_exclusive_objects={},
+            rule_limit_enabled=False
+        )
+        return profilepackage
+
+    def test_reproducible(self):
+        entries = [xml.etree.ElementTree.Element('entry', name=f"rule{i}") for i in range(1000)]
+        with sampling(0.2, seed=1):
+            first = [entry.get('name') for entry in entries if is_sampled('test_dg', entry)]
+        with sampling(0.2, seed=1):
+            # The order in which entries are visited doesn't matter
+            second = [entry.get('name') for entry in reversed(entries) if is_sampled('test_dg', entry)]
+        with sampling(0.2, seed=2) as sampler:
+            third = [entry.get('name') for entry in entries if is_sampled('test_dg', entry)]
+        self.assertEqual(sorted(first), sorted(second))
+        self.assertNotEqual(first, third)
+        self.assertEqual(sampler.population, 1000)
+        self.assertEqual(sampler.sampled, len(third))
+        self.assertTrue(150 < len(third) < 250)
+
+        # Without sampling, everything is checked
+        self.assertTrue(all(is_sampled('test_dg', entry) for entry in entries))
+
+    def test_estimate(self):
+        sampler = Sampler(0.1)
+        sampler.population, sampler.sampled = 1000, 100
+        estimate = sampler.estimate(20)
+        self.assertEqual(estimate.estimate, 200)
+        self.assertTrue(20 <= estimate.lower < 200 < estimate.upper <= 1000)
+
+        # Nothing found still leaves room for some problems
+        estimate = sampler.estimate(0)
+        self.assertEqual((estimate.estimate, estimate.lower), (0, 0))
+        self.assertGreater(estimate.upper, 0)
+
+        # Checking everything is exact
+        sampler.sampled = 1000
+        estimate = sampler.estimate(20)
+        self.assertEqual((estimate.estimate, estimate.lower, estimate.upper), (20, 20, 20))
+
+        with self.assertRaises(ValueError):
+            Sampler(0)
+
+    def test_run_policy_validators(self):
+        rules = "".join(f'<entry name="rule{i}"><disabled>{"yes" if i % 4 == 0 else "no"}</disabled></entry>' for i in range(400))
+        test_xml = f"""\
+        <response status="success"><result><config>
+          <devices><entry><device-group><entry name="test_dg">
+            <pre-rulebase><security><rules>{rules}</rules></security></pre-rulebase>
+          </entry></device-group></entry></devices>
+        </config></result></response>
+        """
+        profilepackage = self.create_profilepackage(PanConfig(test_xml))
+        validators = {'DisabledPolicies': get_policy_validator('DisabledPolicies')}
+
+        estimates = {}
+        problems, total_problems, _ = run_policy_validators(validators, profilepackage, 'unused',
+                                                            sample_fraction=0.25, sample_seed=3, estimates=estimates)
+        estimate = estimates['DisabledPolicies']
+        self.assertEqual(estimate.population, 400)
+        self.assertEqual(estimate.found, total_problems)
+        self.assertLess(total_problems, 100)
+        self.assertTrue(estimate.lower <= 100 <= estimate.upper)
+
+        # Without sampling, nothing is estimated
+        estimates = {}
+        _, total_problems, _ = run_policy_validators(validators, profilepackage, 'unused', estimates=estimates)
+        self.assertEqual(total_problems, 100)
+        self.assertEqual(estimates, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
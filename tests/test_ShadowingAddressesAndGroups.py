@@ -60,7 +60,7 @@ class TestShadowingAddressesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(shared_addresses, dg_addesses, shared_addressgroups, dg_addessgroups)
 
         _, _, validator_function = get_policy_validators()['ShadowingAddressesAndGroups']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 0)
 
     def test_dup_in_shared(self):
@@ -92,7 +92,7 @@ class TestShadowingAddressesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(shared_addresses, dg_addesses, shared_addressgroups, dg_addessgroups)
 
         _, _, validator_function = get_policy_validators()['ShadowingAddressesAndGroups']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 1)
         self.assertEqual(len(results[0].data), 2)
         self.assertEqual(results[0].data[0][0], 'shared')
@@ -131,7 +131,7 @@ class TestShadowingAddressesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(shared_addresses, dg_addesses, shared_addressgroups, dg_addessgroups)
 
         _, _, validator_function = get_policy_validators()['ShadowingAddressesAndGroups']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 1)
         self.assertEqual(len(results[0].data), 2)
         self.assertEqual(results[0].data[0][0], 'test_dg')
@@ -179,7 +179,7 @@ class TestShadowingAddressesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(shared_addresses, dg_addesses, shared_addressgroups, dg_addessgroups)
 
         _, _, validator_function = get_policy_validators()['ShadowingAddressesAndGroups']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
 
         self.assertEqual(len(results), 4)
         self.assertEqual(len(results[0].data), 2)
@@ -239,7 +239,7 @@ class TestShadowingAddressesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(shared_addresses, dg_addesses, shared_addressgroups, dg_addessgroups)
 
         _, _, validator_function = get_policy_validators()['ShadowingAddressesAndGroups']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
 
         self.assertEqual(len(results), 2)
         self.assertEqual(len(results[0].data), 2)
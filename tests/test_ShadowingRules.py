@@ -4,12 +4,13 @@ import unittest
 from palo_alto_firewall_analyzer.core import get_policy_validators
 from palo_alto_firewall_analyzer.core import ProfilePackage, ConfigurationSettings
 from palo_alto_firewall_analyzer.pan_config import PanConfig
+from palo_alto_firewall_analyzer.validators.shadowing_rules import CompiledRuleCache
 
 
 class TestShadowingRules(unittest.TestCase):
     @staticmethod
-    def create_profilepackage(pan_config):
-        device_groups = ["test_dg"]
+    def create_profilepackage(pan_config, device_groups=("test_dg",)):
+        device_groups = list(device_groups)
 
         profilepackage = ProfilePackage(
             api_key='',
@@ -83,7 +84,7 @@ class TestShadowingRules(unittest.TestCase):
         profilepackage = self.create_profilepackage(pan_config)
 
         _, _, validator_function = get_policy_validators()['ShadowingRules']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 1)
         self.assertEqual(len(results[0].data), 2)
         self.assertEqual(results[0].data[0][0], 'test_dg')
@@ -98,5 +99,165 @@ class TestShadowingRules(unittest.TestCase):
         self.assertEqual(results[0].device_group, 'test_dg')
 
 
+    def test_shadowing_by_network(self):
+        rule_template = """
+            <entry name="{name}">
+              <to><member>any</member></to><from><member>any</member></from>
+              <source>{sources}</source><destination><member>any</member></destination>
+              <source-user><member>any</member></source-user><category><member>any</member></category>
+              <application><member>any</member></application><service><member>any</member></service>
+            </entry>"""
+        rules = [('Subnet', '<member>10.0.0.0/24</member><member>2001:db8::/32</member>'),
+                 ('Literal IP', '<member>10.0.0.5</member>'),
+                 ('Address object', '<member>web</member>'),
+                 ('Range', '<member>10.0.0.10-10.0.0.20</member><member>2001:db8::1</member>'),
+                 ('Outside the subnet', '<member>10.0.1.5</member>'),
+                 ('FQDN', '<member>fqdn_object</member>')]
+        test_xml = f"""\
+        <response status="success"><result><config>
+          <devices><entry><device-group><entry name="test_dg">
+            <pre-rulebase><security><rules>
+              {''.join(rule_template.format(name=name, sources=sources) for name, sources in rules)}
+            </rules></security></pre-rulebase>
+            <address>
+              <entry name="web"><ip-netmask>10.0.0.80</ip-netmask></entry>
+              <entry name="fqdn_object"><fqdn>example.com</fqdn></entry>
+            </address>
+          </entry></device-group></entry></devices>
+          <readonly><devices><entry name="localhost.localdomain"><device-group>
+            <entry name="test_dg"><id>11</id></entry>
+          </device-group></entry></devices></readonly>
+        </config></result></response>
+        """
+        profilepackage = self.create_profilepackage(PanConfig(test_xml))
+        _, _, validator_function = get_policy_validators()['ShadowingRules']
+        results = list(validator_function(profilepackage))
+        shadowed = {result.data[0][2]: [prior[2] for prior in result.data[1]] for result in results}
+        self.assertEqual(shadowed, {'Literal IP': ['Subnet'], 'Address object': ['Subnet'], 'Range': ['Subnet']})
+
+    def test_ipv4_and_ipv6_are_separate(self):
+        rule_template = """
+            <entry name="{name}">
+              <to><member>any</member></to><from><member>any</member></from>
+              <source><member>any</member></source><destination>{destinations}</destination>
+              <source-user><member>any</member></source-user><category><member>any</member></category>
+              <application><member>any</member></application><service><member>any</member></service>
+            </entry>"""
+        rules = [('All IPv6', '<member>::/0</member>'),
+                 ('IPv4 subnet', '<member>10.0.0.0/8</member>'),
+                 ('Any', '<member>any</member>'),
+                 ('IPv4 and IPv6 hosts', '<member>192.168.0.1</member><member>2001:db8::1</member>')]
+        test_xml = f"""\
+        <response status="success"><result><config>
+          <devices><entry><device-group><entry name="test_dg">
+            <pre-rulebase><security><rules>
+              {''.join(rule_template.format(name=name, destinations=destinations) for name, destinations in rules)}
+            </rules></security></pre-rulebase>
+          </entry></device-group></entry></devices>
+          <readonly><devices><entry name="localhost.localdomain"><device-group>
+            <entry name="test_dg"><id>11</id></entry>
+          </device-group></entry></devices></readonly>
+        </config></result></response>
+        """
+        profilepackage = self.create_profilepackage(PanConfig(test_xml))
+        _, _, validator_function = get_policy_validators()['ShadowingRules']
+        results = list(validator_function(profilepackage))
+        shadowed = {result.data[0][2]: [prior[2] for prior in result.data[1]] for result in results}
+        # ::/0 only contains IPv6 addresses, while 'any' contains both IPv4 and IPv6 addresses
+        self.assertEqual(shadowed, {'IPv4 and IPv6 hosts': ['Any']})
+
+    def test_shadowing_by_ports(self):
+        rule_template = """
+            <entry name="{name}">
+              <to><member>any</member></to><from><member>any</member></from>
+              <source><member>any</member></source><destination><member>any</member></destination>
+              <source-user><member>any</member></source-user><category><member>any</member></category>
+              <application><member>any</member></application><service>{services}</service>
+            </entry>"""
+        rules = [('All TCP', '<member>tcp-all</member>'),
+                 ('Web group', '<member>web</member>'),
+                 ('HTTPS', '<member>service-https</member>'),
+                 ('DNS from a high port', '<member>udp-53-from-high-ports</member>'),
+                 ('Application default', '<member>application-default</member>'),
+                 ('UDP', '<member>udp-all</member>'),
+                 ('DNS', '<member>udp-53</member>')]
+        test_xml = f"""\
+        <response status="success"><result><config>
+          <devices><entry><device-group><entry name="test_dg">
+            <pre-rulebase><security><rules>
+              {''.join(rule_template.format(name=name, services=services) for name, services in rules)}
+            </rules></security></pre-rulebase>
+            <service>
+              <entry name="tcp-all"><protocol><tcp><port>1-65535</port></tcp></protocol></entry>
+              <entry name="tcp-8080"><protocol><tcp><port>8080</port></tcp></protocol></entry>
+              <entry name="udp-all"><protocol><udp><port>0-65535</port></udp></protocol></entry>
+              <entry name="udp-53"><protocol><udp><port>53</port></udp></protocol></entry>
+              <entry name="udp-53-from-high-ports"><protocol><udp><port>53</port><source-port>1024-65535</source-port></udp></protocol></entry>
+            </service>
+            <service-group>
+              <entry name="web"><members><member>tcp-8080</member><member>service-http</member></members></entry>
+            </service-group>
+          </entry></device-group></entry></devices>
+          <readonly><devices><entry name="localhost.localdomain"><device-group>
+            <entry name="test_dg"><id>11</id></entry>
+          </device-group></entry></devices></readonly>
+        </config></result></response>
+        """
+        profilepackage = self.create_profilepackage(PanConfig(test_xml))
+        _, _, validator_function = get_policy_validators()['ShadowingRules']
+        results = list(validator_function(profilepackage))
+        shadowed = {result.data[0][2]: [prior[2] for prior in result.data[1]] for result in results}
+        self.assertEqual(shadowed, {'Web group': ['All TCP'], 'HTTPS': ['All TCP'], 'DNS': ['UDP']})
+
+    def test_inherited_rules(self):
+        rule_template = """
+            <entry name="{name}">
+              <to><member>any</member></to><from><member>any</member></from>
+              <source><member>{source}</member></source><destination><member>any</member></destination>
+              <source-user><member>any</member></source-user><category><member>any</member></category>
+              <application><member>any</member></application><service><member>any</member></service>
+            </entry>"""
+        test_xml = f"""\
+        <response status="success"><result><config>
+          <devices><entry><device-group>
+            <entry name="parent_dg">
+              <pre-rulebase><security><rules>{rule_template.format(name='Subnet', source='10.0.0.0/24')}</rules></security></pre-rulebase>
+              <address><entry name="web"><ip-netmask>10.0.0.80</ip-netmask></entry></address>
+            </entry>
+            <entry name="child_dg">
+              <pre-rulebase><security><rules>{rule_template.format(name='Child web', source='web')}</rules></security></pre-rulebase>
+            </entry>
+            <entry name="overriding_dg">
+              <pre-rulebase><security><rules>{rule_template.format(name='Overriding web', source='web')}</rules></security></pre-rulebase>
+              <address><entry name="web"><ip-netmask>192.168.0.80</ip-netmask></entry></address>
+            </entry>
+          </device-group></entry></devices>
+          <readonly><devices><entry name="localhost.localdomain"><device-group>
+            <entry name="parent_dg"></entry>
+            <entry name="child_dg"><parent-dg>parent_dg</parent-dg></entry>
+            <entry name="overriding_dg"><parent-dg>parent_dg</parent-dg></entry>
+          </device-group></entry></devices></readonly>
+        </config></result></response>
+        """
+        pan_config = PanConfig(test_xml)
+        compiled_rule_cache = CompiledRuleCache(pan_config)
+        # child_dg doesn't define any objects, so it resolves its rules the same way as parent_dg
+        self.assertEqual(compiled_rule_cache.get_namespace('child_dg'), ('parent_dg',))
+        self.assertEqual(compiled_rule_cache.get_namespace('overriding_dg'), ('overriding_dg', 'parent_dg'))
+        parent_rules = compiled_rule_cache.get_transformed_rules('parent_dg')
+        child_rules = compiled_rule_cache.get_transformed_rules('child_dg')
+        overriding_rules = compiled_rule_cache.get_transformed_rules('overriding_dg')
+        # The inherited rule is only transformed again where the namespace differs
+        self.assertIs(child_rules[0], parent_rules[0])
+        self.assertIsNot(overriding_rules[0], parent_rules[0])
+        self.assertEqual(overriding_rules[0][4], parent_rules[0][4])
+
+        profilepackage = self.create_profilepackage(pan_config, ['parent_dg', 'child_dg', 'overriding_dg'])
+        _, _, validator_function = get_policy_validators()['ShadowingRules']
+        results = list(validator_function(profilepackage))
+        # overriding_dg's web address isn't within the subnet
+        self.assertEqual([result.data[0][2] for result in results], ['Child web'])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -56,7 +56,7 @@ class TestSimilarAddressesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(shared_addresses, dg_addesses, shared_addressgroups, dg_addessgroups)
 
         _, _, validator_function = get_policy_validators()['SimilarAddressesAndGroups']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 2)
         self.assertEqual(len(results[0].data), 2)
         self.assertEqual(results[0].data[0][0], 'shared')
@@ -98,7 +98,7 @@ class TestSimilarAddressesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(shared_addresses, dg_addesses, shared_addressgroups, dg_addessgroups)
 
         _, _, validator_function = get_policy_validators()['SimilarAddressesAndGroups']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 2)
         self.assertEqual(len(results[0].data), 2)
         self.assertEqual(results[0].data[0][0], 'shared')
@@ -139,7 +139,7 @@ class TestSimilarAddressesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(shared_addresses, dg_addesses, shared_addressgroups, dg_addessgroups)
 
         _, _, validator_function = get_policy_validators()['SimilarAddressesAndGroups']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 1)
         self.assertEqual(len(results[0].data), 2)
         self.assertEqual(results[0].data[0][0], 'shared')
@@ -172,7 +172,7 @@ class TestSimilarAddressesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(shared_addresses, dg_addesses, shared_addressgroups, dg_addessgroups)
 
         _, _, validator_function = get_policy_validators()['SimilarAddressesAndGroups']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 1)
         self.assertEqual(len(results[0].data), 2)
         self.assertEqual(results[0].data[0][0], 'test_dg')
@@ -208,7 +208,7 @@ class TestSimilarAddressesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(shared_addresses, dg_addesses, shared_addressgroups, dg_addessgroups)
 
         _, _, validator_function = get_policy_validators()['SimilarAddressesAndGroups']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 0)
 
 
@@ -54,7 +54,7 @@ class TestSimilarServicesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(shared_services, dg_services, shared_servicegroups, dg_servicegroups)
 
         _, _, validator_function = get_policy_validators()['SimilarServicesAndGroups']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 2)
         self.assertEqual(len(results[0].data), 2)
         self.assertEqual(results[0].data[0][0], 'shared')
@@ -96,7 +96,7 @@ class TestSimilarServicesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(shared_services, dg_services, shared_servicegroups, dg_servicegroups)
 
         _, _, validator_function = get_policy_validators()['SimilarServicesAndGroups']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 2)
         self.assertEqual(len(results[0].data), 2)
         self.assertEqual(results[0].data[0][0], 'shared')
@@ -137,7 +137,7 @@ class TestSimilarServicesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(shared_services, dg_services, shared_servicegroups, dg_servicegroups)
 
         _, _, validator_function = get_policy_validators()['SimilarServicesAndGroups']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 1)
         self.assertEqual(len(results[0].data), 2)
         self.assertEqual(results[0].data[0][0], 'shared')
@@ -170,7 +170,7 @@ class TestSimilarServicesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(shared_services, dg_services, shared_servicegroups, dg_servicegroups)
 
         _, _, validator_function = get_policy_validators()['SimilarServicesAndGroups']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 1)
         self.assertEqual(len(results[0].data), 2)
         self.assertEqual(results[0].data[0][0], 'test_dg')
@@ -206,7 +206,7 @@ class TestSimilarServicesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(shared_services, dg_services, shared_servicegroups, dg_servicegroups)
 
         _, _, validator_function = get_policy_validators()['SimilarServicesAndGroups']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
         self.assertEqual(len(results), 0)
 
 
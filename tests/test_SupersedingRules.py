@@ -1,5 +1,4 @@
 #!/usr/bin/env python
-import collections
 import unittest
 
 from palo_alto_firewall_analyzer.core import ProfilePackage, ConfigurationSettings
@@ -9,20 +8,18 @@ from palo_alto_firewall_analyzer.validators.superseding_rules import find_supers
 
 class TestSupersedingRules(unittest.TestCase):
     @staticmethod
-    def create_profilepackage(rules):
+    def create_profilepackage(pan_config):
         device_groups = ['test_dg']
-        devicegroup_objects = {'test_dg': collections.defaultdict(list)}
-        devicegroup_objects["test_dg"]['SecurityPreRules'] = rules
 
         profilepackage = ProfilePackage(
             api_key='',
-            pan_config=PanConfig('<_/>'),
+            pan_config=pan_config,
             settings=ConfigurationSettings().get_config(),
             device_group_hierarchy_children={},
             device_group_hierarchy_parent={},
             device_groups_and_firewalls={},
             device_groups=device_groups,
-            devicegroup_objects=devicegroup_objects,
+            devicegroup_objects={},
             devicegroup_exclusive_objects={},
             rule_limit_enabled=False
         )
@@ -50,17 +47,56 @@ class TestSupersedingRules(unittest.TestCase):
               </entry>
             </rules></security></pre-rulebase>
           </entry></device-group></entry></devices>
+          <readonly><devices><entry name="localhost.localdomain"><device-group>
+            <entry name="test_dg"><id>11</id></entry>
+          </device-group></entry></devices></readonly>
         </config></result></response>
         """
         pan_config = PanConfig(test_xml)
-        rules = pan_config.get_devicegroup_policy('SecurityPreRules', 'test_dg')
 
-        profilepackage = self.create_profilepackage(rules)
-        results = find_superseding_rules(profilepackage)
+        profilepackage = self.create_profilepackage(pan_config)
+        results = list(find_superseding_rules(profilepackage))
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0].data[0][2], 'first_rule')
         self.assertEqual(results[0].data[1][2], 'superseding_rule')
 
+    def test_superseded_by_groups(self):
+        rule_template = """
+            <entry name="{name}">
+              <from><member>src_zone</member></from><to><member>dest_zone</member></to>
+              <source><member>{source}</member></source><service><member>{service}</member></service>
+              <action>{action}</action>
+            </entry>"""
+        rules = [('https_rule', 'address1', 'tcp-443', 'allow'),
+                 ('denied_web_rule', 'servers', 'web', 'deny'),
+                 ('web_rule', 'servers', 'web', 'allow')]
+        test_xml = f"""\
+        <response status="success"><result><config>
+          <devices><entry><device-group><entry name="test_dg">
+            <pre-rulebase><security><rules>
+              {''.join(rule_template.format(name=name, source=source, service=service, action=action)
+                       for name, source, service, action in rules)}
+            </rules></security></pre-rulebase>
+            <address>
+              <entry name="address1"><ip-netmask>10.0.0.1</ip-netmask></entry>
+              <entry name="subnet"><ip-netmask>10.0.0.0/24</ip-netmask></entry>
+            </address>
+            <address-group><entry name="servers"><static><member>subnet</member></static></entry></address-group>
+            <service>
+              <entry name="tcp-443"><protocol><tcp><port>443</port></tcp></protocol></entry>
+              <entry name="tcp-80-443"><protocol><tcp><port>80,443</port></tcp></protocol></entry>
+            </service>
+            <service-group><entry name="web"><members><member>tcp-80-443</member></members></entry></service-group>
+          </entry></device-group></entry></devices>
+          <readonly><devices><entry name="localhost.localdomain"><device-group>
+            <entry name="test_dg"><id>11</id></entry>
+          </device-group></entry></devices></readonly>
+        </config></result></response>
+        """
+        profilepackage = self.create_profilepackage(PanConfig(test_xml))
+        results = list(find_superseding_rules(profilepackage))
+        # The groups contain address1 and tcp-443, but only a rule with the same action supersedes it
+        self.assertEqual([(result.data[0][2], result.data[1][2]) for result in results], [('https_rule', 'web_rule')])
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+import itertools
+import random
+import unittest
+
+from palo_alto_firewall_analyzer.core import get_policy_validators
+from palo_alto_firewall_analyzer.core import ProfilePackage, ConfigurationSettings
+from palo_alto_firewall_analyzer.coverage import CoverageLimitExceeded, NameSet, UnionCoverage
+from palo_alto_firewall_analyzer.intervals import AddressSet
+from palo_alto_firewall_analyzer.pan_config import PanConfig
+
+
+class TestUnionShadowingRules(unittest.TestCase):
+    @staticmethod
+    def create_profilepackage(pan_config):
+        profilepackage = ProfilePackage(
+            api_key='',
+            pan_config=pan_config,
+            settings=ConfigurationSettings().get_config(),
+            device_group_hierarchy_children={},
+            device_group_hierarchy_parent={},
+            device_groups_and_firewalls={},
+            device_groups=["test_dg"],
+            devicegroup_objects={},
+            devicegroup_exclusive_objects={},
+            rule_limit_enabled=False
+        )
+        return profilepackage
+
+    def test_union_shadowing_rules(self):
+        rule_template = """
+            <entry name="{name}">
+              <to><member>any</member></to><from>{zones}</from>
+              <source>{sources}</source><destination><member>any</member></destination>
+              <source-user><member>any</member></source-user><category><member>any</member></category>
+              <application>{applications}</application><service><member>application-default</member></service>
+            </entry>"""
+        rules = [('Lower half', '<member>trust</member>', '<member>10.0.0.0/25</member>', '<member>ssh</member>'),
+                 ('Upper half', '<member>trust</member>', '<member>10.0.0.128/25</member>', '<member>any</member>'),
+                 ('Whole subnet', '<member>trust</member>', '<member>10.0.0.0/24</member>', '<member>ssh</member>'),
+                 # Only dns to the lower half isn't covered
+                 ('Not covered', '<member>trust</member>', '<member>10.0.0.0/24</member>', '<member>dns</member>'),
+                 ('Other zone', '<member>dmz</member>', '<member>10.0.0.0/24</member>', '<member>ssh</member>'),
+                 ('Both zones', '<member>trust</member><member>dmz</member>', '<member>10.0.0.0/25</member>',
+                  '<member>ssh</member>'),
+                 # Shadowed by 'Upper half' alone, so it's left to ShadowingRules
+                 ('Single rule', '<member>trust</member>', '<member>10.0.0.200</member>', '<member>ssh</member>')]
+        test_xml = f"""\
+        <response status="success"><result><config>
+          <devices><entry><device-group><entry name="test_dg">
+            <pre-rulebase><security><rules>
+              {''.join(rule_template.format(name=name, zones=zones, sources=sources, applications=applications)
+                       for name, zones, sources, applications in rules)}
+            </rules></security></pre-rulebase>
+          </entry></device-group></entry></devices>
+          <readonly><devices><entry name="localhost.localdomain"><device-group>
+            <entry name="test_dg"><id>11</id></entry>
+          </device-group></entry></devices></readonly>
+        </config></result></response>
+        """
+        profilepackage = self.create_profilepackage(PanConfig(test_xml))
+        _, _, validator_function = get_policy_validators()['UnionShadowingRules']
+        results = list(validator_function(profilepackage))
+        shadowed = {result.data[0][2]: [prior[2] for prior in result.data[1]] for result in results}
+        self.assertEqual(shadowed, {'Whole subnet': ['Lower half', 'Upper half'],
+                                    'Both zones': ['Lower half', 'Other zone']})
+        self.assertEqual(results[0].text, "test_dg's SecurityPreRules 'Whole subnet' is shadowed by the combination of: "
+                                          "test_dg's SecurityPreRules 'Lower half', test_dg's SecurityPreRules 'Upper half'")
+
+    def test_name_set(self):
+        any_name = NameSet.from_values({'any'})
+        self.assertFalse(NameSet({'ssh'}).difference(any_name))
+        self.assertTrue(any_name.difference(NameSet({'ssh'})))
+        self.assertEqual(any_name.difference(NameSet({'ssh'})).intersection(NameSet({'ssh', 'dns'})).names, {'dns'})
+        self.assertEqual(any_name.difference(NameSet({'ssh'})).difference(any_name.difference(NameSet({'dns'}))).names,
+                         {'dns'})
+
+    def test_matches_enumeration(self):
+        # Without 'any', each rule matches a finite set of points, which can be compared directly
+        rng = random.Random(1)
+        fields = {'src_zones': ['trust', 'untrust', 'dmz'], 'application': ['ssh', 'dns', 'web', 'ftp'],
+                  'src_members': [f'10.0.0.{i}' for i in range(8)]}
+
+        def build_rule(i):
+            values = {field: frozenset(rng.sample(choices, rng.randint(1, len(choices))))
+                      for field, choices in fields.items()}
+            values['src_members'] = AddressSet.from_members(values['src_members'])
+            return ('test_dg', 'SecurityPreRules', f'rule{i}', None, values)
+
+        def get_points(rule_values):
+            addresses = [address for start, end in rule_values['src_members'].intervals for address in range(start, end + 1)]
+            return set(itertools.product(rule_values['src_zones'], rule_values['application'], addresses))
+
+        for _ in range(200):
+            rules = [build_rule(i) for i in range(6)]
+            union_coverage = UnionCoverage(rules)
+            cover = union_coverage.find_cover(5, range(5))
+            prior_points = set().union(*(get_points(rule_tuple[4]) for rule_tuple in rules[:5]))
+            self.assertEqual(cover is not None, get_points(rules[5][4]) <= prior_points)
+            if cover is not None:
+                cover_points = set().union(*(get_points(rules[j][4]) for j in cover))
+                self.assertLessEqual(get_points(rules[5][4]), cover_points)
+
+    def test_work_limit(self):
+        # Each single-IP rule only matches one of the applications, so the rules have to be
+        # subtracted to find that the subnet isn't covered, and each one leaves another piece
+        rules = [('test_dg', 'SecurityPreRules', f'rule{i}', None,
+                  {'application': frozenset([f'app{i % 2}']), 'src_members': AddressSet.from_members([f'10.0.0.{i}'])})
+                 for i in range(256)]
+        rules.append(('test_dg', 'SecurityPreRules', 'subnet', None,
+                      {'application': frozenset(['app0', 'app1']), 'src_members': AddressSet.from_members(['10.0.0.0/24'])}))
+        union_coverage = UnionCoverage(rules, work_limit=100)
+        with self.assertRaises(CoverageLimitExceeded):
+            union_coverage.find_cover(256, range(256))
+        self.assertIsNone(UnionCoverage(rules).find_cover(256, range(256)))
+
+
+if __name__ == "__main__":
+    unittest.main()
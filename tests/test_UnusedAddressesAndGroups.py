@@ -81,7 +81,7 @@ class TestUnusedAddressesAndGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(shared_addresses, shared_addressgroups, shared_securityprerules, shared_natprerules, dg_addresses, dg_securityprerules)
 
         _, _, validator_function = get_policy_validators()['UnusedAddresses']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
 
         self.assertEqual(len(results), 1)
         self.assertEqual(len(results[0].data), 1)
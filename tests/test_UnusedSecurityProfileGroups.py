@@ -56,7 +56,7 @@ class TestUnusedSecurityProfileGroups(unittest.TestCase):
         profilepackage = self.create_profilepackage(pan_config)
 
         _, _, validator_function = get_policy_validators()['UnusedSecurityProfileGroups']
-        results = validator_function(profilepackage)
+        results = list(validator_function(profilepackage))
 
         self.assertEqual(len(results), 1)
         self.assertEqual(len(results[0].data), 1)
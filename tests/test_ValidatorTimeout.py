@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+import time
+import unittest
+from unittest.mock import patch
+
+from palo_alto_firewall_analyzer.core import BadEntry, ProfilePackage, ConfigurationSettings, get_policy_validator
+from palo_alto_firewall_analyzer.core import check_validator_budget, get_validator_timeout, validator_budget, ValidatorTimeout
+from palo_alto_firewall_analyzer.pan_config import PanConfig
+from palo_alto_firewall_analyzer.scripts.pan_analyzer import run_policy_validators
+from palo_alto_firewall_analyzer.validators import shadowing_rules
+
+
+class TestValidatorTimeout(unittest.TestCase):
+    @staticmethod
+    def create_profilepackage(settings, pan_config=None, device_groups=('test_dg',)):
+        profilepackage = ProfilePackage(
+            api_key='',
+            pan_config=pan_config if pan_config is not None else PanConfig('<_/>'),
+            settings=settings,
+            device_group_hierarchy_children={},
+            device_group_hierarchy_parent={},
+            device_groups_and_firewalls={},
+            device_groups=list(device_groups),
+            devicegroup_objects={},
+            devicegroup_exclusive_objects={},
+            rule_limit_enabled=False
+        )
+        return profilepackage
+
+    def test_budget(self):
+        # Without a budget, checkpoints never raise
+        check_validator_budget("anything")
+        with validator_budget(None) as budget:
+            check_validator_budget("rule 1")
+        self.assertEqual(budget.progress, "rule 1")
+
+        with self.assertRaises(ValidatorTimeout) as context:
+            with validator_budget(0.01):
+                check_validator_budget("rule 1")
+                time.sleep(0.02)
+                check_validator_budget("rule 2")
+        self.assertEqual(context.exception.progress, "rule 2")
+
+    def test_timeout_settings(self):
+        settings = ConfigurationSettings().get_config()
+        self.assertIsNone(get_validator_timeout(settings, 'ShadowingRules'))
+        settings['Validator timeout'] = '60'
+        self.assertEqual(get_validator_timeout(settings, 'ShadowingRules'), 60)
+        self.assertEqual(get_validator_timeout(settings, 'ShadowingRules', 30), 30)
+        settings['ShadowingRules timeout'] = '120'
+        self.assertEqual(get_validator_timeout(settings, 'ShadowingRules', 30), 120)
+        self.assertEqual(get_validator_timeout(settings, 'BadLogSetting', 30), 30)
+
+    def test_partial_results(self):
+        def slow_validator(profilepackage):
+            for rule_name in ['rule 1', 'rule 2', 'rule 3']:
+                check_validator_budget(rule_name)
+                yield BadEntry(data=None, text=rule_name, device_group='test_dg', entry_type=None)
+                time.sleep(0.02)
+
+        def fast_validator(profilepackage):
+            return [BadEntry(data=None, text='fast', device_group='test_dg', entry_type=None)]
+
+        settings = ConfigurationSettings().get_config()
+        settings['SlowValidator timeout'] = '0.01'
+        validators = {'SlowValidator': ('SlowValidator', 'Slow', slow_validator),
+                      'FastValidator': ('FastValidator', 'Fast', fast_validator)}
+        problems, total_problems, timed_out = run_policy_validators(validators, self.create_profilepackage(settings), None)
+
+        self.assertEqual(timed_out, {'SlowValidator': 'rule 2'})
+        self.assertEqual(total_problems, 2)
+        self.assertEqual([entry.text for entry in problems[('SlowValidator', 'Slow')]], ['rule 1'])
+        self.assertEqual(len(problems[('FastValidator', 'Fast')]), 1)
+
+    def test_real_validator_keeps_partial_results(self):
+        rules = """
+            <pre-rulebase><security><rules>
+              <entry name="Allow all">
+                <from><member>any</member></from><to><member>any</member></to>
+                <source><member>any</member></source><destination><member>any</member></destination>
+                <application><member>any</member></application><service><member>any</member></service>
+              </entry>
+              <entry name="Allow web">
+                <from><member>any</member></from><to><member>any</member></to>
+                <source><member>any</member></source><destination><member>any</member></destination>
+                <application><member>web-browsing</member></application><service><member>any</member></service>
+              </entry>
+            </rules></security></pre-rulebase>"""
+        pan_config = PanConfig(f"""\
+        <response status="success"><result><config>
+          <devices><entry><device-group>
+            <entry name="first_dg">{rules}</entry>
+            <entry name="second_dg">{rules}</entry>
+          </device-group></entry></devices>
+          <readonly><devices><entry name="localhost.localdomain"><device-group>
+            <entry name="first_dg"></entry>
+            <entry name="second_dg"></entry>
+          </device-group></entry></devices></readonly>
+        </config></result></response>
+        """)
+        settings = ConfigurationSettings().get_config()
+        settings['ShadowingRules timeout'] = '0.05'
+        validators = {'ShadowingRules': get_policy_validator('ShadowingRules')}
+
+        # Checking first_dg uses up the time budget, so ShadowingRules times out when it starts on second_dg
+        def slow_find_shadowing(device_group, transformed_rules):
+            shadowing = find_shadowing(device_group, transformed_rules)
+            time.sleep(0.1)
+            return shadowing
+
+        find_shadowing = shadowing_rules.find_shadowing
+        with patch.object(shadowing_rules, 'find_shadowing', side_effect=slow_find_shadowing):
+            problems, total_problems, timed_out = run_policy_validators(
+                validators, self.create_profilepackage(settings, pan_config, ('first_dg', 'second_dg')), None)
+
+        self.assertEqual(timed_out, {'ShadowingRules': 'Device Group second_dg'})
+        self.assertEqual(total_problems, 1)
+        validator_problems = problems[('ShadowingRules', validators['ShadowingRules'][1])]
+        self.assertEqual([entry.device_group for entry in validator_problems], ['first_dg'])
+
+
+if __name__ == "__main__":
+    unittest.main()